@@ -0,0 +1,12 @@
+"""
+Performance benchmarks of the backtester.
+
+Run from the repository root:
+
+    python -m benchmarks run --tickers 10,100 --years 1,10 -o baseline.json
+    python -m benchmarks run --full -o current.json
+    python -m benchmarks compare baseline.json current.json --threshold 0.15
+
+``compare`` exits with status 1 when a case got slower than the threshold
+allows, so it can guard CI jobs.
+"""
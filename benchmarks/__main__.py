@@ -0,0 +1,77 @@
+"""
+Command line entry point: ``python -m benchmarks {run,compare} ...``.
+"""
+
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+from benchmarks.compare import DEFAULT_MIN_SECONDS, DEFAULT_THRESHOLD, compare_results, format_comparison
+
+
+def _int_list(text: str):
+    return [int(part) for part in text.split(',') if part.strip()]
+
+
+def _run(args) -> int:
+    from benchmarks.suite import (QUICK_TICKER_COUNTS, QUICK_YEAR_COUNTS, TICKER_COUNTS, YEAR_COUNTS,
+                                  run_suite)
+
+    ticker_counts = args.tickers or (TICKER_COUNTS if args.full else QUICK_TICKER_COUNTS)
+    year_counts = args.years or (YEAR_COUNTS if args.full else QUICK_YEAR_COUNTS)
+    document = run_suite(ticker_counts, year_counts, repeats=args.repeats, dataset_root=args.data_dir)
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(document, indent=2, sort_keys=True))
+    print(f"Wrote {len(document['results'])} benchmark results to {output}")
+    return 0
+
+
+def _compare(args) -> int:
+    baseline = json.loads(Path(args.baseline).read_text())
+    current = json.loads(Path(args.current).read_text())
+    rows = compare_results(baseline, current, threshold=args.threshold, min_seconds=args.min_seconds, stat=args.stat)
+    print(format_comparison(rows))
+    regressions = [r for r in rows if r.status == 'regression']
+    if regressions:
+        print(f"\n{len(regressions)} case(s) slower than {args.threshold:.0%} over the baseline.")
+        return 1
+    print("\nNo regressions.")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Backtester performance benchmarks")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Log progress of every case")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run = sub.add_parser('run', help="Run the benchmark suite and write a results JSON")
+    run.add_argument('-o', '--output', default='benchmark-results.json', help="Results file")
+    run.add_argument('--tickers', type=_int_list, help="Comma-separated ticker counts (default 10,100)")
+    run.add_argument('--years', type=_int_list, help="Comma-separated history lengths in years (default 1,10)")
+    run.add_argument('--full', action='store_true', help="Full matrix: 10/100/1000 tickers x 1/10/30 years")
+    run.add_argument('--repeats', type=int, default=3, help="Timed repetitions per case")
+    run.add_argument('--data-dir', help="Directory of the cached synthetic datasets")
+    run.set_defaults(handler=_run)
+
+    compare = sub.add_parser('compare', help="Compare results against a baseline")
+    compare.add_argument('baseline')
+    compare.add_argument('current')
+    compare.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help="Relative slowdown flagged as regression")
+    compare.add_argument('--min-seconds', type=float, default=DEFAULT_MIN_SECONDS, help="Ignore cases faster than this")
+    compare.add_argument('--stat', choices=('median', 'min'), default='median')
+    compare.set_defaults(handler=_compare)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format="%(asctime)s [%(levelname)s] %(name)s - %(message)s")
+    if not args.verbose:
+        # Backtest modules log every run step (and end-of-run position closes as warnings)
+        logging.getLogger('src').setLevel(logging.ERROR)
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""
+Comparison of two benchmark result documents (see ``benchmarks.suite.run_suite``).
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+DEFAULT_THRESHOLD = 0.15      # Relative slowdown that counts as a regression
+DEFAULT_MIN_SECONDS = 0.001   # Cases faster than this in both runs are timer noise
+
+
+@dataclass
+class CaseComparison:
+    """Timing of one case in the baseline and the current run."""
+    name: str
+    baseline: Optional[float]
+    current: Optional[float]
+    status: str                # 'regression', 'improvement', 'ok', 'new' or 'missing'
+
+    @property
+    def ratio(self) -> Optional[float]:
+        if not self.baseline or self.current is None:
+            return None
+        return self.current / self.baseline
+
+
+def compare_results(baseline: Dict[str, Any],
+                    current: Dict[str, Any],
+                    threshold: float = DEFAULT_THRESHOLD,
+                    min_seconds: float = DEFAULT_MIN_SECONDS,
+                    stat: str = 'median') -> List[CaseComparison]:
+    """
+    Compares the cases of two result documents.
+
+    Args:
+        baseline (Dict[str, Any]): Stored baseline results.
+        current (Dict[str, Any]): Results of the run under test.
+        threshold (float): A case is a regression if it is slower than ``baseline * (1 + threshold)``
+                           and an improvement if faster than ``baseline / (1 + threshold)``.
+        min_seconds (float): Cases below this time in both runs are never flagged.
+        stat (str): 'median' or 'min'.
+
+    Returns:
+        List[CaseComparison]: One entry per case of either document, sorted by name.
+    """
+    base_results = baseline.get('results', {})
+    cur_results = current.get('results', {})
+    rows = []
+    for name in sorted(set(base_results) | set(cur_results)):
+        base = base_results.get(name, {}).get(stat)
+        cur = cur_results.get(name, {}).get(stat)
+        if base is None:
+            status = 'new'
+        elif cur is None:
+            status = 'missing'
+        elif max(base, cur) < min_seconds:
+            status = 'ok'
+        elif cur > base * (1 + threshold):
+            status = 'regression'
+        elif cur < base / (1 + threshold):
+            status = 'improvement'
+        else:
+            status = 'ok'
+        rows.append(CaseComparison(name, base, cur, status))
+    return rows
+
+
+def format_comparison(rows: List[CaseComparison]) -> str:
+    """Formats comparisons as a fixed-width table, regressions first."""
+    order = {'regression': 0, 'improvement': 1, 'new': 2, 'missing': 3, 'ok': 4}
+    width = max([len(r.name) for r in rows] + [4])
+    lines = [f"{'case':<{width}}  {'baseline':>10}  {'current':>10}  {'ratio':>7}  status"]
+    for r in sorted(rows, key=lambda r: (order[r.status], r.name)):
+        base = f"{r.baseline:.4f}s" if r.baseline is not None else "-"
+        cur = f"{r.current:.4f}s" if r.current is not None else "-"
+        ratio = f"{r.ratio:.2f}x" if r.ratio is not None else "-"
+        lines.append(f"{r.name:<{width}}  {base:>10}  {cur:>10}  {ratio:>7}  {r.status}")
+    return "\n".join(lines)
@@ -0,0 +1,58 @@
+"""
+Synthetic price datasets for the benchmarks.
+
+Datasets come from the batched generator in ``src.core.synthetic_data`` (the
+one behind ``DataService.generate_synthetic_data``) with its default data
+defects: gaps, missing days, late listings and splits. They are written as
+``historical_prices.csv`` and cached by size under the dataset root, so
+repeated benchmark runs measure the same data and skip the generation.
+"""
+
+import logging
+import shutil
+import tempfile
+from pathlib import Path
+from typing import List, Optional, Union
+
+from src.core.config import config
+from src.core.synthetic_data import SyntheticMarketConfig, generate_synthetic_market, write_price_data
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATASET_ROOT = Path(tempfile.gettempdir()) / "backtester-benchmarks"
+PRICE_FILE_NAME = "historical_prices.csv"
+
+
+def dataset_tickers(n_tickers: int) -> List[str]:
+    """Ticker names of a dataset; the configured benchmark ticker is always included (market filter, benchmark curve)."""
+    return [config.BENCHMARK_TICKER] + [f"T{i:04d}" for i in range(1, n_tickers)]
+
+
+def build_price_csv(n_tickers: int,
+                    years: int,
+                    root: Optional[Union[str, Path]] = None,
+                    rebuild: bool = False) -> Path:
+    """
+    Returns the path of a synthetic price CSV with ``n_tickers`` tickers and ``years`` years of business days.
+
+    Args:
+        n_tickers (int): Number of tickers (including the benchmark ticker).
+        years (int): History length in years.
+        root (Optional[Union[str, Path]]): Dataset cache directory. Defaults to a directory in the temp dir.
+        rebuild (bool): Regenerate even if the dataset exists.
+
+    Returns:
+        Path: The CSV file.
+    """
+    directory = Path(root or DEFAULT_DATASET_ROOT) / f"{n_tickers}x{years}y"
+    csv_path = directory / PRICE_FILE_NAME
+    if csv_path.exists() and not rebuild:
+        return csv_path
+    if directory.exists():
+        shutil.rmtree(directory)
+    directory.mkdir(parents=True)
+
+    logger.info(f"Generating synthetic dataset: {n_tickers} tickers x {years} years...")
+    market = generate_synthetic_market(SyntheticMarketConfig(tickers=dataset_tickers(n_tickers), years=years))
+    write_price_data(market.prices, csv_path)
+    return csv_path
@@ -0,0 +1,249 @@
+"""
+Benchmark cases and the runner that produces a results JSON.
+
+Every case runs ``repeats`` times on one synthetic dataset and records the
+minimum and median wall time. Case names carry the dataset size, e.g.
+``signals.MAC[100x10y]``, so results of different matrices can be compared
+case by case.
+
+Cases per dataset:
+    data_load.*   DataLoader from CSV, building the price store and from the store
+    signals.*     ``generate_signals`` for every ticker, per strategy (indicator cache cleared)
+    backtest.*    ``BacktestManager.run_backtest`` and its day loop (the profiler's simulation phase)
+    metrics.*     functions of ``src/analysis/metrics.py`` on the backtest's equity curve
+                  (``metrics.performance_stats`` is the whole bundle of the single-pass kernel)
+    charts.*      ``BacktestVisualizer`` figure builds
+"""
+
+import logging
+import platform
+import shutil
+import statistics
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.datasets import build_price_csv, dataset_tickers
+from src.analysis import metrics
+from src.core.backtest_manager import BacktestManager
+from src.core.config import config
+from src.core.constants import DEFAULT_STRATEGY_PARAMS, STRATEGY_CLASS_MAP
+from src.core.data import DataLoader
+from src.core.indicator_cache import indicator_cache
+from src.core.price_store import PriceStore
+from src.core.profiling import RunProfiler
+from src.visualization.downsampling import max_points_for_width
+from src.visualization.visualizer import BacktestVisualizer
+
+logger = logging.getLogger(__name__)
+
+TICKER_COUNTS = (10, 100, 1000)
+YEAR_COUNTS = (1, 10, 30)
+QUICK_TICKER_COUNTS = (10, 100)
+QUICK_YEAR_COUNTS = (1, 10)
+BACKTEST_STRATEGY = "MAC"   # Strategy of the backtest/metrics/charts cases (falls back to the first available)
+RESULTS_FORMAT_VERSION = 1
+
+
+def time_call(fn: Callable[[], Any], repeats: int, setup: Optional[Callable[[], Any]] = None) -> List[float]:
+    """Runs ``fn`` ``repeats`` times (``setup`` before each, untimed) and returns the wall times in seconds."""
+    times = []
+    for _ in range(max(1, repeats)):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+class _Recorder:
+    """Collects timings of one suite run under sized case names."""
+
+    def __init__(self, n_tickers: int, years: int):
+        self.n_tickers = n_tickers
+        self.years = years
+        self.results: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, case: str, times: List[float]) -> None:
+        name = f"{case}[{self.n_tickers}x{self.years}y]"
+        self.results[name] = {
+            'min': min(times),
+            'median': statistics.median(times),
+            'repeats': len(times),
+            'tickers': self.n_tickers,
+            'years': self.years,
+        }
+        logger.info(f"{name}: median {self.results[name]['median']:.4f}s")
+
+    def run(self, case: str, fn: Callable[[], Any], repeats: int, setup: Optional[Callable[[], Any]] = None) -> None:
+        try:
+            self.add(case, time_call(fn, repeats, setup))
+        except Exception as e:
+            logger.error(f"Benchmark case {case} failed: {e}", exc_info=True)
+
+
+def _backtest_strategy() -> Optional[str]:
+    if BACKTEST_STRATEGY in STRATEGY_CLASS_MAP:
+        return BACKTEST_STRATEGY
+    return next(iter(STRATEGY_CLASS_MAP), None)
+
+
+def _bench_data_loading(rec: _Recorder, csv_path, tickers: List[str], repeats: int) -> None:
+    rec.run("data_load.csv", lambda: DataLoader(csv_path, use_price_store=False).load_tickers(tickers), repeats)
+    store_root = PriceStore.default_root(csv_path)
+    rec.run("data_load.store_build", lambda: DataLoader(csv_path, use_price_store=True).load_tickers(tickers), repeats,
+            setup=lambda: shutil.rmtree(store_root, ignore_errors=True))
+    rec.run("data_load.store", lambda: DataLoader(csv_path, use_price_store=True).load_tickers(tickers), repeats)
+
+
+def _bench_signals(rec: _Recorder, ticker_data: Dict[str, pd.DataFrame], repeats: int) -> None:
+    tickers = list(ticker_data)
+    for key, strategy_class in STRATEGY_CLASS_MAP.items():
+        strategy = strategy_class(tickers=tickers, **DEFAULT_STRATEGY_PARAMS.get(key, {}))
+
+        def generate():
+            for ticker, df in ticker_data.items():
+                strategy.generate_signals(ticker, df)
+
+        rec.run(f"signals.{key}", generate, repeats, setup=indicator_cache.clear)
+
+
+def _bench_backtest(rec: _Recorder, loader: DataLoader, tickers: List[str], start, end, repeats: int):
+    """Times full runs and their day loop; returns the last run's (signals, results, stats)."""
+    strategy = _backtest_strategy()
+    if strategy is None:
+        logger.warning("No strategy available (pandas_ta missing?); skipping signal and backtest cases.")
+        return None
+    manager = BacktestManager(initial_capital=config.INITIAL_CAPITAL, data_loader=loader)
+    totals, loops, output = [], [], None
+    for _ in range(max(1, repeats)):
+        indicator_cache.clear()
+        profiler = RunProfiler()
+        start_time = time.perf_counter()
+        output = manager.run_backtest(strategy, tickers, strategy_params=DEFAULT_STRATEGY_PARAMS.get(strategy, {}),
+                                      risk_params={'use_market_filter': True},
+                                      start_date=str(start.date()), end_date=str(end.date()), profiler=profiler)
+        totals.append(time.perf_counter() - start_time)
+        loops.append(profiler.phases['simulation'].seconds if 'simulation' in profiler.phases else np.nan)
+    if output is None or output[1] is None:
+        logger.error(f"Backtest benchmark produced no results: {output[2] if output else None}")
+        return None
+    rec.add(f"backtest.run_{strategy}", totals)
+    rec.add("backtest.day_loop", loops)
+    return output
+
+
+def _bench_metrics(rec: _Recorder, equity: pd.Series, benchmark: Optional[pd.Series],
+                   trades: List[Dict[str, Any]], repeats: int) -> None:
+    returns = metrics.calculate_return_series(equity)
+    cases = {
+        'total_return': lambda: metrics.calculate_total_return(equity),
+        'cagr': lambda: metrics.calculate_cagr(equity),
+        'return_series': lambda: metrics.calculate_return_series(equity),
+        'annualized_volatility': lambda: metrics.calculate_annualized_volatility(returns),
+        'sharpe_ratio': lambda: metrics.calculate_sharpe_ratio(equity, config.RISK_FREE_RATE),
+        'sortino_ratio': lambda: metrics.calculate_sortino_ratio(equity, config.RISK_FREE_RATE),
+        'calmar_ratio': lambda: metrics.calculate_calmar_ratio(equity),
+        'drawdown_series': lambda: metrics.calculate_drawdown_series(equity),
+        'max_drawdown': lambda: metrics.calculate_max_drawdown(equity),
+        'trade_statistics': lambda: metrics.calculate_trade_statistics(trades),
+        'performance_stats': lambda: metrics.compute_performance_stats(equity, benchmark, config.RISK_FREE_RATE),
+    }
+    if benchmark is not None and len(benchmark) > 1:
+        cases.update({
+            'beta': lambda: metrics.calculate_beta(equity, benchmark),
+            'alpha': lambda: metrics.calculate_alpha(equity, benchmark, config.RISK_FREE_RATE),
+            'information_ratio': lambda: metrics.calculate_information_ratio(equity, benchmark),
+        })
+    for name, fn in cases.items():
+        rec.run(f"metrics.{name}", fn, repeats)
+
+
+def _bench_charts(rec: _Recorder, equity: pd.Series, benchmark: Optional[pd.Series],
+                  signals: Optional[Dict[str, pd.DataFrame]], trades: List[Dict[str, Any]], repeats: int) -> None:
+    visualizer = BacktestVisualizer()
+    capital = float(equity.iloc[0])
+    rec.run("charts.equity_full", lambda: visualizer.create_equity_curve_figure(
+        equity, benchmark, chart_type='value', initial_capital=capital), repeats)
+    rec.run("charts.equity_downsampled", lambda: visualizer.create_equity_curve_figure(
+        equity, benchmark, chart_type='value', initial_capital=capital, max_points=max_points_for_width(None)), repeats)
+    rec.run("charts.drawdown_downsampled", lambda: visualizer.create_equity_curve_figure(
+        equity, benchmark, chart_type='drawdown', initial_capital=capital, max_points=max_points_for_width(None)), repeats)
+    rec.run("charts.monthly_heatmap", lambda: visualizer.create_monthly_returns_heatmap(equity), repeats)
+    if signals:
+        ticker, signals_df = next(iter(signals.items()))
+        ticker_trades = [t for t in trades if t.get('ticker') == ticker]
+        rec.run("charts.signals", lambda: visualizer.create_signals_chart(
+            ticker, signals_df, ticker_trades, max_points=max_points_for_width(None)), repeats)
+
+
+def run_dataset(n_tickers: int, years: int, repeats: int = 3, dataset_root=None) -> Dict[str, Dict[str, Any]]:
+    """
+    Runs every case on one synthetic dataset.
+
+    Args:
+        n_tickers (int): Number of tickers in the dataset.
+        years (int): Years of history in the dataset.
+        repeats (int): Timed repetitions per case.
+        dataset_root: Dataset cache directory (see ``build_price_csv``).
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Timings by sized case name.
+    """
+    rec = _Recorder(n_tickers, years)
+    csv_path = build_price_csv(n_tickers, years, root=dataset_root)
+    tickers = dataset_tickers(n_tickers)
+
+    _bench_data_loading(rec, csv_path, tickers, repeats)
+    loader = DataLoader(csv_path, use_price_store=True)
+    ticker_data = loader.load_tickers(tickers)
+    _bench_signals(rec, ticker_data, repeats)
+
+    start, end = loader.get_date_range()
+    output = _bench_backtest(rec, loader, tickers, start, end, repeats)
+    benchmark = ticker_data[config.BENCHMARK_TICKER]['Close']
+    if output is not None:
+        signals, results, _ = output
+        equity, trades = results['Portfolio_Value'], results.get('trades', [])
+        benchmark = results.get('Benchmark') if results.get('Benchmark') is not None else benchmark
+    else:
+        # Without strategies the benchmark's own curve stands in for an equity curve
+        signals, equity, trades = None, benchmark / benchmark.iloc[0] * config.INITIAL_CAPITAL, []
+
+    _bench_metrics(rec, equity, benchmark, trades, repeats)
+    _bench_charts(rec, equity, benchmark, signals, trades, repeats)
+    return rec.results
+
+
+def run_suite(ticker_counts: Iterable[int] = QUICK_TICKER_COUNTS,
+              year_counts: Iterable[int] = QUICK_YEAR_COUNTS,
+              repeats: int = 3,
+              dataset_root=None) -> Dict[str, Any]:
+    """
+    Runs the benchmark matrix and returns the results document.
+
+    Returns:
+        Dict[str, Any]: {'meta': environment description, 'results': timings by case name}.
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    for n_tickers in ticker_counts:
+        for years in year_counts:
+            results.update(run_dataset(n_tickers, years, repeats=repeats, dataset_root=dataset_root))
+    return {
+        'meta': {
+            'format': RESULTS_FORMAT_VERSION,
+            'created': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'strategies': sorted(STRATEGY_CLASS_MAP),
+            'repeats': repeats,
+        },
+        'results': results,
+    }
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+"""Generate a synthetic price file for load testing.
+
+Writes a long-format CSV in the layout of ``data/historical_prices.csv`` plus
+its columnar price store, so the app can be pointed at it without network
+access:
+
+    python scripts/generate_synthetic_data.py --tickers 2000 --years 30 -o data/synthetic/historical_prices.csv
+    BACKTESTER_DATA_PATH=data/synthetic/historical_prices.csv python app.py
+"""
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+# Add project root to Python path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.core.config import config
+from src.core.synthetic_data import SyntheticMarketConfig, generate_synthetic_market, write_price_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic OHLCV data for load testing")
+    parser.add_argument("-o", "--output", default="data/synthetic/historical_prices.csv", help="Target CSV path")
+    parser.add_argument("--tickers", type=int, default=500, help="Number of tickers")
+    parser.add_argument("--years", type=float, default=20, help="Years of daily history")
+    parser.add_argument("--start-date", default="2000-01-03", help="First market date (YYYY-MM-DD)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--clean", action="store_true",
+                        help="No jumps, missing days, late listings or splits")
+    parser.add_argument("--no-store", action="store_true", help="Write only the CSV, not the price store")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    # The configured benchmark ticker is included so benchmark curves and the market filter work
+    tickers = [config.BENCHMARK_TICKER] + [f"SYN{i:05d}" for i in range(1, args.tickers)]
+    cfg = SyntheticMarketConfig(tickers=tickers, years=args.years, start_date=args.start_date, seed=args.seed)
+    if args.clean:
+        cfg.jump_probability = cfg.missing_day_probability = cfg.late_listing_fraction = cfg.splits_per_year = 0.0
+
+    started = time.perf_counter()
+    market = generate_synthetic_market(cfg)
+    generated = time.perf_counter()
+    write_price_data(market.prices, args.output, build_store=not args.no_store)
+    print(f"{len(market.prices):,} rows for {len(tickers)} tickers written to {args.output} "
+          f"(generated in {generated - started:.1f}s, written in {time.perf_counter() - generated:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
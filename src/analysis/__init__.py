@@ -22,7 +22,9 @@ try:
         calculate_beta,
         calculate_information_ratio,
         calculate_recovery_factor,
-        calculate_trade_statistics
+        calculate_trade_statistics,
+        compute_performance_stats,
+        compute_performance_stats_batch
     )
     logger.debug("Successfully imported key metric functions.")
 except ImportError as e:
@@ -38,5 +40,7 @@ except ImportError as e:
     def calculate_information_ratio(*args, **kwargs): return None
     def calculate_recovery_factor(*args, **kwargs): return None
     def calculate_trade_statistics(*args, **kwargs): return None
+    def compute_performance_stats(*args, **kwargs): return {}
+    def compute_performance_stats_batch(*args, **kwargs): return None
 
 logger.info("Analysis package initialized.")
\ No newline at end of file
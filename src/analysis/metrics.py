@@ -1,6 +1,7 @@
 import numpy as np
 import pandas as pd
-from typing import Dict, Any, Callable, List, Union, Optional, Tuple
+from functools import cached_property
+from typing import Dict, Any, Callable, Union, Optional, Sequence, Tuple
 import logging
 
 # Użyj loggera zdefiniowanego w app.py lub globalnie
@@ -14,6 +15,13 @@ except ImportError:
     logger.warning("Could not import config for metrics. Using default TRADING_DAYS_PER_YEAR=252.")
     TRADING_DAYS_PER_YEAR = 252
 
+# Keys of the bundle returned by compute_performance_stats (fractions, not percentages)
+PERFORMANCE_STAT_KEYS = (
+    'total_return', 'cagr', 'annualized_volatility', 'sharpe_ratio', 'sortino_ratio',
+    'max_drawdown', 'max_drawdown_abs', 'calmar_ratio', 'recovery_factor',
+    'alpha', 'beta', 'information_ratio',
+)
+
 
 # --- Helper Functions ---
 
@@ -67,13 +75,526 @@ def _handle_input_series(series: Optional[pd.Series], min_length: int = 2) -> Op
         return None
 
 
+def _clean_values(series: Optional[pd.Series], min_length: int = 2) -> Optional[np.ndarray]:
+    """NumPy counterpart of _handle_input_series: float64 values, forward- then back-filled, or None."""
+    if series is None or not isinstance(series, pd.Series) or series.empty or len(series) < min_length:
+        return None
+    try:
+        if series.dtype.kind in 'fiu':
+            values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        else:
+            values = pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    except Exception as e:
+        logger.error(f"Error cleaning input series: {e}")
+        return None
+
+    missing = np.isnan(values)
+    if missing.any():
+        if missing.all():
+            return None
+        # Forward fill: every position takes the value of the last valid position at or before it
+        positions = np.where(missing, 0, np.arange(len(values)))
+        np.maximum.accumulate(positions, out=positions)
+        values = values[positions]
+        # Back fill the leading gap with the first valid value
+        first_valid = int(np.argmax(~missing))
+        values[:first_valid] = values[first_valid]
+    return values
+
+
+def _cagr(values: np.ndarray, index: pd.Index) -> Optional[float]:
+    """CAGR of cleaned values over a DatetimeIndex."""
+    start_value = values[0]
+    end_value = values[-1]
+
+    if start_value <= 0:
+        logger.warning("CAGR calculation failed: Start value is non-positive.")
+        return None # Cannot calculate CAGR if start value is zero or negative
+
+    if not isinstance(index, pd.DatetimeIndex):
+         logger.warning("CAGR calculation failed: Series index is not DatetimeIndex.")
+         return None
+
+    time_span_years = (index[-1] - index[0]).days / 365.25
+
+    if time_span_years <= 0:
+        logger.warning(f"CAGR calculation failed: Time span is non-positive ({time_span_years:.2f} years).")
+        return None # Return None for non-positive time span
+
+    value_factor = end_value / start_value
+    if value_factor < 0:
+         # CAGR is undefined for negative terminal value relative to start; the raw calculation is returned
+         logger.warning("CAGR calculation might be misleading: Negative value factor.")
+         return (np.sign(value_factor) * (abs(value_factor)**(1/time_span_years))) - 1
+    return (value_factor**(1 / time_span_years)) - 1
+
+
+def _annualized_volatility(returns: np.ndarray, periods_per_year: float) -> Optional[float]:
+    """Annualized standard deviation (ddof=1) of the non-NaN returns."""
+    returns = returns[~np.isnan(returns)]
+    if len(returns) < 2: return None # Need at least 2 returns for std dev
+    if periods_per_year <= 0:
+        logger.warning("Could not determine valid periods per year for volatility annualization.")
+        return None
+    return np.std(returns, ddof=1) * np.sqrt(periods_per_year)
+
+
+def _sortino_ratio(cagr: float, returns: np.ndarray, periods_per_year: float, risk_free_rate: float) -> Optional[float]:
+    """Sortino ratio from CAGR and periodic returns; downside deviation is taken against the periodic risk-free rate."""
+    returns = returns[~np.isnan(returns)]
+    if len(returns) < 2 or periods_per_year <= 0: return None
+
+    # Adjust risk-free rate to the period frequency
+    periodic_rf_rate = (1 + risk_free_rate)**(1 / periods_per_year) - 1
+    downside = returns[returns < periodic_rf_rate] - periodic_rf_rate
+    if downside.size == 0:
+        # No returns below the target rate, Sortino is theoretically infinite if CAGR > RF
+        return np.inf if cagr > risk_free_rate else 0.0
+
+    annualized_downside_deviation = np.sqrt(np.dot(downside, downside) / len(returns)) * np.sqrt(periods_per_year)
+    if annualized_downside_deviation == 0:
+        return np.inf if cagr > risk_free_rate else 0.0
+    return (cagr - risk_free_rate) / annualized_downside_deviation
+
+
+def _beta(portfolio_returns: np.ndarray, benchmark_returns: np.ndarray) -> Optional[float]:
+    """Beta of aligned return arrays."""
+    matrix = np.cov(portfolio_returns, benchmark_returns)
+    covariance = matrix[0, 1]
+    benchmark_variance = matrix[1, 1]
+    if benchmark_variance == 0:
+        logger.warning("Benchmark variance is zero, cannot calculate Beta.")
+        return None
+    return covariance / benchmark_variance
+
+
+def _information_ratio(active_returns: np.ndarray, periods_per_year: float) -> Optional[float]:
+    """Information ratio of an active (portfolio minus benchmark) return array."""
+    if len(active_returns) < 2 or periods_per_year <= 0: return None
+    annualized_active_return = np.nanmean(active_returns) * periods_per_year
+    tracking_error = np.nanstd(active_returns, ddof=1) * np.sqrt(periods_per_year)
+    if tracking_error == 0:
+        logger.warning("Tracking error is zero, Information Ratio is undefined or infinite.")
+        # Return Inf if positive active return, -Inf if negative, 0 if zero
+        return np.inf if annualized_active_return > 0 else (-np.inf if annualized_active_return < 0 else 0.0)
+    return annualized_active_return / tracking_error
+
+
+# --- Metrics Kernel ---
+
+class EquityCurve:
+    """
+    An equity (or price) series validated and cleaned once, as a float64 array.
+
+    Everything the metrics derive from the series (returns, running peak,
+    drawdowns, periods per year, CAGR) is computed lazily on first use and
+    shared, so computing the whole stats bundle costs one cleaning pass and
+    one ``pd.infer_freq`` instead of one per metric. The ``calculate_*``
+    functions below are thin wrappers around it.
+    """
+
+    def __init__(self, values: np.ndarray, index: pd.Index, name: Any = None):
+        self.values = values
+        self.index = index
+        self.name = name
+
+    @classmethod
+    def from_series(cls, series: Optional[pd.Series], min_length: int = 2) -> Optional['EquityCurve']:
+        """Returns the cleaned curve, or None if the series is missing, too short or has no numeric values."""
+        values = _clean_values(series, min_length=min_length)
+        if values is None: return None
+        return cls(values, series.index, series.name)
+
+    # --- Derived arrays ---
+
+    @cached_property
+    def returns(self) -> np.ndarray:
+        """Simple returns (len - 1 values, aligned with ``index[1:]``)."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.values[1:] / self.values[:-1] - 1
+
+    @cached_property
+    def periods_per_year(self) -> float:
+        return _get_trading_periods_per_year(self.index[1:])
+
+    @cached_property
+    def running_max(self) -> np.ndarray:
+        return np.maximum.accumulate(self.values)
+
+    @cached_property
+    def drawdowns(self) -> np.ndarray:
+        """Percentage drawdown from the running peak; 0 where the peak is 0."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            drawdowns = (self.values - self.running_max) / self.running_max
+        drawdowns[self.running_max == 0] = 0.0
+        return drawdowns
+
+    def return_series(self) -> pd.Series:
+        """Returns as a Series on the full index (NaN first, like ``pct_change``)."""
+        return pd.Series(np.concatenate(([np.nan], self.returns)), index=self.index, name=self.name)
+
+    # --- Metrics ---
+
+    @property
+    def has_datetime_index(self) -> bool:
+        return isinstance(self.index, pd.DatetimeIndex)
+
+    @cached_property
+    def total_return(self) -> Optional[float]:
+        if self.values[0] == 0: return None # Avoid division by zero
+        return self.values[-1] / self.values[0] - 1
+
+    @cached_property
+    def cagr(self) -> Optional[float]:
+        return _cagr(self.values, self.index)
+
+    @cached_property
+    def annualized_volatility(self) -> Optional[float]:
+        if not self.has_datetime_index:
+            logger.warning("Cannot annualize volatility: Return series index is not DatetimeIndex.")
+            return None
+        return _annualized_volatility(self.returns, self.periods_per_year)
+
+    @cached_property
+    def max_drawdown(self) -> float:
+        """Most negative percentage drawdown (0 if the curve never falls below its peak)."""
+        return self.drawdowns.min()
+
+    @cached_property
+    def max_drawdown_abs(self) -> float:
+        """Largest fall from the running peak in value units."""
+        return (self.running_max - self.values).max()
+
+    def sharpe_ratio(self, risk_free_rate: float = 0.0) -> Optional[float]:
+        if self.cagr is None: return None
+        volatility = self.annualized_volatility
+        if volatility is None or volatility == 0:
+            # Handle zero volatility case (e.g., flat returns)
+            return 0.0 if self.cagr == risk_free_rate else (np.inf if self.cagr > risk_free_rate else -np.inf)
+        return (self.cagr - risk_free_rate) / volatility
+
+    def sortino_ratio(self, risk_free_rate: float = 0.0) -> Optional[float]:
+        if self.cagr is None: return None
+        if not self.has_datetime_index:
+            logger.warning("Cannot calculate Sortino Ratio: Return series index is not DatetimeIndex.")
+            return None
+        return _sortino_ratio(self.cagr, self.returns, self.periods_per_year, risk_free_rate)
+
+    def calmar_ratio(self) -> Optional[float]:
+        if self.cagr is None:
+            logger.warning("Cannot calculate Calmar Ratio: CAGR calculation failed.")
+            return None
+        if self.max_drawdown == 0:
+            # Handle zero drawdown: Infinite if CAGR > 0, 0 if CAGR <= 0
+            logger.warning("Max Drawdown is zero, Calmar Ratio is undefined or infinite.")
+            return np.inf if self.cagr > 0 else 0.0
+        return self.cagr / abs(self.max_drawdown)
+
+    def recovery_factor(self, initial_value: Optional[float] = None) -> float:
+        """Absolute profit over the largest drawdown in value units (both measured from ``initial_value``, default the first value)."""
+        start = self.values[0] if initial_value is None else initial_value
+        profit = abs(self.values[-1] - start)
+        if self.max_drawdown_abs > 0:
+            return profit / self.max_drawdown_abs
+        return np.inf if profit > 0 else 0.0
+
+    # --- Benchmark relative ---
+
+    def aligned_returns(self, benchmark: 'EquityCurve') -> Optional[Tuple[np.ndarray, np.ndarray, pd.Index]]:
+        """Returns of both curves on their common return dates, or None if fewer than two are shared."""
+        own_index, other_index = self.index[1:], benchmark.index[1:]
+        if own_index.equals(other_index):
+            common_index, own, other = own_index, self.returns, benchmark.returns
+        else:
+            common_index = own_index.intersection(other_index)
+            if len(common_index) < 2:
+                logger.warning("Could not align series or insufficient common data points.")
+                return None
+            own = pd.Series(self.returns, index=own_index).loc[common_index].to_numpy()
+            other = pd.Series(benchmark.returns, index=other_index).loc[common_index].to_numpy()
+        if len(own) < 2:
+            logger.warning("Could not align series or insufficient common data points.")
+            return None
+        return own, other, common_index
+
+    def beta(self, benchmark: 'EquityCurve') -> Optional[float]:
+        aligned = self.aligned_returns(benchmark)
+        if aligned is None: return None
+        return _beta(aligned[0], aligned[1])
+
+    def alpha(self, benchmark: 'EquityCurve', risk_free_rate: float = 0.0) -> Optional[float]:
+        return self._alpha(benchmark, self.beta(benchmark), risk_free_rate)
+
+    def _alpha(self, benchmark: 'EquityCurve', beta: Optional[float], risk_free_rate: float) -> Optional[float]:
+        if any(v is None for v in [self.cagr, benchmark.cagr, beta]):
+            logger.warning("Cannot calculate Alpha due to missing required metrics (CAGR portfolio/benchmark or Beta).")
+            return None
+        # Jensen's Alpha formula: Alpha = Portfolio Return - [Risk-Free Rate + Beta * (Benchmark Return - Risk-Free Rate)]
+        return self.cagr - (risk_free_rate + beta * (benchmark.cagr - risk_free_rate))
+
+    def information_ratio(self, benchmark: 'EquityCurve') -> Optional[float]:
+        aligned = self.aligned_returns(benchmark)
+        if aligned is None: return None
+        return self._information_ratio(*aligned)
+
+    def _information_ratio(self, own: np.ndarray, other: np.ndarray, common_index: pd.Index) -> Optional[float]:
+        # Shared return dates are the usual case and reuse the curve's own periods per year
+        periods_per_year = self.periods_per_year if len(common_index) == len(self.index) - 1 \
+            else _get_trading_periods_per_year(common_index)
+        return _information_ratio(own - other, periods_per_year)
+
+
+def compute_performance_stats(equity: pd.Series,
+                              benchmark: Optional[pd.Series] = None,
+                              risk_free_rate: float = 0.0,
+                              initial_value: Optional[float] = None) -> Dict[str, Optional[float]]:
+    """
+    Computes the whole performance stats bundle of an equity curve in one pass.
+
+    The curve is validated and cleaned once; returns, drawdowns and periods per
+    year are derived once and shared by every metric.
+
+    Args:
+        equity (pd.Series): Portfolio value over a DatetimeIndex.
+        benchmark (Optional[pd.Series]): Benchmark value series. Both series are aligned on their
+                                         common dates before the relative metrics (alpha, beta, IR).
+        risk_free_rate (float): Annual risk-free rate for Sharpe, Sortino and alpha.
+        initial_value (Optional[float]): Starting capital for the recovery factor. Defaults to the first value.
+
+    Returns:
+        Dict[str, Optional[float]]: Every key of PERFORMANCE_STAT_KEYS, as fractions (not percentages);
+                                    None where a metric cannot be computed.
+    """
+    stats: Dict[str, Optional[float]] = dict.fromkeys(PERFORMANCE_STAT_KEYS)
+    curve = EquityCurve.from_series(equity)
+    if curve is None:
+        logger.warning("Cannot calculate performance stats: equity series invalid.")
+        return stats
+
+    stats['total_return'] = curve.total_return
+    stats['cagr'] = curve.cagr
+    stats['annualized_volatility'] = curve.annualized_volatility
+    stats['sharpe_ratio'] = curve.sharpe_ratio(risk_free_rate)
+    stats['sortino_ratio'] = curve.sortino_ratio(risk_free_rate)
+    stats['max_drawdown'] = curve.max_drawdown
+    stats['max_drawdown_abs'] = curve.max_drawdown_abs
+    stats['calmar_ratio'] = curve.calmar_ratio()
+    stats['recovery_factor'] = curve.recovery_factor(initial_value)
+
+    if benchmark is None or not isinstance(benchmark, pd.Series) or len(benchmark) < 2:
+        return stats
+    if benchmark.index.equals(equity.index):
+        equity_curve, benchmark_curve = curve, EquityCurve.from_series(benchmark)
+    else:
+        common_index = equity.index.intersection(benchmark.index)
+        if len(common_index) < 2:
+            logger.warning("Could not align benchmark for Alpha/Beta/InfoRatio.")
+            return stats
+        equity_curve = EquityCurve.from_series(equity[common_index])
+        benchmark_curve = EquityCurve.from_series(benchmark[common_index])
+    if equity_curve is None or benchmark_curve is None:
+        return stats
+
+    aligned = equity_curve.aligned_returns(benchmark_curve)
+    if aligned is None:
+        return stats
+    stats['beta'] = _beta(aligned[0], aligned[1])
+    stats['alpha'] = equity_curve._alpha(benchmark_curve, stats['beta'], risk_free_rate)
+    stats['information_ratio'] = equity_curve._information_ratio(*aligned)
+    return stats
+
+
+def _clean_matrix(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Row-wise forward then back fill of a 2-D array; returns (filled, row_is_valid)."""
+    missing = np.isnan(values)
+    valid_rows = ~missing.all(axis=1)
+    if not missing.any():
+        return values, valid_rows
+    n_cols = values.shape[1]
+    positions = np.where(missing, 0, np.arange(n_cols))
+    np.maximum.accumulate(positions, axis=1, out=positions)
+    rows = np.arange(values.shape[0])
+    filled = values[rows[:, None], positions]
+    first_valid = np.argmax(~missing, axis=1)
+    leading = np.arange(n_cols) < first_valid[:, None]
+    filled = np.where(leading, filled[rows, first_valid][:, None], filled)
+    return filled, valid_rows
+
+
+def _cagr_rows(values: np.ndarray, index: pd.Index) -> np.ndarray:
+    """CAGR per row (NaN where undefined), same rules as _cagr."""
+    cagr = np.full(values.shape[0], np.nan)
+    if not isinstance(index, pd.DatetimeIndex) or len(index) < 2:
+        return cagr
+    time_span_years = (index[-1] - index[0]).days / 365.25
+    if time_span_years <= 0:
+        return cagr
+    start, end = values[:, 0], values[:, -1]
+    positive = start > 0
+    factor = end[positive] / start[positive]
+    cagr[positive] = np.sign(factor) * np.abs(factor) ** (1 / time_span_years) - 1
+    return cagr
+
+
+def _rowwise_cov(x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Sample covariance (ddof=1) of every row of ``x`` with ``y``, and the sample variance of ``y``."""
+    n = x.shape[1]
+    x_dev = x - x.mean(axis=1, keepdims=True)
+    y_dev = y - y.mean()
+    return x_dev @ y_dev / (n - 1), np.dot(y_dev, y_dev) / (n - 1)
+
+
+def compute_performance_stats_batch(equity: np.ndarray,
+                                    index: pd.Index,
+                                    benchmark: Optional[pd.Series] = None,
+                                    risk_free_rate: float = 0.0,
+                                    initial_value: Optional[float] = None) -> pd.DataFrame:
+    """
+    Computes the performance stats bundle for many equity curves sharing one date index.
+
+    Vectorized counterpart of compute_performance_stats: every metric is
+    evaluated along the date axis for all curves at once (running peak,
+    downside deviation, benchmark covariance), with no Python loop per curve.
+    Row ``k`` equals ``compute_performance_stats(pd.Series(equity[k], index), ...)``
+    up to floating point rounding.
+
+    Args:
+        equity (np.ndarray): Curve values of shape (n_curves, n_days).
+        index (pd.Index): Dates of the columns (a DatetimeIndex for the annualized metrics).
+        benchmark (Optional[pd.Series]): Benchmark value series, aligned with the curves on common dates.
+        risk_free_rate (float): Annual risk-free rate for Sharpe, Sortino and alpha.
+        initial_value (Optional[float]): Starting capital for the recovery factor. Defaults to each curve's first value.
+
+    Returns:
+        pd.DataFrame: One row per curve, columns PERFORMANCE_STAT_KEYS (fractions); NaN where a metric cannot be computed.
+    """
+    values = np.asarray(equity, dtype=np.float64)
+    if values.ndim != 2:
+        raise ValueError(f"equity must be 2-D (n_curves, n_days), got shape {values.shape}")
+    n_curves, n_days = values.shape
+    stats = {key: np.full(n_curves, np.nan) for key in PERFORMANCE_STAT_KEYS}
+    if len(index) != n_days:
+        raise ValueError(f"equity has {n_days} columns but the index has {len(index)} dates")
+    if n_curves == 0 or n_days < 2:
+        return pd.DataFrame(stats, columns=list(PERFORMANCE_STAT_KEYS))
+
+    values, valid_rows = _clean_matrix(values)
+    is_datetime = isinstance(index, pd.DatetimeIndex)
+    periods_per_year = _get_trading_periods_per_year(index[1:])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        first, last = values[:, 0], values[:, -1]
+        stats['total_return'] = np.where(first == 0, np.nan, last / first - 1)
+        cagr = _cagr_rows(values, index)
+        excess = cagr - risk_free_rate
+        stats['cagr'] = cagr
+
+        returns = values[:, 1:] / values[:, :-1] - 1
+        return_mask = ~np.isnan(returns)
+        return_counts = return_mask.sum(axis=1)
+        enough_returns = return_counts >= 2
+
+        if is_datetime and periods_per_year > 0:
+            # Volatility: ddof=1 over the non-NaN returns of each row
+            means = np.where(return_mask, returns, 0.0).sum(axis=1) / np.maximum(return_counts, 1)
+            squared = np.where(return_mask, (returns - means[:, None]) ** 2, 0.0).sum(axis=1)
+            volatility = np.sqrt(squared / np.maximum(return_counts - 1, 1)) * np.sqrt(periods_per_year)
+            volatility[~enough_returns] = np.nan
+
+            # Sortino: downside deviation against the periodic risk-free rate
+            periodic_rf_rate = (1 + risk_free_rate)**(1 / periods_per_year) - 1
+            below = returns < periodic_rf_rate
+            downside = np.where(below, returns - periodic_rf_rate, 0.0)
+            downside_deviation = np.sqrt((downside ** 2).sum(axis=1) / np.maximum(return_counts, 1)) * np.sqrt(periods_per_year)
+            no_downside = ~below.any(axis=1) | (downside_deviation == 0)
+            sortino = np.where(no_downside, np.where(cagr > risk_free_rate, np.inf, 0.0), excess / downside_deviation)
+            sortino[np.isnan(cagr) | ~enough_returns] = np.nan
+            stats['annualized_volatility'] = volatility
+            stats['sortino_ratio'] = sortino
+        volatility = stats['annualized_volatility']
+
+        # Sharpe: 0 / ±inf for zero (or undefined) volatility, as in EquityCurve.sharpe_ratio
+        degenerate = np.isnan(volatility) | (volatility == 0)
+        flat_sharpe = np.where(excess == 0, 0.0, np.where(excess > 0, np.inf, -np.inf))
+        stats['sharpe_ratio'] = np.where(np.isnan(cagr), np.nan, np.where(degenerate, flat_sharpe, excess / volatility))
+
+        # Drawdowns from the running peak of every row
+        running_max = np.maximum.accumulate(values, axis=1)
+        drawdowns = np.where(running_max == 0, 0.0, (values - running_max) / running_max)
+        max_drawdown = drawdowns.min(axis=1)
+        max_drawdown_abs = (running_max - values).max(axis=1)
+        stats['max_drawdown'] = max_drawdown
+        stats['max_drawdown_abs'] = max_drawdown_abs
+        stats['calmar_ratio'] = np.where(
+            np.isnan(cagr), np.nan,
+            np.where(max_drawdown == 0, np.where(cagr > 0, np.inf, 0.0), cagr / np.abs(max_drawdown))
+        )
+        profit = np.abs(last - (first if initial_value is None else initial_value))
+        stats['recovery_factor'] = np.where(max_drawdown_abs > 0, profit / max_drawdown_abs, np.where(profit > 0, np.inf, 0.0))
+
+        stats.update(_relative_stats_batch(values, index, cagr, periods_per_year, benchmark, risk_free_rate))
+
+    table = pd.DataFrame(stats, columns=list(PERFORMANCE_STAT_KEYS))
+    table.loc[~valid_rows, :] = np.nan
+    return table
+
+
+def _relative_stats_batch(values: np.ndarray,
+                          index: pd.Index,
+                          cagr: np.ndarray,
+                          periods_per_year: float,
+                          benchmark: Optional[pd.Series],
+                          risk_free_rate: float) -> Dict[str, np.ndarray]:
+    """Beta, alpha and information ratio of every row against a benchmark (prices aligned on common dates)."""
+    if benchmark is None or not isinstance(benchmark, pd.Series) or len(benchmark) < 2:
+        return {}
+    if not benchmark.index.equals(index):
+        common_index = index.intersection(benchmark.index)
+        if len(common_index) < 2 or not index.is_unique or not benchmark.index.is_unique:
+            logger.warning("Could not align benchmark for Alpha/Beta/InfoRatio.")
+            return {}
+        values = values[:, index.get_indexer(common_index)]
+        benchmark = benchmark.loc[common_index]
+        cagr = _cagr_rows(values, common_index)
+        periods_per_year = _get_trading_periods_per_year(common_index[1:])
+    benchmark_curve = EquityCurve.from_series(benchmark)
+    if benchmark_curve is None or values.shape[1] < 3:
+        return {}
+
+    returns = values[:, 1:] / values[:, :-1] - 1
+    benchmark_returns = benchmark_curve.returns
+    covariance, benchmark_variance = _rowwise_cov(returns, benchmark_returns)
+    if benchmark_variance == 0:
+        logger.warning("Benchmark variance is zero, cannot calculate Beta.")
+        beta = np.full(values.shape[0], np.nan)
+    else:
+        beta = covariance / benchmark_variance
+    benchmark_cagr = benchmark_curve.cagr if benchmark_curve.cagr is not None else np.nan
+    alpha = cagr - (risk_free_rate + beta * (benchmark_cagr - risk_free_rate))
+
+    information_ratio = np.full(values.shape[0], np.nan)
+    if periods_per_year > 0:
+        active = returns - benchmark_returns
+        active_counts = (~np.isnan(active)).sum(axis=1)
+        usable = active_counts >= 2
+        if usable.any():
+            annualized_active_return = np.nanmean(active[usable], axis=1) * periods_per_year
+            tracking_error = np.nanstd(active[usable], axis=1, ddof=1) * np.sqrt(periods_per_year)
+            information_ratio[usable] = np.where(
+                tracking_error == 0,
+                np.where(annualized_active_return > 0, np.inf, np.where(annualized_active_return < 0, -np.inf, 0.0)),
+                annualized_active_return / tracking_error
+            )
+    return {'beta': beta, 'alpha': alpha, 'information_ratio': information_ratio}
+
+
 # --- Return Calculation Functions ---
 
 def calculate_return_series(series: pd.Series) -> Optional[pd.Series]:
     """Calculates the simple return series (price / prev_price - 1)."""
-    cleaned_series = _handle_input_series(series, min_length=2)
-    if cleaned_series is None: return None
-    return cleaned_series.pct_change() # More direct way to calculate simple returns
+    curve = EquityCurve.from_series(series)
+    if curve is None: return None
+    return curve.return_series()
 
 
 def calculate_log_return_series(series: pd.Series) -> Optional[pd.Series]:
@@ -101,176 +622,77 @@ def calculate_cumulative_returns(return_series: pd.Series) -> Optional[pd.Series
 
 def calculate_total_return(series: pd.Series) -> Optional[float]:
     """Calculates the total percentage return over the series."""
-    cleaned_series = _handle_input_series(series, min_length=2)
-    if cleaned_series is None: return None
-    if cleaned_series.iloc[0] == 0: return None # Avoid division by zero
-
-    return (cleaned_series.iloc[-1] / cleaned_series.iloc[0] - 1)
+    curve = EquityCurve.from_series(series)
+    return curve.total_return if curve is not None else None
 
 
 # --- Annualized Metrics ---
 
 def calculate_cagr(series: pd.Series) -> Optional[float]:
     """Calculates Compound Annual Growth Rate (CAGR)."""
-    cleaned_series = _handle_input_series(series, min_length=2)
-    if cleaned_series is None: return None
-
-    start_value = cleaned_series.iloc[0]
-    end_value = cleaned_series.iloc[-1]
-
-    if start_value <= 0:
-        logger.warning("CAGR calculation failed: Start value is non-positive.")
-        return None # Cannot calculate CAGR if start value is zero or negative
-
-    if not isinstance(cleaned_series.index, pd.DatetimeIndex):
-         logger.warning("CAGR calculation failed: Series index is not DatetimeIndex.")
-         return None
-
-    time_span_years = (cleaned_series.index[-1] - cleaned_series.index[0]).days / 365.25
-
-    if time_span_years <= 0:
-        logger.warning(f"CAGR calculation failed: Time span is non-positive ({time_span_years:.2f} years).")
-        return None # Return None for non-positive time span
-
-    value_factor = end_value / start_value
-    # Handle potential negative returns correctly
-    if value_factor < 0:
-         # CAGR is undefined for negative terminal value relative to start
-         # We can return geometric mean - 1, but need to handle negative values carefully.
-         # For simplicity, return None or log an error.
-         logger.warning("CAGR calculation might be misleading: Negative value factor.")
-         # Approximate using average annual return or return None
-         # return None
-         # Or return the raw calculation, user should be aware
-         return (np.sign(value_factor) * (abs(value_factor)**(1/time_span_years))) - 1
-    else:
-        return (value_factor**(1 / time_span_years)) - 1
+    curve = EquityCurve.from_series(series)
+    return curve.cagr if curve is not None else None
 
 
 def calculate_annualized_volatility(return_series: pd.Series) -> Optional[float]:
-    """Calculates the annualized volatility (standard deviation of returns)."""
-    cleaned_returns = _handle_input_series(return_series, min_length=2)
-    if cleaned_returns is None: return None
+    """
+    Calculates the annualized volatility (standard deviation of returns).
 
-    # Drop first NaN if it exists (from pct_change)
-    if pd.isna(cleaned_returns.iloc[0]):
-        cleaned_returns = cleaned_returns.iloc[1:]
-    if len(cleaned_returns) < 2: return None # Need at least 2 returns for std dev
+    A leading NaN (from ``pct_change``) is dropped before cleaning. Earlier versions
+    back-filled it into a duplicate of the first return, which gave a slightly
+    different value (e.g. 0.157761 instead of 0.157699 on a 1,006-day curve); the
+    result now equals ``returns.dropna().std() * sqrt(periods_per_year)``, the same
+    volatility ``compute_performance_stats`` reports.
+    """
+    if return_series is None or not isinstance(return_series, pd.Series) or return_series.empty: return None
+    # Drop the leading NaN of pct_change before cleaning, so it is not back-filled into a duplicate first return
+    if pd.isna(return_series.iloc[0]):
+        return_series = return_series.iloc[1:]
+    returns = _clean_values(return_series, min_length=2)
+    if returns is None: return None
 
-    if not isinstance(cleaned_returns.index, pd.DatetimeIndex):
+    if not isinstance(return_series.index, pd.DatetimeIndex):
         logger.warning("Cannot annualize volatility: Return series index is not DatetimeIndex.")
         return None
-
-    periods_per_year = _get_trading_periods_per_year(cleaned_returns.index)
-    if periods_per_year <= 0:
-        logger.warning("Could not determine valid periods per year for volatility annualization.")
-        return None
-
-    volatility = cleaned_returns.std()
-    annualized_volatility = volatility * np.sqrt(periods_per_year)
-    return annualized_volatility
+    return _annualized_volatility(returns, _get_trading_periods_per_year(return_series.index))
 
 
 # --- Risk-Adjusted Return Metrics ---
 
 def calculate_sharpe_ratio(price_series: pd.Series, risk_free_rate: float = 0.0) -> Optional[float]:
     """Calculates the annualized Sharpe ratio."""
-    cagr = calculate_cagr(price_series) # Returns None on error
-    if cagr is None: return None
-
-    return_series = calculate_return_series(price_series) # Returns None on error
-    if return_series is None: return None
-
-    volatility = calculate_annualized_volatility(return_series) # Returns None on error
-    if volatility is None or volatility == 0:
-        # Handle zero volatility case (e.g., flat returns)
-        return 0.0 if cagr == risk_free_rate else (np.inf if cagr > risk_free_rate else -np.inf)
-
-    return (cagr - risk_free_rate) / volatility
+    curve = EquityCurve.from_series(price_series)
+    return curve.sharpe_ratio(risk_free_rate) if curve is not None else None
 
 
 def calculate_sortino_ratio(price_series: pd.Series, risk_free_rate: float = 0.0) -> Optional[float]:
     """Calculates the annualized Sortino ratio."""
-    cagr = calculate_cagr(price_series)
-    if cagr is None: return None
-
-    return_series = calculate_return_series(price_series)
-    if return_series is None: return None
-
-    # Drop first NaN if it exists
-    if pd.isna(return_series.iloc[0]):
-        return_series = return_series.iloc[1:]
-    if len(return_series) < 2: return None
-
-    if not isinstance(return_series.index, pd.DatetimeIndex):
-        logger.warning("Cannot calculate Sortino Ratio: Return series index is not DatetimeIndex.")
-        return None
-
-    periods_per_year = _get_trading_periods_per_year(return_series.index)
-    if periods_per_year <= 0: return None
-
-    # Adjust risk-free rate to the period frequency
-    periodic_rf_rate = (1 + risk_free_rate)**(1 / periods_per_year) - 1
-
-    # Calculate downside returns relative to the periodic risk-free rate
-    downside_returns = return_series[return_series < periodic_rf_rate]
-
-    if downside_returns.empty:
-        # No returns below the target rate, Sortino is theoretically infinite if CAGR > RF
-        return np.inf if cagr > risk_free_rate else 0.0
-
-    # Calculate downside deviation
-    downside_deviation_periodic = np.sqrt((downside_returns - periodic_rf_rate).pow(2).sum() / len(return_series))
-    annualized_downside_deviation = downside_deviation_periodic * np.sqrt(periods_per_year)
-
-    if annualized_downside_deviation == 0:
-        return np.inf if cagr > risk_free_rate else 0.0
-
-    return (cagr - risk_free_rate) / annualized_downside_deviation
+    curve = EquityCurve.from_series(price_series)
+    return curve.sortino_ratio(risk_free_rate) if curve is not None else None
 
 
 def calculate_calmar_ratio(price_series: pd.Series) -> Optional[float]:
     """Calculates the Calmar ratio (CAGR / Max Drawdown)."""
-    cagr = calculate_cagr(price_series)
-    if cagr is None:
+    curve = EquityCurve.from_series(price_series)
+    if curve is None:
         logger.warning("Cannot calculate Calmar Ratio: CAGR calculation failed.")
         return None
-
-    max_drawdown = calculate_max_drawdown(price_series) # Returns negative value or zero
-    if max_drawdown is None:
-        logger.warning("Cannot calculate Calmar Ratio: Max Drawdown calculation failed.")
-        return None
-
-    if max_drawdown == 0:
-        # Handle zero drawdown: Infinite if CAGR > 0, 0 if CAGR <= 0
-        logger.warning("Max Drawdown is zero, Calmar Ratio is undefined or infinite.")
-        return np.inf if cagr > 0 else 0.0
-
-    # Use absolute value of max drawdown for the ratio
-    calmar_ratio = cagr / abs(max_drawdown)
-    return calmar_ratio
+    return curve.calmar_ratio()
 
 
 # --- Drawdown Metrics ---
 
 def calculate_drawdown_series(series: pd.Series) -> Optional[pd.Series]:
     """Calculates the percentage drawdown series from peak equity."""
-    cleaned_series = _handle_input_series(series, min_length=1)
-    if cleaned_series is None: return None
-
-    rolling_max = cleaned_series.cummax()
-    # Avoid division by zero if rolling_max is zero
-    rolling_max = rolling_max.replace(0, np.nan) # Replace 0 with NaN to avoid division issues
-    drawdown = (cleaned_series - rolling_max) / rolling_max
-    return drawdown.fillna(0) # Fill NaNs (e.g., at the start or where rolling_max was 0) with 0 drawdown
+    curve = EquityCurve.from_series(series, min_length=1)
+    if curve is None: return None
+    return pd.Series(curve.drawdowns, index=curve.index, name=curve.name)
 
 
 def calculate_max_drawdown(series: pd.Series) -> Optional[float]:
     """Calculates the maximum percentage drawdown."""
-    drawdown_series = calculate_drawdown_series(series)
-    if drawdown_series is None: return None
-    # Max drawdown is the minimum value of the drawdown series (most negative)
-    return drawdown_series.min()
+    curve = EquityCurve.from_series(series, min_length=1)
+    return curve.max_drawdown if curve is not None else None
 
 
 def calculate_recovery_factor(total_return_pct: Optional[float], max_drawdown_pct: Optional[float]) -> Optional[float]:
@@ -287,101 +709,60 @@ def calculate_recovery_factor(total_return_pct: Optional[float], max_drawdown_pc
 
 # --- Benchmark Relative Metrics ---
 
-def _align_series(series1: pd.Series, series2: pd.Series) -> Tuple[Optional[pd.Series], Optional[pd.Series]]:
-    """Aligns two time series based on their common index."""
-    if series1 is None or series2 is None: return None, None
-    common_index = series1.index.intersection(series2.index)
-    if len(common_index) < 2: # Need at least two common points for cov/var
-        logger.warning("Could not align series or insufficient common data points.")
-        return None, None
-    return series1.loc[common_index], series2.loc[common_index]
-
-
 def calculate_beta(portfolio_price_series: pd.Series, benchmark_price_series: pd.Series) -> Optional[float]:
     """Calculates the portfolio Beta relative to a benchmark."""
-    portfolio_returns = calculate_return_series(portfolio_price_series)
-    benchmark_returns = calculate_return_series(benchmark_price_series)
-
-    if portfolio_returns is None or benchmark_returns is None: return None
-
-    # Align return series
-    portfolio_aligned, benchmark_aligned = _align_series(portfolio_returns.iloc[1:], benchmark_returns.iloc[1:]) # Skip first NaN
-
-    if portfolio_aligned is None or benchmark_aligned is None or len(portfolio_aligned) < 2:
-        return None
-
-    # Calculate covariance and benchmark variance
-    # Use numpy for potentially better NaN handling if needed, but pandas should be fine
-    matrix = np.cov(portfolio_aligned, benchmark_aligned)
-    covariance = matrix[0, 1]
-    benchmark_variance = matrix[1, 1] # np.var(benchmark_aligned) gives biased estimator
-
-    if benchmark_variance == 0:
-        logger.warning("Benchmark variance is zero, cannot calculate Beta.")
-        return None # Or return 0 or 1 depending on desired behavior
-
-    beta = covariance / benchmark_variance
-    return beta
+    portfolio = EquityCurve.from_series(portfolio_price_series)
+    benchmark = EquityCurve.from_series(benchmark_price_series)
+    if portfolio is None or benchmark is None: return None
+    return portfolio.beta(benchmark)
 
 
 def calculate_alpha(portfolio_price_series: pd.Series, benchmark_price_series: pd.Series,
                       risk_free_rate: float = 0.0) -> Optional[float]:
     """Calculates the annualized Jensen's Alpha."""
-    cagr_portfolio = calculate_cagr(portfolio_price_series)
-    cagr_benchmark = calculate_cagr(benchmark_price_series)
-    beta = calculate_beta(portfolio_price_series, benchmark_price_series)
-
-    if any(v is None for v in [cagr_portfolio, cagr_benchmark, beta]):
+    portfolio = EquityCurve.from_series(portfolio_price_series)
+    benchmark = EquityCurve.from_series(benchmark_price_series)
+    if portfolio is None or benchmark is None:
         logger.warning("Cannot calculate Alpha due to missing required metrics (CAGR portfolio/benchmark or Beta).")
         return None
-
-    # Jensen's Alpha formula: Alpha = Portfolio Return - [Risk-Free Rate + Beta * (Benchmark Return - Risk-Free Rate)]
-    alpha = cagr_portfolio - (risk_free_rate + beta * (cagr_benchmark - risk_free_rate))
-    return alpha
+    return portfolio.alpha(benchmark, risk_free_rate)
 
 
 def calculate_information_ratio(portfolio_price_series: pd.Series, benchmark_price_series: pd.Series) -> Optional[float]:
     """Calculates the Information Ratio."""
-    portfolio_returns = calculate_return_series(portfolio_price_series)
-    benchmark_returns = calculate_return_series(benchmark_price_series)
-
-    if portfolio_returns is None or benchmark_returns is None: return None
-
-    portfolio_aligned, benchmark_aligned = _align_series(portfolio_returns.iloc[1:], benchmark_returns.iloc[1:])
-
-    if portfolio_aligned is None or benchmark_aligned is None or len(portfolio_aligned) < 2:
-        return None
-
-    # Calculate excess returns over benchmark (active returns)
-    active_returns = portfolio_aligned - benchmark_aligned
-
-    if len(active_returns) < 2: return None
-
-    # Calculate annualized active return
-    periods_per_year = _get_trading_periods_per_year(active_returns.index)
-    if periods_per_year <= 0: return None
-    annualized_active_return = active_returns.mean() * periods_per_year
-
-    # Calculate tracking error (annualized standard deviation of active returns)
-    tracking_error = active_returns.std() * np.sqrt(periods_per_year)
-
-    if tracking_error == 0:
-        logger.warning("Tracking error is zero, Information Ratio is undefined or infinite.")
-        # Return Inf if positive active return, -Inf if negative, 0 if zero
-        return np.inf if annualized_active_return > 0 else (-np.inf if annualized_active_return < 0 else 0.0)
-
-    return annualized_active_return / tracking_error
+    portfolio = EquityCurve.from_series(portfolio_price_series)
+    benchmark = EquityCurve.from_series(benchmark_price_series)
+    if portfolio is None or benchmark is None: return None
+    return portfolio.information_ratio(benchmark)
 
 
 # --- Trade Analysis Metrics ---
 
-def calculate_trade_statistics(trades: List[Dict]) -> Dict[str, Any]:
+def _trade_pnls(trades) -> np.ndarray:
+    """Net PnL of every trade with a valid value (float64 array)."""
+    if hasattr(trades, 'column'):
+        # TradeLedger: the column is already a float64 buffer
+        pnls = trades.column('net_pnl')
+    else:
+        pnls = [trade.get('net_pnl') for trade in trades]
+        valid = [pnl for pnl in pnls if isinstance(pnl, (int, float, np.number)) and not isinstance(pnl, bool)]
+        if len(valid) < len(pnls):
+            logger.warning(f"Skipping {len(pnls) - len(valid)} trade(s) with invalid Net PnL.")
+        pnls = np.asarray(valid, dtype=np.float64)
+    invalid = np.isnan(pnls)
+    if invalid.any():
+        logger.warning(f"Skipping {int(invalid.sum())} trade(s) with NaN Net PnL.")
+        pnls = pnls[~invalid]
+    return pnls
+
+
+def calculate_trade_statistics(trades: Sequence[Dict]) -> Dict[str, Any]:
     """
-    Calculates various statistics based on a list of completed trades.
+    Calculates various statistics based on the completed trades.
 
     Args:
-        trades (List[Dict]): A list where each dict represents a trade and must contain
-                             at least 'pnl' (float) and optionally 'pnl_pct' (float).
+        trades (Sequence[Dict]): A TradeLedger or a list of trade dicts; each trade
+                                 must contain 'net_pnl' (float).
 
     Returns:
         Dict[str, Any]: A dictionary containing trade statistics.
@@ -395,34 +776,15 @@ def calculate_trade_statistics(trades: List[Dict]) -> Dict[str, Any]:
         # Add more stats if needed (e.g., avg duration, avg pnl_pct)
     }
 
-    if not trades:
+    if trades is None or len(trades) == 0:
         return stats # Return defaults if no trades
 
-    pnls = []
-    win_pnls = []
-    loss_pnls = []
-
     logger.debug(f"Calculating trade stats for {len(trades)} trades.") # DEBUG
-    trade_count_processed = 0 # DEBUG
-
-    for trade in trades:
-        # Use 'net_pnl' instead of 'pnl' as it reflects profit after costs
-        pnl = trade.get('net_pnl') 
-        if trade_count_processed < 5: # Log first 5 PnLs # DEBUG
-            logger.debug(f"Processing trade {trade_count_processed + 1}, Net PnL: {pnl}") # DEBUG
-
-        if pnl is None or not isinstance(pnl, (int, float)) or np.isnan(pnl):
-            logger.warning(f"Skipping trade due to invalid Net PnL: {trade}")
-            trade_count_processed += 1 # DEBUG
-            continue
-
-        pnls.append(pnl)
-        if pnl > 0:
-            win_pnls.append(pnl)
-        elif pnl < 0:
-            loss_pnls.append(pnl)
-        # Trades with PnL == 0 are counted in total but not in win/loss counts here
-        trade_count_processed += 1 # DEBUG
+    # Use 'net_pnl' instead of 'pnl' as it reflects profit after costs
+    pnls = _trade_pnls(trades)
+    win_pnls = pnls[pnls > 0]
+    loss_pnls = pnls[pnls < 0]
+    # Trades with PnL == 0 are counted in total but not in win/loss counts here
 
     total_trades = len(pnls)
     winning_trades = len(win_pnls)
@@ -440,8 +802,8 @@ def calculate_trade_statistics(trades: List[Dict]) -> Dict[str, Any]:
     stats['losing_trades'] = losing_trades
     stats['win_rate'] = (winning_trades / total_trades) * 100 if total_trades > 0 else 0.0
 
-    gross_profit = sum(win_pnls)
-    gross_loss = abs(sum(loss_pnls)) # Use absolute value for gross loss
+    gross_profit = float(win_pnls.sum())
+    gross_loss = abs(float(loss_pnls.sum())) # Use absolute value for gross loss
 
     # DEBUG: Log profit/loss values
     logger.debug(f"Trade stats intermediate: gross_profit={gross_profit:.2f}, gross_loss={gross_loss:.2f}")
@@ -455,8 +817,8 @@ def calculate_trade_statistics(trades: List[Dict]) -> Dict[str, Any]:
     stats['avg_win_pnl'] = gross_profit / winning_trades if winning_trades > 0 else 0.0
     stats['avg_loss_pnl'] = -gross_loss / losing_trades if losing_trades > 0 else 0.0 # Avg loss is negative
 
-    stats['largest_win_pnl'] = max(win_pnls) if winning_trades > 0 else 0.0
-    stats['largest_loss_pnl'] = min(loss_pnls) if losing_trades > 0 else 0.0 # Largest loss is most negative
+    stats['largest_win_pnl'] = float(win_pnls.max()) if winning_trades > 0 else 0.0
+    stats['largest_loss_pnl'] = float(loss_pnls.min()) if losing_trades > 0 else 0.0 # Largest loss is most negative
 
     logger.debug(f"Calculated trade stats: {stats}") # DEBUG
 
@@ -21,12 +21,14 @@ except ImportError as e:
     config = MockConfig()
 
 try:
-    from .data import DataLoader
+    from .data import DataLoader, data_registry, get_shared_data_loader
     logger.debug("Successfully imported DataLoader.")
 except ImportError as e:
     logger.error(f"Failed to import DataLoader: {e}")
     # Simple placeholder class
     class DataLoader: pass
+    data_registry = None
+    def get_shared_data_loader(data_path=None): return DataLoader()
 
 try:
     # Core manager component
@@ -2,7 +2,8 @@ import pandas as pd
 import numpy as np
 import logging
 import traceback
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
+from dataclasses import dataclass, field, replace
 from pathlib import Path
 import sys
 
@@ -12,30 +13,66 @@ logger = logging.getLogger(__name__)
 # --- Importy Lokalne ---
 try:
     from src.core.constants import STRATEGY_CLASS_MAP, TRADING_DAYS_PER_YEAR
-    from src.core.data import DataLoader
+    from src.core.data import DataLoader, get_shared_data_loader
     from src.core.config import config
     from src.portfolio.portfolio_manager import PortfolioManager
     from src.portfolio.risk_manager import RiskManager
-    from src.strategies.base import BaseStrategy
-    from src.analysis.metrics import (
-        calculate_cagr, calculate_sharpe_ratio, calculate_sortino_ratio,
-        calculate_max_drawdown, calculate_annualized_volatility, calculate_return_series,
-        calculate_alpha, calculate_beta, calculate_information_ratio,
-        calculate_recovery_factor, calculate_trade_statistics, calculate_calmar_ratio
+    from src.core.simulation import (
+        SimulationPanel, ScenarioResults, PartialResultsPublisher, build_simulation_panel,
+        run_array_simulation, run_multi_scenario_simulation
     )
+    from src.core.exceptions import BacktestCancelled, DataError
+    from src.core.cancellation import CancellationToken, raise_if_cancelled
+    from src.core.profiling import NULL_PROFILER, RunProfiler
+    from src.core.indicator_cache import indicator_cache
+    from src.core.result_cache import run_fingerprint
+    from src.core.market_regime import evaluate_regime, regime_filter_from_params
+    from src.strategies.base import BaseStrategy
+    from src.analysis.metrics import compute_performance_stats, compute_performance_stats_batch, calculate_trade_statistics
 except ImportError as e:
     logger.error(f"CRITICAL: Failed to import core/portfolio/analysis modules in BacktestManager: {e}", exc_info=True)
     raise ImportError("Core module import failed in BacktestManager") from e
 
+@dataclass
+class PreparedData:
+    """
+    Data for a set of tickers prepared once and reused by many simulations
+    (e.g. every parameter set of an optimizer grid).
+    """
+    tickers: List[str]                     # Tickers with valid data, in the requested order
+    ticker_data: Dict[str, pd.DataFrame]   # OHLCV per ticker from the warm-up start to the window end (input for signal generation)
+    combined_index: pd.DatetimeIndex       # Union of all ticker dates
+    panel: pd.DataFrame                    # (date x (ticker, field)) panel restricted to the backtest window
+    dates: pd.DatetimeIndex                # Backtest dates
+    simulation_panel: SimulationPanel = field(repr=False, default=None) # Array view of ``panel`` without signals
+
+
+@dataclass
+class SimulationContext:
+    """
+    Inputs that depend only on the prepared data and risk settings, shared by
+    every scenario of a batch (and shipped to optimizer worker processes).
+    """
+    market_favorable: Optional[np.ndarray] = None  # Market filter per backtest date; None = always favorable
+    benchmark: Optional[pd.Series] = None          # Benchmark value series over the backtest dates
+
+
 class BacktestManager:
     """
     Manages the execution of backtests for trading strategies across multiple instruments.
     """
 
-    def __init__(self, initial_capital: float = 100000.0):
+    def __init__(self, initial_capital: float = 100000.0, data_loader: Optional[DataLoader] = None):
+        """
+        Args:
+            initial_capital (float): Starting capital for each backtest.
+            data_loader (Optional[DataLoader]): Loader to use for every run. If None, the process-wide
+                                                shared loader is used and refreshed at the start of each run.
+        """
         self.initial_capital = initial_capital
+        self._pinned_data_loader = data_loader is not None
         try:
-            self.data_loader = DataLoader(data_path=config.DATA_PATH)
+            self.data_loader = data_loader or get_shared_data_loader(config.DATA_PATH)
             logger.info(f"BacktestManager initialized with initial capital: ${initial_capital:,.2f} and data path: {config.DATA_PATH}")
         except Exception as e:
             logger.error(f"CRITICAL: Failed to initialize DataLoader in BacktestManager: {e}", exc_info=True)
@@ -48,9 +85,30 @@ class BacktestManager:
                      risk_params: Optional[Dict[str, Any]] = None,
                      cost_params: Optional[Dict[str, Any]] = None,      # Added cost_params
                      rebalancing_params: Optional[Dict[str, Any]] = None, # Added rebalancing_params
-                     progress_callback: Optional[callable] = None
+                     progress_callback: Optional[callable] = None,
+                     use_legacy_loop: bool = False,
+                     start_date: Optional[str] = None,
+                     end_date: Optional[str] = None,
+                     partial_callback: Optional[callable] = None,
+                     cancel_token: Optional[CancellationToken] = None,
+                     profiler: Optional[RunProfiler] = None
                      ):
-        """Runs a backtest for the specified strategy, tickers, and parameters."""
+        """
+        Runs a backtest for the specified strategy, tickers, and parameters.
+
+        The day loop runs on the array-backed simulation core by default;
+        pass ``use_legacy_loop=True`` to run the original pandas loop instead.
+        ``start_date``/``end_date`` (YYYY-MM-DD) default to config.START_DATE/END_DATE.
+        Only the strategy's warm-up history before the window and the window itself
+        are used for signal generation.
+        ``partial_callback`` receives batches of new equity points and closed
+        trades while the day loop runs (see ``PartialResultsPublisher``).
+        ``cancel_token`` is checked per ticker during signal generation and per
+        day in the loop; cancellation raises ``BacktestCancelled``.
+        ``profiler`` receives phase timings (data_load, panel_build, signals,
+        market_filter, simulation, finalize), signal/order/rejection counters
+        and memory snapshots.
+        """
         logger.info(f"--- BacktestManager: Starting run_backtest ---")
         logger.info(f"Strategy: {strategy_type}, Tickers: {tickers}")
         logger.info(f"Strategy Params: {strategy_params}, Risk Params: {risk_params}, Cost Params: {cost_params}, Rebalancing Params: {rebalancing_params}")
@@ -60,12 +118,17 @@ class BacktestManager:
         risk_params = risk_params or {}
         cost_params = cost_params or {}
         rebalancing_params = rebalancing_params or {}
+        profiler = profiler or NULL_PROFILER
 
         # Base progress for manager, assuming service part took up to 7%
         MANAGER_PROGRESS_START = 8
         MANAGER_PROGRESS_END_BEFORE_SERVICE_RESUMES = 80
 
         try:
+            # Pick up the current shared loader (reloaded by the registry if the data file changed)
+            if not self._pinned_data_loader:
+                self.data_loader = get_shared_data_loader(config.DATA_PATH)
+
             # --- 1. Initialization & Strategy Resolution (8% - 10%) ---
             if progress_callback: progress_callback((MANAGER_PROGRESS_START, "Manager: Resolving strategy..."))
             strategy_key = next((k for k in STRATEGY_CLASS_MAP.keys() if k.lower() == strategy_type.lower()), None)
@@ -78,15 +141,24 @@ class BacktestManager:
                 logger.error("No tickers provided.")
                 if progress_callback: progress_callback((MANAGER_PROGRESS_START + 1, "Error: No tickers provided"))
                 return None, None, {"error": "No tickers provided"}
-            if progress_callback: progress_callback((MANAGER_PROGRESS_START + 2, "Manager: Strategy Resolved. Loading All Ticker Data...")) # Now 10%
+            if progress_callback: progress_callback((MANAGER_PROGRESS_START + 2, "Manager: Strategy Resolved. Loading Ticker Data...")) # Now 10%
 
             # --- 2. Data Loading and Preparation (11% - 20%) ---
-            all_ticker_data = self.data_loader.load_all_data()
+            # Only the selected tickers are prepared; the benchmark is loaded separately below
+            start_date = pd.to_datetime(start_date or config.START_DATE).tz_localize(None)
+            end_date = pd.to_datetime(end_date or config.END_DATE).tz_localize(None)
+            try:
+                warmup_bars = strategy_class.warmup_bars(strategy_params)
+            except (TypeError, ValueError):
+                warmup_bars = None # Invalid parameters are reported by the strategy constructor below
+            with profiler.phase("data_load"):
+                all_ticker_data = self._slice_history(self.data_loader.load_tickers(tickers), start_date, end_date, warmup_bars)
+            profiler.snapshot("data_loaded")
             if not all_ticker_data: 
                 logger.error("Failed to load any ticker data.")
                 if progress_callback: progress_callback((MANAGER_PROGRESS_START + 3, "Error: Failed to load any ticker data")) # 11%
                 return None, None, {"error": "Failed to load any ticker data"}
-            if progress_callback: progress_callback((MANAGER_PROGRESS_START + 4, "Manager: All Ticker Data Loaded. Validating Tickers...")) # 12%
+            if progress_callback: progress_callback((MANAGER_PROGRESS_START + 4, "Manager: Ticker Data Loaded. Validating Tickers...")) # 12%
 
             valid_tickers = [t for t in tickers if t in all_ticker_data and not all_ticker_data[t].empty]
             if not valid_tickers: 
@@ -103,9 +175,8 @@ class BacktestManager:
                     if progress_callback: progress_callback((MANAGER_PROGRESS_START + 7, "Error: No valid data panels created")) # 15%
                     return None, None, {"error": "No valid data panels created."}
                 if progress_callback: progress_callback((MANAGER_PROGRESS_START + 8, "Manager: Panel Data Created. Combining and Filtering...")) # 16%
-                combined_df = pd.concat(panel_data, axis=1, keys=panel_data.keys()); combined_df.index = pd.to_datetime(combined_df.index).tz_localize(None); combined_df = combined_df.sort_index()
-                start_date = pd.to_datetime(config.START_DATE).tz_localize(None); end_date = pd.to_datetime(config.END_DATE).tz_localize(None)
-                combined_df_filtered = combined_df.loc[start_date:end_date]; backtest_range = combined_df_filtered.index.unique()
+                with profiler.phase("panel_build"):
+                    combined_df, combined_df_filtered, backtest_range = self._build_combined_panel(panel_data, start_date, end_date)
                 if backtest_range.empty: 
                     logger.error(f"No data in date range: {start_date} to {end_date}")
                     if progress_callback: progress_callback((MANAGER_PROGRESS_START + 9, "Error: No data in date range")) # 17%
@@ -150,198 +221,87 @@ class BacktestManager:
             all_signals = {}
             logger.info("Generating signals for all tickers...")
             num_valid_tickers = len(valid_tickers)
-            for i, ticker in enumerate(valid_tickers):
-                try:
-                    ticker_data_full = all_ticker_data[ticker]
-                    signals_df = strategy.generate_signals(ticker, ticker_data_full)
-                    if signals_df is not None and not signals_df.empty:
-                         signals_df.index = pd.to_datetime(signals_df.index).tz_localize(None)
-                         all_signals[ticker] = signals_df.reindex(combined_df.index).fillna(0)
-                except Exception as e: logger.error(f"Error generating signals for {ticker}: {e}", exc_info=True)
-                if progress_callback and num_valid_tickers > 0:
-                    current_progress = SIGNAL_GEN_START_PROGRESS + int(((i + 1) / num_valid_tickers) * SIGNAL_GEN_RANGE)
-                    progress_callback((current_progress, f"Signals: {ticker} ({i+1}/{num_valid_tickers})..."))
+            with profiler.phase("signals"):
+                for i, ticker in enumerate(valid_tickers):
+                    raise_if_cancelled(cancel_token)
+                    try:
+                        ticker_data_full = all_ticker_data[ticker]
+                        signals_df = strategy.generate_signals(ticker, ticker_data_full)
+                        if signals_df is not None and not signals_df.empty:
+                             signals_df.index = pd.to_datetime(signals_df.index).tz_localize(None)
+                             all_signals[ticker] = signals_df.reindex(combined_df.index).fillna(0)
+                    except Exception as e: logger.error(f"Error generating signals for {ticker}: {e}", exc_info=True)
+                    if progress_callback and num_valid_tickers > 0:
+                        current_progress = SIGNAL_GEN_START_PROGRESS + int(((i + 1) / num_valid_tickers) * SIGNAL_GEN_RANGE)
+                        progress_callback((current_progress, f"Signals: {ticker} ({i+1}/{num_valid_tickers})..."))
             
             if not all_signals:
                 logger.warning("No signals generated for any ticker.")
 
             logger.info(f"Signal generation complete for {len(all_signals)} tickers.")
+            logger.debug(f"Indicator cache: {indicator_cache.stats()}")
             if progress_callback: progress_callback((SIGNAL_GEN_START_PROGRESS + SIGNAL_GEN_RANGE + 1, "Manager: Signals Generated. Preparing Market Filter...")) # 46%
 
             # --- 5. Market Filter Prep (47% - 48%) --- Range: 2%
-            market_filter_data = None
-            spy_close = None 
-            apply_market_filter = bool(risk_params.get('use_market_filter', False))
-            if apply_market_filter:
-                 try:
-                      spy_data_df = self.data_loader.load_benchmark_data_df() 
-                      if spy_data_df is not None and not spy_data_df.empty:
-                            spy_data_df.index = pd.to_datetime(spy_data_df.index).tz_localize(None); spy_close = spy_data_df['Close']
-                            market_filter_data_series = spy_close.rolling(window=risk_manager.market_trend_lookback).mean()
-                            market_filter_data = market_filter_data_series.reindex(combined_df.index).ffill(); logger.info(f"Market filter data (MA {risk_manager.market_trend_lookback}) prepared.")
-                      else: 
-                          logger.warning("Benchmark data for market filter not found. Disabling filter.")
-                          apply_market_filter = False
-                 except Exception as e: 
-                     logger.warning(f"Error preparing market filter data: {e}. Disabling filter.", exc_info=True)
-                     apply_market_filter = False            
+            with profiler.phase("market_filter"):
+                market_favorable = self._prepare_market_regime(risk_params, risk_manager, backtest_range)
             if progress_callback: progress_callback((SIGNAL_GEN_START_PROGRESS + SIGNAL_GEN_RANGE + 2, "Manager: Starting Simulation Loop...")) # 48%
 
             # --- 6. Backtest Execution Loop (49% - 78%) --- Range: 30%
             SIMULATION_START_PROGRESS = SIGNAL_GEN_START_PROGRESS + SIGNAL_GEN_RANGE + 3 # 49%
             SIMULATION_RANGE = 29 # Ends at 78%
             logger.info("Starting backtest simulation loop...")
-            portfolio_history = []
-            rejected_signal_counts = {
-                'insufficient_cash': 0,
-                'risk_rejected_size': 0,
-                'max_positions_reached': 0,
-                'position_exists': 0,
-                'invalid_price': 0,
-                'missing_data': 0,
-                'market_filter': 0, # Count signals skipped due to market filter
-                'other': 0 # Catch-all for unexpected reasons
-            }
-            total_signals_considered = 0 # Count entry signals encountered
-
-            num_days = len(backtest_range)
-            loop_progress_updates = 20 
-            update_interval = max(1, num_days // loop_progress_updates) 
-
-            for i, current_date in enumerate(backtest_range):
-                try:
-                    current_market_slice = combined_df_filtered.loc[[current_date]]
-
-                    is_market_favorable = True
-                    if apply_market_filter and market_filter_data is not None and spy_close is not None: 
-                         try:
-                              current_spy_ma = market_filter_data.loc[current_date]
-                              current_spy_price = spy_close.loc[current_date] 
-                              if pd.notna(current_spy_price) and pd.notna(current_spy_ma): 
-                                  is_market_favorable = current_spy_price >= current_spy_ma
-                         except KeyError: 
-                             is_market_favorable = True 
-
-                    current_prices_dict = {ticker: current_market_slice.loc[current_date, (ticker, 'Close')] for ticker in portfolio_manager.positions.keys() if (ticker, 'Close') in current_market_slice.columns and pd.notna(current_market_slice.loc[current_date, (ticker, 'Close')])}
-                    for ticker in portfolio_manager.positions.keys():
-                         if ticker not in current_prices_dict:
-                              last_known_price = portfolio_manager.positions[ticker].entry_price
-                              logger.warning(f"Using last known price (${last_known_price:.2f}) for stop/exit check for {ticker} on {current_date}")
-                              current_prices_dict[ticker] = last_known_price
-
-                    if current_prices_dict: portfolio_manager.update_positions_and_stops(current_prices_dict, current_date)
-
-                    if is_market_favorable:
-                        for ticker in valid_tickers:
-                            if ticker in all_signals:
-                                try: signal_value = all_signals[ticker].loc[current_date, 'Signal']
-                                except (KeyError, IndexError): signal_value = 0
-
-                                if signal_value > 0: 
-                                    total_signals_considered += 1
-                                    if ticker not in portfolio_manager.positions:
-                                        try:
-                                            entry_price = combined_df_filtered.loc[current_date, (ticker, 'Close')]
-                                            if pd.isna(entry_price) or entry_price <= 0: 
-                                                rejected_signal_counts['invalid_price'] += 1
-                                                continue
-
-                                            calculated_volatility = None
-
-                                            signal_data = {
-                                                'ticker': ticker, 'date': current_date, 'price': entry_price,
-                                                'direction': 1, 'volatility': calculated_volatility
-                                            }
-                                            rejection_reason = portfolio_manager.open_position(signal_data)
-                                            if rejection_reason:
-                                                if rejection_reason in rejected_signal_counts:
-                                                    rejected_signal_counts[rejection_reason] += 1
-                                                else:
-                                                    rejected_signal_counts['other'] += 1
-
-                                        except KeyError: 
-                                            logger.warning(f"Could not get price for {ticker} on {current_date} for buy signal.")
-                                            rejected_signal_counts['missing_data'] += 1
-                                            continue
-                                        except Exception as sig_proc_e: 
-                                            logger.error(f"Error processing buy signal for {ticker} on {current_date}: {sig_proc_e}", exc_info=True)
-                                            rejected_signal_counts['other'] += 1
-                                            continue
-                                    else:
-                                        rejected_signal_counts['position_exists'] += 1
-
-                                elif signal_value < 0 and ticker in portfolio_manager.positions:
-                                    try:
-                                        exit_price = combined_df_filtered.loc[current_date, (ticker, 'Close')]
-                                        if pd.isna(exit_price) or exit_price <= 0: logger.warning(f"Invalid exit price ({exit_price}) for {ticker} on {current_date}. Skipping close."); continue
-                                        portfolio_manager.close_position(ticker, exit_price, current_date, reason="signal")
-                                    except KeyError: logger.warning(f"Could not get price for {ticker} on {current_date} for sell signal."); continue
-                                    except Exception as sig_proc_e: logger.error(f"Error processing sell signal for {ticker} on {current_date}: {sig_proc_e}", exc_info=True); continue
-                    else:
-                        for ticker in valid_tickers:
-                            if ticker in all_signals:
-                                try: signal_value = all_signals[ticker].loc[current_date, 'Signal']
-                                except (KeyError, IndexError): signal_value = 0
-                                if signal_value > 0: 
-                                    rejected_signal_counts['market_filter'] += 1
-
-                    eod_prices_dict = {ticker: current_market_slice.loc[current_date, (ticker, 'Close')] for ticker in valid_tickers if (ticker, 'Close') in current_market_slice.columns and pd.notna(current_market_slice.loc[current_date, (ticker, 'Close')])}
-                    for ticker in portfolio_manager.positions.keys():
-                        if ticker not in eod_prices_dict:
-                            last_known_price = portfolio_manager.positions[ticker].entry_price
-                            logger.warning(f"Using last known price (${last_known_price:.2f}) for EOD valuation for {ticker} on {current_date}")
-                            eod_prices_dict[ticker] = last_known_price
-                    current_portfolio_value = portfolio_manager.update_portfolio_value(eod_prices_dict, current_date)
-
-                except KeyError as date_err: logger.warning(f"Market data potentially missing for date {current_date}. Error: {date_err}. Carrying forward value."); last_value = portfolio_manager.portfolio_value_history[-1][1] if portfolio_manager.portfolio_value_history else self.initial_capital; portfolio_manager.portfolio_value_history.append((current_date, last_value)); continue
-                except Exception as loop_err: logger.error(f"Error in backtest loop for date {current_date}: {loop_err}", exc_info=True); continue
-                
-                if progress_callback and num_days > 0 and (i + 1) % update_interval == 0 :
-                    current_progress = SIMULATION_START_PROGRESS + int(((i + 1) / num_days) * SIMULATION_RANGE)
-                    progress_callback((current_progress, f"Simulating: Day {i+1}/{num_days}..."))
-
+            rejected_signal_counts = self._new_rejection_counts()
+            with profiler.phase("simulation"):
+                if use_legacy_loop:
+                    logger.info("Using legacy pandas simulation loop.")
+                    total_signals_considered = self._run_legacy_loop(
+                        backtest_range, combined_df_filtered, valid_tickers, all_signals, portfolio_manager,
+                        rejected_signal_counts, market_favorable,
+                        progress_callback, SIMULATION_START_PROGRESS, SIMULATION_RANGE,
+                        partial_callback=partial_callback, cancel_token=cancel_token
+                    )
+                else:
+                    sim_panel = build_simulation_panel(combined_df_filtered, all_signals, valid_tickers)
+                    total_signals_considered = run_array_simulation(
+                        sim_panel, portfolio_manager, rejected_signal_counts,
+                        market_favorable=market_favorable,
+                        progress_callback=progress_callback,
+                        progress_start=SIMULATION_START_PROGRESS,
+                        progress_range=SIMULATION_RANGE,
+                        partial_callback=partial_callback,
+                        cancel_token=cancel_token
+                    )
+
+            profiler.snapshot("simulated")
             logger.info("Backtest simulation loop finished.")
             # --- 7. Finalization (79% - 80%) --- Range: 2%
             FINALIZATION_PROGRESS_START = SIMULATION_START_PROGRESS + SIMULATION_RANGE + 1 # 79%
             if progress_callback: progress_callback((FINALIZATION_PROGRESS_START, "Manager: Simulation Finished. Closing Final Positions..."))
 
-            final_date = backtest_range[-1]
-            try:
-                 final_market_data_slice = combined_df_filtered.loc[[final_date]]
-                 final_prices_dict = {
-                    ticker: final_market_data_slice.loc[final_date, (ticker, 'Close')] 
-                    if (ticker, 'Close') in final_market_data_slice.columns and pd.notna(final_market_data_slice.loc[final_date, (ticker, 'Close')]) 
-                    else (portfolio_manager.positions[ticker].entry_price if ticker in portfolio_manager.positions else np.nan) 
-                    for ticker in valid_tickers 
-                 }
-                 final_prices_dict_valid = {k: v for k, v in final_prices_dict.items() if pd.notna(v)}
-                 portfolio_manager.close_all_positions(final_prices_dict_valid, final_date, reason="end_of_backtest")
-            except Exception as final_close_err: 
-                logger.error(f"Error during final position closure: {final_close_err}", exc_info=True)
-
-            if not portfolio_manager.portfolio_value_history: 
-                logger.error("Portfolio history empty.")
-                portfolio_manager.portfolio_value_history.append((backtest_range[0] if not backtest_range.empty else pd.Timestamp.now().normalize(), self.initial_capital))
-                if backtest_range.empty: 
-                    portfolio_manager.portfolio_value_history.append((pd.Timestamp.now().normalize() + pd.Timedelta(days=1), self.initial_capital))
-
-            portfolio_df = pd.DataFrame(portfolio_manager.portfolio_value_history, columns=['date', 'value']).set_index('date')
-            portfolio_value_series = portfolio_df['value'].sort_index(); portfolio_value_series.name = "Portfolio"
-            
-            if portfolio_value_series.empty: 
-                logger.error("Portfolio value series is unexpectedly empty after history check.")
-                if progress_callback: progress_callback((FINALIZATION_PROGRESS_START, "Error: Portfolio value series empty"))
-                return all_signals, {'trades': portfolio_manager.closed_trades, 'Portfolio_Value': pd.Series([self.initial_capital], index=[pd.Timestamp.now().normalize()])}, {'Initial Capital': self.initial_capital, 'Final Capital': self.initial_capital, 'total_trades': 0, "error": "Portfolio value series empty"}
-
-            benchmark_value_series = self._get_benchmark_data(portfolio_value_series.index)
-            combined_results = {'Portfolio_Value': portfolio_value_series, 'Benchmark': benchmark_value_series, 'trades': portfolio_manager.closed_trades}
-            stats = self._calculate_portfolio_stats(combined_results, rejected_signal_counts, total_signals_considered)
+            with profiler.phase("finalize"):
+                combined_results, stats = self._finalize_results(
+                    portfolio_manager, combined_df_filtered, backtest_range, valid_tickers,
+                    rejected_signal_counts, total_signals_considered, profiler=profiler
+                )
+            profiler.count("signals_considered", total_signals_considered)
+            profiler.count("trades_closed", len(portfolio_manager.closed_trades))
+            profiler.count("rejections", sum(rejected_signal_counts.values()))
+            for reason, n in rejected_signal_counts.items():
+                if n:
+                    profiler.count(f"rejections.{reason}", n)
+            if 'error' in stats:
+                if progress_callback: progress_callback((FINALIZATION_PROGRESS_START, f"Error: {stats['error']}"))
+                return all_signals, combined_results, stats
             final_pv_str = f"${stats.get('Final Capital', 0):,.2f}" if isinstance(stats.get('Final Capital'), (int, float)) else 'N/A'
             logger.info(f"Backtest analysis complete. Final Portfolio Value: {final_pv_str}, Total Trades: {stats.get('total_trades', 0)}")
             if progress_callback: progress_callback((MANAGER_PROGRESS_END_BEFORE_SERVICE_RESUMES, "Manager: Analysis Complete. Returning to Service...")) # 80%
 
             return all_signals, combined_results, stats
 
+        except BacktestCancelled:
+            logger.info("Backtest cancelled.")
+            raise
         except Exception as e:
             logger.error(f"CRITICAL error during backtest execution: {str(e)}", exc_info=True)
             # Use a progress value within the manager's range for critical errors
@@ -349,6 +309,532 @@ class BacktestManager:
             if progress_callback: progress_callback((error_progress_value, f"Manager Error: {type(e).__name__} - {str(e)[:30]}..."))
             return None, None, {"error": f"Manager critical error: {str(e)}"}
 
+    # --- Reusable stages (shared by run_backtest and the optimizer) ---
+
+    def data_version(self) -> str:
+        """Returns the version of the data the next run will use (see DataLoader.data_version)."""
+        if not self._pinned_data_loader:
+            self.data_loader = get_shared_data_loader(config.DATA_PATH)
+        return self.data_loader.data_version()
+
+    def run_fingerprint(self,
+                        strategy_type: str,
+                        tickers: List[str],
+                        strategy_params: Optional[Dict[str, Any]] = None,
+                        risk_params: Optional[Dict[str, Any]] = None,
+                        cost_params: Optional[Dict[str, Any]] = None,
+                        rebalancing_params: Optional[Dict[str, Any]] = None,
+                        start_date: Optional[str] = None,
+                        end_date: Optional[str] = None) -> str:
+        """
+        Returns the result cache key of a run with this manager's capital and data.
+
+        Arguments mirror ``run_backtest``; missing parameter dicts and dates are
+        normalized, so equivalent calls map to the same key.
+
+        Returns:
+            str: Key for ``ResultCache``.
+        """
+        return run_fingerprint(
+            strategy=str(strategy_type).upper(),
+            tickers=[str(t).upper() for t in tickers],
+            strategy_params=strategy_params or {},
+            risk_params=risk_params or {},
+            cost_params=cost_params or {},
+            rebalancing_params=rebalancing_params or {},
+            start=pd.Timestamp(start_date or config.START_DATE).date().isoformat(),
+            end=pd.Timestamp(end_date or config.END_DATE).date().isoformat(),
+            initial_capital=float(self.initial_capital),
+            data_version=self.data_version(),
+        )
+
+    def prepare_data(self,
+                     tickers: List[str],
+                     start_date: Optional[str] = None,
+                     end_date: Optional[str] = None,
+                     warmup_bars: Optional[int] = None) -> PreparedData:
+        """
+        Loads the tickers and builds the backtest panel once, for reuse across many simulations.
+
+        Args:
+            tickers (List[str]): Requested tickers.
+            start_date (Optional[str]): Backtest start (YYYY-MM-DD). Defaults to config.START_DATE.
+            end_date (Optional[str]): Backtest end (YYYY-MM-DD). Defaults to config.END_DATE.
+            warmup_bars (Optional[int]): History kept before the start for indicators
+                                         (see ``BaseStrategy.warmup_bars``). None keeps the full history.
+
+        Returns:
+            PreparedData: Prepared panel and per-ticker data.
+
+        Raises:
+            DataError: If no selected ticker has data in the requested window.
+        """
+        if not self._pinned_data_loader:
+            self.data_loader = get_shared_data_loader(config.DATA_PATH)
+        if not tickers:
+            raise DataError("No tickers provided")
+
+        ohlcv_cols = ['Open', 'High', 'Low', 'Close', 'Volume']
+        ticker_data = self.data_loader.load_tickers(tickers)
+        valid_tickers = [t for t in tickers if t in ticker_data and not ticker_data[t].empty and all(col in ticker_data[t].columns for col in ohlcv_cols)]
+        if not valid_tickers:
+            raise DataError(f"None of selected tickers {tickers} have valid data.")
+
+        start = pd.to_datetime(start_date or config.START_DATE).tz_localize(None)
+        end = pd.to_datetime(end_date or config.END_DATE).tz_localize(None)
+        ticker_data = self._slice_history({ticker: ticker_data[ticker] for ticker in valid_tickers}, start, end, warmup_bars)
+        return self.prepare_ticker_data(ticker_data, start, end)
+
+    def prepare_ticker_data(self,
+                            ticker_data: Dict[str, pd.DataFrame],
+                            start: pd.Timestamp,
+                            end: pd.Timestamp) -> PreparedData:
+        """
+        Builds PreparedData from already loaded OHLCV frames.
+
+        Args:
+            ticker_data (Dict[str, pd.DataFrame]): Valid OHLCV frames keyed by ticker, in ticker order.
+            start (pd.Timestamp): First backtest date (inclusive).
+            end (pd.Timestamp): Last backtest date (inclusive).
+
+        Returns:
+            PreparedData: Prepared panel and per-ticker data.
+
+        Raises:
+            DataError: If the window contains no dates.
+        """
+        ohlcv_cols = ['Open', 'High', 'Low', 'Close', 'Volume']
+        tickers = list(ticker_data)
+        panel_data = {ticker: ticker_data[ticker][ohlcv_cols] for ticker in tickers}
+        combined_df, combined_df_filtered, backtest_range = self._build_combined_panel(panel_data, start, end)
+        if backtest_range.empty:
+            raise DataError(f"No data in date range: {start} to {end}")
+
+        return PreparedData(
+            tickers=tickers,
+            ticker_data=dict(ticker_data),
+            combined_index=combined_df.index,
+            panel=combined_df_filtered,
+            dates=backtest_range,
+            simulation_panel=build_simulation_panel(combined_df_filtered, {}, tickers)
+        )
+
+    def simulate_signals(self,
+                         prepared: PreparedData,
+                         signals: np.ndarray,
+                         risk_params: Optional[Dict[str, Any]] = None,
+                         cost_params: Optional[Dict[str, Any]] = None,
+                         rebalancing_params: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Runs the portfolio simulation for precomputed signals on prepared data.
+
+        Args:
+            prepared (PreparedData): Output of ``prepare_data``.
+            signals (np.ndarray): Signal matrix (len(prepared.dates) x len(prepared.tickers)),
+                                  1 = buy, -1 = sell, 0 = none.
+            risk_params (Optional[Dict[str, Any]]): RiskManager configuration.
+            cost_params (Optional[Dict[str, Any]]): Commission/slippage configuration.
+            rebalancing_params (Optional[Dict[str, Any]]): Rebalancing configuration.
+
+        Returns:
+            Tuple[Dict[str, Any], Dict[str, Any]]: (combined_results, stats) as returned by run_backtest.
+        """
+        risk_params = risk_params or {}
+        risk_manager = RiskManager(risk_params)
+        portfolio_manager = PortfolioManager(
+            initial_capital=self.initial_capital,
+            risk_manager=risk_manager,
+            cost_params=cost_params or {},
+            rebalancing_params=rebalancing_params or {}
+        )
+
+        market_favorable = self._prepare_market_regime(risk_params, risk_manager, prepared.dates)
+
+        rejected_signal_counts = self._new_rejection_counts()
+        total_signals_considered = run_array_simulation(
+            prepared.simulation_panel.with_signals(signals), portfolio_manager, rejected_signal_counts,
+            market_favorable=market_favorable
+        )
+        return self._finalize_results(
+            portfolio_manager, prepared.panel, prepared.dates, prepared.tickers,
+            rejected_signal_counts, total_signals_considered
+        )
+
+    def build_simulation_context(self,
+                                 prepared: PreparedData,
+                                 risk_params: Optional[Dict[str, Any]] = None) -> SimulationContext:
+        """
+        Prepares the market filter and benchmark series for batches of simulations.
+
+        Args:
+            prepared (PreparedData): Output of ``prepare_data``.
+            risk_params (Optional[Dict[str, Any]]): RiskManager configuration.
+
+        Returns:
+            SimulationContext: Market filter and benchmark aligned with ``prepared.dates``.
+        """
+        risk_params = risk_params or {}
+        market_favorable = self._prepare_market_regime(risk_params, RiskManager(risk_params), prepared.dates)
+        benchmark = self._get_benchmark_data(pd.DatetimeIndex(prepared.dates, name='date'))
+        return SimulationContext(market_favorable=market_favorable, benchmark=benchmark)
+
+    def simulate_scenarios(self,
+                           prepared: PreparedData,
+                           signal_tensor: np.ndarray,
+                           risk_params: Optional[Dict[str, Any]] = None,
+                           cost_params: Optional[Dict[str, Any]] = None,
+                           context: Optional[SimulationContext] = None,
+                           cancel_token: Optional[CancellationToken] = None) -> ScenarioResults:
+        """
+        Runs the lockstep simulation and returns the raw per-scenario arrays (no statistics).
+
+        Args:
+            prepared (PreparedData): Output of ``prepare_data``.
+            signal_tensor (np.ndarray): Signals of shape (K, len(prepared.dates), len(prepared.tickers)).
+            risk_params (Optional[Dict[str, Any]]): RiskManager configuration.
+            cost_params (Optional[Dict[str, Any]]): Commission/slippage configuration.
+            context (Optional[SimulationContext]): Output of ``build_simulation_context``; built here if None.
+            cancel_token (Optional[CancellationToken]): Checked every simulated day.
+
+        Returns:
+            ScenarioResults: Equity curves, trades and rejection counters per scenario.
+        """
+        risk_params = risk_params or {}
+        if context is None:
+            context = self.build_simulation_context(prepared, risk_params)
+        return run_multi_scenario_simulation(
+            prepared.simulation_panel, signal_tensor, RiskManager(risk_params), cost_params or {},
+            self.initial_capital, market_favorable=context.market_favorable, cancel_token=cancel_token
+        )
+
+    def slice_prepared(self,
+                       prepared: PreparedData,
+                       context: SimulationContext,
+                       start: int,
+                       stop: int) -> Tuple[PreparedData, SimulationContext]:
+        """
+        Restricts prepared data to a sub-window of its backtest dates.
+
+        A simulation on the slice equals a fresh backtest of that window, as
+        long as ``prepared`` kept enough warm-up history for the signals.
+
+        Args:
+            prepared (PreparedData): Prepared data covering the window.
+            context (SimulationContext): Context built for ``prepared``.
+            start (int): First date position (inclusive) in ``prepared.dates``.
+            stop (int): Last date position (exclusive) in ``prepared.dates``.
+
+        Returns:
+            Tuple[PreparedData, SimulationContext]: Window data and its context. The benchmark is the
+                                                    context's series sliced and rebased to the window, so
+                                                    no price data is read.
+        """
+        window = slice(start, stop)
+        dates = prepared.dates[window]
+        sim = prepared.simulation_panel
+        window_prepared = PreparedData(
+            tickers=prepared.tickers,
+            ticker_data=prepared.ticker_data,
+            combined_index=prepared.combined_index,
+            panel=prepared.panel.iloc[window],
+            dates=dates,
+            simulation_panel=replace(sim, dates=dates, close=sim.close[window], signals=sim.signals[window])
+        )
+        window_context = SimulationContext(
+            market_favorable=None if context.market_favorable is None else context.market_favorable[window],
+            benchmark=self._rebase_benchmark(context.benchmark, window)
+        )
+        return window_prepared, window_context
+
+    def _rebase_benchmark(self, benchmark: Optional[pd.Series], window: slice) -> Optional[pd.Series]:
+        """Slices a benchmark value series and rescales it to start at the initial capital (no data loading)."""
+        if benchmark is None:
+            return None
+        window_benchmark = benchmark.iloc[window]
+        if window_benchmark.empty or not window_benchmark.iloc[0] > 0:
+            logger.warning("Benchmark cannot be rebased to the window; leaving it out.")
+            return None
+        return window_benchmark * (self.initial_capital / window_benchmark.iloc[0])
+
+    def simulate_signals_batch(self,
+                               prepared: PreparedData,
+                               signal_tensor: np.ndarray,
+                               risk_params: Optional[Dict[str, Any]] = None,
+                               cost_params: Optional[Dict[str, Any]] = None,
+                               context: Optional[SimulationContext] = None,
+                               cancel_token: Optional[CancellationToken] = None) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """
+        Simulates K signal matrices in lockstep, sharing the risk and cost settings.
+
+        Equivalent to calling ``simulate_signals`` once per scenario, but the
+        portfolios advance together through ``run_multi_scenario_simulation``
+        and the benchmark series is built only once.
+
+        Args:
+            prepared (PreparedData): Output of ``prepare_data``.
+            signal_tensor (np.ndarray): Signals of shape (K, len(prepared.dates), len(prepared.tickers)).
+            risk_params (Optional[Dict[str, Any]]): RiskManager configuration.
+            cost_params (Optional[Dict[str, Any]]): Commission/slippage configuration.
+            context (Optional[SimulationContext]): Output of ``build_simulation_context``; built here if None.
+            cancel_token (Optional[CancellationToken]): Checked every simulated day and per scenario.
+
+        Returns:
+            List[Tuple[Dict[str, Any], Dict[str, Any]]]: (combined_results, stats) per scenario.
+        """
+        risk_params = risk_params or {}
+        if context is None:
+            context = self.build_simulation_context(prepared, risk_params)
+        scenarios = self.simulate_scenarios(prepared, signal_tensor, risk_params, cost_params, context, cancel_token)
+
+        value_index = pd.DatetimeIndex(prepared.dates, name='date')
+        benchmark_value_series = context.benchmark
+        # Performance metrics of all equity curves in one vectorized pass
+        performance_table = compute_performance_stats_batch(
+            scenarios.equity, value_index, benchmark_value_series, risk_free_rate=config.RISK_FREE_RATE,
+            initial_value=self.initial_capital
+        )
+        performance = performance_table.astype(object).where(performance_table.notna(), None).to_dict('records')
+        outputs = []
+        for k in range(scenarios.n_scenarios):
+            raise_if_cancelled(cancel_token)
+            portfolio_value_series = pd.Series(scenarios.equity[k], index=value_index, name="Portfolio")
+            combined_results = {'Portfolio_Value': portfolio_value_series, 'Benchmark': benchmark_value_series, 'trades': scenarios.trades_for(k)}
+            stats = self._calculate_portfolio_stats(
+                combined_results, scenarios.rejected_counts_for(k), int(scenarios.total_signals[k]), performance=performance[k]
+            )
+            outputs.append((combined_results, stats))
+        return outputs
+
+    @staticmethod
+    def _new_rejection_counts() -> Dict[str, int]:
+        """Returns zeroed signal rejection counters."""
+        return {
+            'insufficient_cash': 0,
+            'risk_rejected_size': 0,
+            'max_positions_reached': 0,
+            'position_exists': 0,
+            'invalid_price': 0,
+            'missing_data': 0,
+            'market_filter': 0, # Count signals skipped due to market filter
+            'other': 0 # Catch-all for unexpected reasons
+        }
+
+    @staticmethod
+    def _slice_history(ticker_data: Dict[str, pd.DataFrame],
+                       start: pd.Timestamp,
+                       end: pd.Timestamp,
+                       warmup_bars: Optional[int]) -> Dict[str, pd.DataFrame]:
+        """
+        Restricts each ticker's history to ``warmup_bars`` rows before ``start`` through ``end``.
+
+        Args:
+            ticker_data (Dict[str, pd.DataFrame]): Date-sorted OHLCV frames per ticker.
+            start (pd.Timestamp): Backtest start.
+            end (pd.Timestamp): Backtest end.
+            warmup_bars (Optional[int]): Rows kept before ``start``; None returns the data unchanged.
+
+        Returns:
+            Dict[str, pd.DataFrame]: Sliced frames (views where pandas allows).
+        """
+        if warmup_bars is None:
+            return ticker_data
+        sliced = {}
+        for ticker, frame in ticker_data.items():
+            index = pd.DatetimeIndex(frame.index)
+            if index.tz is not None:
+                index = index.tz_localize(None)
+            if not index.is_monotonic_increasing:
+                sliced[ticker] = frame
+                continue
+            first = max(0, index.searchsorted(start, side='left') - warmup_bars)
+            last = index.searchsorted(end, side='right')
+            sliced[ticker] = frame.iloc[first:last]
+        return sliced
+
+    @staticmethod
+    def _build_combined_panel(panel_data: Dict[str, pd.DataFrame],
+                              start_date: pd.Timestamp,
+                              end_date: pd.Timestamp) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DatetimeIndex]:
+        """Concatenates per-ticker OHLCV frames into a (ticker, field) panel and restricts it to the window."""
+        combined_df = pd.concat(panel_data, axis=1, keys=panel_data.keys()); combined_df.index = pd.to_datetime(combined_df.index).tz_localize(None); combined_df = combined_df.sort_index()
+        combined_df_filtered = combined_df.loc[start_date:end_date]; backtest_range = combined_df_filtered.index.unique()
+        return combined_df, combined_df_filtered, backtest_range
+
+    def _prepare_market_regime(self,
+                               risk_params: Dict[str, Any],
+                               risk_manager: RiskManager,
+                               dates: pd.DatetimeIndex) -> Optional[np.ndarray]:
+        """Returns the 'market favorable' array over ``dates`` (see ``src.core.market_regime``), or None if the filter is off or benchmark data is unavailable."""
+        if not risk_params.get('use_market_filter', False):
+            return None
+        try:
+            regime = regime_filter_from_params(risk_params, risk_manager)
+            spy_data_df = self.data_loader.load_benchmark_data_df()
+            if spy_data_df is None or spy_data_df.empty:
+                logger.warning("Benchmark data for market filter not found. Disabling filter.")
+                return None
+            spy_close = spy_data_df['Close'].copy(); spy_close.index = pd.to_datetime(spy_close.index).tz_localize(None)
+            market_favorable = evaluate_regime(regime, spy_close, pd.DatetimeIndex(dates))
+            logger.info(f"Market filter prepared ({regime}): favorable on {int(market_favorable.sum())}/{len(market_favorable)} days.")
+            return market_favorable
+        except Exception as e:
+            logger.warning(f"Error preparing market filter data: {e}. Disabling filter.", exc_info=True)
+            return None
+
+    def _finalize_results(self,
+                          portfolio_manager: PortfolioManager,
+                          combined_df_filtered: pd.DataFrame,
+                          backtest_range: pd.DatetimeIndex,
+                          valid_tickers: List[str],
+                          rejected_signal_counts: Dict[str, int],
+                          total_signals_considered: int,
+                          profiler: Optional[RunProfiler] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Closes remaining positions on the last date and builds (combined_results, stats)."""
+        profiler = profiler or NULL_PROFILER
+        final_date = backtest_range[-1]
+        try:
+             final_market_data_slice = combined_df_filtered.loc[[final_date]]
+             final_prices_dict = {
+                ticker: final_market_data_slice.loc[final_date, (ticker, 'Close')] 
+                if (ticker, 'Close') in final_market_data_slice.columns and pd.notna(final_market_data_slice.loc[final_date, (ticker, 'Close')]) 
+                else (portfolio_manager.positions[ticker].entry_price if ticker in portfolio_manager.positions else np.nan) 
+                for ticker in valid_tickers 
+             }
+             final_prices_dict_valid = {k: v for k, v in final_prices_dict.items() if pd.notna(v)}
+             portfolio_manager.close_all_positions(final_prices_dict_valid, final_date, reason="end_of_backtest")
+        except Exception as final_close_err: 
+            logger.error(f"Error during final position closure: {final_close_err}", exc_info=True)
+
+        if not portfolio_manager.portfolio_value_history: 
+            logger.error("Portfolio history empty.")
+            portfolio_manager.portfolio_value_history.append((backtest_range[0] if not backtest_range.empty else pd.Timestamp.now().normalize(), self.initial_capital))
+            if backtest_range.empty: 
+                portfolio_manager.portfolio_value_history.append((pd.Timestamp.now().normalize() + pd.Timedelta(days=1), self.initial_capital))
+
+        portfolio_df = pd.DataFrame(portfolio_manager.portfolio_value_history, columns=['date', 'value']).set_index('date')
+        portfolio_value_series = portfolio_df['value'].sort_index(); portfolio_value_series.name = "Portfolio"
+        
+        if portfolio_value_series.empty: 
+            logger.error("Portfolio value series is unexpectedly empty after history check.")
+            return {'trades': portfolio_manager.closed_trades, 'Portfolio_Value': pd.Series([self.initial_capital], index=[pd.Timestamp.now().normalize()])}, {'Initial Capital': self.initial_capital, 'Final Capital': self.initial_capital, 'total_trades': 0, "error": "Portfolio value series empty"}
+
+        with profiler.phase("benchmark"):
+            benchmark_value_series = self._get_benchmark_data(portfolio_value_series.index)
+        combined_results = {'Portfolio_Value': portfolio_value_series, 'Benchmark': benchmark_value_series, 'trades': portfolio_manager.closed_trades}
+        with profiler.phase("metrics"):
+            stats = self._calculate_portfolio_stats(combined_results, rejected_signal_counts, total_signals_considered)
+        return combined_results, stats
+
+    def _run_legacy_loop(self,
+                         backtest_range: pd.DatetimeIndex,
+                         combined_df_filtered: pd.DataFrame,
+                         valid_tickers: List[str],
+                         all_signals: Dict[str, pd.DataFrame],
+                         portfolio_manager: PortfolioManager,
+                         rejected_signal_counts: Dict[str, int],
+                         market_favorable: Optional[np.ndarray],
+                         progress_callback: Optional[callable],
+                         progress_start: int,
+                         progress_range: int,
+                         partial_callback: Optional[callable] = None,
+                         cancel_token: Optional[CancellationToken] = None) -> int:
+        """Original per-day pandas loop, kept for comparison with the array-backed core. Returns the number of entry signals considered."""
+        total_signals_considered = 0 # Count entry signals encountered
+        publisher = PartialResultsPublisher(partial_callback, portfolio_manager) if partial_callback else None
+
+        num_days = len(backtest_range)
+        loop_progress_updates = 20 
+        update_interval = max(1, num_days // loop_progress_updates) 
+
+        for i, current_date in enumerate(backtest_range):
+            raise_if_cancelled(cancel_token)
+            try:
+                current_market_slice = combined_df_filtered.loc[[current_date]]
+
+                is_market_favorable = True if market_favorable is None else bool(market_favorable[i])
+
+                current_prices_dict = {ticker: current_market_slice.loc[current_date, (ticker, 'Close')] for ticker in portfolio_manager.positions.keys() if (ticker, 'Close') in current_market_slice.columns and pd.notna(current_market_slice.loc[current_date, (ticker, 'Close')])}
+                for ticker in portfolio_manager.positions.keys():
+                     if ticker not in current_prices_dict:
+                          last_known_price = portfolio_manager.positions[ticker].entry_price
+                          logger.warning(f"Using last known price (${last_known_price:.2f}) for stop/exit check for {ticker} on {current_date}")
+                          current_prices_dict[ticker] = last_known_price
+
+                if current_prices_dict: portfolio_manager.update_positions_and_stops(current_prices_dict, current_date)
+
+                if is_market_favorable:
+                    for ticker in valid_tickers:
+                        if ticker in all_signals:
+                            try: signal_value = all_signals[ticker].loc[current_date, 'Signal']
+                            except (KeyError, IndexError): signal_value = 0
+
+                            if signal_value > 0: 
+                                total_signals_considered += 1
+                                if ticker not in portfolio_manager.positions:
+                                    try:
+                                        entry_price = combined_df_filtered.loc[current_date, (ticker, 'Close')]
+                                        if pd.isna(entry_price) or entry_price <= 0: 
+                                            rejected_signal_counts['invalid_price'] += 1
+                                            continue
+
+                                        calculated_volatility = None
+
+                                        signal_data = {
+                                            'ticker': ticker, 'date': current_date, 'price': entry_price,
+                                            'direction': 1, 'volatility': calculated_volatility
+                                        }
+                                        rejection_reason = portfolio_manager.open_position(signal_data)
+                                        if rejection_reason:
+                                            if rejection_reason in rejected_signal_counts:
+                                                rejected_signal_counts[rejection_reason] += 1
+                                            else:
+                                                rejected_signal_counts['other'] += 1
+
+                                    except KeyError: 
+                                        logger.warning(f"Could not get price for {ticker} on {current_date} for buy signal.")
+                                        rejected_signal_counts['missing_data'] += 1
+                                        continue
+                                    except Exception as sig_proc_e: 
+                                        logger.error(f"Error processing buy signal for {ticker} on {current_date}: {sig_proc_e}", exc_info=True)
+                                        rejected_signal_counts['other'] += 1
+                                        continue
+                                else:
+                                    rejected_signal_counts['position_exists'] += 1
+
+                            elif signal_value < 0 and ticker in portfolio_manager.positions:
+                                try:
+                                    exit_price = combined_df_filtered.loc[current_date, (ticker, 'Close')]
+                                    if pd.isna(exit_price) or exit_price <= 0: logger.warning(f"Invalid exit price ({exit_price}) for {ticker} on {current_date}. Skipping close."); continue
+                                    portfolio_manager.close_position(ticker, exit_price, current_date, reason="signal")
+                                except KeyError: logger.warning(f"Could not get price for {ticker} on {current_date} for sell signal."); continue
+                                except Exception as sig_proc_e: logger.error(f"Error processing sell signal for {ticker} on {current_date}: {sig_proc_e}", exc_info=True); continue
+                else:
+                    for ticker in valid_tickers:
+                        if ticker in all_signals:
+                            try: signal_value = all_signals[ticker].loc[current_date, 'Signal']
+                            except (KeyError, IndexError): signal_value = 0
+                            if signal_value > 0: 
+                                rejected_signal_counts['market_filter'] += 1
+
+                eod_prices_dict = {ticker: current_market_slice.loc[current_date, (ticker, 'Close')] for ticker in valid_tickers if (ticker, 'Close') in current_market_slice.columns and pd.notna(current_market_slice.loc[current_date, (ticker, 'Close')])}
+                for ticker in portfolio_manager.positions.keys():
+                    if ticker not in eod_prices_dict:
+                        last_known_price = portfolio_manager.positions[ticker].entry_price
+                        logger.warning(f"Using last known price (${last_known_price:.2f}) for EOD valuation for {ticker} on {current_date}")
+                        eod_prices_dict[ticker] = last_known_price
+                current_portfolio_value = portfolio_manager.update_portfolio_value(eod_prices_dict, current_date)
+
+            except KeyError as date_err: logger.warning(f"Market data potentially missing for date {current_date}. Error: {date_err}. Carrying forward value."); last_value = portfolio_manager.portfolio_value_history[-1][1] if portfolio_manager.portfolio_value_history else self.initial_capital; portfolio_manager.portfolio_value_history.append((current_date, last_value)); continue
+            except Exception as loop_err: logger.error(f"Error in backtest loop for date {current_date}: {loop_err}", exc_info=True); continue
+            
+            if progress_callback and num_days > 0 and (i + 1) % update_interval == 0 :
+                current_progress = progress_start + int(((i + 1) / num_days) * progress_range)
+                progress_callback((current_progress, f"Simulating: Day {i+1}/{num_days}..."))
+            if publisher and (i + 1) % update_interval == 0: publisher.publish()
+
+        if publisher: publisher.publish()
+        return total_signals_considered
+
     def _get_benchmark_data(self, target_index: pd.DatetimeIndex) -> Optional[pd.Series]:
         """Get benchmark data aligned with the target portfolio index."""
         if target_index.empty: logger.warning("Cannot get benchmark data for empty target index."); return None
@@ -365,22 +851,18 @@ class BacktestManager:
             return benchmark_portfolio
         except Exception as e: logger.error(f"Error loading/processing benchmark data: {str(e)}", exc_info=True); return None
 
-    def _calculate_portfolio_stats(self, results: Dict[str, Any], rejected_counts: Dict[str, int], total_signals: int) -> Dict[str, Any]:
-        """Calculate portfolio performance statistics, including signal rejection details."""
+    def _calculate_portfolio_stats(self, results: Dict[str, Any], rejected_counts: Dict[str, int], total_signals: int,
+                                   performance: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Calculate portfolio performance statistics, including signal rejection details. ``performance`` is a precomputed ``compute_performance_stats`` bundle (e.g. a row of the batched table)."""
         portfolio_series = results.get('Portfolio_Value'); benchmark_series = results.get('Benchmark'); trades = results.get('trades', [])
         if portfolio_series is None or portfolio_series.empty or len(portfolio_series) < 2: logger.warning("Cannot calculate stats, Portfolio_Value series invalid."); base_stats = {'Initial Capital': self.initial_capital, 'Final Capital': self.initial_capital, 'total_trades': len(trades)}; base_stats.update(calculate_trade_statistics(trades)); return base_stats
-        stats = {}; stats['Initial Capital'] = self.initial_capital; stats['Final Capital'] = portfolio_series.iloc[-1]; stats['Total Return'] = ((stats['Final Capital'] / stats['Initial Capital']) - 1) * 100; stats['CAGR'] = calculate_cagr(portfolio_series) * 100 if calculate_cagr(portfolio_series) is not None else None
-        stats['Max Drawdown'] = calculate_max_drawdown(portfolio_series) * 100 if calculate_max_drawdown(portfolio_series) is not None else None
-        stats['Calmar Ratio'] = calculate_calmar_ratio(portfolio_series)
-        returns_series = calculate_return_series(portfolio_series).dropna()
-        if not returns_series.empty:
-             risk_free_rate_annual = config.RISK_FREE_RATE; stats['Annualized Volatility'] = calculate_annualized_volatility(returns_series) * 100 if calculate_annualized_volatility(returns_series) is not None else None; stats['Sharpe Ratio'] = calculate_sharpe_ratio(portfolio_series, risk_free_rate=risk_free_rate_annual); stats['Sortino Ratio'] = calculate_sortino_ratio(portfolio_series, risk_free_rate=risk_free_rate_annual)
-             if benchmark_series is not None and not benchmark_series.empty and len(benchmark_series) > 1:
-                 common_index = portfolio_series.index.intersection(benchmark_series.index)
-                 if len(common_index) > 1: portfolio_aligned, benchmark_aligned = portfolio_series[common_index], benchmark_series[common_index]; stats['Alpha'] = calculate_alpha(portfolio_aligned, benchmark_aligned, risk_free_rate=risk_free_rate_annual); stats['Beta'] = calculate_beta(portfolio_aligned, benchmark_aligned); stats['Information Ratio'] = calculate_information_ratio(portfolio_aligned, benchmark_aligned)
-                 else: logger.warning("Could not align benchmark for Alpha/Beta/InfoRatio."); stats['Alpha'], stats['Beta'], stats['Information Ratio'] = None, None, None
-             else: stats['Alpha'], stats['Beta'], stats['Information Ratio'] = None, None, None
-        else: stats['Annualized Volatility'], stats['Sharpe Ratio'], stats['Sortino Ratio'], stats['Alpha'], stats['Beta'], stats['Information Ratio'] = 0.0, 0.0, 0.0, None, None, None
+        risk_free_rate_annual = config.RISK_FREE_RATE
+        perf = performance if performance is not None else compute_performance_stats(portfolio_series, benchmark_series, risk_free_rate=risk_free_rate_annual, initial_value=self.initial_capital)
+        stats = {}; stats['Initial Capital'] = self.initial_capital; stats['Final Capital'] = portfolio_series.iloc[-1]; stats['Total Return'] = ((stats['Final Capital'] / stats['Initial Capital']) - 1) * 100; stats['CAGR'] = perf['cagr'] * 100 if perf['cagr'] is not None else None
+        stats['Max Drawdown'] = perf['max_drawdown'] * 100 if perf['max_drawdown'] is not None else None
+        stats['Calmar Ratio'] = perf['calmar_ratio']
+        stats['Annualized Volatility'] = perf['annualized_volatility'] * 100 if perf['annualized_volatility'] is not None else None; stats['Sharpe Ratio'] = perf['sharpe_ratio']; stats['Sortino Ratio'] = perf['sortino_ratio']
+        stats['Alpha'], stats['Beta'], stats['Information Ratio'] = perf['alpha'], perf['beta'], perf['information_ratio']
         trade_stats = calculate_trade_statistics(trades); stats.update(trade_stats)
         
         stats['total_entry_signals'] = total_signals
@@ -397,9 +879,7 @@ class BacktestManager:
         logger.info(f"Signal Execution Summary: Total Entry Signals={total_signals}, Executed={stats['total_executed_trades']}, Rejected={total_rejected}")
         logger.info(f"Rejection Breakdown: Cash={stats['rejected_signals_cash']}, Risk/Size={stats['rejected_signals_risk_size']}, MaxPos={stats['rejected_signals_max_pos']}, Exists={stats['rejected_signals_exists']}, Filter={stats['rejected_signals_market_filter']}, Other={stats['rejected_signals_other']}")
 
-        total_return_abs = abs(stats.get('Final Capital',0) - stats.get('Initial Capital',0)); rolling_max = portfolio_series.cummax(); drawdown_values = rolling_max - portfolio_series; max_drawdown_dollar = drawdown_values.max()
-        if max_drawdown_dollar > 0: stats['Recovery Factor'] = total_return_abs / max_drawdown_dollar
-        else: stats['Recovery Factor'] = np.inf if total_return_abs > 0 else 0.0
+        stats['Recovery Factor'] = perf['recovery_factor']
         final_stats = {k: v for k, v in stats.items() if not k.startswith('_')}
         logger.info("Portfolio statistics calculated.")
         return final_stats
\ No newline at end of file
@@ -0,0 +1,105 @@
+"""
+Cooperative cancellation of backtests and optimizer jobs.
+
+A ``CancellationToken`` is created by the caller, handed to the running work
+and checked at loop boundaries (per ticker during signal generation, per day
+in the simulation loops, per chunk in the optimizer's dispatch). ``cancel()``
+makes the next check raise ``BacktestCancelled``.
+
+Threads see the cancellation through a ``threading.Event``. Worker processes
+get a pickled copy of the token, which watches a marker file that ``cancel()``
+creates, so a process pool stops within one check interval as well. The job
+that owns the token calls ``release()`` when it ends to remove the marker.
+
+Example:
+    token = CancellationToken()
+    threading.Timer(5.0, token.cancel).start()
+    try:
+        optimizer = StrategyOptimizer(cancel_token=token)
+        optimizer.grid_search(...)
+    except BacktestCancelled:
+        ...
+"""
+
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Optional, Union
+
+from src.core.exceptions import BacktestCancelled
+
+logger = logging.getLogger(__name__)
+
+MARKER_CHECK_INTERVAL = 0.1  # Seconds between marker file checks in one process
+
+
+class CancellationToken:
+    """Cancellation flag shared between the caller, worker threads and worker processes."""
+
+    def __init__(self, marker_path: Optional[Union[str, Path]] = None):
+        """
+        Args:
+            marker_path (Optional[Union[str, Path]]): File whose existence means "cancelled".
+                                                      Defaults to a unique name in the temp directory.
+        """
+        self.marker_path = Path(marker_path) if marker_path else Path(tempfile.gettempdir()) / f"backtester-cancel-{uuid.uuid4().hex}"
+        self._event = threading.Event()
+        self._next_marker_check = 0.0
+
+    def __getstate__(self):
+        # Events cannot be pickled; worker processes rely on the marker file
+        return {'marker_path': str(self.marker_path)}
+
+    def __setstate__(self, state):
+        self.__init__(state['marker_path'])
+
+    def cancel(self) -> None:
+        """Requests cancellation of all work holding this token (or a pickled copy of it)."""
+        self._event.set()
+        try:
+            self.marker_path.touch()
+        except OSError as e:
+            logger.warning(f"Could not create cancellation marker {self.marker_path}: {e}")
+
+    def release(self) -> None:
+        """Removes the marker file once the work holding this token has finished; the token stays cancelled here."""
+        try:
+            os.remove(self.marker_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove cancellation marker {self.marker_path}: {e}")
+
+    def reset(self) -> None:
+        """Clears a previous cancellation so the token can be reused."""
+        self._event.clear()
+        self._next_marker_check = 0.0
+        self.release()
+
+    @property
+    def cancelled(self) -> bool:
+        """True once ``cancel()`` was called here or in another process."""
+        if self._event.is_set():
+            return True
+        now = time.monotonic()
+        if now >= self._next_marker_check:
+            self._next_marker_check = now + MARKER_CHECK_INTERVAL
+            if self.marker_path.exists():
+                self._event.set()
+                return True
+        return False
+
+    def raise_if_cancelled(self) -> None:
+        """Raises ``BacktestCancelled`` if cancellation was requested."""
+        if self.cancelled:
+            raise BacktestCancelled("Cancelled by request.")
+
+
+def raise_if_cancelled(token: Optional[CancellationToken]) -> None:
+    """``token.raise_if_cancelled()`` that accepts None (no cancellation)."""
+    if token is not None:
+        token.raise_if_cancelled()
@@ -18,6 +18,10 @@ class Config:
     # Assumes the CSV has columns like: Date, Ticker, Open, High, Low, Close, Volume
     DATA_PATH: str = os.environ.get("BACKTESTER_DATA_PATH", "data/historical_prices.csv")
 
+    # Convert the CSV once into a memory-mapped columnar store (data/.price_store) and load from it.
+    # Set BACKTESTER_PRICE_STORE=0 to always parse the CSV.
+    USE_PRICE_STORE: bool = os.environ.get("BACKTESTER_PRICE_STORE", "1").lower() not in ("0", "false", "no")
+
     # Ticker symbol for the benchmark index used for comparison (e.g., Alpha, Beta calculations).
     BENCHMARK_TICKER: str = os.environ.get("BACKTESTER_BENCHMARK", "SPY")
 
@@ -46,6 +50,36 @@ class Config:
     RSI_OVERBOUGHT: int = int(os.environ.get("RSI_OVERBOUGHT", 70))
     RSI_OVERSOLD: int = int(os.environ.get("RSI_OVERSOLD", 30))
 
+    # Memory budget (MB) of the process-wide indicator cache used by strategies. 0 disables caching.
+    INDICATOR_CACHE_MB: int = int(os.environ.get("BACKTESTER_INDICATOR_CACHE_MB", 256))
+
+    # Size budget (MB) of the on-disk backtest result cache. 0 disables caching.
+    RESULT_CACHE_MB: int = int(os.environ.get("BACKTESTER_RESULT_CACHE_MB", 512))
+
+    # Directory of the result cache. Empty means '.result_cache' next to the data file.
+    RESULT_CACHE_DIR: str = os.environ.get("BACKTESTER_RESULT_CACHE_DIR", "")
+
+    # --- Background Job Settings ---
+    # Backend for Dash background callbacks: 'pool' (bounded, per-user fair queue) or 'diskcache' (one process per job).
+    JOB_QUEUE_BACKEND: str = os.environ.get("BACKTESTER_JOB_QUEUE_BACKEND", "pool").lower()
+
+    # Maximum number of background jobs running at once. 0 means one per CPU core.
+    JOB_WORKERS: int = int(os.environ.get("BACKTESTER_JOB_WORKERS", 0))
+
+    # Seconds after which unread job results and progress are dropped. 0 keeps them until read.
+    JOB_RESULT_TTL_SECONDS: int = int(os.environ.get("BACKTESTER_JOB_RESULT_TTL_SECONDS", 3600))
+
+    # Request header naming the user for fair scheduling. Only set it when a trusted proxy adds the header
+    # (clients can send any header); empty groups jobs by client address.
+    JOB_USER_HEADER: str = os.environ.get("BACKTESTER_JOB_USER_HEADER", "")
+
+    # --- Profiling Settings ---
+    # JSONL file each backtest run's phase timings are appended to. Empty disables the trace file.
+    PROFILE_TRACE_PATH: str = os.environ.get("BACKTESTER_PROFILE_TRACE", "")
+
+    # Track allocations per phase with tracemalloc (slows runs down noticeably).
+    PROFILE_ALLOCATIONS: bool = os.environ.get("BACKTESTER_PROFILE_ALLOCATIONS", "0").lower() in ("1", "true", "yes")
+
     # --- Performance Calculation Settings ---
     # Annual risk-free rate used for calculations like Sharpe Ratio. (e.g., 0.02 for 2%)
     RISK_FREE_RATE: float = float(os.environ.get("RISK_FREE_RATE", 0.02))
@@ -90,7 +124,7 @@ except Exception as e:
     logger.error(traceback.format_exc())
     # Fallback to basic config or exit
     class BasicConfig: # Define a minimal fallback
-        DATA_PATH="data/historical_prices.csv"; BENCHMARK_TICKER="SPY"; START_DATE="2020-01-01"; END_DATE="2023-12-31"; INITIAL_CAPITAL=100000.0; RISK_FREE_RATE=0.02; TRADING_DAYS_PER_YEAR=252; LOG_LEVEL="INFO"
+        DATA_PATH="data/historical_prices.csv"; USE_PRICE_STORE=True; BENCHMARK_TICKER="SPY"; START_DATE="2020-01-01"; END_DATE="2023-12-31"; INITIAL_CAPITAL=100000.0; INDICATOR_CACHE_MB=256; RESULT_CACHE_MB=512; RESULT_CACHE_DIR=""; JOB_QUEUE_BACKEND="pool"; JOB_WORKERS=0; JOB_RESULT_TTL_SECONDS=3600; JOB_USER_HEADER=""; PROFILE_TRACE_PATH=""; PROFILE_ALLOCATIONS=False; RISK_FREE_RATE=0.02; TRADING_DAYS_PER_YEAR=252; LOG_LEVEL="INFO"
         MOVING_AVERAGE_SHORT=20; MOVING_AVERAGE_LONG=50; BOLLINGER_PERIOD=20; BOLLINGER_STD=2.0; RSI_PERIOD=14; RSI_OVERBOUGHT=70; RSI_OVERSOLD=30
     config = BasicConfig()
     logger.warning("Using basic fallback configuration.")
@@ -4,6 +4,7 @@ import traceback
 from pathlib import Path
 from typing import Dict, Optional, List, Union, Tuple # Dodano Union, Tuple
 import os
+import threading
 
 # Importuj konfigurację, aby uzyskać ścieżkę do danych i nazwę benchmarka
 # Zakładamy, że config.py jest w tym samym katalogu (core) lub dostępny przez src.core
@@ -20,8 +21,14 @@ except ImportError:
          class MockConfig:
              DATA_PATH = "data/historical_prices.csv"
              BENCHMARK_TICKER = "SPY"
+             USE_PRICE_STORE = True
          config = MockConfig()
 
+try:
+    from .price_store import PriceStore, to_datetime64_ns
+except ImportError:
+    from src.core.price_store import PriceStore, to_datetime64_ns
+
 
 logger = logging.getLogger(__name__)
 
@@ -29,27 +36,36 @@ class DataLoader:
     """
     Handles loading and basic preprocessing of historical financial data
     from a CSV file. Caches loaded data for efficiency.
+
+    By default the CSV is converted once into a memory-mapped columnar store
+    (see ``src.core.price_store``) and later loads read from that store.
     """
 
-    def __init__(self, data_path: Optional[Union[str, Path]] = None):
+    def __init__(self, data_path: Optional[Union[str, Path]] = None, use_price_store: Optional[bool] = None):
         """
         Initializes the DataLoader.
 
         Args:
             data_path (Optional[Union[str, Path]]): Path to the historical data CSV file.
                                                     If None, uses the path from the global config.
+            use_price_store (Optional[bool]): Read through the columnar price store instead of
+                                              parsing the CSV. If None, uses config.USE_PRICE_STORE.
         """
         self.data_path = Path(data_path or config.DATA_PATH)
+        self.use_price_store = getattr(config, 'USE_PRICE_STORE', True) if use_price_store is None else use_price_store
         self.benchmark_ticker = config.BENCHMARK_TICKER
         self._data_cache: Dict[str, pd.DataFrame] = {} # Cache dla danych tickerów
         self._full_data_cache: Optional[pd.DataFrame] = None # Cache dla całego wczytanego pliku
+        self._price_store: Optional[PriceStore] = None # Kolumnowy magazyn cen (mmap)
+        self._ticker_keys: Optional[pd.Series] = None # Tickery z pliku CSV (upper-case), liczone raz
+        self._csv_fully_split = False # Czy wszystkie tickery z CSV są już w _data_cache
         self._available_tickers: Optional[List[str]] = None # Cache dla listy tickerów
         logger.debug(f"DataLoader initialized. Data path: '{self.data_path}', Benchmark: '{self.benchmark_ticker}'")
 
 
     def _load_and_cache_full_data(self) -> bool:
-        """Loads the entire CSV data file into cache if not already loaded."""
-        if self._full_data_cache is not None:
+        """Loads the entire CSV data file (or its columnar store) into cache if not already loaded."""
+        if self._full_data_cache is not None or self._price_store is not None:
             return True # Already cached
 
         if not self.data_path.exists():
@@ -59,6 +75,15 @@ class DataLoader:
              logger.error(f"Specified path is not a file: {self.data_path}")
              return False
 
+        if self.use_price_store:
+            try:
+                self._price_store = PriceStore.open_or_build(self.data_path)
+                logger.debug(f"Using columnar price store at: {self._price_store.path}")
+                return True
+            except Exception as e:
+                logger.warning(f"Could not use columnar price store for '{self.data_path}': {e}. Falling back to CSV.")
+                self._price_store = None
+
         try:
             logger.debug(f"Loading historical data from: {self.data_path}...")
             # Kluczowe kolumny: Date, Ticker, Open, High, Low, Close, Volume
@@ -83,6 +108,7 @@ class DataLoader:
                  except Exception as date_err:
                       logger.error(f"Failed to convert 'Date' column to datetime: {date_err}")
                       return False
+            df['Date'] = to_datetime64_ns(df['Date']) # Same unit as the price store on any pandas version
 
             # Cache the full dataframe
             self._full_data_cache = df
@@ -100,61 +126,100 @@ class DataLoader:
             return False
 
 
+    def _split_ticker_frames(self, tickers: Optional[List[str]] = None) -> None:
+        """
+        Splits the full CSV frame into per-ticker OHLCV frames in a single group-by pass
+        and stores them in the ticker cache.
+
+        Args:
+            tickers (Optional[List[str]]): Upper-case tickers to prepare. If None, prepares every ticker
+                                           in the file.
+        """
+        df = self._full_data_cache
+        if self._ticker_keys is None:
+            self._ticker_keys = df['Ticker'].astype(str).str.upper() # Upper-case once per file
+
+        ohlcv_cols = ['Open', 'High', 'Low', 'Close', 'Volume']
+        keys = self._ticker_keys
+        if tickers is not None:
+            mask = keys.isin(tickers)
+            df, keys = df[mask], keys[mask]
+
+        # Convert columns to numeric once for all tickers, coercing errors
+        ohlcv = df[ohlcv_cols].apply(pd.to_numeric, errors='coerce')
+        ohlcv.index = pd.DatetimeIndex(df['Date'], name='Date')
+
+        for ticker, ticker_df in ohlcv.groupby(keys.to_numpy(), sort=False):
+            if ticker in self._data_cache:
+                continue
+            # Sort by date (important for time series analysis)
+            self._data_cache[ticker] = ticker_df.sort_index()
+
+        if tickers is None:
+            self._csv_fully_split = True
+
+
     def _prepare_ticker_data(self, ticker: str) -> Optional[pd.DataFrame]:
         """Prepares and caches data for a specific ticker from the full dataset."""
-        if self._full_data_cache is None:
-            if not self._load_and_cache_full_data():
-                return None # Failed to load base data
+        if not self._load_and_cache_full_data():
+            return None # Failed to load base data
 
+        ticker = ticker.upper()
         if ticker in self._data_cache:
             return self._data_cache[ticker] # Return from cache
 
-        # Filter data for the specific ticker
-        ticker_df = self._full_data_cache[self._full_data_cache['Ticker'].str.upper() == ticker.upper()].copy()
+        if self._price_store is not None:
+            ticker_df = self._price_store.ticker_frame(ticker)
+            if ticker_df is not None:
+                self._data_cache[ticker] = ticker_df
+            return ticker_df
 
-        if ticker_df.empty:
-            # logger.warning(f"No data found for ticker '{ticker}' in the loaded file.")
+        if self._csv_fully_split:
             return None # Ticker not found or has no data
 
         try:
-            # Set 'Date' as index
-            ticker_df.set_index('Date', inplace=True)
-
-            # Ensure index is DatetimeIndex (should be due to parse_dates)
-            if not isinstance(ticker_df.index, pd.DatetimeIndex):
-                 logger.warning(f"Index for ticker {ticker} is not DatetimeIndex after setting. Attempting conversion.")
-                 ticker_df.index = pd.to_datetime(ticker_df.index)
+            # One pass over the file prepares every ticker, later lookups hit the cache
+            self._split_ticker_frames()
+            return self._data_cache.get(ticker)
+        except Exception as e:
+            logger.error(f"Error preparing data for ticker '{ticker}': {str(e)}")
+            logger.error(traceback.format_exc())
+            return None
 
-            # Select standard OHLCV columns
-            ohlcv_cols = ['Open', 'High', 'Low', 'Close', 'Volume']
-            if not all(col in ticker_df.columns for col in ohlcv_cols):
-                 logger.error(f"Data for {ticker} missing one or more OHLCV columns.")
-                 return None
 
-            ticker_df = ticker_df[ohlcv_cols]
+    def load_tickers(self, tickers: List[str]) -> Dict[str, pd.DataFrame]:
+        """
+        Loads and caches data only for the requested tickers.
 
-            # Convert columns to numeric, coercing errors
-            for col in ohlcv_cols:
-                ticker_df[col] = pd.to_numeric(ticker_df[col], errors='coerce')
+        Args:
+            tickers (List[str]): Ticker symbols (case-insensitive).
 
-            # Sort by date (important for time series analysis)
-            ticker_df.sort_index(inplace=True)
+        Returns:
+            Dict[str, pd.DataFrame]: Mapping of the requested ticker symbols to their prepared
+                                     DataFrames. Tickers without data are omitted.
+        """
+        if not self._load_and_cache_full_data():
+            return {} # Failed to load base data
 
-            # Handle potential NaNs introduced by coercion (optional: fill or drop?)
-            # For now, let strategies handle NaNs if necessary.
-            # num_nan = ticker_df.isnull().sum().sum()
-            # if num_nan > 0:
-            #     logger.warning(f"Ticker {ticker}: Found {num_nan} NaN values after numeric conversion.")
+        if self._price_store is None and not self._csv_fully_split:
+            missing = sorted({t.upper() for t in tickers} - set(self._data_cache))
+            if missing:
+                try:
+                    self._split_ticker_frames(missing)
+                except Exception as e:
+                    logger.error(f"Error preparing data for tickers {missing}: {str(e)}")
+                    logger.error(traceback.format_exc())
 
-            # Cache the prepared data
-            self._data_cache[ticker] = ticker_df
-            # logger.debug(f"Prepared and cached data for ticker '{ticker}'. Shape: {ticker_df.shape}")
-            return ticker_df
+        loaded_data = {}
+        for ticker in tickers:
+            prepared_data = self._data_cache.get(ticker.upper())
+            if prepared_data is None and self._price_store is not None:
+                prepared_data = self._prepare_ticker_data(ticker)
+            if prepared_data is not None:
+                loaded_data[ticker] = prepared_data
 
-        except Exception as e:
-            logger.error(f"Error preparing data for ticker '{ticker}': {str(e)}")
-            logger.error(traceback.format_exc())
-            return None
+        logger.info(f"Finished loading data for {len(loaded_data)}/{len(tickers)} requested tickers.")
+        return loaded_data
 
 
     def load_all_data(self) -> Dict[str, pd.DataFrame]:
@@ -173,14 +238,7 @@ class DataLoader:
              logger.warning("No available tickers found after loading data.")
              return {}
 
-        loaded_data = {}
-        for ticker in tickers_to_load:
-            prepared_data = self._prepare_ticker_data(ticker)
-            if prepared_data is not None:
-                loaded_data[ticker] = prepared_data
-
-        logger.info(f"Finished loading data for {len(loaded_data)}/{len(tickers_to_load)} requested tickers.")
-        return loaded_data
+        return self.load_tickers(tickers_to_load)
 
 
     def get_ticker_data(self, ticker: str) -> Optional[pd.DataFrame]:
@@ -225,12 +283,14 @@ class DataLoader:
         if self._available_tickers is not None:
             return self._available_tickers # Return from cache
 
-        if self._full_data_cache is None:
-            if not self._load_and_cache_full_data():
-                return [] # Failed to load data
+        if not self._load_and_cache_full_data():
+            return [] # Failed to load data
 
         try:
-            all_tickers_in_file = self._full_data_cache['Ticker'].str.upper().unique()
+            if self._price_store is not None:
+                all_tickers_in_file = self._price_store.tickers
+            else:
+                all_tickers_in_file = self._full_data_cache['Ticker'].str.upper().unique()
             # Exclude the benchmark ticker
             non_benchmark_tickers = [t for t in all_tickers_in_file if t != self.benchmark_ticker.upper()]
             self._available_tickers = sorted(non_benchmark_tickers) # Cache the list
@@ -239,6 +299,26 @@ class DataLoader:
             logger.error(f"Error extracting unique tickers from data: {e}")
             return []
 
+    def data_version(self) -> str:
+        """
+        Returns an identifier of the data file contents.
+
+        With the price store this is the store name (which embeds the CSV hash);
+        otherwise the CSV path, size and modification time.
+
+        Returns:
+            str: Version string that changes whenever the data file changes.
+        """
+        if self.use_price_store:
+            self._load_and_cache_full_data()
+        if self._price_store is not None:
+            return self._price_store.path.name
+        try:
+            stat = self.data_path.stat()
+            return f"{self.data_path.resolve()}:{stat.st_size}:{stat.st_mtime_ns}"
+        except OSError:
+            return str(self.data_path)
+
     def get_date_range(self) -> Tuple[pd.Timestamp, pd.Timestamp]:
         """
         Returns the earliest and latest dates available in the dataset.
@@ -247,12 +327,13 @@ class DataLoader:
             Tuple[pd.Timestamp, pd.Timestamp]: A tuple containing (min_date, max_date)
                                                or (None, None) if data couldn't be loaded.
         """
-        if self._full_data_cache is None:
-            if not self._load_and_cache_full_data():
-                logger.error("Failed to load data for date range retrieval")
-                return (None, None)
+        if not self._load_and_cache_full_data():
+            logger.error("Failed to load data for date range retrieval")
+            return (None, None)
         
         try:
+            if self._price_store is not None:
+                return self._price_store.date_range()
             dates = pd.to_datetime(self._full_data_cache['Date'])
             min_date = dates.min()
             max_date = dates.max()
@@ -260,3 +341,99 @@ class DataLoader:
         except Exception as e:
             logger.error(f"Error getting date range from data: {e}")
             return (None, None)
+
+
+class DataRegistry:
+    """
+    Process-wide registry of DataLoader instances keyed by data file path.
+
+    All managers and services obtain their loader from here, so the loaded
+    data and per-ticker caches are shared between backtest runs. Each lookup
+    compares the file's size and mtime with the ones seen at load time. When
+    the file has changed, one caller builds and primes a new loader outside the
+    lookup lock and swaps it in; concurrent callers get the previous loader
+    right away instead of waiting for the reload, and callers still holding
+    it keep a consistent snapshot. Only the very first load of a path blocks.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reload_locks: Dict[Path, threading.Lock] = {}
+        self._entries: Dict[Path, Tuple[Optional[Tuple[int, int]], DataLoader]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    @staticmethod
+    def _file_signature(path: Path) -> Optional[Tuple[int, int]]:
+        try:
+            stat = path.stat()
+            return (stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            return None
+
+    def get_loader(self, data_path: Optional[Union[str, Path]] = None) -> DataLoader:
+        """
+        Returns the shared DataLoader for ``data_path``, reloading it if the file changed.
+
+        Args:
+            data_path (Optional[Union[str, Path]]): Data file path. If None, uses config.DATA_PATH.
+
+        Returns:
+            DataLoader: Shared loader instance.
+        """
+        path = Path(data_path or config.DATA_PATH).resolve()
+        signature = self._file_signature(path)
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == signature:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            reload_lock = self._reload_locks.setdefault(path, threading.Lock())
+
+        if entry is None:
+            # Nothing to serve yet: wait for the first load
+            reload_lock.acquire()
+        elif not reload_lock.acquire(blocking=False):
+            # Another thread is reloading: keep serving the previous snapshot
+            return entry[1]
+        try:
+            # Another thread may have finished the same reload while we waited
+            with self._lock:
+                current = self._entries.get(path)
+                if current is not None and current[0] == signature:
+                    return current[1]
+
+            loader = DataLoader(data_path=path)
+            loader._load_and_cache_full_data() # Prime outside the registry lock
+
+            with self._lock:
+                if path in self._entries:
+                    self.reloads += 1
+                    logger.info(f"Data file '{path}' changed on disk. Reloaded shared DataLoader.")
+                self._entries[path] = (signature, loader)
+            return loader
+        finally:
+            reload_lock.release()
+
+    def stats(self) -> Dict[str, int]:
+        """Returns hit/miss/reload counters and the number of registered loaders."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'reloads': self.reloads, 'loaders': len(self._entries)}
+
+    def clear(self) -> None:
+        """Drops all shared loaders and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.reloads = 0
+
+
+# --- Process-wide registry instance ---
+data_registry = DataRegistry()
+
+
+def get_shared_data_loader(data_path: Optional[Union[str, Path]] = None) -> DataLoader:
+    """Shortcut for ``data_registry.get_loader(data_path)``."""
+    return data_registry.get_loader(data_path)
@@ -12,4 +12,9 @@ class StrategyError(BacktestError):
 
 class ValidationError(BacktestError):
     """Raised when validation fails"""
-    pass
\ No newline at end of file
+    pass
+
+
+class BacktestCancelled(BacktestError):
+    """Raised when a running backtest or optimization is cancelled"""
+    pass
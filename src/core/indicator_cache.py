@@ -0,0 +1,155 @@
+"""
+Process-wide cache for technical indicator series.
+
+Strategies ask the cache for an indicator instead of computing it directly.
+Entries are keyed by (ticker, indicator name, parameters, data fingerprint),
+so a parameter sweep that reuses the same ``SMA_20`` on the same price history
+computes it only once. The cache is bounded by a memory budget and evicts the
+least recently used entries first.
+
+Example:
+    sma = indicator_cache.get_or_compute(
+        ticker, 'ta.sma', {'length': 20}, df['Close'],
+        lambda: df.ta.sma(length=20)
+    )
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    from src.core.config import config
+    DEFAULT_MAX_BYTES = int(getattr(config, 'INDICATOR_CACHE_MB', 256) * 1024 * 1024)
+except ImportError:
+    DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+def data_fingerprint(series: pd.Series) -> str:
+    """
+    Returns a content hash of a price series (values and index).
+
+    Args:
+        series (pd.Series): Input series, typically the 'Close' column.
+
+    Returns:
+        str: Hex digest identifying the exact data the indicator is computed from.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.ascontiguousarray(series.to_numpy(dtype=np.float64, na_value=np.nan)).tobytes())
+    index = series.index
+    if isinstance(index, pd.DatetimeIndex):
+        digest.update(index.asi8.tobytes())
+    else:
+        digest.update(pd.util.hash_pandas_object(index, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class IndicatorCache:
+    """
+    Thread-safe LRU cache of indicator series bounded by total size in bytes.
+
+    Cached series are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            max_bytes (int): Memory budget for cached values. 0 disables caching.
+        """
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple, Tuple[pd.Series, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(ticker: str, name: str, params: Optional[Dict[str, Any]], fingerprint: str) -> Tuple:
+        """Builds the cache key from ticker, indicator name, parameters and data fingerprint."""
+        params_key: Tuple[Tuple[str, Hashable], ...] = tuple(sorted((params or {}).items()))
+        return (str(ticker).upper(), name, params_key, fingerprint)
+
+    def get_or_compute(self,
+                       ticker: str,
+                       name: str,
+                       params: Optional[Dict[str, Any]],
+                       source: pd.Series,
+                       compute: Callable[[], pd.Series],
+                       fingerprint: Optional[str] = None) -> pd.Series:
+        """
+        Returns a cached indicator series, computing and storing it on a miss.
+
+        Args:
+            ticker (str): Instrument ticker.
+            name (str): Indicator identifier, e.g. 'ta.sma' or 'rolling_std'.
+            params (Optional[Dict[str, Any]]): Indicator parameters (hashable values).
+            source (pd.Series): Series the indicator is computed from; used for the fingerprint.
+            compute (Callable[[], pd.Series]): Computes the indicator on a miss.
+            fingerprint (Optional[str]): Precomputed ``data_fingerprint(source)``.
+
+        Returns:
+            pd.Series: Indicator values aligned with ``source``.
+        """
+        if self.max_bytes <= 0:
+            return compute()
+
+        key = self.make_key(ticker, name, params, fingerprint or data_fingerprint(source))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Compute outside the lock; a concurrent miss on the same key just computes twice
+        result = compute()
+        if result is None:
+            return result
+        size = int(result.memory_usage(index=False, deep=False)) if isinstance(result, pd.Series) else 0
+        if size > self.max_bytes:
+            return result
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (result, size)
+                self.current_bytes += size
+                while self.current_bytes > self.max_bytes and self._entries:
+                    _, (_, evicted_size) = self._entries.popitem(last=False)
+                    self.current_bytes -= evicted_size
+                    self.evictions += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit/miss/eviction counters, hit rate and memory usage."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+    def clear(self) -> None:
+        """Drops all entries and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+
+# --- Process-wide cache instance ---
+indicator_cache = IndicatorCache()
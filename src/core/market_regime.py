@@ -0,0 +1,154 @@
+"""
+Market regime filter stage.
+
+With ``use_market_filter`` on, entry signals are only taken on days the
+market regime is favorable. The regime is evaluated once per run on the
+benchmark's full close history (so lookbacks reach back before the backtest
+start) and aligned to the backtest dates as a boolean array; the simulation
+loops only index that array. Days without a defined regime (missing benchmark
+price, lookback warm-up) count as favorable.
+
+Regime definitions are small classes with a ``favorable(close)`` method
+returning a float series of 1.0 / 0.0 / NaN. They are registered by name in
+``REGIME_FILTERS`` and selected with the ``market_filter_type`` risk parameter
+(a name or a list of names that must all be favorable):
+
+    ma_trend    close at or above its moving average (``market_trend_lookback``)
+    volatility  annualized volatility of daily returns at or below a ceiling
+    drawdown    drawdown from the running (or rolling) high within a limit
+
+Example:
+    regime = regime_filter_from_params({'market_filter_type': ['ma_trend', 'volatility']}, risk_manager)
+    market_favorable = evaluate_regime(regime, benchmark_close, backtest_dates)
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Type, Union
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REGIME = 'ma_trend'
+DEFAULT_VOLATILITY_LOOKBACK = 20
+DEFAULT_MAX_VOLATILITY = 0.30       # Annualized
+DEFAULT_MAX_DRAWDOWN = 0.10         # Fraction below the high
+TRADING_DAYS_PER_YEAR = 252
+
+
+def _as_flag(condition: pd.Series, defined: pd.Series) -> pd.Series:
+    """1.0 where ``condition`` holds, 0.0 where not, NaN where the inputs are undefined."""
+    return condition.astype(np.float64).where(defined)
+
+
+@dataclass
+class MovingAverageTrend:
+    """Favorable while the close is at or above its simple moving average."""
+    lookback: int = 200
+
+    def favorable(self, close: pd.Series) -> pd.Series:
+        moving_average = close.rolling(window=self.lookback).mean().ffill()
+        return _as_flag(close >= moving_average, close.notna() & moving_average.notna())
+
+
+@dataclass
+class VolatilityRegime:
+    """Favorable while the annualized volatility of daily returns stays at or below ``max_volatility``."""
+    lookback: int = DEFAULT_VOLATILITY_LOOKBACK
+    max_volatility: float = DEFAULT_MAX_VOLATILITY
+
+    def favorable(self, close: pd.Series) -> pd.Series:
+        returns = close.ffill().pct_change()
+        volatility = returns.rolling(window=self.lookback).std() * np.sqrt(TRADING_DAYS_PER_YEAR)
+        return _as_flag(volatility <= self.max_volatility, close.notna() & volatility.notna())
+
+
+@dataclass
+class DrawdownRegime:
+    """Favorable while the close is within ``max_drawdown`` of its high (all-time, or over ``lookback`` days)."""
+    max_drawdown: float = DEFAULT_MAX_DRAWDOWN
+    lookback: Optional[int] = None
+
+    def favorable(self, close: pd.Series) -> pd.Series:
+        filled = close.ffill()
+        high = filled.cummax() if self.lookback is None else filled.rolling(window=self.lookback, min_periods=1).max()
+        drawdown = filled / high - 1
+        return _as_flag(drawdown >= -self.max_drawdown, close.notna() & high.notna())
+
+
+@dataclass
+class AllRegimes:
+    """Favorable only where every member regime is favorable (undefined members are ignored)."""
+    regimes: List[Any]
+
+    def favorable(self, close: pd.Series) -> pd.Series:
+        flags = pd.concat([regime.favorable(close) for regime in self.regimes], axis=1)
+        return flags.min(axis=1, skipna=True)
+
+
+REGIME_FILTERS: Dict[str, Type] = {
+    'ma_trend': MovingAverageTrend,
+    'volatility': VolatilityRegime,
+    'drawdown': DrawdownRegime,
+}
+
+
+def regime_filter_from_params(risk_params: Dict[str, Any], risk_manager=None):
+    """
+    Builds the regime filter selected by the risk parameters.
+
+    Args:
+        risk_params (Dict[str, Any]): RiskManager configuration. Reads 'market_filter_type'
+                                      (name or list of names, default 'ma_trend'),
+                                      'market_volatility_lookback', 'market_max_volatility',
+                                      'market_max_drawdown' and 'market_drawdown_lookback'.
+        risk_manager (RiskManager, optional): Source of ``market_trend_lookback`` for the MA trend.
+
+    Returns:
+        A regime filter object with a ``favorable(close)`` method.
+
+    Raises:
+        ValueError: If a regime name is unknown.
+    """
+    names: Union[str, Sequence[str]] = risk_params.get('market_filter_type') or DEFAULT_REGIME
+    if isinstance(names, str):
+        names = [names]
+    regimes = []
+    for name in names:
+        if name not in REGIME_FILTERS:
+            raise ValueError(f"Unknown market filter type '{name}'. Available: {sorted(REGIME_FILTERS)}")
+        if name == 'ma_trend':
+            lookback = getattr(risk_manager, 'market_trend_lookback', None) or risk_params.get('market_trend_lookback', 200)
+            regimes.append(MovingAverageTrend(lookback=int(lookback)))
+        elif name == 'volatility':
+            regimes.append(VolatilityRegime(
+                lookback=int(risk_params.get('market_volatility_lookback', DEFAULT_VOLATILITY_LOOKBACK)),
+                max_volatility=float(risk_params.get('market_max_volatility', DEFAULT_MAX_VOLATILITY))))
+        elif name == 'drawdown':
+            lookback = risk_params.get('market_drawdown_lookback')
+            regimes.append(DrawdownRegime(
+                max_drawdown=float(risk_params.get('market_max_drawdown', DEFAULT_MAX_DRAWDOWN)),
+                lookback=int(lookback) if lookback else None))
+        else:  # Registered by another module with default parameters
+            regimes.append(REGIME_FILTERS[name]())
+    return regimes[0] if len(regimes) == 1 else AllRegimes(regimes)
+
+
+def evaluate_regime(regime, benchmark_close: pd.Series, dates: pd.DatetimeIndex) -> np.ndarray:
+    """
+    Evaluates ``regime`` on the benchmark history and aligns it to ``dates``.
+
+    Args:
+        regime: Regime filter (see ``REGIME_FILTERS``).
+        benchmark_close (pd.Series): Benchmark close prices (full history, any date index).
+        dates (pd.DatetimeIndex): Backtest dates.
+
+    Returns:
+        np.ndarray: Boolean 'market favorable' array of len(dates); undefined days are favorable.
+    """
+    close = pd.to_numeric(benchmark_close, errors='coerce').sort_index()
+    close = close[~close.index.duplicated(keep='last')]
+    flags = regime.favorable(close).reindex(dates).to_numpy(dtype=np.float64)
+    return np.isnan(flags) | (flags > 0)
@@ -0,0 +1,300 @@
+"""
+Chunked parallel execution for parameter sweeps.
+
+Running one future per parameter set pickles the whole caller (including the
+BacktestManager and its data) into every task. Here the prepared data is
+written once to a temporary columnar store (the ``PriceStore`` layout) and each
+worker process memory-maps it in its initializer, so the OS shares the pages
+between workers. Tasks are chunks of parameter sets, at most ``max_in_flight``
+chunks are queued at a time, and results are yielded as chunks finish.
+
+Example:
+    with SharedPreparedData(prepared) as shared:
+        for chunk, result, error in iter_chunk_results(
+                evaluate_chunk, chunks, n_workers=8,
+                initializer=init_worker, initargs=(shared.path,)):
+            ...
+"""
+
+import json
+import logging
+import math
+import os
+import shutil
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.core.cancellation import CancellationToken
+from src.core.price_store import PriceStore, to_datetime64_ns
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TASKS_PER_WORKER = 4   # Chunks per worker, so uneven chunks still balance
+MAX_CHUNK_SIZE = 256           # Upper bound of parameter sets simulated together
+CHUNK_MEMORY_BUDGET = 256 * 1024 * 1024  # Bytes of per-scenario arrays (signal tensor) one chunk may hold
+CANCEL_POLL_SECONDS = 0.2      # How often the dispatcher looks at the cancellation token
+
+
+def resolve_worker_count(n_jobs: int) -> int:
+    """Maps ``n_jobs`` to a worker count; values <= 0 mean one worker per CPU core."""
+    if n_jobs is None or n_jobs <= 0:
+        return os.cpu_count() or 1
+    return n_jobs
+
+
+def chunk_size_for(n_items: int, n_workers: int, max_chunk_size: int = MAX_CHUNK_SIZE,
+                   item_shape: Optional[Tuple[int, ...]] = None, itemsize: int = 1,
+                   memory_budget: int = CHUNK_MEMORY_BUDGET) -> int:
+    """
+    Chooses a chunk size that gives every worker several tasks.
+
+    A single worker gets chunks as large as allowed, since the lockstep
+    simulation pays a fixed cost per chunk. With ``item_shape`` the chunk is
+    also capped so that its per-item arrays fit in ``memory_budget``; each
+    worker holds one chunk at a time, so peak memory stays near
+    ``n_workers * memory_budget`` whatever the universe size.
+
+    Args:
+        n_items (int): Number of items to process.
+        n_workers (int): Number of workers.
+        max_chunk_size (int): Upper bound of the chunk size.
+        item_shape (Optional[Tuple[int, ...]]): Shape of the array each item needs,
+                                                e.g. (n_dates, n_tickers) of a signal matrix.
+        itemsize (int): Bytes per element of that array.
+        memory_budget (int): Bytes the arrays of one chunk may take.
+
+    Returns:
+        int: Chunk size >= 1.
+    """
+    if n_items <= 0:
+        return 1
+    if item_shape is not None:
+        item_bytes = math.prod(item_shape) * itemsize
+        if item_bytes > 0:
+            max_chunk_size = max(1, min(max_chunk_size, memory_budget // item_bytes))
+    if n_workers <= 1:
+        return min(max_chunk_size, n_items)
+    return max(1, min(max_chunk_size, math.ceil(n_items / (n_workers * DEFAULT_TASKS_PER_WORKER))))
+
+
+def make_chunks(items: Sequence[Any], size: int) -> List[List[Any]]:
+    """Splits ``items`` into consecutive lists of at most ``size`` elements."""
+    return [list(items[start:start + size]) for start in range(0, len(items), size)]
+
+
+def iter_chunk_results(task: Callable[[Any], Any],
+                       chunks: Iterable[Any],
+                       n_workers: int,
+                       use_processes: bool = True,
+                       initializer: Optional[Callable] = None,
+                       initargs: Tuple = (),
+                       max_in_flight: Optional[int] = None,
+                       cancel_token: Optional[CancellationToken] = None) -> Iterator[Tuple[Any, Any, Optional[BaseException]]]:
+    """
+    Runs ``task(chunk)`` for every chunk on a worker pool and yields results as they finish.
+
+    Args:
+        task (Callable[[Any], Any]): Picklable (module-level) function when ``use_processes`` is True.
+        chunks (Iterable[Any]): Task inputs; consumed lazily.
+        n_workers (int): Number of workers.
+        use_processes (bool): Process pool (True) or thread pool (False).
+        initializer (Optional[Callable]): Runs once in every worker before its first task.
+        initargs (Tuple): Arguments of ``initializer``.
+        max_in_flight (Optional[int]): Maximum number of submitted, unfinished chunks.
+                                       Defaults to twice the worker count. Only running
+                                       chunks allocate their arrays, so memory is bounded
+                                       by the chunk size (see ``chunk_size_for``).
+        cancel_token (Optional[CancellationToken]): On cancellation no further chunks are
+                                                    submitted, queued ones are dropped and
+                                                    ``BacktestCancelled`` is raised once the
+                                                    running ones (which should check the same
+                                                    token) have stopped.
+
+    Yields:
+        Tuple[Any, Any, Optional[BaseException]]: (chunk, result, error) in completion order.
+                                                  ``result`` is None when ``error`` is set.
+    """
+    executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    max_in_flight = max_in_flight or 2 * n_workers
+    chunk_iter = iter(chunks)
+
+    with executor_class(max_workers=n_workers, initializer=initializer, initargs=initargs) as executor:
+        pending = {executor.submit(task, chunk): chunk for chunk in islice(chunk_iter, max_in_flight)}
+        while pending:
+            done, _ = wait(pending, timeout=CANCEL_POLL_SECONDS if cancel_token else None, return_when=FIRST_COMPLETED)
+            if cancel_token is not None and cancel_token.cancelled:
+                for future in pending:
+                    future.cancel()
+                executor.shutdown(wait=True, cancel_futures=True)
+                cancel_token.raise_if_cancelled()
+            for future in done:
+                chunk = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    if cancel_token is not None and cancel_token.cancelled:
+                        continue  # The task saw the cancellation; raised below
+                    logger.error(f"Parallel task failed: {e}", exc_info=True)
+                    yield chunk, None, e
+                else:
+                    yield chunk, result, None
+            for chunk in islice(chunk_iter, len(done)):
+                pending[executor.submit(task, chunk)] = chunk
+    if cancel_token is not None:
+        cancel_token.raise_if_cancelled()
+
+
+class SharedPreparedData:
+    """
+    Read-only on-disk copy of ``PreparedData`` for worker processes.
+
+    The per-ticker OHLCV history is written as a ``PriceStore`` and the backtest
+    panel as one ``.npy`` file per column (plus the simulation close matrix) in a
+    temporary directory that is removed on ``close()``. Workers call ``load`` to
+    get an equivalent ``PreparedData`` whose frames and arrays are read-only views
+    of the memory-mapped files, so the workers share the OS pages instead of each
+    holding its own copy. The ``SimulationContext`` (market filter and benchmark)
+    travels the same way and is rebuilt with ``load_context``, so workers never
+    read the price data themselves.
+    """
+
+    META_FILE = 'prepared.json'
+
+    def __init__(self, prepared, root: Optional[Union[str, Path]] = None, context=None):
+        """
+        Args:
+            prepared (PreparedData): Data to share.
+            root (Optional[Union[str, Path]]): Parent directory of the temporary store.
+            context (Optional[SimulationContext]): Context built for ``prepared`` to share as well.
+        """
+        self.path = Path(tempfile.mkdtemp(prefix='backtester-shared-', dir=root))
+        try:
+            frames = []
+            for ticker in prepared.tickers:
+                frame = prepared.ticker_data[ticker][['Open', 'High', 'Low', 'Close', 'Volume']]
+                frames.append(frame.rename_axis('Date').reset_index().assign(Ticker=ticker))
+            PriceStore.write(pd.concat(frames, ignore_index=True), self.path / 'prices')
+
+            panel = prepared.panel
+            (self.path / 'panel').mkdir()
+            for i in range(panel.shape[1]):
+                np.save(self.path / 'panel' / f'{i}.npy', np.ascontiguousarray(panel.iloc[:, i].to_numpy()))
+            np.save(self.path / 'panel_index.npy', to_datetime64_ns(panel.index))
+            np.save(self.path / 'combined_index.npy', to_datetime64_ns(prepared.combined_index))
+            np.save(self.path / 'close.npy', np.ascontiguousarray(prepared.simulation_panel.close))
+            market_favorable = benchmark = None
+            if context is not None:
+                market_favorable, benchmark = context.market_favorable, context.benchmark
+            if market_favorable is not None:
+                np.save(self.path / 'market_favorable.npy', np.ascontiguousarray(market_favorable, dtype=bool))
+            if benchmark is not None:
+                np.save(self.path / 'benchmark.npy', np.ascontiguousarray(benchmark.to_numpy(dtype=np.float64)))
+            with open(self.path / self.META_FILE, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'tickers': list(prepared.tickers),
+                    'panel_columns': [list(col) for col in panel.columns],
+                    'panel_column_names': list(panel.columns.names),
+                    'panel_index_name': panel.index.name,
+                    'combined_index_name': prepared.combined_index.name,
+                    # Dates are stored as ns; the units let load() return the dtypes it was given
+                    'panel_index_unit': panel.index.unit,
+                    'combined_index_unit': prepared.combined_index.unit,
+                    'ticker_index_units': {ticker: prepared.ticker_data[ticker].index.unit for ticker in prepared.tickers},
+                    'has_prices': prepared.simulation_panel.has_prices.tolist(),
+                    'benchmark_name': None if benchmark is None else benchmark.name,
+                    'benchmark_index_name': None if benchmark is None else benchmark.index.name,
+                }, f)
+        except Exception:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        """Removes the temporary store."""
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def __enter__(self) -> 'SharedPreparedData':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    @classmethod
+    def load(cls, path: Union[str, Path]):
+        """
+        Rebuilds ``PreparedData`` from a shared store without copying the arrays.
+
+        Args:
+            path (Union[str, Path]): ``SharedPreparedData.path`` of the exporting process.
+
+        Returns:
+            PreparedData: Same tickers, history and backtest window as the exported data,
+            backed by read-only memory-mapped arrays.
+        """
+        from src.core.backtest_manager import PreparedData
+        from src.core.simulation import SimulationPanel
+
+        path = Path(path)
+        with open(path / cls.META_FILE, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        store = PriceStore.open(path / 'prices')
+        ticker_data = {}
+        for ticker in meta['tickers']:
+            frame = store.ticker_frame(ticker, copy=False)
+            frame.index = frame.index.as_unit(meta['ticker_index_units'][ticker])
+            ticker_data[ticker] = frame
+
+        columns = pd.MultiIndex.from_tuples([tuple(col) for col in meta['panel_columns']], names=meta['panel_column_names'])
+        index = pd.DatetimeIndex(np.load(path / 'panel_index.npy', mmap_mode='r'), name=meta['panel_index_name'])
+        index = index.as_unit(meta['panel_index_unit'])
+        panel = pd.DataFrame({col: np.asarray(np.load(path / 'panel' / f'{i}.npy', mmap_mode='r')) for i, col in enumerate(columns)},
+                             index=index, copy=False)
+        panel.columns = columns
+        dates = index.unique()
+
+        close = np.asarray(np.load(path / 'close.npy', mmap_mode='r'))
+        simulation_panel = SimulationPanel(dates=dates, tickers=list(meta['tickers']), close=close,
+                                           signals=np.zeros(close.shape, dtype=np.float64),
+                                           has_prices=np.array(meta['has_prices'], dtype=bool),
+                                           has_signals=np.zeros(close.shape[1], dtype=bool))
+        return PreparedData(
+            tickers=list(meta['tickers']),
+            ticker_data=ticker_data,
+            combined_index=pd.DatetimeIndex(np.load(path / 'combined_index.npy', mmap_mode='r'),
+                                            name=meta['combined_index_name']).as_unit(meta['combined_index_unit']),
+            panel=panel,
+            dates=dates,
+            simulation_panel=simulation_panel,
+        )
+
+    @classmethod
+    def load_context(cls, path: Union[str, Path], dates: pd.DatetimeIndex):
+        """
+        Rebuilds the ``SimulationContext`` shared with the prepared data.
+
+        Args:
+            path (Union[str, Path]): ``SharedPreparedData.path`` of the exporting process.
+            dates (pd.DatetimeIndex): Backtest dates of the loaded ``PreparedData``.
+
+        Returns:
+            SimulationContext: Market filter and benchmark (read-only, memory-mapped);
+            both None when no context was exported.
+        """
+        from src.core.backtest_manager import SimulationContext
+
+        path = Path(path)
+        with open(path / cls.META_FILE, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        market_favorable = benchmark = None
+        if (path / 'market_favorable.npy').exists():
+            market_favorable = np.load(path / 'market_favorable.npy', mmap_mode='r')
+        if (path / 'benchmark.npy').exists():
+            benchmark = pd.Series(np.asarray(np.load(path / 'benchmark.npy', mmap_mode='r')),
+                                  index=pd.DatetimeIndex(dates, name=meta['benchmark_index_name']),
+                                  name=meta['benchmark_name'], copy=False)
+        return SimulationContext(market_favorable=market_favorable, benchmark=benchmark)
@@ -0,0 +1,251 @@
+"""
+Columnar on-disk cache of the historical price CSV.
+
+The long-format CSV (Date, Ticker, Open, High, Low, Close, Volume) is parsed once
+and written as one ``.npy`` file per field. Rows are grouped by ticker and sorted
+by date, so every ticker occupies a contiguous ``[start, end)`` slice of the
+shared ``dates`` array and of each field array. The arrays are opened with
+``mmap_mode='r'``, which makes loading near-instant and lets several worker
+processes share the same OS pages.
+
+Each store is versioned by the SHA-256 of the source CSV. A small pointer file
+keeps the CSV size/mtime next to the hash, so the hash is only recomputed when
+the CSV looks modified.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+OHLCV_FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+REQUIRED_COLUMNS = ['Date', 'Ticker', *OHLCV_FIELDS]
+STORE_FORMAT_VERSION = 1
+STORE_DIR_NAME = '.price_store'
+
+
+def _file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def to_datetime64_ns(values) -> np.ndarray:
+    """
+    Converts dates to a ``datetime64[ns]`` array.
+
+    pandas 3 parses dates as ``datetime64[us]`` while pandas 2 uses nanoseconds; the
+    stores, caches and ledgers encode dates as int64 nanoseconds, so every encoder
+    goes through this helper instead of assuming the unit pandas picked.
+
+    Args:
+        values: Anything ``np.asarray`` accepts with a datetime dtype (Series, DatetimeIndex,
+                ``datetime64`` array of any unit, list of Timestamps).
+
+    Returns:
+        np.ndarray: ``datetime64[ns]`` array (no copy when ``values`` already is one).
+    """
+    return np.asarray(values, dtype='datetime64[ns]')
+
+
+def read_price_csv(csv_path: Union[str, Path]) -> pd.DataFrame:
+    """
+    Parses the long-format price CSV and validates its columns.
+
+    Args:
+        csv_path (Union[str, Path]): Path to the CSV file.
+
+    Returns:
+        pd.DataFrame: Raw long-format frame with a datetime 'Date' column.
+
+    Raises:
+        ValueError: If required columns are missing or dates cannot be parsed.
+    """
+    df = pd.read_csv(csv_path, parse_dates=['Date'])
+    missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Data file missing required columns. Expected: {REQUIRED_COLUMNS}, Found: {list(df.columns)}")
+    if not pd.api.types.is_datetime64_any_dtype(df['Date']):
+        logger.warning("Column 'Date' was not parsed as datetime. Attempting conversion.")
+        df['Date'] = pd.to_datetime(df['Date'])
+    df['Date'] = to_datetime64_ns(df['Date'])
+    return df
+
+
+class PriceStore:
+    """Read-only, memory-mapped view of a columnar price store."""
+
+    def __init__(self, path: Path, dates: np.ndarray, fields: Dict[str, np.ndarray],
+                 offsets: Dict[str, Tuple[int, int]]):
+        self.path = path
+        self.dates = dates
+        self.fields = fields
+        self.offsets = offsets
+
+    # --- Queries ---
+
+    @property
+    def tickers(self) -> List[str]:
+        """Sorted list of upper-case tickers in the store."""
+        return sorted(self.offsets)
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker.upper() in self.offsets
+
+    def ticker_frame(self, ticker: str, copy: bool = True) -> Optional[pd.DataFrame]:
+        """
+        Builds the OHLCV DataFrame for a single ticker.
+
+        Args:
+            ticker (str): Ticker symbol (case-insensitive).
+            copy (bool): Copy the columns into memory. With False the columns are read-only
+                         views of the memory-mapped files, so the store must stay on disk
+                         while the frame is in use.
+
+        Returns:
+            Optional[pd.DataFrame]: OHLCV frame indexed by 'Date', or None if the ticker is absent.
+        """
+        bounds = self.offsets.get(ticker.upper())
+        if bounds is None:
+            return None
+        start, end = bounds
+        index = pd.DatetimeIndex(self.dates[start:end], name='Date')
+        as_array = np.array if copy else np.asarray
+        return pd.DataFrame({field: as_array(self.fields[field][start:end]) for field in OHLCV_FIELDS}, index=index, copy=copy)
+
+    def date_range(self) -> Tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]:
+        """Returns the (min, max) date over all rows."""
+        if len(self.dates) == 0:
+            return (None, None)
+        valid = self.dates[~np.isnat(self.dates)]
+        if len(valid) == 0:
+            return (None, None)
+        return (pd.Timestamp(valid.min()), pd.Timestamp(valid.max()))
+
+    # --- Building / opening ---
+
+    @staticmethod
+    def default_root(csv_path: Path) -> Path:
+        """Directory that holds the stores for ``csv_path``."""
+        return csv_path.parent / STORE_DIR_NAME
+
+    @classmethod
+    def open(cls, path: Path) -> 'PriceStore':
+        """Memory-maps an existing store directory."""
+        with open(path / 'meta.json', 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('format_version') != STORE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported price store format: {meta.get('format_version')}")
+        dates = np.load(path / 'dates.npy', mmap_mode='r')
+        fields = {field: np.load(path / f'{field}.npy', mmap_mode='r') for field in OHLCV_FIELDS}
+        offsets = {ticker: (int(start), int(end)) for ticker, (start, end) in meta['offsets'].items()}
+        return cls(path, dates, fields, offsets)
+
+    @staticmethod
+    def write(df: pd.DataFrame, path: Path) -> None:
+        """
+        Writes a long-format price frame as a columnar store.
+
+        Args:
+            df (pd.DataFrame): Frame with the REQUIRED_COLUMNS.
+            path (Path): Target directory. It is written to a temporary sibling first
+                         and moved into place, so readers never see a partial store.
+                         Store paths are content-addressed, so a complete store already
+                         at ``path`` (e.g. from a concurrent writer) is kept as is.
+        """
+        tickers = df['Ticker'].astype(str).str.upper().to_numpy()
+        dates = to_datetime64_ns(df['Date'])
+        order = np.lexsort((dates, tickers))  # by ticker, then by date
+        tickers, dates = tickers[order], dates[order]
+
+        unique_tickers, starts = np.unique(tickers, return_index=True)
+        ends = np.append(starts[1:], len(tickers))
+        offsets = {str(t): [int(s), int(e)] for t, s, e in zip(unique_tickers, starts, ends)}
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_dir = Path(tempfile.mkdtemp(prefix=path.name + '.tmp', dir=path.parent))
+        try:
+            np.save(tmp_dir / 'dates.npy', dates)
+            for field in OHLCV_FIELDS:
+                values = pd.to_numeric(df[field], errors='coerce').to_numpy()[order]
+                if values.dtype.kind not in 'if':
+                    values = values.astype(np.float64)
+                np.save(tmp_dir / f'{field}.npy', np.ascontiguousarray(values))
+            with open(tmp_dir / 'meta.json', 'w', encoding='utf-8') as f:
+                json.dump({'format_version': STORE_FORMAT_VERSION, 'rows': int(len(dates)), 'offsets': offsets}, f)
+            for attempt in range(2):
+                if (path / 'meta.json').exists():
+                    shutil.rmtree(tmp_dir, ignore_errors=True)  # Same contents already in place
+                    return
+                try:
+                    os.replace(tmp_dir, path)
+                    return
+                except OSError:
+                    if (path / 'meta.json').exists():
+                        continue  # A concurrent writer got there first
+                    if attempt:
+                        raise
+                    # Leftover without meta.json (interrupted build): no reader can have it open
+                    shutil.rmtree(path, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+    @classmethod
+    def open_or_build(cls, csv_path: Union[str, Path], root: Optional[Union[str, Path]] = None,
+                      frame: Optional[pd.DataFrame] = None) -> 'PriceStore':
+        """
+        Opens the store matching the current CSV contents, converting the CSV first if needed.
+
+        Args:
+            csv_path (Union[str, Path]): Source CSV file.
+            root (Optional[Union[str, Path]]): Store directory. Defaults to ``<csv dir>/.price_store``.
+            frame (Optional[pd.DataFrame]): Contents of the CSV already in memory (e.g. just written);
+                                            used instead of parsing the file when the store is built.
+
+        Returns:
+            PriceStore: Memory-mapped store.
+        """
+        csv_path = Path(csv_path)
+        root = Path(root) if root is not None else cls.default_root(csv_path)
+        pointer_path = root / f'{csv_path.stem}.json'
+        stat = csv_path.stat()
+
+        pointer = {}
+        if pointer_path.exists():
+            try:
+                with open(pointer_path, 'r', encoding='utf-8') as f:
+                    pointer = json.load(f)
+            except (OSError, ValueError):
+                pointer = {}
+
+        unchanged = pointer.get('size') == stat.st_size and pointer.get('mtime_ns') == stat.st_mtime_ns
+        sha = pointer.get('sha256') if unchanged else _file_sha256(csv_path)
+        store_path = root / f'{csv_path.stem}-{sha[:16]}'
+
+        if not (store_path / 'meta.json').exists():
+            logger.info(f"Building columnar price store for '{csv_path}' at '{store_path}'...")
+            cls.write(frame if frame is not None else read_price_csv(csv_path), store_path)
+            # Drop stores built from older versions of this CSV
+            for old in root.glob(f'{csv_path.stem}-*'):
+                if old.is_dir() and old != store_path and '.tmp' not in old.name:
+                    shutil.rmtree(old, ignore_errors=True)
+
+        if not unchanged or pointer.get('sha256') != sha:
+            tmp_pointer = pointer_path.with_suffix(f'.json.{os.getpid()}')
+            with open(tmp_pointer, 'w', encoding='utf-8') as f:
+                json.dump({'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha}, f)
+            os.replace(tmp_pointer, pointer_path)
+
+        return cls.open(store_path)
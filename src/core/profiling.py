@@ -0,0 +1,216 @@
+"""
+Per-phase timing of backtest runs.
+
+A ``RunProfiler`` collects nested phase timers, counters and memory snapshots
+for one run. Phases nest by ``with`` blocks, so a phase opened inside another
+one is reported under the outer phase's path (``backtest/signals``). Code that
+may run without a profiler uses ``NULL_PROFILER``, whose methods do nothing.
+
+Allocation tracking (``tracemalloc``) slows Python code down noticeably and is
+therefore off unless requested; without it, snapshots record only the peak
+resident set size of the process.
+
+Example:
+    profiler = RunProfiler(label="MAC on 3 tickers", trace_path="traces.jsonl")
+    with profiler.phase("signals"):
+        ...
+    profiler.count("signals_considered", 120)
+    report = profiler.finish()   # also appended to traces.jsonl
+"""
+
+import json
+import logging
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+try:
+    import resource  # Not available on Windows
+except ImportError:
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+PHASE_SEPARATOR = "/"
+
+
+@dataclass
+class PhaseTiming:
+    """Accumulated timing of one phase path."""
+    path: str
+    seconds: float = 0.0
+    calls: int = 0
+    alloc_bytes: Optional[int] = None  # Net traced allocation change (tracemalloc only)
+    peak_bytes: Optional[int] = None   # Traced peak since the phase's last sub-phase started (tracemalloc only)
+
+
+@dataclass
+class MemorySnapshot:
+    """Process memory at a point of the run."""
+    label: str
+    elapsed_seconds: float
+    max_rss_mb: Optional[float] = None
+    traced_current_mb: Optional[float] = None
+    traced_peak_mb: Optional[float] = None
+
+
+def _max_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+class RunProfiler:
+    """Nested phase timers, counters and memory snapshots of one run."""
+
+    def __init__(self,
+                 label: str = "",
+                 trace_path: Optional[Union[str, Path]] = None,
+                 track_allocations: bool = False):
+        """
+        Args:
+            label (str): Free-form description stored with the report (e.g. strategy and tickers).
+            trace_path (Optional[Union[str, Path]]): JSONL file the report is appended to by ``finish()``.
+            track_allocations (bool): Record allocations per phase with ``tracemalloc``.
+        """
+        self.label = label
+        self.trace_path = Path(trace_path) if trace_path else None
+        self.track_allocations = track_allocations
+        self.phases: Dict[str, PhaseTiming] = {}
+        self.counters: Dict[str, int] = {}
+        self.snapshots: List[MemorySnapshot] = []
+        self._local = threading.local()
+        self._started_tracing = False
+        if track_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._start = time.perf_counter()
+        self._finished: Optional[Dict[str, Any]] = None
+
+    def _stack(self) -> List[str]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Times the enclosed block as ``name`` below the currently open phase (per thread)."""
+        stack = self._stack()
+        stack.append(name)
+        path = PHASE_SEPARATOR.join(stack)
+        # Registered on entry, so reports list parents before their sub-phases
+        timing = self.phases.get(path)
+        if timing is None:
+            timing = self.phases[path] = PhaseTiming(path)
+        tracing = self.track_allocations and tracemalloc.is_tracing()
+        if tracing:
+            alloc_before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            timing.seconds += elapsed
+            timing.calls += 1
+            if tracing:
+                current, peak = tracemalloc.get_traced_memory()
+                timing.alloc_bytes = (timing.alloc_bytes or 0) + current - alloc_before
+                timing.peak_bytes = max(timing.peak_bytes or 0, peak)
+
+    def count(self, name: str, n: int = 1) -> None:
+        """Adds ``n`` to counter ``name``."""
+        self.counters[name] = self.counters.get(name, 0) + int(n)
+
+    def snapshot(self, label: str) -> None:
+        """Records process memory (and traced allocations if tracking) under ``label``."""
+        snap = MemorySnapshot(label=label, elapsed_seconds=time.perf_counter() - self._start, max_rss_mb=_max_rss_mb())
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            snap.traced_current_mb = current / 2**20
+            snap.traced_peak_mb = peak / 2**20
+        self.snapshots.append(snap)
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Returns the collected data as a JSON-serializable dict.
+
+        Returns:
+            Dict[str, Any]: 'label', 'total_seconds', 'phases' (list in entry order with
+                            'path', 'seconds', 'calls', 'share' of the total and allocation fields),
+                            'counters' and 'snapshots'.
+        """
+        if self._finished is not None:
+            return self._finished
+        total = time.perf_counter() - self._start
+        phases = []
+        for timing in self.phases.values():
+            entry = asdict(timing)
+            entry['share'] = timing.seconds / total if total > 0 else 0.0
+            phases.append(entry)
+        return {
+            'label': self.label,
+            'total_seconds': total,
+            'phases': phases,
+            'counters': dict(self.counters),
+            'snapshots': [asdict(s) for s in self.snapshots],
+        }
+
+    def finish(self) -> Dict[str, Any]:
+        """Freezes the report, stops allocation tracking started here and appends the report to the trace file."""
+        if self._finished is not None:
+            return self._finished
+        self._finished = self.report()
+        if self._started_tracing:
+            tracemalloc.stop()
+        if self.trace_path is not None:
+            self.write_trace(self._finished)
+        return self._finished
+
+    def write_trace(self, report: Dict[str, Any]) -> None:
+        """Appends ``report`` as one JSON line to the trace file; failures are only logged."""
+        record = dict(report, timestamp=datetime.now(timezone.utc).isoformat())
+        try:
+            self.trace_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.trace_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, default=str) + "\n")
+        except OSError as e:
+            logger.warning(f"Could not write profiling trace to {self.trace_path}: {e}")
+
+    def format_summary(self) -> str:
+        """One line per phase (indented by depth) with seconds and share of the total."""
+        report = self.report()
+        lines = [f"Run profile {report['label']!r}: {report['total_seconds']:.3f}s"]
+        for entry in report['phases']:
+            depth = entry['path'].count(PHASE_SEPARATOR)
+            name = entry['path'].rsplit(PHASE_SEPARATOR, 1)[-1]
+            lines.append(f"{'  ' * (depth + 1)}{name}: {entry['seconds']:.3f}s ({entry['share']:.0%})")
+        if report['counters']:
+            lines.append("  counters: " + ", ".join(f"{k}={v}" for k, v in report['counters'].items()))
+        return "\n".join(lines)
+
+
+class _NullProfiler:
+    """Stand-in used when no profiler is passed; every method is a no-op."""
+
+    _NULL_CONTEXT = nullcontext()
+
+    def phase(self, name: str):
+        return self._NULL_CONTEXT
+
+    def count(self, name: str, n: int = 1) -> None:
+        pass
+
+    def snapshot(self, label: str) -> None:
+        pass
+
+
+NULL_PROFILER = _NullProfiler()
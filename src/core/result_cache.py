@@ -0,0 +1,339 @@
+"""
+Persistent, content-addressed cache of backtest results.
+
+A run is identified by a fingerprint of everything that determines its
+outcome: strategy and its parameters, tickers, date range, capital,
+risk/cost/rebalancing parameters, the data version (the price store hash or
+the CSV size/mtime) and the settings the statistics depend on. Each entry is
+a single uncompressed ``.npz`` file with the equity curve, benchmark, trades
+and (optionally) per-ticker signal frames stored as typed columns plus a small
+JSON header with the statistics. Loading a hit is a few ``np.load`` calls.
+
+The cache directory is bounded in size; the least recently used entries
+(by file mtime, refreshed on every hit) are evicted first.
+
+Example:
+    key = run_fingerprint(strategy='MAC', params=params, tickers=tickers, ...)
+    entry = result_cache.get(key)
+    if entry is None:
+        signals, results, stats = manager.run_backtest(...)
+        result_cache.put(key, results, stats, signals)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from src.core.price_store import to_datetime64_ns
+from src.portfolio.trade_ledger import TRADE_SCHEMA, TradeLedger
+
+try:
+    from src.core.config import config
+    from src.version import VERSION
+except ImportError:
+    config = None
+    VERSION = '0'
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 1
+CACHE_DIR_NAME = '.result_cache'
+_HEADER_KEY = '__header__'
+
+
+def _json_default(value: Any) -> Any:
+    """Converts numpy scalars, timestamps and other values for canonical JSON."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(value).isoformat()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    return str(value)
+
+
+def run_fingerprint(**parts: Any) -> str:
+    """
+    Returns the cache key of a backtest configuration.
+
+    None values of dict-like parts are treated as empty dicts by the callers;
+    the engine version, benchmark ticker and risk-free rate are always included.
+
+    Args:
+        **parts: Everything that determines the run (strategy, params, tickers, dates, ...).
+
+    Returns:
+        str: Hex digest.
+    """
+    payload = dict(parts)
+    payload['_format'] = CACHE_FORMAT_VERSION
+    payload['_engine'] = VERSION
+    payload['_benchmark'] = getattr(config, 'BENCHMARK_TICKER', None)
+    payload['_risk_free_rate'] = getattr(config, 'RISK_FREE_RATE', None)
+    canonical = json.dumps(payload, sort_keys=True, default=_json_default, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+# --- Frame <-> typed column arrays ---
+
+def _frame_to_arrays(prefix: str, frame: pd.DataFrame, arrays: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """Stores ``frame`` columns (and a datetime index) as arrays; returns its header."""
+    header: Dict[str, Any] = {'columns': [], 'kinds': [], 'name': frame.index.name}
+    if isinstance(frame.index, pd.DatetimeIndex):
+        arrays[f'{prefix}.index'] = to_datetime64_ns(frame.index).view(np.int64)
+        header['index'] = 'datetime'
+        header['index_unit'] = frame.index.unit  # Stored as ns, restored in the unit pandas produced
+    else:
+        header['index'] = 'range'
+    for position, column in enumerate(frame.columns):
+        values = frame[column]
+        if values.dtype == object and not any(v is None for v in values):
+            values = values.infer_objects()
+        key = f'{prefix}.{position}'
+        if pd.api.types.is_datetime64_any_dtype(values):
+            arrays[key] = to_datetime64_ns(values).view(np.int64)
+            header.setdefault('units', {})[str(position)] = values.dt.unit
+            kind = 'datetime'
+        elif pd.api.types.is_bool_dtype(values) or pd.api.types.is_numeric_dtype(values):
+            arrays[key] = values.to_numpy()
+            kind = 'numeric'
+        elif values.map(lambda v: isinstance(v, str)).all():
+            arrays[key] = values.to_numpy(dtype=str)
+            kind = 'str'
+        else:  # Mixed objects (e.g. None next to numbers) are kept in the JSON header
+            header.setdefault('values', {})[str(position)] = json.loads(json.dumps(values.tolist(), default=_json_default))
+            kind = 'json'
+        header['columns'].append(column)
+        header['kinds'].append(kind)
+    header['rows'] = len(frame)
+    return header
+
+
+def _frame_from_arrays(prefix: str, header: Dict[str, Any], arrays) -> pd.DataFrame:
+    """Rebuilds a frame written by ``_frame_to_arrays``."""
+    if header['index'] == 'datetime':
+        index = pd.DatetimeIndex(arrays[f'{prefix}.index'].view('datetime64[ns]'), name=header['name'])
+        index = index.as_unit(header.get('index_unit', 'ns'))
+    else:
+        index = pd.RangeIndex(header['rows'], name=header['name'])
+    data = {}
+    for position, (column, kind) in enumerate(zip(header['columns'], header['kinds'])):
+        if kind == 'json':
+            data[column] = pd.Series(header['values'][str(position)], index=index, dtype=object)
+            continue
+        values = arrays[f'{prefix}.{position}']
+        if kind == 'datetime':
+            unit = header.get('units', {}).get(str(position), 'ns')
+            values = values.view('datetime64[ns]').astype(f'datetime64[{unit}]', copy=False)
+        data[column] = values
+    return pd.DataFrame(data, index=index, columns=header['columns'])
+
+
+def _trades_from_frame(frame: pd.DataFrame) -> Union[TradeLedger, List[Dict[str, Any]]]:
+    """Trades as PortfolioManager produces them: a TradeLedger, or trade dicts for other layouts."""
+    if len(frame) and list(frame.columns) == list(TRADE_SCHEMA):
+        return TradeLedger.from_frame(frame)
+    columns = {}
+    for column in frame.columns:
+        values = frame[column]
+        columns[column] = list(values) if pd.api.types.is_datetime64_any_dtype(values) else values.tolist()
+    return [dict(zip(columns, row)) for row in zip(*columns.values())] if columns else []
+
+
+class ResultCache:
+    """
+    Size-bounded on-disk cache of backtest results keyed by ``run_fingerprint``.
+
+    Safe to share between threads and processes: entries are written to a
+    temporary file and renamed into place, so readers never see partial files.
+    """
+
+    def __init__(self, root: Optional[Union[str, Path]] = None, max_bytes: Optional[int] = None):
+        """
+        Args:
+            root (Optional[Union[str, Path]]): Cache directory. Defaults to config.RESULT_CACHE_DIR
+                                               or ``<data dir>/.result_cache``.
+            max_bytes (Optional[int]): Size budget of the directory. 0 disables caching.
+                                       Defaults to config.RESULT_CACHE_MB.
+        """
+        if root is None:
+            root = getattr(config, 'RESULT_CACHE_DIR', '') or Path(getattr(config, 'DATA_PATH', 'data/x')).parent / CACHE_DIR_NAME
+        if max_bytes is None:
+            max_bytes = int(getattr(config, 'RESULT_CACHE_MB', 512) * 1024 * 1024)
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _path(self, key: str) -> Path:
+        return self.root / f'{key}.npz'
+
+    def get(self, key: str, require_signals: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Loads a cached result.
+
+        Args:
+            key (str): ``run_fingerprint`` of the run.
+            require_signals (bool): Treat entries stored without signal frames as misses.
+
+        Returns:
+            Optional[Dict[str, Any]]: {'results': {'Portfolio_Value', 'Benchmark', 'trades'},
+                                       'stats': dict, 'signals': dict or None}, or None on a miss.
+        """
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as arrays:
+                header = json.loads(arrays[_HEADER_KEY].tobytes().decode('utf-8'))
+                if header.get('format') != CACHE_FORMAT_VERSION or (require_signals and header['signals'] is None):
+                    raise KeyError(key)
+                frames = {name: _frame_from_arrays(name, frame_header, arrays)
+                          for name, frame_header in header['frames'].items()}
+        except (OSError, KeyError, ValueError) as e:
+            if not isinstance(e, (FileNotFoundError, KeyError)):
+                logger.warning(f"Discarding unreadable result cache entry '{path.name}': {e}")
+            with self._lock:
+                self.misses += 1
+            return None
+
+        try:
+            os.utime(path)  # Refresh LRU position
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+
+        equity = frames['equity']
+        benchmark = frames.get('benchmark')
+        results = {
+            'Portfolio_Value': equity['Portfolio'].rename('Portfolio'),
+            'Benchmark': benchmark.iloc[:, 0] if benchmark is not None else None,
+            'trades': _trades_from_frame(frames['trades']),
+        }
+        signals = None
+        if header['signals'] is not None:
+            signals = {ticker: frames[f'signals.{i}'] for i, ticker in enumerate(header['signals'])}
+        return {'results': results, 'stats': header['stats'], 'signals': signals}
+
+    def put(self,
+            key: str,
+            results: Dict[str, Any],
+            stats: Dict[str, Any],
+            signals: Optional[Dict[str, pd.DataFrame]] = None) -> bool:
+        """
+        Stores a result. Failures are logged and ignored.
+
+        Args:
+            key (str): ``run_fingerprint`` of the run.
+            results (Dict[str, Any]): BacktestManager results ('Portfolio_Value', 'Benchmark', 'trades').
+            stats (Dict[str, Any]): Portfolio statistics.
+            signals (Optional[Dict[str, pd.DataFrame]]): Per-ticker signal frames.
+
+        Returns:
+            bool: True if the entry was written.
+        """
+        if not self.enabled:
+            return False
+        try:
+            arrays: Dict[str, np.ndarray] = {}
+            frames = {'equity': _frame_to_arrays('equity', results['Portfolio_Value'].rename('Portfolio').to_frame(), arrays)}
+            benchmark = results.get('Benchmark')
+            if isinstance(benchmark, pd.Series) and not benchmark.empty:
+                frames['benchmark'] = _frame_to_arrays('benchmark', benchmark.to_frame(), arrays)
+            trades = results.get('trades') or []
+            if isinstance(trades, TradeLedger):
+                trade_frame = trades.to_frame()
+                for column in trade_frame.select_dtypes('category').columns:
+                    trade_frame[column] = trade_frame[column].astype(object)
+            else:
+                columns = list(dict.fromkeys(key for trade in trades for key in trade))
+                trade_frame = pd.DataFrame({key: pd.Series([trade.get(key) for trade in trades], dtype=object) for key in columns})
+            frames['trades'] = _frame_to_arrays('trades', trade_frame, arrays)
+            signal_tickers = None
+            if signals is not None:
+                signal_tickers = list(signals)
+                for i, ticker in enumerate(signal_tickers):
+                    frames[f'signals.{i}'] = _frame_to_arrays(f'signals.{i}', signals[ticker], arrays)
+            header = {'format': CACHE_FORMAT_VERSION, 'frames': frames, 'signals': signal_tickers, 'stats': stats}
+            arrays[_HEADER_KEY] = np.frombuffer(json.dumps(header, default=_json_default).encode('utf-8'), dtype=np.uint8)
+
+            self.root.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=key[:16], suffix='.tmp', dir=self.root)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    np.savez(f, **arrays)
+                os.replace(tmp_path, self._path(key))
+            except Exception:
+                Path(tmp_path).unlink(missing_ok=True)
+                raise
+        except Exception as e:
+            logger.warning(f"Could not store backtest result in cache: {e}")
+            return False
+        self._evict()
+        return True
+
+    def _evict(self) -> None:
+        """Removes least recently used entries until the directory fits the budget."""
+        entries = []
+        for path in self.root.glob('*.npz'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit/miss/eviction counters and the hit rate."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'max_bytes': self.max_bytes,
+            }
+
+    def clear(self) -> None:
+        """Deletes all entries and resets the counters."""
+        for path in self.root.glob('*.npz'):
+            path.unlink(missing_ok=True)
+        with self._lock:
+            self.hits = self.misses = self.evictions = 0
+
+
+# --- Process-wide cache instance (created on first use) ---
+_default_cache: Optional[ResultCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """Returns the process-wide ResultCache configured from config."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResultCache()
+        return _default_cache
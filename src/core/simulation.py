@@ -0,0 +1,672 @@
+"""
+Array-backed simulation core for BacktestManager.
+
+The panel (dates x tickers) is converted once into contiguous NumPy arrays
+for close prices and signals, and the day loop walks those arrays with
+integer indices instead of issuing pandas ``.loc`` lookups per ticker per day.
+Trade execution itself is still delegated to ``PortfolioManager`` so cash,
+sizing, costs and stop handling stay identical to the legacy loop.
+
+``run_multi_scenario_simulation`` is the optimizer variant: it advances K
+portfolios that share prices and risk settings but differ in signals, keeping
+cash, shares, stops and equity as arrays over the scenario axis.
+"""
+
+import logging
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional, Callable, Any
+
+import numpy as np
+import pandas as pd
+
+from src.core.cancellation import CancellationToken, raise_if_cancelled
+from src.core.price_store import to_datetime64_ns
+from src.portfolio.trade_ledger import TradeLedger
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SimulationPanel:
+    """Contiguous array view of the backtest panel."""
+    dates: pd.DatetimeIndex
+    tickers: List[str]
+    close: np.ndarray        # float64, shape (n_days, n_tickers), NaN where missing
+    signals: np.ndarray      # float64, shape (n_days, n_tickers), 0 where no signal
+    has_prices: np.ndarray   # bool, shape (n_tickers,), ticker has a Close column in the panel
+    has_signals: np.ndarray  # bool, shape (n_tickers,), ticker produced a signals frame
+
+    @property
+    def n_days(self) -> int:
+        return len(self.dates)
+
+    @property
+    def n_tickers(self) -> int:
+        return len(self.tickers)
+
+    def column_of(self) -> Dict[str, int]:
+        """Returns a ticker -> column index mapping."""
+        return {ticker: j for j, ticker in enumerate(self.tickers)}
+
+    def with_signals(self, signals: np.ndarray) -> 'SimulationPanel':
+        """
+        Returns a panel sharing the price arrays with a different signal matrix.
+
+        Args:
+            signals (np.ndarray): Signal matrix of shape (n_days, n_tickers).
+
+        Returns:
+            SimulationPanel: New panel in which every ticker counts as having signals.
+        """
+        signals = np.asarray(signals, dtype=np.float64)
+        if signals.shape != self.close.shape:
+            raise ValueError(f"Signal matrix shape {signals.shape} does not match panel shape {self.close.shape}.")
+        return replace(self, signals=signals, has_signals=np.ones(self.n_tickers, dtype=bool))
+
+
+def build_simulation_panel(panel_df: pd.DataFrame,
+                           all_signals: Dict[str, pd.DataFrame],
+                           tickers: List[str]) -> SimulationPanel:
+    """
+    Converts the (date x (ticker, field)) panel and per-ticker signal frames
+    into a SimulationPanel.
+
+    Args:
+        panel_df (pd.DataFrame): Combined OHLCV panel restricted to the backtest window,
+                                 with a (ticker, field) MultiIndex on the columns.
+        all_signals (Dict[str, pd.DataFrame]): Per-ticker signal frames containing a 'Signal' column.
+        tickers (List[str]): Ticker order used for the array columns.
+
+    Returns:
+        SimulationPanel: Arrays aligned on ``panel_df.index`` and ``tickers``.
+    """
+    dates = panel_df.index.unique()
+    n_days, n_tickers = len(dates), len(tickers)
+
+    close = np.full((n_days, n_tickers), np.nan, dtype=np.float64)
+    signals = np.zeros((n_days, n_tickers), dtype=np.float64)
+    has_prices = np.zeros(n_tickers, dtype=bool)
+    has_signals = np.zeros(n_tickers, dtype=bool)
+
+    for j, ticker in enumerate(tickers):
+        if (ticker, 'Close') in panel_df.columns:
+            close[:, j] = pd.to_numeric(panel_df[(ticker, 'Close')], errors='coerce').reindex(dates).to_numpy(dtype=np.float64)
+            has_prices[j] = True
+        signals_df = all_signals.get(ticker)
+        if signals_df is not None and 'Signal' in signals_df.columns:
+            signal_values = pd.to_numeric(signals_df['Signal'], errors='coerce').reindex(dates).fillna(0)
+            signals[:, j] = signal_values.to_numpy(dtype=np.float64)
+            has_signals[j] = True
+
+    return SimulationPanel(dates=dates, tickers=list(tickers), close=close, signals=signals,
+                           has_prices=has_prices, has_signals=has_signals)
+
+
+class PartialResultsPublisher:
+    """
+    Publishes the equity points and closed trades recorded since the previous batch.
+
+    The day loops call ``publish`` at their progress ticks. The callback gets a
+    JSON-friendly dict with only the new items, so the receiver appends them to
+    its own running series:
+    ``{'dates': [iso str], 'values': [float], 'trades': [{'ticker', 'entry_date',
+    'exit_date', 'net_pnl', 'exit_reason'}]}``.
+    """
+
+    def __init__(self, callback: Callable[[Dict[str, Any]], None], portfolio_manager):
+        self.callback = callback
+        self.portfolio_manager = portfolio_manager
+        self._n_values = 0
+        self._n_trades = 0
+
+    def publish(self) -> None:
+        """Sends the new batch; failures of the receiver never stop the simulation."""
+        history = self.portfolio_manager.portfolio_value_history
+        trades = self.portfolio_manager.closed_trades
+        new_points, new_trades = history[self._n_values:], trades[self._n_trades:]
+        if not new_points and not new_trades:
+            return
+        self._n_values, self._n_trades = len(history), len(trades)
+        try:
+            self.callback({
+                'dates': [pd.Timestamp(date).isoformat() for date, _ in new_points],
+                'values': [float(value) for _, value in new_points],
+                'trades': [{
+                    'ticker': trade.get('ticker'),
+                    'entry_date': pd.Timestamp(trade['entry_date']).isoformat() if trade.get('entry_date') is not None else None,
+                    'exit_date': pd.Timestamp(trade['exit_date']).isoformat() if trade.get('exit_date') is not None else None,
+                    'net_pnl': float(trade.get('net_pnl') or 0.0),
+                    'exit_reason': trade.get('exit_reason'),
+                } for trade in new_trades],
+            })
+        except Exception as e:
+            logger.warning(f"Partial results callback failed: {e}")
+
+
+def _position_prices(positions, column_slots: np.ndarray, close_row: np.ndarray,
+                     current_date: pd.Timestamp, purpose: str) -> np.ndarray:
+    """Close row aligned to the position book slots; open positions without a price use their entry price."""
+    prices = np.full(positions.n_slots, np.nan)
+    prices[column_slots] = close_row
+    held = positions.held_slots()
+    missing = held[np.isnan(prices[held])]
+    if missing.size:
+        entry_prices = positions.field('entry_price')
+        for slot in missing:
+            logger.warning(f"Using last known price (${entry_prices[slot]:.2f}) for {purpose} for {positions.ticker_of(slot)} on {current_date}")
+        prices[missing] = entry_prices[missing]
+    return prices
+
+
+def run_array_simulation(panel: SimulationPanel,
+                         portfolio_manager,
+                         rejected_signal_counts: Dict[str, int],
+                         market_favorable: Optional[np.ndarray] = None,
+                         progress_callback: Optional[Callable] = None,
+                         progress_start: int = 0,
+                         progress_range: int = 0,
+                         partial_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                         cancel_token: Optional[CancellationToken] = None) -> int:
+    """
+    Walks the panel day by day and drives the portfolio manager.
+
+    Produces the same sequence of ``update_positions_and_stops``,
+    ``open_position``/``close_position`` and ``update_portfolio_value`` calls
+    as the legacy pandas loop in ``BacktestManager``.
+
+    Args:
+        panel (SimulationPanel): Array view of prices and signals.
+        portfolio_manager (PortfolioManager): Portfolio to mutate.
+        rejected_signal_counts (Dict[str, int]): Rejection counters, updated in place.
+        market_favorable (Optional[np.ndarray]): Boolean array (n_days,) from the market filter.
+                                                 None means the market is always favorable.
+        progress_callback (Optional[Callable]): Receives (percent, message) tuples.
+        progress_start (int): Progress value at the start of the loop.
+        progress_range (int): Progress span covered by the loop.
+        partial_callback (Optional[Callable]): Receives batches of new equity points and
+                                               closed trades (see ``PartialResultsPublisher``)
+                                               at every progress tick.
+        cancel_token (Optional[CancellationToken]): Checked every day; raises ``BacktestCancelled``.
+
+    Returns:
+        int: Total number of entry signals considered.
+    """
+    dates, tickers = panel.dates, panel.tickers
+    publisher = PartialResultsPublisher(partial_callback, portfolio_manager) if partial_callback else None
+    close, signals = panel.close, panel.signals
+    has_prices, has_signals = panel.has_prices, panel.has_signals
+    positions = portfolio_manager.positions
+    # Position book slot of every panel column: a close row scatters into a slot-aligned price array
+    column_slots = positions.register(tickers)
+
+    # Tickers that can ever emit a signal, in the user's ticker order.
+    signal_columns = [j for j in range(panel.n_tickers) if has_signals[j]]
+
+    total_signals_considered = 0
+    num_days = panel.n_days
+    update_interval = max(1, num_days // 20)
+
+    for i in range(num_days):
+        raise_if_cancelled(cancel_token)
+        current_date = dates[i]
+        close_row = close[i]
+        signal_row = signals[i]
+        try:
+            # --- Stops and trailing stops for open positions ---
+            if len(positions):
+                stop_prices = _position_prices(positions, column_slots, close_row, current_date, "stop/exit check")
+                portfolio_manager.update_positions_and_stops(stop_prices, current_date)
+
+            # --- Signal processing ---
+            is_market_favorable = True if market_favorable is None else bool(market_favorable[i])
+            if is_market_favorable:
+                for j in signal_columns:
+                    signal_value = signal_row[j]
+                    ticker = tickers[j]
+                    if signal_value > 0:
+                        total_signals_considered += 1
+                        if ticker in positions:
+                            rejected_signal_counts['position_exists'] += 1
+                            continue
+                        if not has_prices[j]:
+                            logger.warning(f"Could not get price for {ticker} on {current_date} for buy signal.")
+                            rejected_signal_counts['missing_data'] += 1
+                            continue
+                        entry_price = close_row[j]
+                        if np.isnan(entry_price) or entry_price <= 0:
+                            rejected_signal_counts['invalid_price'] += 1
+                            continue
+                        try:
+                            signal_data = {
+                                'ticker': ticker, 'date': current_date, 'price': entry_price,
+                                'direction': 1, 'volatility': None
+                            }
+                            rejection_reason = portfolio_manager.open_position(signal_data)
+                            if rejection_reason:
+                                if rejection_reason in rejected_signal_counts:
+                                    rejected_signal_counts[rejection_reason] += 1
+                                else:
+                                    rejected_signal_counts['other'] += 1
+                        except Exception as sig_proc_e:
+                            logger.error(f"Error processing buy signal for {ticker} on {current_date}: {sig_proc_e}", exc_info=True)
+                            rejected_signal_counts['other'] += 1
+                    elif signal_value < 0 and ticker in positions:
+                        if not has_prices[j]:
+                            logger.warning(f"Could not get price for {ticker} on {current_date} for sell signal.")
+                            continue
+                        exit_price = close_row[j]
+                        if np.isnan(exit_price) or exit_price <= 0:
+                            logger.warning(f"Invalid exit price ({exit_price}) for {ticker} on {current_date}. Skipping close.")
+                            continue
+                        try:
+                            portfolio_manager.close_position(ticker, exit_price, current_date, reason="signal")
+                        except Exception as sig_proc_e:
+                            logger.error(f"Error processing sell signal for {ticker} on {current_date}: {sig_proc_e}", exc_info=True)
+            else:
+                if signal_columns:
+                    rejected_signal_counts['market_filter'] += int(np.count_nonzero(signal_row[signal_columns] > 0))
+
+            # --- End-of-day valuation ---
+            eod_prices = _position_prices(positions, column_slots, close_row, current_date, "EOD valuation")
+            portfolio_manager.update_portfolio_value(eod_prices, current_date)
+
+        except Exception as loop_err:
+            logger.error(f"Error in backtest loop for date {current_date}: {loop_err}", exc_info=True)
+            continue
+
+        if (i + 1) % update_interval == 0:
+            if progress_callback:
+                current_progress = progress_start + int(((i + 1) / num_days) * progress_range)
+                progress_callback((current_progress, f"Simulating: Day {i+1}/{num_days}..."))
+            if publisher: publisher.publish()
+
+    if publisher: publisher.publish()
+    return total_signals_considered
+
+
+# --- Multi-scenario (lockstep) simulation ---
+
+EXIT_REASONS = ('signal', 'stop_loss', 'take_profit', 'end_of_backtest')
+_NOT_HELD = np.iinfo(np.int64).max
+
+
+@dataclass
+class ScenarioResults:
+    """Outcome of ``run_multi_scenario_simulation`` for K scenarios."""
+    dates: pd.DatetimeIndex
+    tickers: List[str]
+    equity: np.ndarray                   # float64, shape (K, n_days), end-of-day portfolio value
+    cash: np.ndarray                     # float64, shape (K,), cash after the final close-out
+    total_signals: np.ndarray            # int64, shape (K,), entry signals considered
+    rejected_signal_counts: Dict[str, np.ndarray]  # reason -> int64 array (K,)
+    trade_columns: Dict[str, np.ndarray] = field(repr=False, default_factory=dict)  # Columnar trade events
+
+    @property
+    def n_scenarios(self) -> int:
+        return self.equity.shape[0]
+
+    def rejected_counts_for(self, k: int) -> Dict[str, int]:
+        """Rejection counters of scenario ``k`` in the BacktestManager format."""
+        return {reason: int(counts[k]) for reason, counts in self.rejected_signal_counts.items()}
+
+    def trades_for(self, k: int) -> TradeLedger:
+        """
+        Closed trades of scenario ``k`` as a PortfolioManager-style trade ledger.
+
+        Args:
+            k (int): Scenario index.
+
+        Returns:
+            TradeLedger: Trades in the order they were closed.
+        """
+        ledger = TradeLedger()
+        cols = self.trade_columns
+        if not cols or len(cols['scenario']) == 0:
+            return ledger
+        rows = np.flatnonzero(cols['scenario'] == k)
+        entry_dates = self.dates[cols['entry_day'][rows]]
+        exit_dates = self.dates[cols['exit_day'][rows]]
+        ledger.append_columns(
+            ticker=np.asarray(self.tickers, dtype=object)[cols['column'][rows]],
+            entry_date=entry_dates,
+            exit_date=exit_dates,
+            entry_price=cols['entry_price'][rows],
+            exit_price=cols['exit_price'][rows],
+            shares=cols['shares'][rows],
+            direction=np.ones(len(rows), dtype=np.int8),
+            gross_pnl=cols['gross_pnl'][rows],
+            net_pnl=cols['net_pnl'][rows],
+            commission=cols['commission'][rows],
+            pnl_pct=cols['pnl_pct'][rows],
+            exit_reason=np.asarray(EXIT_REASONS, dtype=object)[cols['reason'][rows]],
+            holding_period_days=TradeLedger.holding_days(to_datetime64_ns(entry_dates).view(np.int64),
+                                                          to_datetime64_ns(exit_dates).view(np.int64)),
+            initial_stop_price=cols['initial_stop_price'][rows],
+            final_stop_price=cols['final_stop_price'][rows],
+        )
+        return ledger
+
+
+class _LockstepBook:
+    """
+    Position state of K independent long-only portfolios held as (K, n_tickers) arrays.
+
+    Mirrors ``PortfolioManager``: sizing, stops, slippage and commission use the same
+    formulas, and every sum over positions runs in position opening order so the
+    floating point results match the single-portfolio path.
+    """
+
+    def __init__(self, n_scenarios: int, n_tickers: int, initial_capital: float, risk_manager, cost_params: Dict[str, Any]):
+        shape = (n_scenarios, n_tickers)
+        self.rows = np.arange(n_scenarios)
+        self.cash = np.full(n_scenarios, float(initial_capital))
+        self.held = np.zeros(shape, dtype=bool)
+        self.shares = np.zeros(shape, dtype=np.int64)
+        self.entry_price = np.zeros(shape)
+        self.stop = np.zeros(shape)
+        self.take = np.zeros(shape)
+        self.initial_stop = np.zeros(shape)
+        self.high = np.zeros(shape)
+        self.low = np.zeros(shape)
+        self.entry_day = np.zeros(shape, dtype=np.int64)
+        self.open_seq = np.full(shape, _NOT_HELD, dtype=np.int64)
+
+        rm = risk_manager
+        self.use_sizing = bool(getattr(rm, '_use_position_sizing', True))
+        self.use_stop_loss = bool(getattr(rm, '_use_stop_loss', False))
+        self.use_take_profit = bool(getattr(rm, '_use_take_profit', False))
+        self.use_trailing = bool(rm.use_trailing_stop)
+        self.max_open_positions = rm.max_open_positions
+        self.max_position_size = rm.max_position_size
+        self.stop_loss_pct = rm.stop_loss_pct
+        self.profit_target_ratio = rm.profit_target_ratio
+        self.trailing_activation = rm.trailing_stop_activation
+        self.trailing_distance = rm.trailing_stop_distance
+        cost_params = cost_params or {}
+        self.commission_pct = cost_params.get('commission_pct', 0.0)
+        self.slippage_pct = cost_params.get('slippage_pct', 0.0)
+
+        self._events: List[Dict[str, np.ndarray]] = []
+
+    # --- Helpers ---
+
+    def opening_order(self) -> np.ndarray:
+        """(K, n_tickers) column order by position opening sequence; columns without a position come last."""
+        return _opening_order(self.open_seq)
+
+    def position_value(self, prices: np.ndarray) -> np.ndarray:
+        """Sum of shares * price over held positions, accumulated in opening order (K,)."""
+        return _ordered_position_value(self.held, self.shares, self.open_seq, prices)
+
+    # --- Trading ---
+
+    def open(self, k: np.ndarray, j: int, price: float, day: int, n_open: np.ndarray,
+             rejected: Dict[str, np.ndarray]) -> None:
+        """Attempts to open column ``j`` at ``price`` in scenarios ``k`` (PortfolioManager.open_position)."""
+        def reject(mask, reason):
+            np.add.at(rejected[reason], k[mask], 1)
+
+        max_reached = ~(n_open[k] < self.max_open_positions)
+        reject(max_reached, 'max_positions_reached')
+        k = k[~max_reached]
+        if len(k) == 0:
+            return
+
+        cash = self.cash[k]
+        low_cash = cash < price
+        reject(low_cash, 'insufficient_cash')
+        k, cash = k[~low_cash], cash[~low_cash]
+        if len(k) == 0:
+            return
+
+        if self.use_sizing:
+            # Other positions are valued at their entry price (get_current_portfolio_value({ticker: price}))
+            total_value = cash + _ordered_position_value(self.held[k], self.shares[k], self.open_seq[k], self.entry_price[k])
+            shares = np.floor_divide(total_value * self.max_position_size, price).astype(np.int64)
+            shares = np.maximum(shares, 0)
+            no_size = shares <= 0
+            reject(no_size, 'risk_rejected_size')
+            k, cash, shares = k[~no_size], cash[~no_size], shares[~no_size]
+            cost = shares * price
+            over = cash < cost
+            if over.any():
+                affordable = np.floor_divide(cash, price).astype(np.int64)
+                reduce = over & (affordable < shares)
+                shares = np.where(reduce, affordable, shares)
+                cost = np.where(reduce, shares * price, cost)
+                failed = (reduce & (shares <= 0)) | (cash < cost)
+                reject(failed, 'insufficient_cash')
+                k, cash, shares = k[~failed], cash[~failed], shares[~failed]
+        else:
+            shares = np.floor_divide(cash, price).astype(np.int64)
+            failed = shares <= 0
+            cost = shares * price
+            failed |= cash < cost
+            reject(failed, 'insufficient_cash')
+            k, cash, shares = k[~failed], cash[~failed], shares[~failed]
+        if len(k) == 0:
+            return
+
+        # Stops (RiskManager.calculate_stops, long) on the pre-slippage price
+        stop_loss_distance = price * self.stop_loss_pct
+        stop_loss_price = min(price - (stop_loss_distance * 1), price * 0.999)
+        take_profit_price = max(price + ((stop_loss_distance * self.profit_target_ratio) * 1), price * 1.001)
+
+        entry_price = price + price * self.slippage_pct
+        cost = shares * entry_price
+        total_cost = cost + cost * self.commission_pct
+        failed = cash < total_cost
+        reject(failed, 'insufficient_cash')
+        k, shares, total_cost = k[~failed], shares[~failed], total_cost[~failed]
+        if len(k) == 0:
+            return
+
+        self.held[k, j] = True
+        self.shares[k, j] = shares
+        self.entry_price[k, j] = entry_price
+        self.stop[k, j] = stop_loss_price
+        self.initial_stop[k, j] = stop_loss_price
+        self.take[k, j] = take_profit_price
+        self.high[k, j] = entry_price
+        self.low[k, j] = entry_price
+        self.entry_day[k, j] = day
+        self.open_seq[k, j] = day * self.held.shape[1] + j
+        self.cash[k] -= total_cost
+        n_open[k] += 1
+
+    def close(self, k: np.ndarray, j: np.ndarray, exit_price: np.ndarray, day: int, reason: int,
+              n_open: np.ndarray) -> None:
+        """Closes positions (k[i], j[i]) at ``exit_price[i]`` (PortfolioManager.close_position)."""
+        valid = ~np.isnan(exit_price) & (exit_price > 0)
+        k, j, exit_price = k[valid], j[valid], exit_price[valid]
+        if len(k) == 0:
+            return
+        shares = self.shares[k, j]
+        entry_price = self.entry_price[k, j]
+        exit_price = exit_price - exit_price * self.slippage_pct
+        proceeds = shares * exit_price
+        cost_basis = shares * entry_price
+        exit_commission = proceeds * self.commission_pct
+        net_proceeds = proceeds - exit_commission
+        total_commission = (shares * entry_price) * self.commission_pct + exit_commission
+        gross_pnl = (exit_price - entry_price) * shares * 1
+        net_pnl = gross_pnl - total_commission
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pnl_pct = np.where(cost_basis != 0, (net_pnl / cost_basis) * 100, 0.0)
+
+        self._events.append({
+            'scenario': k, 'column': j, 'entry_day': self.entry_day[k, j], 'exit_day': np.full(len(k), day),
+            'entry_price': entry_price, 'exit_price': exit_price, 'shares': shares,
+            'gross_pnl': gross_pnl, 'net_pnl': net_pnl, 'commission': total_commission, 'pnl_pct': pnl_pct,
+            'reason': np.full(len(k), reason, dtype=np.int8),
+            'initial_stop_price': self.initial_stop[k, j], 'final_stop_price': self.stop[k, j],
+        })
+        self.cash[k] += net_proceeds
+        self.held[k, j] = False
+        self.shares[k, j] = 0
+        self.open_seq[k, j] = _NOT_HELD
+        n_open[k] -= 1
+
+    def close_in_opening_order(self, exiting: np.ndarray, exit_prices: np.ndarray, day: int,
+                               reasons: np.ndarray, n_open: np.ndarray) -> None:
+        """Closes every flagged (K, n_tickers) position, one opening-order rank at a time."""
+        if not exiting.any():
+            return
+        order = self.opening_order()
+        for r in range(order.shape[1]):
+            col = order[:, r]
+            mask = exiting[self.rows, col]
+            if not mask.any():
+                continue
+            k = self.rows[mask]
+            c = col[mask]
+            for reason in np.unique(reasons[k, c]):
+                sel = reasons[k, c] == reason
+                self.close(k[sel], c[sel], exit_prices[k[sel], c[sel]], day, int(reason), n_open)
+
+    def update_stops(self, prices: np.ndarray, day: int, n_open: np.ndarray) -> None:
+        """Stop-loss / take-profit exits and trailing stop updates (PortfolioManager.update_positions_and_stops)."""
+        held = self.held
+        if not held.any():
+            return
+        self.high = np.where(held, np.maximum(self.high, prices), self.high)
+        self.low = np.where(held, np.minimum(self.low, prices), self.low)
+
+        stop_hit = held & self.use_stop_loss & (prices <= self.stop)
+        take_hit = held & ~stop_hit & self.use_take_profit & (prices >= self.take)
+        exiting = stop_hit | take_hit
+
+        if self.use_trailing and self.use_stop_loss:
+            trail = held & ~exiting & (self.high >= self.entry_price * (1 + self.trailing_activation))
+            candidate = self.high * (1 - self.trailing_distance)
+            self.stop = np.where(trail & (candidate > self.stop), candidate, self.stop)
+
+        if exiting.any():
+            exit_prices = np.where(stop_hit, self.stop, self.take)
+            reasons = np.where(stop_hit, EXIT_REASONS.index('stop_loss'), EXIT_REASONS.index('take_profit'))
+            self.close_in_opening_order(exiting, exit_prices, day, reasons, n_open)
+
+    def trade_columns(self) -> Dict[str, np.ndarray]:
+        """Concatenates the recorded trade events into columns."""
+        if not self._events:
+            return {}
+        return {key: np.concatenate([event[key] for event in self._events]) for key in self._events[0]}
+
+
+def _opening_order(open_seq: np.ndarray) -> np.ndarray:
+    return np.argsort(open_seq, axis=1, kind='stable')
+
+
+def _ordered_position_value(held: np.ndarray, shares: np.ndarray, open_seq: np.ndarray, prices: np.ndarray) -> np.ndarray:
+    """
+    Row-wise sum of shares * price over held positions.
+
+    Positions are added in opening order, the iteration order of
+    ``PortfolioManager.positions``; ``cumsum`` accumulates strictly left to
+    right, so every scenario gets the same floating point sum as the loop.
+    """
+    if held.shape[1] == 0:
+        return np.zeros(held.shape[0])
+    values = np.where(held, shares * prices, 0.0)
+    ordered = np.take_along_axis(values, _opening_order(open_seq), axis=1)
+    return np.cumsum(ordered, axis=1)[:, -1]
+
+
+def run_multi_scenario_simulation(panel: SimulationPanel,
+                                  signal_tensor: np.ndarray,
+                                  risk_manager,
+                                  cost_params: Optional[Dict[str, Any]],
+                                  initial_capital: float,
+                                  market_favorable: Optional[np.ndarray] = None,
+                                  cancel_token: Optional[CancellationToken] = None) -> ScenarioResults:
+    """
+    Advances K independent portfolios in lockstep over the same dates.
+
+    Scenario ``k`` behaves like ``run_array_simulation`` with ``signal_tensor[k]``
+    followed by BacktestManager's end-of-backtest close-out, with cash, shares,
+    stops and equity held as arrays across scenarios. Each day costs a fixed
+    number of array operations per ticker, independent of K. All scenarios
+    share the risk and cost settings. Positions are long only.
+
+    Args:
+        panel (SimulationPanel): Prices (signals in the panel are ignored).
+        signal_tensor (np.ndarray): Signals of shape (K, n_days, n_tickers), any numeric dtype
+                                    (the batched generators return int8). Read one day at a time, never copied.
+        risk_manager (RiskManager): Risk settings shared by all scenarios.
+        cost_params (Optional[Dict[str, Any]]): 'commission_pct' and 'slippage_pct'.
+        initial_capital (float): Starting cash of every scenario.
+        market_favorable (Optional[np.ndarray]): Boolean array (n_days,) from the market filter.
+        cancel_token (Optional[CancellationToken]): Checked every day; raises ``BacktestCancelled``.
+
+    Returns:
+        ScenarioResults: Equity curves, rejection counters and trades per scenario.
+    """
+    signal_tensor = np.asarray(signal_tensor)
+    n_scenarios, num_days, n_tickers = signal_tensor.shape
+    if (num_days, n_tickers) != panel.close.shape:
+        raise ValueError(f"Signal tensor shape {signal_tensor.shape} does not match panel shape {panel.close.shape}.")
+
+    book = _LockstepBook(n_scenarios, n_tickers, initial_capital, risk_manager, cost_params)
+    rejected = {reason: np.zeros(n_scenarios, dtype=np.int64) for reason in (
+        'insufficient_cash', 'risk_rejected_size', 'max_positions_reached', 'position_exists',
+        'invalid_price', 'missing_data', 'market_filter', 'other')}
+    total_signals = np.zeros(n_scenarios, dtype=np.int64)
+    n_open = np.zeros(n_scenarios, dtype=np.int64)
+    equity = np.empty((n_scenarios, num_days))
+    has_prices = panel.has_prices
+    rows = book.rows
+
+    for i in range(num_days):
+        raise_if_cancelled(cancel_token)
+        close_row = panel.close[i]
+        signal_rows = signal_tensor[:, i, :]
+
+        # --- Stops and trailing stops (missing prices fall back to the entry price) ---
+        held_prices = np.where(np.isnan(close_row)[None, :], book.entry_price, close_row[None, :])
+        book.update_stops(held_prices, i, n_open)
+
+        # --- Signal processing ---
+        if market_favorable is None or market_favorable[i]:
+            buy = signal_rows > 0
+            if buy.any():
+                total_signals += np.count_nonzero(buy, axis=1)
+                # A column's position only changes while that column is processed, so
+                # these checks can run for the whole day before the ordered pass below.
+                exists = buy & book.held
+                rejected['position_exists'] += np.count_nonzero(exists, axis=1)
+                candidates = buy & ~exists
+                missing = candidates & ~has_prices
+                invalid = candidates & has_prices & ~(close_row > 0)
+                rejected['missing_data'] += np.count_nonzero(missing, axis=1)
+                rejected['invalid_price'] += np.count_nonzero(invalid, axis=1)
+                openable = candidates & ~missing & ~invalid
+            else:
+                openable = buy
+            sellable = (signal_rows < 0) & book.held & has_prices & (close_row > 0)
+
+            # Opens and closes change cash, so columns are processed in ticker order
+            for j in np.flatnonzero(openable.any(axis=0) | sellable.any(axis=0)):
+                price = float(close_row[j])
+                if openable[:, j].any():
+                    book.open(rows[openable[:, j]], j, price, i, n_open, rejected)
+                if sellable[:, j].any():
+                    k = rows[sellable[:, j]]
+                    book.close(k, np.full(len(k), j), np.full(len(k), price), i, EXIT_REASONS.index('signal'), n_open)
+        else:
+            rejected['market_filter'] += np.count_nonzero(signal_rows > 0, axis=1)
+
+        # --- End-of-day valuation ---
+        eod_prices = np.where(np.isnan(close_row)[None, :], book.entry_price, close_row[None, :])
+        equity[:, i] = book.cash + book.position_value(eod_prices)
+
+    # --- Final close-out (BacktestManager: close_all_positions on the last date) ---
+    if num_days:
+        last = num_days - 1
+        final_prices = np.where(np.isnan(panel.close[last])[None, :], book.entry_price, panel.close[last][None, :])
+        reasons = np.full(book.held.shape, EXIT_REASONS.index('end_of_backtest'))
+        book.close_in_opening_order(book.held.copy(), final_prices, last, reasons, n_open)
+
+    return ScenarioResults(
+        dates=panel.dates, tickers=list(panel.tickers), equity=equity, cash=book.cash.copy(),
+        total_signals=total_signals, rejected_signal_counts=rejected, trade_columns=book.trade_columns()
+    )
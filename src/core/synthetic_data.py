@@ -0,0 +1,269 @@
+"""
+Vectorized generator of synthetic multi-asset OHLCV data.
+
+Returns of all tickers are drawn in one batch from a factor model:
+
+    r[t, i] = alpha[i] + sum_k F[t, k] * B[i, k] + vol[i] * m[t] * e[t, i]
+
+Factor 0 is the market. ``m[t]`` and the market drift follow a two-state
+(calm/stress) regime chain with geometric durations. On top of the returns
+the generator adds:
+
+- overnight gaps (including occasional large jumps),
+- missing days and late listings (ragged histories),
+- stock splits, which leave the prices unadjusted like raw vendor data.
+
+The result is the long format of ``data/historical_prices.csv``.
+``write_price_data`` writes it as the CSV plus its columnar price store, so a
+``DataLoader`` pointed at the CSV starts from memory-mapped arrays without
+parsing it.
+
+Example:
+    market = generate_synthetic_market(SyntheticMarketConfig(n_tickers=2000, years=30))
+    write_price_data(market.prices, "data/synthetic/historical_prices.csv")
+"""
+
+import logging
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from src.core.price_store import OHLCV_FIELDS, REQUIRED_COLUMNS, PriceStore
+
+logger = logging.getLogger(__name__)
+
+TRADING_DAYS_PER_YEAR = 252
+CALM, STRESS = 0, 1
+REGIME_NAMES = ('calm', 'stress')
+SPLIT_RATIOS = (2.0, 3.0, 4.0, 1.5)
+PRICE_DECIMALS = 4
+TICKER_BLOCK = 256   # Tickers simulated per block of day x ticker matrices
+
+
+@dataclass
+class SyntheticMarketConfig:
+    """Parameters of a synthetic market. The defaults give a realistic-looking daily equity universe."""
+    n_tickers: int = 100
+    years: float = 10.0
+    tickers: Optional[Sequence[str]] = None  # Names; default SYN00001.. (overrides n_tickers)
+    start_date: str = "2000-01-03"
+    seed: int = 42
+
+    # Factor model
+    n_factors: int = 3                       # Market plus sector-like factors
+    market_drift: float = 0.0003             # Daily market drift in the calm regime
+    market_vol: float = 0.010
+    factor_vol: float = 0.005                # Volatility of the non-market factors
+    idiosyncratic_vol: float = 0.015         # Average ticker-specific volatility
+    start_price_range: tuple = (10.0, 200.0)
+
+    # Regimes
+    calm_mean_days: float = 250.0            # Mean duration of a calm regime
+    stress_mean_days: float = 40.0
+    stress_vol_multiplier: float = 2.5
+    stress_market_drift: float = -0.0015
+
+    # Microstructure and data defects
+    gap_vol: float = 0.003                   # Overnight gap volatility
+    jump_probability: float = 0.002          # Chance of a large overnight jump per ticker and day
+    jump_vol: float = 0.06
+    missing_day_probability: float = 0.002   # Chance a ticker has no row on a day
+    late_listing_fraction: float = 0.2       # Tickers whose history starts later than the market
+    splits_per_year: float = 0.03            # Expected splits per ticker and year (prices stay unadjusted)
+
+    def ticker_names(self) -> List[str]:
+        if self.tickers is not None:
+            return [str(t) for t in self.tickers]
+        return [f"SYN{i:05d}" for i in range(1, self.n_tickers + 1)]
+
+    def with_daily_volatility(self, daily_vol: float) -> 'SyntheticMarketConfig':
+        """
+        Copy with the market, factor and idiosyncratic volatilities scaled by one
+        factor so that an average ticker's daily return has standard deviation
+        ``daily_vol`` in the calm regime (set ``stress_vol_multiplier=1.0`` to
+        keep it there throughout).
+
+        Args:
+            daily_vol (float): Target total daily volatility of a ticker's returns.
+
+        Returns:
+            SyntheticMarketConfig: Rescaled configuration.
+        """
+        # E[b^2] = E[u^2] = 13/12 for the market beta and the idio multiplier ~ U(0.5, 1.5);
+        # the other loadings are N(0, 1)
+        variance = (13 / 12 * (self.market_vol ** 2 + self.idiosyncratic_vol ** 2)
+                    + (max(1, self.n_factors) - 1) * self.factor_vol ** 2)
+        scale = daily_vol / np.sqrt(variance) if variance > 0 else 0.0
+        return replace(self, market_vol=self.market_vol * scale, factor_vol=self.factor_vol * scale,
+                       idiosyncratic_vol=self.idiosyncratic_vol * scale)
+
+
+@dataclass
+class SyntheticMarket:
+    """Generated data in the project's long price format, plus the events behind it."""
+    prices: pd.DataFrame     # Date, Ticker, Open, High, Low, Close, Volume (sorted by date, ticker)
+    splits: pd.DataFrame     # Ticker, Date, Ratio of every split
+    regimes: pd.Series       # 'calm' / 'stress' per market date
+
+    def ticker_frames(self) -> Dict[str, pd.DataFrame]:
+        """Splits ``prices`` into one date-indexed OHLCV frame per ticker."""
+        return {
+            str(ticker): group.set_index('Date')[list(OHLCV_FIELDS)]
+            for ticker, group in self.prices.groupby('Ticker', sort=False, observed=True)
+        }
+
+
+def _regime_path(n_days: int, cfg: SyntheticMarketConfig, rng: np.random.Generator) -> np.ndarray:
+    """Alternating calm/stress episodes with geometric durations (starts calm)."""
+    states = np.empty(n_days, dtype=np.int8)
+    pos, state = 0, CALM
+    while pos < n_days:
+        mean_days = cfg.calm_mean_days if state == CALM else cfg.stress_mean_days
+        length = int(rng.geometric(1.0 / max(mean_days, 1.0)))
+        states[pos:pos + length] = state
+        pos += length
+        state = STRESS if state == CALM else CALM
+    return states
+
+
+def generate_synthetic_market(cfg: Optional[SyntheticMarketConfig] = None,
+                              dates: Optional[pd.DatetimeIndex] = None) -> SyntheticMarket:
+    """
+    Generates correlated OHLCV histories for all tickers in one batch.
+
+    Shared inputs (regimes, factor returns) are drawn once. The day x ticker
+    matrices are drawn in blocks of ``TICKER_BLOCK`` tickers, which keeps
+    memory bounded for thousands of tickers over decades.
+
+    Args:
+        cfg (Optional[SyntheticMarketConfig]): Market parameters. Defaults to ``SyntheticMarketConfig()``.
+        dates (Optional[pd.DatetimeIndex]): Market dates. Defaults to ``years`` of business days from
+                                            ``cfg.start_date``.
+
+    Returns:
+        SyntheticMarket: Prices in long format with the split events and regime path.
+    """
+    cfg = cfg or SyntheticMarketConfig()
+    rng = np.random.default_rng(cfg.seed)
+    tickers = np.array(cfg.ticker_names(), dtype=object)
+    if dates is None:
+        dates = pd.bdate_range(cfg.start_date, periods=max(1, int(round(cfg.years * TRADING_DAYS_PER_YEAR))))
+    dates = pd.DatetimeIndex(dates)
+    n_days, n_tickers = len(dates), len(tickers)
+    n_factors = max(1, cfg.n_factors)
+
+    # --- Market-wide inputs ---
+    regimes = _regime_path(n_days, cfg, rng)
+    vol_mult = np.where(regimes == STRESS, cfg.stress_vol_multiplier, 1.0)
+    factor_vols = np.full(n_factors, cfg.factor_vol)
+    factor_vols[0] = cfg.market_vol
+    factors = rng.standard_normal((n_days, n_factors)) * factor_vols * vol_mult[:, None]
+    factors[:, 0] += np.where(regimes == STRESS, cfg.stress_market_drift, cfg.market_drift)
+
+    # --- Per-ticker parameters ---
+    loadings = np.empty((n_tickers, n_factors))
+    loadings[:, 0] = rng.uniform(0.5, 1.5, n_tickers)
+    loadings[:, 1:] = rng.normal(0.0, 1.0, (n_tickers, n_factors - 1))
+    alpha = rng.normal(0.0, 0.0002, n_tickers)
+    idio_vol = cfg.idiosyncratic_vol * rng.uniform(0.5, 1.5, n_tickers)
+    start_prices = rng.uniform(*cfg.start_price_range, n_tickers)
+    base_volume = rng.lognormal(12.5, 1.0, n_tickers)
+    late = rng.random(n_tickers) < cfg.late_listing_fraction
+    listing_day = np.where(late, rng.integers(0, max(1, int(n_days * 0.8)), n_tickers), 0)
+
+    # Splits before a ticker's listing are dropped; prices stay unadjusted (divide from the split date on)
+    split_rate = cfg.splits_per_year * n_days / TRADING_DAYS_PER_YEAR if n_days > 1 else 0.0
+    split_counts = rng.poisson(split_rate, n_tickers)
+    split_tickers = np.repeat(np.arange(n_tickers), split_counts)
+    split_days = rng.integers(1, max(2, n_days), len(split_tickers))  # Never on the first day
+    split_ratios = rng.choice(SPLIT_RATIOS, len(split_tickers))
+    listed = split_days >= listing_day[split_tickers]
+    split_tickers, split_days, split_ratios = split_tickers[listed], split_days[listed], split_ratios[listed]
+
+    # --- Day x ticker matrices, one block of tickers at a time ---
+    frames = []
+    volume_regime = np.where(regimes == STRESS, 1.5, 1.0)[:, None]
+    wick_vol = (cfg.idiosyncratic_vol / 2) * vol_mult[:, None]
+    for first in range(0, n_tickers, TICKER_BLOCK):
+        block = slice(first, min(first + TICKER_BLOCK, n_tickers))
+        width = block.stop - block.start
+
+        returns = factors @ loadings[block].T + alpha[block]
+        returns += rng.standard_normal((n_days, width)) * idio_vol[block] * vol_mult[:, None]
+        # Part of each day's return happens overnight; jumps are added on top
+        gaps = rng.normal(0.0, cfg.gap_vol, (n_days, width))
+        jumps = rng.random((n_days, width)) < cfg.jump_probability
+        gaps[jumps] += rng.normal(0.0, cfg.jump_vol, int(jumps.sum()))
+        returns[jumps] += gaps[jumps]
+
+        close = start_prices[block] * np.exp(np.cumsum(returns, axis=0))
+        open_ = np.vstack([start_prices[None, block], close[:-1]]) * np.exp(gaps)
+        high = np.maximum(open_, close) * np.exp(np.abs(rng.standard_normal((n_days, width))) * wick_vol)
+        low = np.minimum(open_, close) * np.exp(-np.abs(rng.standard_normal((n_days, width))) * wick_vol)
+        volume = (base_volume[block] * rng.lognormal(0.0, 0.4, (n_days, width))
+                  * (1.0 + 20.0 * np.abs(returns)) * volume_regime)
+
+        in_block = (split_tickers >= block.start) & (split_tickers < block.stop)
+        if in_block.any():
+            divisor = np.ones((n_days, width))
+            np.multiply.at(divisor, (split_days[in_block], split_tickers[in_block] - block.start), split_ratios[in_block])
+            divisor = np.cumprod(divisor, axis=0)
+            open_, high, low, close = open_ / divisor, high / divisor, low / divisor, close / divisor
+            volume *= divisor
+
+        present = rng.random((n_days, width)) >= cfg.missing_day_probability
+        present &= np.arange(n_days)[:, None] >= listing_day[None, block]
+        day_idx, col_idx = np.nonzero(present)
+        frames.append(pd.DataFrame({
+            'Date': dates[day_idx],
+            'Ticker': col_idx + block.start,
+            'Open': open_[day_idx, col_idx],
+            'High': high[day_idx, col_idx],
+            'Low': low[day_idx, col_idx],
+            'Close': close[day_idx, col_idx],
+            'Volume': volume[day_idx, col_idx].astype(np.int64),
+        }))
+
+    prices = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=REQUIRED_COLUMNS)
+    prices = prices.sort_values(['Date', 'Ticker'], kind='stable', ignore_index=True)
+    prices['Ticker'] = pd.Categorical.from_codes(prices['Ticker'].to_numpy(dtype=np.int64), categories=tickers)
+    splits = pd.DataFrame({'Ticker': tickers[split_tickers], 'Date': dates[split_days], 'Ratio': split_ratios})
+
+    logger.info(f"Generated synthetic market: {n_tickers} tickers x {n_days} days ({len(prices):,} rows, "
+                f"{len(splits)} splits, {int((regimes == STRESS).sum())} stress days).")
+    return SyntheticMarket(
+        prices=prices,
+        splits=splits.sort_values(['Date', 'Ticker']).reset_index(drop=True),
+        regimes=pd.Series(np.array(REGIME_NAMES)[regimes], index=dates, name='Regime'),
+    )
+
+
+def write_price_data(prices: pd.DataFrame,
+                     csv_path: Union[str, Path],
+                     build_store: bool = True) -> Path:
+    """
+    Writes a long-format price frame as the project's price CSV and (optionally) its columnar store.
+
+    Args:
+        prices (pd.DataFrame): Frame with the REQUIRED_COLUMNS (e.g. ``SyntheticMarket.prices``).
+        csv_path (Union[str, Path]): Target CSV; its directory is created if needed.
+        build_store (bool): Build the price store from ``prices`` right away, so the first
+                            ``DataLoader`` does not have to parse the CSV.
+
+    Prices are rounded to ``PRICE_DECIMALS`` decimals.
+
+    Returns:
+        Path: The CSV path.
+    """
+    csv_path = Path(csv_path)
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    # Rounded first, so the store holds exactly what a reader of the CSV gets
+    prices = prices[REQUIRED_COLUMNS].round({field: PRICE_DECIMALS for field in ('Open', 'High', 'Low', 'Close')})
+    prices.to_csv(csv_path, index=False, date_format='%Y-%m-%d')
+    if build_store:
+        PriceStore.open_or_build(csv_path, frame=prices)
+    logger.info(f"Wrote {len(prices):,} price rows to {csv_path}.")
+    return csv_path
@@ -20,6 +20,23 @@ except ImportError as e:
     class PortfolioManager: pass
     class Position: pass
 
+try:
+    from .position_book import PositionBook, PositionView
+    logger.debug("Successfully imported PositionBook.")
+except ImportError as e:
+    logger.error(f"Failed to import PositionBook: {e}")
+    # Fallback definitions
+    class PositionBook: pass
+    class PositionView: pass
+
+try:
+    from .trade_ledger import TradeLedger
+    logger.debug("Successfully imported TradeLedger.")
+except ImportError as e:
+    logger.error(f"Failed to import TradeLedger: {e}")
+    # Fallback definition
+    class TradeLedger: pass
+
 try:
     from .risk_manager import RiskManager
     logger.debug("Successfully imported RiskManager.")
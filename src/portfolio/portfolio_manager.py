@@ -6,6 +6,9 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 import logging
+
+from .position_book import PositionBook, PriceInput
+from .trade_ledger import TradeLedger
 # Upewnij się, że RiskManager jest importowany poprawnie
 try:
     from .risk_manager import RiskManager
@@ -51,8 +54,8 @@ class PortfolioManager:
         if initial_capital <= 0: raise ValueError("Initial capital must be positive.")
         self.initial_capital = initial_capital
         self.cash = initial_capital
-        self.positions: Dict[str, Position] = {}
-        self.closed_trades: List[Dict] = []
+        self.positions: PositionBook = PositionBook() # Slot-indexed arrays; dict-like ticker -> position
+        self.closed_trades: TradeLedger = TradeLedger() # Columnar; iterates as trade dicts
         self.portfolio_value_history: List[Tuple[pd.Timestamp, float]] = []
         self.risk_manager = risk_manager if risk_manager is not None else RiskManager()
         
@@ -80,16 +83,15 @@ class PortfolioManager:
             self.use_stop_loss = False
             self.use_take_profit = False
 
-    def get_current_portfolio_value(self, current_prices: Dict[str, float]) -> float:
-        """Calculates the total current value of the portfolio."""
-        position_value = 0.0
-        for ticker, position in self.positions.items():
-            current_price = current_prices.get(ticker, position.entry_price)
-            if pd.notna(current_price): position_value += position.shares * current_price
-            else: logger.warning(f"NaN price for {ticker}. Using entry price."); position_value += position.shares * position.entry_price
-        return self.cash + position_value
+    def get_current_portfolio_value(self, current_prices: PriceInput) -> float:
+        """Calculates the total current value of the portfolio.
+
+        ``current_prices`` is a ``{ticker: price}`` dict or a price array aligned to the
+        position book slots; positions without a valid price are valued at entry price.
+        """
+        return self.cash + self.positions.market_value(self.positions.price_array(current_prices))
 
-    def update_portfolio_value(self, current_prices: Dict[str, float], current_date: Optional[pd.Timestamp] = None) -> float:
+    def update_portfolio_value(self, current_prices: PriceInput, current_date: Optional[pd.Timestamp] = None) -> float:
         """Calculates current portfolio value and optionally records it."""
         total_value = self.get_current_portfolio_value(current_prices)
         if current_date is not None: self.portfolio_value_history.append((current_date, total_value))
@@ -264,24 +266,23 @@ class PortfolioManager:
         
         pnl_pct = (net_pnl / cost_basis) * 100 if cost_basis != 0 else 0.0
 
-        trade_record = {
-            'ticker': position.ticker, 
-            'entry_date': position.entry_date, 
-            'exit_date': exit_date, 
-            'entry_price': position.entry_price, # Price after entry slippage
-            'exit_price': exit_price,         # Price after exit slippage
-            'shares': position.shares, 
-            'direction': position.direction, 
-            'gross_pnl': gross_pnl,
-            'net_pnl': net_pnl,               # Added net PnL
-            'commission': total_commission,   # Added total commission
-            'pnl_pct': pnl_pct,               # PnL % based on net PnL
-            'exit_reason': reason, 
-            'holding_period_days': (exit_date - position.entry_date).days if pd.notna(position.entry_date) and pd.notna(exit_date) else None, 
-            'initial_stop_price': position.initial_stop_price, 
-            'final_stop_price': position.stop_loss_price
-        }
-        self.closed_trades.append(trade_record)
+        self.closed_trades.record(
+            ticker=position.ticker,
+            entry_date=position.entry_date,
+            exit_date=exit_date,
+            entry_price=position.entry_price, # Price after entry slippage
+            exit_price=exit_price,            # Price after exit slippage
+            shares=position.shares,
+            direction=position.direction,
+            gross_pnl=gross_pnl,
+            net_pnl=net_pnl,
+            commission=total_commission,
+            pnl_pct=pnl_pct,                  # PnL % based on net PnL
+            exit_reason=reason,
+            holding_period_days=(exit_date - position.entry_date).days if pd.notna(position.entry_date) and pd.notna(exit_date) else None,
+            initial_stop_price=position.initial_stop_price,
+            final_stop_price=position.stop_loss_price
+        )
         self.cash += net_proceeds # Add net proceeds (after commission)
         del self.positions[ticker]
 
@@ -300,38 +301,34 @@ class PortfolioManager:
                 else: logger.error(f"Cannot close {ticker}: No valid exit price on {current_date}.")
         logger.info(f"Closed {closed_count} positions during final closure.")
 
-    def update_positions_and_stops(self, current_prices: Dict[str, float], current_date: pd.Timestamp):
-        """Checks for stop-loss/take-profit triggers and updates trailing stops."""
+    def update_positions_and_stops(self, current_prices: PriceInput, current_date: pd.Timestamp):
+        """Checks for stop-loss/take-profit triggers and updates trailing stops.
+
+        ``current_prices`` is a ``{ticker: price}`` dict or a slot-aligned price array;
+        positions without a valid price are skipped. All positions are updated with
+        array operations; triggered exits are closed in position opening order.
+        """
+        book = self.positions
+        if len(book) == 0: return
+        prices = book.price_array(current_prices)
+        slots = book.held_slots()
+        slot_prices = prices[slots]
+        priced = ~np.isnan(slot_prices)
+        slots, slot_prices = slots[priced], slot_prices[priced]
+        if slots.size == 0: return
+
+        book.update_peaks(slots, slot_prices)
+        # Check Stops/Profits only if their respective features are enabled
+        exiting, exit_prices, stop_hit = book.triggered_exits(slots, slot_prices, self.use_stop_loss, self.use_take_profit)
+        # Update Trailing Stop only if trailing stop feature is enabled (positions that exit keep their stop)
+        if self.use_stop_loss:
+            book.update_trailing_stops(slots[~exiting], self.risk_manager)
+
         positions_to_close = []
-        for ticker, position in self.positions.items():
-            current_price = current_prices.get(ticker)
-            if current_price is None or pd.isna(current_price): continue
-
-            position.update_peak_prices(current_price)
-            exit_reason, exit_price = None, current_price
-
-            # Check Stops/Profits only if their respective features are enabled
-            if position.direction > 0: # Long
-                if self.use_stop_loss and current_price <= position.stop_loss_price: 
-                    exit_reason, exit_price = "stop_loss", position.stop_loss_price
-                elif self.use_take_profit and current_price >= position.take_profit_price: 
-                    exit_reason, exit_price = "take_profit", position.take_profit_price
-            else: # Short
-                if self.use_stop_loss and current_price >= position.stop_loss_price: 
-                    exit_reason, exit_price = "stop_loss", position.stop_loss_price
-                elif self.use_take_profit and current_price <= position.take_profit_price: 
-                    exit_reason, exit_price = "take_profit", position.take_profit_price
-
-            if exit_reason:
-                 logger.debug(f"{exit_reason.replace('_',' ').title()} triggered for {ticker}: Price ${current_price:.2f} vs Level ${exit_price:.2f}")
-                 positions_to_close.append((ticker, exit_price, exit_reason))
-                 continue
-
-            # Update Trailing Stop only if trailing stop feature is enabled
-            if position.use_trailing and self.use_stop_loss:
-                new_stop_loss = self.risk_manager.update_trailing_stop(entry_price=position.entry_price, highest_price_since_entry=position.highest_price_since_entry, lowest_price_since_entry=position.lowest_price_since_entry, current_stop=position.stop_loss_price, direction=position.direction)
-                if new_stop_loss != position.stop_loss_price:
-                    position.stop_loss_price = new_stop_loss
+        for slot, exit_price, is_stop, current_price in zip(slots[exiting], exit_prices[exiting], stop_hit[exiting], slot_prices[exiting]):
+            ticker, exit_reason = book.ticker_of(slot), "stop_loss" if is_stop else "take_profit"
+            logger.debug(f"{exit_reason.replace('_',' ').title()} triggered for {ticker}: Price ${current_price:.2f} vs Level ${exit_price:.2f}")
+            positions_to_close.append((ticker, float(exit_price), exit_reason))
 
         # Close positions scheduled for exit
         for ticker, price, reason in positions_to_close:
@@ -0,0 +1,267 @@
+"""
+Array-backed book of open positions.
+
+``PortfolioManager.positions`` used to be a dict of ``Position`` dataclasses
+that the manager walked in Python every bar for valuation, peak prices,
+stop/take-profit checks and trailing stops. ``PositionBook`` keeps the
+position fields in parallel NumPy arrays indexed by a ticker slot: a ticker
+gets a slot the first time it is seen (or when a universe is registered up
+front) and keeps it, so a slot-aligned price array can be fed straight into
+the per-bar operations, each of which is a handful of array expressions.
+
+The book stays a mutable mapping ``ticker -> position`` for existing
+callers: assigning a ``Position`` stores its fields, ``book[ticker]``
+returns a ``PositionView`` whose attributes read and write the arrays, and
+iteration follows position opening order like the dict did. Every sum over
+positions runs in that order, so valuations match the dict loop bit for bit.
+
+Example:
+    book = PositionBook()
+    slots = book.register(['AAPL', 'MSFT'])   # slot of each price column
+    book['AAPL'] = Position(...)
+    value = book.market_value(book.price_array(close_row_by_slot))
+"""
+
+import logging
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterable, Iterator, List, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Position field -> storage dtype (field names as in the Position dataclass)
+POSITION_FIELDS: Dict[str, Any] = {
+    'entry_date': object,
+    'entry_price': np.float64,
+    'shares': np.int64,
+    'direction': np.int8,
+    'stop_loss_price': np.float64,
+    'take_profit_price': np.float64,
+    'initial_stop_price': np.float64,
+    'use_trailing': np.bool_,
+    'highest_price_since_entry': np.float64,
+    'lowest_price_since_entry': np.float64,
+}
+_NOT_HELD = np.iinfo(np.int64).max
+DEFAULT_CAPACITY = 16
+
+PriceInput = Union[Dict[str, float], np.ndarray]
+
+
+class PositionView:
+    """Live view of one position in a ``PositionBook``; reads and writes go to the book's arrays."""
+
+    __slots__ = ('_book', '_slot')
+
+    def __init__(self, book: 'PositionBook', slot: int):
+        self._book = book
+        self._slot = slot
+
+    @property
+    def ticker(self) -> str:
+        return self._book.ticker_of(self._slot)
+
+    def update_peak_prices(self, current_price: float):
+        f = self._book._fields
+        f['highest_price_since_entry'][self._slot] = max(f['highest_price_since_entry'][self._slot], current_price)
+        f['lowest_price_since_entry'][self._slot] = min(f['lowest_price_since_entry'][self._slot], current_price)
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in POSITION_FIELDS)
+        return f"PositionView(ticker={self.ticker!r}, {fields})"
+
+
+def _field_property(name: str) -> property:
+    def getter(view: PositionView):
+        value = view._book._fields[name][view._slot]
+        return value.item() if isinstance(value, np.generic) else value
+
+    def setter(view: PositionView, value: Any):
+        view._book._fields[name][view._slot] = value
+
+    return property(getter, setter)
+
+
+for _name in POSITION_FIELDS:
+    setattr(PositionView, _name, _field_property(_name))
+
+
+class PositionBook(MutableMapping):
+    """
+    Open positions as slot-indexed parallel arrays (see module docstring).
+
+    Args:
+        capacity (int): Initial number of ticker slots; grows by doubling.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        capacity = max(1, capacity)
+        self._tickers: List[str] = []
+        self._slot_of: Dict[str, int] = {}
+        self._fields: Dict[str, np.ndarray] = {name: np.zeros(capacity, dtype=dtype) for name, dtype in POSITION_FIELDS.items()}
+        self._held = np.zeros(capacity, dtype=bool)
+        self._open_seq = np.full(capacity, _NOT_HELD, dtype=np.int64)
+        self._next_seq = 0
+        self._n_held = 0
+
+    # --- Slots ---
+
+    @property
+    def n_slots(self) -> int:
+        """Number of tickers with a slot; slot-aligned arrays have this length."""
+        return len(self._tickers)
+
+    def _grow(self, needed: int) -> None:
+        capacity = len(self._held)
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, 2 * capacity)
+        for name, values in self._fields.items():
+            grown = np.zeros(new_capacity, dtype=values.dtype)
+            grown[:capacity] = values
+            self._fields[name] = grown
+        self._held = np.concatenate([self._held, np.zeros(new_capacity - capacity, dtype=bool)])
+        self._open_seq = np.concatenate([self._open_seq, np.full(new_capacity - capacity, _NOT_HELD, dtype=np.int64)])
+
+    def slot(self, ticker: str) -> int:
+        """Slot of ``ticker``, assigning a new one if the ticker is unknown."""
+        slot = self._slot_of.get(ticker)
+        if slot is None:
+            slot = len(self._tickers)
+            self._grow(slot + 1)
+            self._tickers.append(ticker)
+            self._slot_of[ticker] = slot
+        return slot
+
+    def register(self, tickers: Iterable[str]) -> np.ndarray:
+        """
+        Assigns slots to a ticker universe up front.
+
+        Args:
+            tickers (Iterable[str]): Tickers, e.g. the price columns of a panel.
+
+        Returns:
+            np.ndarray: Slot of each ticker; ``prices_by_slot[slots] = row`` aligns a price row.
+        """
+        return np.array([self.slot(ticker) for ticker in tickers], dtype=np.int64)
+
+    def ticker_of(self, slot: int) -> str:
+        return self._tickers[slot]
+
+    def held_slots(self) -> np.ndarray:
+        """Slots of the open positions in opening order."""
+        slots = np.flatnonzero(self._held[:self.n_slots])
+        if slots.size > 1:
+            slots = slots[np.argsort(self._open_seq[slots], kind='stable')]
+        return slots
+
+    def field(self, name: str) -> np.ndarray:
+        """Slot-aligned array of one position field (a view; only held slots are meaningful)."""
+        return self._fields[name][:self.n_slots]
+
+    # --- Mapping interface ---
+
+    def __getitem__(self, ticker: str) -> PositionView:
+        slot = self._slot_of.get(ticker)
+        if slot is None or not self._held[slot]:
+            raise KeyError(ticker)
+        return PositionView(self, slot)
+
+    def __setitem__(self, ticker: str, position: Any) -> None:
+        slot = self.slot(ticker)
+        for name in POSITION_FIELDS:
+            self._fields[name][slot] = getattr(position, name)
+        if not self._held[slot]:
+            # Like a dict, replacing an open position keeps its place in the iteration order
+            self._held[slot] = True
+            self._open_seq[slot] = self._next_seq
+            self._next_seq += 1
+            self._n_held += 1
+
+    def __delitem__(self, ticker: str) -> None:
+        slot = self._slot_of.get(ticker)
+        if slot is None or not self._held[slot]:
+            raise KeyError(ticker)
+        self._held[slot] = False
+        self._open_seq[slot] = _NOT_HELD
+        self._fields['entry_date'][slot] = None
+        self._n_held -= 1
+
+    def __contains__(self, ticker: object) -> bool:
+        slot = self._slot_of.get(ticker)
+        return slot is not None and bool(self._held[slot])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter([self._tickers[slot] for slot in self.held_slots()])
+
+    def __len__(self) -> int:
+        return self._n_held
+
+    def __repr__(self) -> str:
+        return f"PositionBook({list(self)})"
+
+    # --- Per-bar operations ---
+
+    def price_array(self, current_prices: PriceInput) -> np.ndarray:
+        """
+        Slot-aligned float64 prices; NaN where no price is known.
+
+        Args:
+            current_prices (PriceInput): ``{ticker: price}`` or an array already aligned to the slots.
+
+        Returns:
+            np.ndarray: Array of length ``n_slots``.
+        """
+        if isinstance(current_prices, np.ndarray):
+            if len(current_prices) != self.n_slots:
+                raise ValueError(f"Price array has {len(current_prices)} values, the book has {self.n_slots} slots.")
+            return current_prices.astype(np.float64, copy=False)
+        prices = np.full(self.n_slots, np.nan)
+        for slot in self.held_slots():
+            price = current_prices.get(self._tickers[slot])
+            if price is not None:
+                prices[slot] = price
+        return prices
+
+    def market_value(self, prices: np.ndarray) -> float:
+        """Sum of shares * price over open positions in opening order; missing prices use the entry price."""
+        slots = self.held_slots()
+        if slots.size == 0:
+            return 0.0
+        position_prices = prices[slots]
+        position_prices = np.where(np.isnan(position_prices), self._fields['entry_price'][slots], position_prices)
+        # cumsum adds strictly left to right, like the former loop over the positions dict
+        return float(np.cumsum(self._fields['shares'][slots] * position_prices)[-1])
+
+    def update_peaks(self, slots: np.ndarray, prices: np.ndarray) -> None:
+        """Raises the highest / lowers the lowest price since entry of ``slots`` to ``prices``."""
+        high, low = self._fields['highest_price_since_entry'], self._fields['lowest_price_since_entry']
+        high[slots] = np.maximum(high[slots], prices)
+        low[slots] = np.minimum(low[slots], prices)
+
+    def triggered_exits(self, slots: np.ndarray, prices: np.ndarray, use_stop_loss: bool,
+                        use_take_profit: bool) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Stop-loss and take-profit triggers of ``slots`` at ``prices``.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: Per slot: exit flag, exit price (the stop
+            or target level) and whether the exit is a stop loss (else take profit).
+        """
+        f = self._fields
+        long = f['direction'][slots] > 0
+        stop, take = f['stop_loss_price'][slots], f['take_profit_price'][slots]
+        stop_hit = use_stop_loss & np.where(long, prices <= stop, prices >= stop)
+        take_hit = ~stop_hit & use_take_profit & np.where(long, prices >= take, prices <= take)
+        return stop_hit | take_hit, np.where(stop_hit, stop, take), stop_hit
+
+    def update_trailing_stops(self, slots: np.ndarray, risk_manager) -> None:
+        """Moves the stops of the trailing positions among ``slots`` (``RiskManager.update_trailing_stops``)."""
+        f = self._fields
+        slots = slots[f['use_trailing'][slots]]
+        if slots.size == 0:
+            return
+        f['stop_loss_price'][slots] = risk_manager.update_trailing_stops(
+            f['entry_price'][slots], f['highest_price_since_entry'][slots], f['lowest_price_since_entry'][slots],
+            f['stop_loss_price'][slots], f['direction'][slots])
@@ -265,6 +265,33 @@ class RiskManager:
 
         return current_stop # No update
 
+    def update_trailing_stops(self, entry_price: np.ndarray, highest_price_since_entry: np.ndarray,
+                              lowest_price_since_entry: np.ndarray, current_stop: np.ndarray,
+                              direction: np.ndarray) -> np.ndarray:
+        """
+        Vectorized ``update_trailing_stop`` over many positions.
+
+        Args:
+            entry_price (np.ndarray): Entry prices of the positions.
+            highest_price_since_entry (np.ndarray): Highest prices since entry.
+            lowest_price_since_entry (np.ndarray): Lowest prices since entry.
+            current_stop (np.ndarray): Current stop-loss levels.
+            direction (np.ndarray): 1 for long, -1 for short positions.
+
+        Returns:
+            np.ndarray: Updated stop-loss levels (a new array).
+        """
+        current_stop = np.asarray(current_stop, dtype=np.float64)
+        if not self.use_trailing_stop:
+            return current_stop.copy()
+        long = np.asarray(direction) > 0
+        # Long: the stop follows the high up once the activation profit is reached; short: mirrored
+        long_candidate = highest_price_since_entry * (1 - self.trailing_stop_distance)
+        short_candidate = lowest_price_since_entry * (1 + self.trailing_stop_distance)
+        move_long = long & (highest_price_since_entry >= entry_price * (1 + self.trailing_stop_activation)) & (long_candidate > current_stop)
+        move_short = ~long & (lowest_price_since_entry <= entry_price * (1 - self.trailing_stop_activation)) & (short_candidate < current_stop)
+        return np.where(move_long, long_candidate, np.where(move_short, short_candidate, current_stop))
+
 
     def can_open_new_position(self, open_position_count: int) -> bool:
         """
@@ -0,0 +1,403 @@
+"""
+Columnar ledger of closed trades.
+
+``PortfolioManager.closed_trades`` used to be a list with one 15-key dict per
+trade. ``TradeLedger`` keeps the same fields in typed NumPy buffers, one per
+field, that grow geometrically, so appending a trade writes a few scalars and
+high-turnover runs hold a handful of arrays instead of hundreds of thousands
+of dicts. Tickers and exit reasons are dictionary-encoded, dates are int64
+nanoseconds.
+
+Columnar consumers read ``column()`` views, ``to_frame()`` or ``to_arrow()``
+(no copies of the numeric buffers). The ledger is also a read-only
+``Sequence`` of trade dicts, so code written for the list of dicts (charts,
+the partial results publisher, tests) keeps working unchanged.
+
+Example:
+    ledger = TradeLedger()
+    ledger.record('AAPL', entry_date, exit_date, 10.0, 11.0, 5, 1, 5.0, 4.9, 0.1, 9.8, 'signal', 3, 9.5, 9.5)
+    wins = ledger.column('net_pnl') > 0
+    frame = ledger.to_frame()
+"""
+
+import logging
+from collections.abc import Sequence
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from src.core.price_store import to_datetime64_ns
+
+try:
+    import pyarrow as pa
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Field -> kind, in the key order of the trade dicts PortfolioManager used to produce
+TRADE_SCHEMA: Dict[str, str] = {
+    'ticker': 'category',
+    'entry_date': 'datetime',
+    'exit_date': 'datetime',
+    'entry_price': 'float',
+    'exit_price': 'float',
+    'shares': 'int',
+    'direction': 'int8',
+    'gross_pnl': 'float',
+    'net_pnl': 'float',
+    'commission': 'float',
+    'pnl_pct': 'float',
+    'exit_reason': 'category',
+    'holding_period_days': 'optional_int',   # Stored as float64, NaN = None
+    'initial_stop_price': 'float',
+    'final_stop_price': 'float',
+}
+
+_STORAGE_DTYPES = {
+    'category': np.int32,      # Codes into the field's label list
+    'datetime': np.int64,      # Nanoseconds since the epoch, NaT = _NAT
+    'float': np.float64,
+    'int': np.int64,
+    'int8': np.int8,
+    'optional_int': np.float64,
+}
+_NAT = np.iinfo(np.int64).min
+_NS_PER_DAY = 86_400 * 10**9
+DEFAULT_CAPACITY = 64
+
+
+def _to_ns(value: Any) -> int:
+    """Nanosecond timestamp of a date-like value (None/NaT -> _NAT)."""
+    if value is None or value is pd.NaT:
+        return _NAT
+    if isinstance(value, pd.Timestamp):
+        return value.value
+    return pd.Timestamp(value).value
+
+
+def _to_float(value: Any) -> float:
+    return np.nan if value is None else float(value)
+
+
+class TradeLedger(Sequence):
+    """
+    Append-optimized columnar store of closed trades (see module docstring).
+
+    Args:
+        capacity (int): Initial buffer length; buffers double when full.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self._size = 0
+        self._buffers: Dict[str, np.ndarray] = {
+            name: np.empty(max(1, capacity), dtype=_STORAGE_DTYPES[kind]) for name, kind in TRADE_SCHEMA.items()
+        }
+        self._labels: Dict[str, List[str]] = {name: [] for name, kind in TRADE_SCHEMA.items() if kind == 'category'}
+        self._label_codes: Dict[str, Dict[str, int]] = {name: {} for name in self._labels}
+
+    # --- Appending ---
+
+    @property
+    def capacity(self) -> int:
+        return len(self._buffers['net_pnl'])
+
+    def _reserve(self, extra: int) -> None:
+        needed = self._size + extra
+        if needed <= self.capacity:
+            return
+        new_capacity = max(needed, 2 * self.capacity)
+        for name, buffer in self._buffers.items():
+            grown = np.empty(new_capacity, dtype=buffer.dtype)
+            grown[:self._size] = buffer[:self._size]
+            self._buffers[name] = grown
+
+    def _code(self, field: str, label: Any) -> int:
+        codes = self._label_codes[field]
+        code = codes.get(label)
+        if code is None:
+            code = codes[label] = len(self._labels[field])
+            self._labels[field].append(label)
+        return code
+
+    def record(self,
+               ticker: str,
+               entry_date: Any,
+               exit_date: Any,
+               entry_price: float,
+               exit_price: float,
+               shares: int,
+               direction: int,
+               gross_pnl: float,
+               net_pnl: float,
+               commission: float,
+               pnl_pct: float,
+               exit_reason: str,
+               holding_period_days: Optional[int] = None,
+               initial_stop_price: Optional[float] = None,
+               final_stop_price: Optional[float] = None) -> None:
+        """Appends one closed trade (the fields of TRADE_SCHEMA, in order)."""
+        self._reserve(1)
+        i = self._size
+        b = self._buffers
+        b['ticker'][i] = self._code('ticker', ticker)
+        b['entry_date'][i] = _to_ns(entry_date)
+        b['exit_date'][i] = _to_ns(exit_date)
+        b['entry_price'][i] = entry_price
+        b['exit_price'][i] = exit_price
+        b['shares'][i] = shares
+        b['direction'][i] = direction
+        b['gross_pnl'][i] = gross_pnl
+        b['net_pnl'][i] = net_pnl
+        b['commission'][i] = commission
+        b['pnl_pct'][i] = pnl_pct
+        b['exit_reason'][i] = self._code('exit_reason', exit_reason)
+        b['holding_period_days'][i] = _to_float(holding_period_days)
+        b['initial_stop_price'][i] = _to_float(initial_stop_price)
+        b['final_stop_price'][i] = _to_float(final_stop_price)
+        self._size = i + 1
+
+    def append(self, trade: Dict[str, Any]) -> None:
+        """Appends a trade dict (list-compatible; missing numeric fields are stored as NaN)."""
+        self.record(**{name: trade.get(name, np.nan if kind == 'float' else None) for name, kind in TRADE_SCHEMA.items()})
+
+    def extend(self, trades: Iterable[Dict[str, Any]]) -> None:
+        if isinstance(trades, TradeLedger):
+            self.append_columns(**{name: trades.column(name) for name in TRADE_SCHEMA})
+            return
+        for trade in trades:
+            self.append(trade)
+
+    def append_columns(self, **columns: Any) -> None:
+        """
+        Appends many trades at once from one array per field.
+
+        Args:
+            **columns: Every field of TRADE_SCHEMA as an array-like of equal length. Category fields
+                       take labels, date fields anything ``pd.DatetimeIndex`` accepts.
+        """
+        missing = set(TRADE_SCHEMA) - set(columns)
+        if missing:
+            raise ValueError(f"Missing trade columns: {sorted(missing)}")
+        n = len(columns['net_pnl'])
+        if n == 0:
+            return
+        self._reserve(n)
+        start, stop = self._size, self._size + n
+        for name, kind in TRADE_SCHEMA.items():
+            values = columns[name]
+            if len(values) != n:
+                raise ValueError(f"Trade column '{name}' has {len(values)} values, expected {n}")
+            target = self._buffers[name]
+            if kind == 'category':
+                labels, inverse = np.unique(np.asarray(values, dtype=object), return_inverse=True)
+                mapping = np.array([self._code(name, label) for label in labels], dtype=np.int32)
+                target[start:stop] = mapping[inverse]
+            elif kind == 'datetime':
+                target[start:stop] = to_datetime64_ns(pd.DatetimeIndex(values)).view(np.int64)
+            elif kind == 'optional_int':
+                target[start:stop] = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(dtype=np.float64)
+            else:
+                target[start:stop] = np.asarray(values)
+        self._size = stop
+
+    # --- Columnar access ---
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _view(self, name: str) -> np.ndarray:
+        return self._buffers[name][:self._size]
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Values of one field for all trades.
+
+        Numeric fields are views of the buffers (do not modify them); dates come as
+        ``datetime64[ns]`` views, category fields as an object array of labels.
+        """
+        kind = TRADE_SCHEMA[name]
+        values = self._view(name)
+        if kind == 'category':
+            return np.asarray(self._labels[name] + [None], dtype=object)[values]
+        if kind == 'datetime':
+            return values.view('datetime64[ns]')
+        return values
+
+    def codes(self, name: str) -> np.ndarray:
+        """Integer codes of a category field (view); ``labels(name)[code]`` is the value."""
+        if TRADE_SCHEMA[name] != 'category':
+            raise ValueError(f"'{name}' is not a category field")
+        return self._view(name)
+
+    def labels(self, name: str) -> List[str]:
+        return list(self._labels[name])
+
+    def mask_for(self, name: str, value: Any) -> np.ndarray:
+        """Boolean mask of the trades whose category field equals ``value``."""
+        code = self._label_codes[name].get(value)
+        if code is None:
+            return np.zeros(self._size, dtype=bool)
+        return self.codes(name) == code
+
+    def select(self, selector: Union[np.ndarray, slice, List[int]]) -> 'TradeLedger':
+        """New ledger with the trades picked by a boolean mask, index array or slice (copied)."""
+        ledger = TradeLedger(capacity=0)
+        ledger._labels = {name: list(labels) for name, labels in self._labels.items()}
+        ledger._label_codes = {name: dict(codes) for name, codes in self._label_codes.items()}
+        ledger._buffers = {name: np.ascontiguousarray(self._view(name)[selector]) for name in TRADE_SCHEMA}
+        ledger._size = len(ledger._buffers['net_pnl'])
+        return ledger
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        The trades as a DataFrame, one column per field.
+
+        Numeric and date columns wrap the buffers without copying; category fields
+        become ``pd.Categorical`` columns over the shared codes.
+        """
+        data = {}
+        for name, kind in TRADE_SCHEMA.items():
+            values = self._view(name)
+            if kind == 'category':
+                data[name] = pd.Categorical.from_codes(values, categories=self._labels[name]) if self._labels[name] \
+                    else pd.Categorical([None] * self._size)
+            elif kind == 'datetime':
+                data[name] = pd.Series(values.view('datetime64[ns]'), copy=False)
+            else:
+                data[name] = pd.Series(values, copy=False)
+        return pd.DataFrame(data, copy=False)
+
+    def to_arrow(self):
+        """
+        The trades as a ``pyarrow.Table`` (zero-copy for the numeric and date buffers).
+
+        Raises:
+            ImportError: If pyarrow is not installed.
+        """
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow is required for TradeLedger.to_arrow(); install it with: pip install pyarrow")
+        arrays = {}
+        for name, kind in TRADE_SCHEMA.items():
+            values = self._view(name)
+            if kind == 'category':
+                arrays[name] = pa.DictionaryArray.from_arrays(pa.array(values), pa.array(self._labels[name], type=pa.string()))
+            elif kind == 'datetime':
+                arrays[name] = pa.array(values.view('datetime64[ns]'))
+            elif kind == 'optional_int':
+                arrays[name] = pa.array(values, from_pandas=True)
+            else:
+                arrays[name] = pa.array(values)
+        return pa.table(arrays)
+
+    # --- Row access (list-of-dicts compatibility) ---
+
+    def row(self, i: int) -> Dict[str, Any]:
+        """Trade ``i`` as a dict with Python/pandas scalars, like PortfolioManager used to record."""
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError("trade index out of range")
+        trade = {}
+        for name, kind in TRADE_SCHEMA.items():
+            value = self._buffers[name][i]
+            if kind == 'category':
+                trade[name] = self._labels[name][value]
+            elif kind == 'datetime':
+                trade[name] = None if value == _NAT else pd.Timestamp(int(value))
+            elif kind == 'optional_int':
+                trade[name] = None if np.isnan(value) else int(value)
+            elif kind == 'float':
+                trade[name] = float(value)
+            else:
+                trade[name] = int(value)
+        return trade
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """All trades as dicts (the former ``closed_trades`` list)."""
+        if self._size == 0:
+            return []
+        columns = []
+        for name, kind in TRADE_SCHEMA.items():
+            values = self._view(name)
+            if kind == 'category':
+                labels = self._labels[name]
+                columns.append([labels[code] for code in values.tolist()])
+            elif kind == 'datetime':
+                columns.append([None if ts is pd.NaT else ts for ts in pd.DatetimeIndex(values.view('datetime64[ns]'))])
+            elif kind == 'optional_int':
+                columns.append([None if v != v else int(v) for v in values.tolist()])
+            else:
+                columns.append(values.tolist())
+        names = list(TRADE_SCHEMA)
+        return [dict(zip(names, row)) for row in zip(*columns)]
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        if isinstance(key, slice):
+            return [self.row(i) for i in range(*key.indices(self._size))]
+        return self.row(key)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.to_records())
+
+    def __eq__(self, other: Any) -> bool:
+        """Field-by-field comparison with a ledger or a list of trade dicts (missing values compare equal)."""
+        if isinstance(other, list):
+            other = TradeLedger.from_records(other)
+        if not isinstance(other, TradeLedger):
+            return NotImplemented
+        if len(self) != len(other):
+            return False
+        for name, kind in TRADE_SCHEMA.items():
+            mine, theirs = self.column(name), other.column(name)
+            equal_nan = kind in ('float', 'optional_int')
+            if not np.array_equal(mine, theirs, equal_nan=equal_nan):
+                return False
+        return True
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"TradeLedger({self._size} trades)"
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Pickles (e.g. results sent from worker processes) carry only the used part of the buffers
+        return {'size': self._size, 'labels': self._labels,
+                'buffers': {name: self._view(name).copy() for name in TRADE_SCHEMA}}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self._size = state['size']
+        self._buffers = state['buffers']
+        self._labels = state['labels']
+        self._label_codes = {name: {label: code for code, label in enumerate(labels)} for name, labels in self._labels.items()}
+
+    # --- Construction ---
+
+    @classmethod
+    def from_records(cls, trades: Iterable[Dict[str, Any]]) -> 'TradeLedger':
+        trades = list(trades)
+        ledger = cls(capacity=len(trades))
+        ledger.extend(trades)
+        return ledger
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> 'TradeLedger':
+        """Ledger from a frame with the TRADE_SCHEMA columns (e.g. ``to_frame()`` output)."""
+        ledger = cls(capacity=len(frame))
+        ledger.append_columns(**{name: frame[name].to_numpy() for name in TRADE_SCHEMA})
+        return ledger
+
+    @classmethod
+    def coerce(cls, trades: Optional[Iterable[Dict[str, Any]]]) -> 'TradeLedger':
+        """Returns ``trades`` if it already is a ledger, otherwise a ledger built from the trade dicts."""
+        if isinstance(trades, TradeLedger):
+            return trades
+        return cls.from_records(trades or [])
+
+    @staticmethod
+    def holding_days(entry_ns: np.ndarray, exit_ns: np.ndarray) -> np.ndarray:
+        """Whole days between nanosecond timestamps (``Timedelta.days`` semantics)."""
+        return (np.asarray(exit_ns, dtype=np.int64) - np.asarray(entry_ns, dtype=np.int64)) // _NS_PER_DAY
@@ -1,10 +1,14 @@
 import pandas as pd
 import numpy as np
 import logging
+import tempfile
+import threading
 import traceback
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
 from typing import Dict, List, Tuple, Any, Optional
 from datetime import datetime
-import plotly.io as pio # Import pio
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -16,11 +20,20 @@ from src.core.config import config
 from src.services.data_service import DataService
 from src.services.visualization_service import VisualizationService
 from src.visualization.visualizer import BacktestVisualizer
-from src.core.exceptions import DataError, StrategyError, BacktestError
+from src.visualization.downsampling import max_points_for_width
+from src.core.exceptions import DataError, StrategyError, BacktestError, BacktestCancelled
+from src.core.cancellation import CancellationToken
+from src.core.profiling import RunProfiler
+from src.core.result_cache import ResultCache, get_result_cache
+from src.portfolio.trade_ledger import TradeLedger
 
 # Import metric helpers for additional performance calculations
 from src.analysis.metrics import calculate_total_return, calculate_cagr
 
+RUN_STORE_DIR_NAME = 'backtester-runs'          # Fallback run storage when the result cache is disabled
+RUN_STORE_FALLBACK_BYTES = 256 * 1024 * 1024
+LOADED_RUNS_IN_MEMORY = 4                       # Runs kept deserialized for chart callbacks
+
 class BacktestService:
     """
     Service class for handling backtest operations, providing an interface
@@ -41,6 +54,14 @@ class BacktestService:
             self.current_results = None
             self.current_signals = None
             self.current_stats = None
+
+            # Server-side run storage: run ID -> equity, trades, stats and signals.
+            # On disk, so runs finished in background-callback processes are visible here.
+            self.run_store = get_result_cache()
+            if not self.run_store.enabled:
+                self.run_store = ResultCache(Path(tempfile.gettempdir()) / RUN_STORE_DIR_NAME, max_bytes=RUN_STORE_FALLBACK_BYTES)
+            self._loaded_runs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+            self._loaded_runs_lock = threading.Lock()
             
             logger.info("BacktestService initialized")
         except Exception as e:
@@ -57,12 +78,26 @@ class BacktestService:
                      risk_params: Optional[Dict[str, Any]] = None,
                      cost_params: Optional[Dict[str, Any]] = None,
                      rebalancing_params: Optional[Dict[str, Any]] = None,
-                     progress_callback: Optional[callable] = None
+                     progress_callback: Optional[callable] = None,
+                     partial_callback: Optional[callable] = None,
+                     cancel_token: Optional[CancellationToken] = None
                      ) -> Dict[str, Any]:
         """
         Runs a backtest for the specified strategy, tickers, and parameters.
         Returns a dictionary containing the results and any errors.
+
+        ``partial_callback`` receives batches of equity points and closed trades
+        while the simulation runs (nothing is streamed on a result cache hit).
+        A cancelled ``cancel_token`` stops the run and returns a package with
+        ``"cancelled": True``.
+        The package's ``"profile"`` holds the run's phase timings and counters
+        (see ``RunProfiler.report``); they are also appended to
+        ``config.PROFILE_TRACE_PATH`` if set.
         """
+        # Created outside the try so the finally below always stops allocation tracking
+        profiler = RunProfiler(label=f"{strategy_type} on {len(tickers or [])} ticker(s)",
+                               trace_path=config.PROFILE_TRACE_PATH or None,
+                               track_allocations=config.PROFILE_ALLOCATIONS)
         try:
             logger.info(f"--- BacktestService: Starting run_backtest ---")
             if progress_callback: progress_callback((1, "Service: Initializing..."))
@@ -86,20 +121,41 @@ class BacktestService:
             if progress_callback: progress_callback((3, "Service: Backtest Manager Initialized. Configuring DataLoader..."))
 
             # --- 3. Configure DataLoader with Date Range ---
-            # This step is mostly conceptual for progress, as DataLoader is configured within BacktestManager
-            if progress_callback: progress_callback((4, "Service: DataLoader Configuration Simulated. Calling Manager's run_backtest..."))
-
-            # --- 4. Execute Backtest via BacktestManager ---
-            # Manager's progress will range from 8% to 80%
-            all_signals, combined_results, stats = current_backtest_manager.run_backtest(
-                strategy_type=strategy_type,
-                tickers=tickers,
-                strategy_params=strategy_params or {},
-                risk_params=risk_params or {},
-                cost_params=cost_params or {},
-                rebalancing_params=rebalancing_params or {},
-                progress_callback=progress_callback # Pass the callback
+            # The date range is applied by BacktestManager (window plus indicator warm-up)
+            run_id = current_backtest_manager.run_fingerprint(
+                strategy_type, tickers, strategy_params, risk_params, cost_params, rebalancing_params, start_date, end_date
             )
+            with profiler.phase("result_cache"):
+                cached = self.run_store.get(run_id, require_signals=True)
+
+            if cached is not None:
+                # --- 4a. Stored result of an identical run ---
+                all_signals, combined_results, stats = cached['signals'], cached['results'], cached['stats']
+                logger.info(f"Result cache hit for {strategy_type} on {len(tickers)} tickers ({run_id[:12]}).")
+                if progress_callback: progress_callback((80, "Service: Result cache hit. Loaded stored backtest results."))
+            else:
+                if progress_callback: progress_callback((4, "Service: Result cache miss. Calling Manager's run_backtest..."))
+
+                # --- 4. Execute Backtest via BacktestManager ---
+                # Manager's progress will range from 8% to 80%
+                with profiler.phase("backtest"):
+                    all_signals, combined_results, stats = current_backtest_manager.run_backtest(
+                        strategy_type=strategy_type,
+                        tickers=tickers,
+                        strategy_params=strategy_params or {},
+                        risk_params=risk_params or {},
+                        cost_params=cost_params or {},
+                        rebalancing_params=rebalancing_params or {},
+                        progress_callback=progress_callback, # Pass the callback
+                        start_date=start_date,
+                        end_date=end_date,
+                        partial_callback=partial_callback,
+                        cancel_token=cancel_token,
+                        profiler=profiler
+                    )
+                if combined_results and stats and "error" not in stats:
+                    with profiler.phase("result_store"):
+                        self.run_store.put(run_id, combined_results, stats, all_signals)
 
             logger.info("Backtest execution completed by BacktestManager.")
             # Service resumes progress from 81%
@@ -113,55 +169,26 @@ class BacktestService:
             
             # Prepare data for UI
             if progress_callback: progress_callback((SERVICE_RESUME_PROGRESS + 2, "Service: Formatting Metrics...")) # 83%
-            formatted_metrics = self.get_performance_metrics()
-            
-            if progress_callback: progress_callback((SERVICE_RESUME_PROGRESS + 5, "Service: Formatting Trades...")) # 86%
-            trades_list = self.get_trades_table_data()
-            if progress_callback: progress_callback((SERVICE_RESUME_PROGRESS + 7, "Service: Metrics & Trades Processed. Initializing Visualizer...")) # 88%
-
-            # Initialize visualizer
-            visualizer = BacktestVisualizer()
-            visualizer.theme = CHART_THEME
-            if progress_callback: progress_callback((SERVICE_RESUME_PROGRESS + 9, "Service: Visualizer Initialized. Generating Charts...")) # 90%
-
-            # Generate chart figures
-            portfolio_value_series = combined_results.get('Portfolio_Value')
-            benchmark_series = combined_results.get('Benchmark')
-
-            # Equity Curve (Value)
-            if progress_callback: progress_callback((SERVICE_RESUME_PROGRESS + 10, "Service: Charting Equity (Value)...")) # 91%
-            equity_value_fig = visualizer.create_equity_curve_figure(portfolio_value_series, benchmark_series, chart_type="value", initial_capital=initial_capital)
+            with profiler.phase("format_metrics"):
+                formatted_metrics = self.get_performance_metrics()
             
-            # Equity Curve (Returns)
-            if progress_callback: progress_callback((SERVICE_RESUME_PROGRESS + 11, "Service: Charting Equity (Returns)...")) # 92%
-            equity_returns_fig = visualizer.create_equity_curve_figure(portfolio_value_series, benchmark_series, chart_type="returns", initial_capital=initial_capital)
-
-            # Drawdown Chart
-            if progress_callback: progress_callback((SERVICE_RESUME_PROGRESS + 12, "Service: Charting Drawdown...")) # 93%
-            drawdown_fig = visualizer.create_equity_curve_figure(portfolio_value_series, benchmark_series, chart_type="drawdown", initial_capital=initial_capital)
-
-            # Monthly Returns Heatmap
-            if progress_callback: progress_callback((SERVICE_RESUME_PROGRESS + 13, "Service: Charting Monthly Returns...")) # 94%
-            monthly_returns_fig = MONTHLY_RETURNS_DEFAULT_TITLE # Changed from config.MONTHLY_RETURNS_DEFAULT_TITLE
-            if portfolio_value_series is not None and not portfolio_value_series.empty:
-                 monthly_returns_fig = visualizer.create_monthly_returns_heatmap(portfolio_value_series)
-            else: # Create an empty chart if no data
-                 monthly_returns_fig = visualizer.create_empty_chart(MONTHLY_RETURNS_DEFAULT_TITLE) # Changed from config.MONTHLY_RETURNS_DEFAULT_TITLE
-
-            if progress_callback: progress_callback((SERVICE_RESUME_PROGRESS + 14, "Service: Charts Generated. Packaging...")) # 95%
+            if progress_callback: progress_callback((SERVICE_RESUME_PROGRESS + 5, "Service: Counting Trades...")) # 86%
+            trades_count = len(combined_results.get('trades', [])) if combined_results else 0
 
+            # Charts and signal frames stay server-side under the run ID; chart callbacks
+            # render them on demand (see get_equity_chart / get_signals_chart).
+            if progress_callback: progress_callback((SERVICE_RESUME_PROGRESS + 14, "Service: Packaging Run Summary...")) # 95%
             results_package = {
                 "success": True,
+                "run_id": run_id,
                 "metrics": formatted_metrics,
-                "trades_data": trades_list,
+                "trades_count": trades_count,
                 "strategy_type": strategy_type,
-                "portfolio_value_chart_json": equity_value_fig.to_json() if equity_value_fig else None,
-                "portfolio_returns_chart_json": equity_returns_fig.to_json() if equity_returns_fig else None,
-                "drawdown_chart_json": drawdown_fig.to_json() if drawdown_fig else None,
-                "monthly_returns_heatmap_json": monthly_returns_fig.to_json() if monthly_returns_fig else None,
                 "selected_tickers": tickers,
-                "signals": {t: df.to_json(orient="split") for t, df in all_signals.items()}
+                "initial_capital": initial_capital,
+                "profile": profiler.finish(),
             }
+            logger.info(profiler.format_summary())
             logger.info("BacktestService: Successfully processed and packaged results.")
             if progress_callback: progress_callback((SERVICE_RESUME_PROGRESS + 17, "Service: Results Packaged. Finalizing...")) # 98%
             return results_package
@@ -174,6 +201,10 @@ class BacktestService:
             logger.error(f"StrategyError in BacktestService: {se}", exc_info=True)
             if progress_callback: progress_callback((100, f"Service Error: Strategy Issue - {str(se)[:30]}..."))
             return {"success": False, "error": f"Strategy Error: {str(se)}", "metrics": {}, "trades_data": [], "charts": {}}
+        except BacktestCancelled:
+            logger.info("BacktestService: Backtest cancelled.")
+            if progress_callback: progress_callback((100, "Cancelled"))
+            return {"success": False, "cancelled": True, "error": "Backtest cancelled.", "metrics": {}}
         except BacktestError as be: # General backtest error
             logger.error(f"BacktestError in BacktestService: {be}", exc_info=True)
             if progress_callback: progress_callback((100, f"Service Error: Backtest Issue - {str(be)[:30]}..."))
@@ -184,6 +215,112 @@ class BacktestService:
             # Ensure progress is set to 100% with an error message before returning
             if progress_callback: progress_callback((100, f"Service Error: Unexpected - {str(e)[:30]}..."))
             return {"success": False, "error": f"An unexpected error occurred: {str(e)}", "metrics": {}, "trades_data": [], "charts": {}}
+        finally:
+            profiler.finish()  # No-op if the results package already called it
+            if cancel_token is not None:
+                cancel_token.release()
+
+    def get_run(self, run_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Returns the stored results of a run.
+
+        Recently used runs are kept in memory, so repeated chart toggles do not
+        hit the disk.
+
+        Args:
+            run_id: Run ID from the results package.
+
+        Returns:
+            Dict with 'results', 'stats' and 'signals', or None if the run is unknown or expired.
+        """
+        if not run_id:
+            return None
+        with self._loaded_runs_lock:
+            run = self._loaded_runs.get(run_id)
+            if run is not None:
+                self._loaded_runs.move_to_end(run_id)
+                return run
+        run = self.run_store.get(run_id, require_signals=True)
+        if run is None:
+            logger.warning(f"Results of run {run_id[:12]} are not available (unknown or evicted).")
+            return None
+        with self._loaded_runs_lock:
+            self._loaded_runs[run_id] = run
+            while len(self._loaded_runs) > LOADED_RUNS_IN_MEMORY:
+                self._loaded_runs.popitem(last=False)
+        return run
+
+    @contextmanager
+    def _chart_profile(self, chart_name: str, run_id: Optional[str]):
+        """Times chart rendering into the trace file; charts are built on demand, after the run's own trace."""
+        if not config.PROFILE_TRACE_PATH:
+            yield
+            return
+        profiler = RunProfiler(label=f"chart:{chart_name} run={(run_id or '')[:12]}", trace_path=config.PROFILE_TRACE_PATH)
+        with profiler.phase("charting"):
+            yield
+        profiler.finish()
+
+    def get_equity_chart(self, run_id: Optional[str], chart_type: str = "value",
+                         width: Optional[float] = None, x_range: Optional[Tuple[Any, Any]] = None,
+                         drawdown_unit: str = "percent"):
+        """
+        Builds the equity curve figure of a stored run.
+
+        Lines are downsampled to what a chart ``width`` pixels wide can show;
+        passing the zoomed ``x_range`` returns that range at full resolution
+        (or downsampled again if it is still longer than the width allows).
+
+        Args:
+            run_id: Run ID from the results package.
+            chart_type: 'value', 'returns' or 'drawdown'.
+            width: Chart width in pixels reported by the browser.
+            x_range: Visible (start, end) dates of a zoomed chart.
+            drawdown_unit: 'percent' or 'usd' (drawdown chart only).
+
+        Returns:
+            Plotly figure object or None
+        """
+        run = self.get_run(run_id)
+        if run is None:
+            return None
+        try:
+            results = run['results']
+            visualizer = BacktestVisualizer()
+            visualizer.theme = CHART_THEME
+            with self._chart_profile(f"equity_{chart_type}", run_id):
+                return visualizer.create_equity_curve_figure(
+                    results.get('Portfolio_Value'), results.get('Benchmark'), chart_type=chart_type,
+                    initial_capital=run['stats'].get('Initial Capital'),
+                    max_points=max_points_for_width(width), x_range=x_range, drawdown_unit=drawdown_unit
+                )
+        except Exception as e:
+            logger.error(f"Error generating {chart_type} chart for run {run_id[:12]}: {e}", exc_info=True)
+            return None
+
+    def get_monthly_returns_chart(self, run_id: Optional[str]):
+        """
+        Builds the monthly returns heatmap of a stored run.
+
+        Args:
+            run_id: Run ID from the results package.
+
+        Returns:
+            Plotly figure object or None
+        """
+        run = self.get_run(run_id)
+        if run is None:
+            return None
+        try:
+            visualizer = BacktestVisualizer()
+            visualizer.theme = CHART_THEME
+            portfolio_value_series = run['results'].get('Portfolio_Value')
+            if portfolio_value_series is None or portfolio_value_series.empty:
+                return visualizer.create_empty_chart(MONTHLY_RETURNS_DEFAULT_TITLE)
+            return visualizer.create_monthly_returns_heatmap(portfolio_value_series)
+        except Exception as e:
+            logger.error(f"Error generating monthly returns chart for run {run_id[:12]}: {e}", exc_info=True)
+            return None
 
     def get_performance_metrics(self) -> Dict[str, Any]:
         """
@@ -274,13 +411,18 @@ class BacktestService:
             )
             return {}
 
-    def get_signals_chart(self, ticker: str, indicators: Optional[List[str]] = None, signals_df: Optional[pd.DataFrame] = None):
+    def get_signals_chart(self, ticker: str, indicators: Optional[List[str]] = None, signals_df: Optional[pd.DataFrame] = None,
+                          run_id: Optional[str] = None, width: Optional[float] = None,
+                          x_range: Optional[Tuple[Any, Any]] = None):
         """
         Generate signals and trades chart figure for a specific ticker.
         Uses BacktestVisualizer.
 
         Args:
             ticker: Ticker symbol to display
+            run_id: Stored run to read signals and trades from (defaults to the current results)
+            width: Chart width in pixels used to downsample the price and indicator lines
+            x_range: Visible (start, end) dates of a zoomed chart
 
         Returns:
             Plotly figure object or None
@@ -292,6 +434,15 @@ class BacktestService:
             logger.warning(f"Cannot generate signals chart. Invalid ticker ('{ticker}').")
             return None
 
+        trades_list = (self.current_results or {}).get("trades", [])
+        if run_id is not None:
+            run = self.get_run(run_id)
+            if run is None:
+                return None
+            trades_list = run['results'].get('trades', [])
+            if signals_df is None:
+                signals_df = (run['signals'] or {}).get(ticker)
+
         if signals_df is None:
             if not self.current_signals or ticker not in self.current_signals:
                 logger.warning(f"Cannot generate signals chart. Invalid ticker ('{ticker}') or no signal data.")
@@ -299,9 +450,11 @@ class BacktestService:
             signals_df = self.current_signals.get(ticker)
 
         try:
-            # signals_df already assigned above
-            trades_list = self.current_results.get("trades", [])
-            ticker_trades = [t for t in trades_list if t.get('ticker') == ticker]
+            # signals_df and trades_list already assigned above
+            if isinstance(trades_list, TradeLedger):
+                ticker_trades = trades_list.select(trades_list.mask_for('ticker', ticker))
+            else:
+                ticker_trades = [t for t in trades_list if t.get('ticker') == ticker]
 
             if signals_df is None or signals_df.empty:
                 logger.warning(f"No signal data found for ticker {ticker} in current_signals.")
@@ -326,26 +479,37 @@ class BacktestService:
 
             visualizer = BacktestVisualizer()
             visualizer.theme = CHART_THEME
-            fig = visualizer.create_signals_chart(ticker, signals_df, ticker_trades, indicators=indicators_dict)
+            with self._chart_profile(f"signals_{ticker}", run_id):
+                fig = visualizer.create_signals_chart(ticker, signals_df, ticker_trades, indicators=indicators_dict,
+                                                      max_points=max_points_for_width(width), x_range=x_range)
             return fig
 
         except Exception as e:
             logger.error(f"Error generating signals chart figure for {ticker}: {e}", exc_info=True)
             return None
 
-    def get_trades_table_data(self) -> List[Dict[str, Any]]:
+    def get_trades_table_data(self, run_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Get trade history data formatted for Dash DataTable.
 
+        Args:
+            run_id: Stored run to read trades from (defaults to the current results)
+
         Returns:
             List of trade records formatted for DataTable.
         """
-        if not self.current_results or "trades" not in self.current_results:
+        results = self.current_results
+        if run_id is not None:
+            run = self.get_run(run_id)
+            results = run['results'] if run is not None else None
+        if not results or "trades" not in results:
             logger.warning("get_trades_table_data called but no results or trades available.")
             return []
 
         try:
-            trades = self.current_results["trades"]
+            trades = results["trades"]
+            if isinstance(trades, TradeLedger):
+                return self._ledger_table_rows(trades)
             formatted_trades = []
             for t in trades:
                 entry_dt = pd.to_datetime(t.get('entry_date'))
@@ -400,6 +564,30 @@ class BacktestService:
             logger.error(f"Error formatting trades table data: {e}", exc_info=True)
             return []
 
+    @staticmethod
+    def _ledger_table_rows(ledger: TradeLedger) -> List[Dict[str, Any]]:
+        """DataTable rows of a trade ledger, built column-wise (same format as the dict path)."""
+        if len(ledger) == 0:
+            return []
+        entry_dates = pd.DatetimeIndex(ledger.column('entry_date'))
+        exit_dates = pd.DatetimeIndex(ledger.column('exit_date'))
+        durations = (exit_dates - entry_dates).days
+        columns = {
+            'entry_date': entry_dates.strftime('%Y-%m-%d').where(entry_dates.notna(), None),
+            'exit_date': exit_dates.strftime('%Y-%m-%d').where(exit_dates.notna(), None),
+            'ticker': ledger.column('ticker'),
+            'direction': np.where(ledger.column('direction') > 0, 'BUY', 'SELL').astype(object),
+            'entry_price': ledger.column('entry_price').tolist(),
+            'exit_price': ledger.column('exit_price').tolist(),
+            'size': ledger.column('shares').tolist(),
+            'pnl': ledger.column('net_pnl').tolist(),
+            'return_pct': ledger.column('pnl_pct').tolist(),
+            'duration': [None if pd.isna(days) else str(int(days)) for days in durations],
+            'exit_reason': ledger.column('exit_reason'),
+        }
+        names = list(columns)
+        return [dict(zip(names, row)) for row in zip(*columns.values())]
+
     def get_available_strategies(self) -> Dict[str, Dict]:
         """
         Get available trading strategies with descriptions.
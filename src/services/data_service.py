@@ -7,7 +7,6 @@ It acts as a data access layer between the application and various data sources.
 
 import os
 import pandas as pd
-import numpy as np
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Union, Tuple, Any
@@ -17,6 +16,8 @@ import json
 # Local imports
 from src.core.exceptions import DataError
 from src.core.constants import DATA_DIR
+from src.core.data import get_shared_data_loader
+from src.core.synthetic_data import SyntheticMarketConfig, generate_synthetic_market
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -98,18 +99,15 @@ class DataService:
                 if os.path.isfile(file_path):
                     data = pd.read_csv(file_path, parse_dates=['Date'], index_col='Date')
                 else:
-                    # Fallback to aggregated data
+                    # Fallback to aggregated data (through the process-wide shared loader)
                     agg_path = os.path.join(self.data_dir, 'historical_prices.csv')
                     if os.path.isfile(agg_path):
                         logger.info(f"Using aggregated data file {agg_path} for ticker {ticker}")
-                        df_all = pd.read_csv(agg_path, parse_dates=['Date'])
-                        df_t = df_all[df_all['Ticker'].str.upper() == ticker.upper()].copy()
-                        if df_t.empty:
+                        df_t = get_shared_data_loader(agg_path).get_ticker_data(ticker)
+                        if df_t is None or df_t.empty:
                             logger.warning(f"No data for {ticker} in aggregated file")
                             return None
-                        df_t.set_index('Date', inplace=True)
-                        df_t.drop(columns=['Ticker'], inplace=True)
-                        data = df_t
+                        data = df_t.copy()
                     else:
                         logger.warning(f"Data file for {ticker} not found at {file_path}")
                         return None
@@ -294,75 +292,43 @@ class DataService:
                               save: bool = False) -> Dict[str, pd.DataFrame]:
         """
         Generate synthetic OHLCV data for testing.
+
+        Uses the batched factor-model generator in ``src.core.synthetic_data``
+        with its data defects disabled; use that module directly for large
+        panels with gaps, missing days and splits.
         
         Args:
             tickers: List of ticker symbols
             days: Number of days to generate
-            volatility: Price volatility parameter
+            volatility: Daily volatility of each ticker's returns (market, factor and
+                ticker-specific parts together)
             save: Whether to save the data to files
             
         Returns:
             Dictionary mapping ticker symbols to generated dataframes
         """
-        np.random.seed(42)  # For reproducibility
-        data_dict = {}
-        
-        # Generate date range
+        # Business days over the requested calendar span, ending today
         end_date = datetime.now().date()
         start_date = end_date - timedelta(days=days)
-        dates = pd.date_range(start=start_date, end=end_date, freq='B')  # Business days
-        
-        for ticker in tickers:
-            try:
-                # Generate random returns with different mean for each ticker
-                mean_return = np.random.uniform(-0.0002, 0.0002)  # Different mean daily returns
-                returns = np.random.normal(mean_return, volatility, len(dates))
-                
-                # Start price between $10 and $200
-                start_price = np.random.uniform(10, 200)
-                prices = start_price * np.cumprod(1 + returns)
-                
-                # Generate OHLC from close prices
-                df = pd.DataFrame(index=dates)
-                df['Close'] = prices
-                df['Open'] = df['Close'].shift(1) * (1 + np.random.normal(0, volatility/2, len(df)))
-                df.loc[df.index[0], 'Open'] = prices[0] * (1 + np.random.normal(0, volatility/2))
-                
-                # High is max of open, close, plus some random amount
-                df['High'] = np.maximum(df['Open'], df['Close']) * (1 + np.abs(np.random.normal(0, volatility/2, len(df))))
-                
-                # Low is min of open, close, minus some random amount
-                df['Low'] = np.minimum(df['Open'], df['Close']) * (1 - np.abs(np.random.normal(0, volatility/2, len(df))))
-                
-                # Volume has mild correlation with absolute returns
-                abs_returns = np.abs(returns)
-                volume_base = np.random.uniform(50000, 500000)  # Base volume different for each ticker
-                df['Volume'] = volume_base * (1 + 2 * abs_returns) * np.random.lognormal(0, 0.5, len(df))
-                
-                # Ensure price columns are positive
-                for col in ['Open', 'High', 'Low', 'Close']:
-                    df[col] = np.maximum(df[col], 0.01)
-                    
-                # Ensure High >= Open, Close and Low <= Open, Close
-                df['High'] = df[['High', 'Open', 'Close']].max(axis=1)
-                df['Low'] = df[['Low', 'Open', 'Close']].min(axis=1)
-                
-                # Round to 2 decimal places
-                for col in ['Open', 'High', 'Low', 'Close']:
-                    df[col] = round(df[col], 2)
-                    
-                df['Volume'] = df['Volume'].astype(int)
-                
-                data_dict[ticker] = df
-                
-                if save:
-                    self.save_data(ticker, df, overwrite=True)
-                    
-                logger.info(f"Generated synthetic data for {ticker}")
-                
-            except Exception as e:
-                logger.error(f"Error generating synthetic data for {ticker}: {e}")
-                
+        dates = pd.date_range(start=start_date, end=end_date, freq='B')
+
+        # Clean, fully populated histories: no jumps, missing days, late listings, splits
+        # or stress-regime volatility, so ``volatility`` is the realized daily volatility
+        market = generate_synthetic_market(
+            SyntheticMarketConfig(tickers=tickers, seed=42, stress_vol_multiplier=1.0,
+                                  jump_probability=0.0, missing_day_probability=0.0,
+                                  late_listing_fraction=0.0, splits_per_year=0.0).with_daily_volatility(volatility),
+            dates=dates
+        )
+
+        data_dict = {}
+        for ticker, df in market.ticker_frames().items():
+            df = df.rename_axis(None).round({'Open': 2, 'High': 2, 'Low': 2, 'Close': 2})
+            data_dict[ticker] = df
+            if save:
+                self.save_data(ticker, df, overwrite=True)
+
+        logger.info(f"Generated synthetic data for {len(data_dict)} tickers ({len(dates)} days)")
         return data_dict
     
     def clear_cache(self) -> None:
@@ -16,6 +16,7 @@ from datetime import datetime
 
 # Local imports
 from src.visualization.chart_utils import add_shapes_to_chart, format_currency
+from src.portfolio.trade_ledger import TradeLedger
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -871,6 +872,17 @@ class VisualizationService:
         """
         Format trade records for display in a table.
         """
+        if isinstance(trades, TradeLedger):
+            if len(trades) == 0:
+                return []
+            # Column-wise formatting; PnL comes from net_pnl, the only PnL field the ledger has
+            entry = pd.DatetimeIndex(trades.column('entry_date')).strftime('%Y-%m-%d')
+            exit = pd.DatetimeIndex(trades.column('exit_date')).strftime('%Y-%m-%d')
+            pnl = [f"${value:.2f}" for value in trades.column('net_pnl').tolist()]
+            pct = [f"{value:.2f}%" for value in trades.column('pnl_pct').tolist()]
+            return [{'Ticker': ticker, 'Entry': e, 'Exit': x, 'PnL': p, 'PnL_pct': r, 'Reason': reason}
+                    for ticker, e, x, p, r, reason in zip(trades.column('ticker'), entry, exit, pnl, pct,
+                                                          trades.column('exit_reason'))]
         formatted = []
         for t in trades:
             # Format dates
@@ -1,9 +1,18 @@
+import inspect
 import pandas as pd
+import numpy as np
 import logging
+from typing import Any, Dict, List, Optional
 
 # Configure logging for this module
 logger = logging.getLogger(__name__)
 
+# Upper bound on (parameter sets x days) processed at once by batched signal generation
+BATCH_CHUNK_ELEMENTS = 2_000_000
+
+# Batched signals only hold -1, 0 or 1; int8 keeps (params x dates x tickers) tensors 8x smaller than float64
+SIGNAL_DTYPE = np.int8
+
 class BaseStrategy:
     """
     Base class for all trading strategies.
@@ -39,4 +48,114 @@ class BaseStrategy:
         Raises:
             NotImplementedError: If the child class doesn't implement this method
         """
-        raise NotImplementedError("Subclasses must implement the generate_signals method")
\ No newline at end of file
+        raise NotImplementedError("Subclasses must implement the generate_signals method")
+
+    @classmethod
+    def generate_signals_batch(cls,
+                               data: Dict[str, pd.DataFrame],
+                               param_grid: List[Dict[str, Any]],
+                               index: pd.DatetimeIndex) -> np.ndarray:
+        """
+        Generates signals for a whole parameter grid at once.
+
+        The default implementation instantiates the strategy for every parameter set
+        and calls ``generate_signals``; strategies override it with vectorized versions.
+
+        Args:
+            data (Dict[str, pd.DataFrame]): Full-history OHLCV data per ticker, as passed to ``generate_signals``.
+            param_grid (List[Dict[str, Any]]): Parameter sets; each must be valid for the constructor.
+            index (pd.DatetimeIndex): Dates of the output tensor.
+
+        Returns:
+            np.ndarray: ``SIGNAL_DTYPE`` (int8) tensor of shape (len(param_grid), len(index), len(data)) with
+                        1 for buy, -1 for sell and 0 for no signal. Tickers follow the order of ``data``.
+        """
+        tickers = list(data)
+        out = np.zeros((len(param_grid), len(index), len(tickers)), dtype=SIGNAL_DTYPE)
+        for p, params in enumerate(param_grid):
+            strategy = cls(tickers=tickers, **params)
+            for j, ticker in enumerate(tickers):
+                try:
+                    signals_df = strategy.generate_signals(ticker, data[ticker])
+                except Exception as e:
+                    logger.error(f"Error generating signals for {ticker} with params {params}: {e}", exc_info=True)
+                    continue
+                if signals_df is not None and not signals_df.empty and 'Signal' in signals_df.columns:
+                    values = pd.to_numeric(signals_df['Signal'], errors='coerce').reindex(index).fillna(0).to_numpy(dtype=np.float64)
+                    out[p, :, j] = np.sign(values)
+        return out
+
+    @classmethod
+    def warmup_bars(cls, params: Dict[str, Any]) -> Optional[int]:
+        """
+        Bars of history needed before the backtest start to reproduce full-history signals.
+
+        BacktestManager drops older rows before generating signals, so short windows
+        (e.g. walk-forward steps) only pay for the warm-up plus the window.
+
+        Args:
+            params (Dict[str, Any]): Constructor parameters; missing ones use the defaults.
+
+        Returns:
+            Optional[int]: Number of bars to keep before the window start, or None to keep
+                           the full history (the safe default for strategies that do not say).
+        """
+        return None
+
+    @classmethod
+    def grid_warmup_bars(cls, param_grid: List[Dict[str, Any]]) -> Optional[int]:
+        """Largest ``warmup_bars`` over a parameter grid; None if any parameter set needs the full history."""
+        bars = [cls.warmup_bars(params) for params in param_grid]
+        if not bars or any(b is None for b in bars):
+            return None
+        return max(bars)
+
+    @classmethod
+    def _param_value(cls, params: Dict[str, Any], name: str) -> Any:
+        """Returns a parameter value, falling back to the constructor default."""
+        if name in params:
+            return params[name]
+        return inspect.signature(cls.__init__).parameters[name].default
+
+    @classmethod
+    def _grid_values(cls, param_grid: List[Dict[str, Any]], name: str) -> np.ndarray:
+        """Returns the values of one parameter across the grid, using the constructor default where missing."""
+        default = inspect.signature(cls.__init__).parameters[name].default
+        return np.array([params.get(name, default) for params in param_grid])
+
+    @staticmethod
+    def _align_signal_rows(rows: np.ndarray, own_index: pd.Index, index: pd.DatetimeIndex) -> np.ndarray:
+        """
+        Aligns signal rows computed on a ticker's own dates to the target dates (0 where a date is missing).
+
+        Args:
+            rows (np.ndarray): Array of shape (n_params, len(own_index)).
+            own_index (pd.Index): Dates the rows were computed on.
+            index (pd.DatetimeIndex): Target dates.
+
+        Returns:
+            np.ndarray: Array of shape (n_params, len(index)).
+        """
+        aligned = np.zeros((rows.shape[0], len(index)), dtype=rows.dtype)
+        if not own_index.is_unique:
+            logger.warning("Duplicate dates in ticker data; cannot align batched signals.")
+            return aligned
+        positions = own_index.get_indexer(index)
+        found = positions >= 0
+        aligned[:, found] = rows[:, positions[found]]
+        return aligned
+
+    @staticmethod
+    def _shift_rows(values: np.ndarray) -> np.ndarray:
+        """Row-wise equivalent of ``Series.shift(1)`` for a 2-D array."""
+        shifted = np.empty_like(values)
+        shifted[:, 0] = np.nan
+        shifted[:, 1:] = values[:, :-1]
+        return shifted
+
+    @staticmethod
+    def _param_chunks(n_params: int, n_days: int):
+        """Yields slices over the parameter axis so that each chunk stays within BATCH_CHUNK_ELEMENTS."""
+        step = max(1, BATCH_CHUNK_ELEMENTS // max(1, n_days))
+        for start in range(0, n_params, step):
+            yield slice(start, min(start + step, n_params))
@@ -1,8 +1,9 @@
 import pandas as pd
 import numpy as np
 import logging
-from .base import BaseStrategy # Importuj klasę bazową
-from typing import Dict, Tuple, Optional, List
+from .base import SIGNAL_DTYPE, BaseStrategy # Importuj klasę bazową
+from src.core.indicator_cache import indicator_cache, data_fingerprint
+from typing import Any, Dict, Tuple, Optional, List
 
 logger = logging.getLogger(__name__)
 
@@ -56,6 +57,61 @@ class BollingerBandsStrategy(BaseStrategy):
         """Returns a dictionary with the current strategy parameters."""
         return self.parameters
 
+    @classmethod
+    def warmup_bars(cls, params: Dict[str, Any]) -> Optional[int]:
+        """The rolling mean and standard deviation need ``window`` bars."""
+        return int(cls._param_value(params, 'window'))
+
+    @classmethod
+    def generate_signals_batch(cls,
+                               data: Dict[str, pd.DataFrame],
+                               param_grid: List[Dict[str, Any]],
+                               index: pd.DatetimeIndex) -> np.ndarray:
+        """
+        Vectorized ``generate_signals`` over a (window x num_std) grid.
+
+        The rolling mean and standard deviation are computed once per distinct window
+        and ticker (through the indicator cache); the bands for every ``num_std`` are
+        then broadcast from them. See ``BaseStrategy.generate_signals_batch``.
+        """
+        tickers = list(data)
+        windows = cls._grid_values(param_grid, 'window').astype(int)
+        num_stds = cls._grid_values(param_grid, 'num_std').astype(np.float64)[:, None]
+        unique_windows, window_rows = np.unique(windows, return_inverse=True)
+
+        out = np.zeros((len(param_grid), len(index), len(tickers)), dtype=SIGNAL_DTYPE)
+        for j, ticker in enumerate(tickers):
+            df = data[ticker]
+            if df is None or df.empty or 'Close' not in df.columns:
+                continue
+            close = df['Close']
+            close_fingerprint = data_fingerprint(close)
+            sma, std = [], []
+            for window in unique_windows:
+                window = int(window)
+                sma.append(indicator_cache.get_or_compute(
+                    ticker, 'rolling_mean', {'window': window}, close,
+                    lambda: close.rolling(window=window, min_periods=window).mean(),
+                    fingerprint=close_fingerprint
+                ).to_numpy(dtype=np.float64))
+                std.append(indicator_cache.get_or_compute(
+                    ticker, 'rolling_std', {'window': window}, close,
+                    lambda: close.rolling(window=window, min_periods=window).std(),
+                    fingerprint=close_fingerprint
+                ).to_numpy(dtype=np.float64))
+            sma, std = np.vstack(sma), np.vstack(std)
+            close_values = close.to_numpy(dtype=np.float64)
+
+            for chunk in cls._param_chunks(len(param_grid), len(df)):
+                band_sma = sma[window_rows[chunk]]
+                band_width = std[window_rows[chunk]] * num_stds[chunk]
+                buy = close_values < (band_sma - band_width)
+                sell = close_values > (band_sma + band_width)
+                signals = np.where(sell, -1, np.where(buy, 1, 0)).astype(SIGNAL_DTYPE)
+                signals[len(df) < windows[chunk]] = 0 # Not enough history for the window
+                out[chunk, :, j] = cls._align_signal_rows(signals, df.index, index)
+        return out
+
     def generate_signals(self, ticker: str, data: pd.DataFrame) -> Optional[pd.DataFrame]:
         """
         Generates trading signals for a specific ticker based on Bollinger Bands.
@@ -84,10 +140,21 @@ class BollingerBandsStrategy(BaseStrategy):
         df = pd.DataFrame(index=data.index)
         try:
             df['Close'] = data['Close'] # Copy necessary column
+            # Rolling mean and std are shared through the indicator cache (num_std only scales the bands)
+            close = df['Close']
+            close_fingerprint = data_fingerprint(close)
             # Calculate rolling mean (Simple Moving Average - SMA)
-            df['SMA'] = df['Close'].rolling(window=self.window, min_periods=self.window).mean()
+            df['SMA'] = indicator_cache.get_or_compute(
+                ticker, 'rolling_mean', {'window': self.window}, close,
+                lambda: close.rolling(window=self.window, min_periods=self.window).mean(),
+                fingerprint=close_fingerprint
+            )
             # Calculate rolling standard deviation
-            rolling_std = df['Close'].rolling(window=self.window, min_periods=self.window).std()
+            rolling_std = indicator_cache.get_or_compute(
+                ticker, 'rolling_std', {'window': self.window}, close,
+                lambda: close.rolling(window=self.window, min_periods=self.window).std(),
+                fingerprint=close_fingerprint
+            )
             # Calculate bands
             df['Upper_Band'] = df['SMA'] + (rolling_std * self.num_std)
             df['Lower_Band'] = df['SMA'] - (rolling_std * self.num_std)
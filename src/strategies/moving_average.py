@@ -1,4 +1,5 @@
 import pandas as pd
+import numpy as np
 try:
     import pandas_ta as ta
 except ImportError:
@@ -6,9 +7,10 @@ except ImportError:
         "The 'pandas_ta' library is required for this strategy but is not installed. "
         "Please install it using: pip install pandas_ta"
     )
-from src.strategies.base import BaseStrategy
+from src.strategies.base import SIGNAL_DTYPE, BaseStrategy
+from src.core.indicator_cache import indicator_cache, data_fingerprint
 import logging
-from typing import List
+from typing import Any, Dict, List, Optional
 
 # Configure logging for this module
 logger = logging.getLogger(__name__)
@@ -56,6 +58,54 @@ class MovingAverageStrategy(BaseStrategy):
         """Returns a dictionary with the current strategy parameters."""
         return self.parameters
 
+    @classmethod
+    def warmup_bars(cls, params: Dict[str, Any]) -> Optional[int]:
+        """The long SMA of the previous day needs ``long_window`` earlier bars."""
+        return int(cls._param_value(params, 'long_window'))
+
+    @classmethod
+    def generate_signals_batch(cls,
+                               data: Dict[str, pd.DataFrame],
+                               param_grid: List[Dict[str, Any]],
+                               index: pd.DatetimeIndex) -> np.ndarray:
+        """
+        Vectorized ``generate_signals`` over a (short_window x long_window) grid.
+
+        Each distinct SMA is computed once per ticker (through the indicator cache)
+        and the crossover conditions are evaluated for all parameter sets with
+        broadcast NumPy comparisons. See ``BaseStrategy.generate_signals_batch``.
+        """
+        tickers = list(data)
+        shorts = cls._grid_values(param_grid, 'short_window').astype(int)
+        longs = cls._grid_values(param_grid, 'long_window').astype(int)
+        windows, inverse = np.unique(np.concatenate([shorts, longs]), return_inverse=True)
+        short_rows, long_rows = inverse[:len(shorts)], inverse[len(shorts):]
+
+        out = np.zeros((len(param_grid), len(index), len(tickers)), dtype=SIGNAL_DTYPE)
+        for j, ticker in enumerate(tickers):
+            df = data[ticker]
+            if df is None or 'Close' not in df.columns:
+                continue
+            close = df['Close']
+            close_fingerprint = data_fingerprint(close)
+            sma = np.vstack([
+                indicator_cache.get_or_compute(
+                    ticker, 'ta.sma', {'length': int(window)}, close,
+                    lambda window=window: df.ta.sma(length=int(window)),
+                    fingerprint=close_fingerprint
+                ).to_numpy(dtype=np.float64)
+                for window in windows
+            ])
+            for chunk in cls._param_chunks(len(param_grid), len(df)):
+                short_ma, long_ma = sma[short_rows[chunk]], sma[long_rows[chunk]]
+                short_prev, long_prev = cls._shift_rows(short_ma), cls._shift_rows(long_ma)
+                buy = (short_ma > long_ma) & (short_prev <= long_prev)
+                sell = (short_ma < long_ma) & (short_prev >= long_prev)
+                signals = np.where(sell, -1, np.where(buy, 1, 0)).astype(SIGNAL_DTYPE)
+                signals[len(df) < longs[chunk]] = 0 # Not enough history for the long SMA
+                out[chunk, :, j] = cls._align_signal_rows(signals, df.index, index)
+        return out
+
     def generate_signals(self, ticker: str, data: pd.DataFrame) -> pd.DataFrame: # Added 'ticker' argument
         """
         Generates trading signals based on moving average crossovers.
@@ -100,9 +150,14 @@ class MovingAverageStrategy(BaseStrategy):
         signals['Reason'] = '' # New column for signal reason
 
         try:
-            # Calculate moving averages using pandas_ta
-            df.ta.sma(length=self.short_window, append=True, col_names=(short_ma_col,))
-            df.ta.sma(length=self.long_window, append=True, col_names=(long_ma_col,))
+            # Calculate moving averages using pandas_ta (shared through the indicator cache)
+            close_fingerprint = data_fingerprint(df['Close'])
+            for window, ma_col in ((self.short_window, short_ma_col), (self.long_window, long_ma_col)):
+                df[ma_col] = indicator_cache.get_or_compute(
+                    ticker, 'ta.sma', {'length': window}, df['Close'],
+                    lambda window=window: df.ta.sma(length=window),
+                    fingerprint=close_fingerprint
+                )
 
             # Check if columns were added correctly
             if short_ma_col not in df.columns or long_ma_col not in df.columns:
@@ -3,32 +3,66 @@ import numpy as np
 import logging
 import time
 import itertools
+import warnings
 from typing import Dict, List, Any, Optional, Union, Type, Tuple, Callable
-from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 import plotly.graph_objects as go
 import plotly.express as px
 
-from src.strategies.base import BaseStrategy
-from src.core.backtest_manager import BacktestManager
-from src.core.constants import SignalType
+from src.strategies.base import SIGNAL_DTYPE, BaseStrategy
+from src.core.backtest_manager import BacktestManager, PreparedData, SimulationContext
+from src.core.constants import STRATEGY_CLASS_MAP
+from src.core.data import DataLoader
+from src.core.result_cache import ResultCache, get_result_cache
+from src.core.cancellation import CancellationToken
+from src.core.exceptions import BacktestCancelled
+from src.portfolio.trade_ledger import TradeLedger
+from src.core.parallel import SharedPreparedData, chunk_size_for, iter_chunk_results, make_chunks, resolve_worker_count
+from src.analysis.metrics import (calculate_calmar_ratio, calculate_max_drawdown, calculate_sharpe_ratio,
+                                  calculate_sortino_ratio, calculate_trade_statistics, compute_performance_stats_batch)
+from src.core.config import config
+
+try:
+    from scipy.stats import norm
+    from sklearn.gaussian_process import GaussianProcessRegressor
+    from sklearn.gaussian_process.kernels import ConstantKernel, Matern, WhiteKernel
+    SKLEARN_AVAILABLE = True
+except ImportError:
+    SKLEARN_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+MIN_RUNG_DAYS = 63  # Najkrótszy wycinek szczebla adaptive_search (ok. kwartał sesji)
+
 class StrategyOptimizer:
     """
     Klasa do optymalizacji parametrów strategii tradingowych.
     Wykonuje grid search i inne metody optymalizacji dla parametrów strategii.
     """
     
-    def __init__(self, backtest_manager: Optional[BacktestManager] = None):
+    def __init__(self, backtest_manager: Optional[BacktestManager] = None, result_cache: Optional[ResultCache] = None,
+                 cancel_token: Optional[CancellationToken] = None):
         """
         Inicjalizuje optymalizator strategii.
         
         Args:
             backtest_manager: Instancja BacktestManager do przeprowadzania backtestów
+            result_cache: Trwały cache wyników (domyślnie wspólny dla procesu)
+            cancel_token: Token anulowania sprawdzany przy rozdziale paczek i w pętlach symulacji
         """
         self.backtest_manager = backtest_manager or BacktestManager()
+        self.result_cache = result_cache or get_result_cache()
+        self.cancel_token = cancel_token or CancellationToken()
         logger.info("Strategy optimizer initialized")
+
+    def cancel(self) -> None:
+        """
+        Anuluje trwającą optymalizację (można wywołać z innego wątku).
+
+        Kolejne paczki nie są uruchamiane, trwające przerywają się przy najbliższym
+        dniu symulacji, a metoda optymalizacji zgłasza BacktestCancelled.
+        Przed ponownym użyciem optymalizatora należy wywołać ``cancel_token.reset()``.
+        """
+        self.cancel_token.cancel()
     
     def generate_parameter_grid(self, param_ranges: Dict[str, Union[List, np.ndarray, range]]) -> List[Dict[str, Any]]:
         """
@@ -61,6 +95,217 @@ class StrategyOptimizer:
         logger.info(f"Generated parameter grid with {len(result)} combinations")
         return result
     
+    def _strategy_key(self, strategy_class: Type[BaseStrategy]) -> str:
+        """
+        Zwraca klucz strategii (np. 'MAC') używany przez BacktestManager.
+
+        Args:
+            strategy_class: Klasa strategii
+
+        Returns:
+            Klucz z STRATEGY_CLASS_MAP lub nazwa klasy bez sufiksu "Strategy"
+        """
+        for key, cls in STRATEGY_CLASS_MAP.items():
+            if cls is strategy_class:
+                return key
+        return strategy_class.__name__.replace("Strategy", "")
+
+    def _evaluate_param_grid(self,
+                             strategy_class: Type[BaseStrategy],
+                             tickers: List[str],
+                             start_date: str,
+                             end_date: str,
+                             param_grid: List[Dict[str, Any]],
+                             risk_params: Optional[Dict[str, Any]] = None,
+                             n_jobs: int = 1,
+                             use_processes: bool = False,
+                             chunk_size: Optional[int] = None,
+                             result_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                             keep_results: bool = False) -> List[Dict[str, Any]]:
+        """
+        Uruchamia backtesty dla całej siatki parametrów.
+
+        Dane i panel są przygotowywane raz. Siatka dzielona jest na paczki;
+        dla każdej paczki sygnały liczone są jednym wywołaniem
+        ``strategy_class.generate_signals_batch`` (tensor parametry x daty x tickery),
+        a portfele wszystkich kombinacji symulowane są jednocześnie
+        (``simulate_signals_batch``). Paczki wykonywane są sekwencyjnie albo
+        w puli wątków/procesów; procesy dostają dane raz (mmap) przy starcie.
+
+        Args:
+            strategy_class: Klasa strategii
+            tickers: Lista tickerów
+            start_date: Data początkowa
+            end_date: Data końcowa
+            param_grid: Lista słowników z parametrami
+            risk_params: Parametry zarządzania ryzykiem
+            n_jobs: Liczba równoległych zadań (1 = sekwencyjnie, <= 0 = liczba rdzeni)
+            use_processes: Czy używać procesów zamiast wątków (True = procesy)
+            chunk_size: Liczba kombinacji w paczce (None = dobierana automatycznie)
+            result_callback: Wywoływana dla każdego wyniku zaraz po jego obliczeniu
+            keep_results: Czy dołączać wyniki symulacji (klucz "results"; nie dotyczy procesów)
+
+        Returns:
+            Lista wyników (w kolejności param_grid)
+        """
+        date_range = f"{start_date} to {end_date}"
+        results: List[Optional[Dict[str, Any]]] = [None] * len(param_grid)
+
+        def store(i: int, result: Dict[str, Any]) -> None:
+            results[i] = result
+            if result_callback:
+                result_callback(result)
+
+        # Walidacja parametrów przez konstruktor strategii
+        valid_positions = []
+        for i, params in enumerate(param_grid):
+            try:
+                strategy_class(tickers=tickers, **params)
+                valid_positions.append(i)
+            except Exception as e:
+                store(i, {"success": False, "params": params, "error": str(e)})
+
+        if not valid_positions:
+            return results
+
+        try:
+            prepared = self.backtest_manager.prepare_data(
+                tickers, start_date, end_date,
+                warmup_bars=strategy_class.grid_warmup_bars([param_grid[i] for i in valid_positions])
+            )
+            context = self.backtest_manager.build_simulation_context(prepared, risk_params)
+        except Exception as e:
+            logger.error(f"Error preparing data for {self._strategy_key(strategy_class)}: {e}", exc_info=True)
+            for i in valid_positions:
+                store(i, {"success": False, "params": param_grid[i], "error": str(e)})
+            return results
+
+        n_workers = min(resolve_worker_count(n_jobs), len(valid_positions))
+        chunk_size = chunk_size or chunk_size_for(len(valid_positions), n_workers, item_shape=self._signal_shape(prepared),
+                                                  itemsize=np.dtype(SIGNAL_DTYPE).itemsize)
+        chunks = make_chunks([(i, param_grid[i]) for i in valid_positions], chunk_size)
+        logger.info(f"Evaluating {len(valid_positions)} parameter sets in {len(chunks)} chunks with {n_workers} worker(s)")
+
+        shared = None
+        try:
+            if n_workers == 1:
+                for done, chunk in enumerate(chunks):
+                    self.cancel_token.raise_if_cancelled()
+                    for i, result in self._evaluate_chunk(prepared, context, strategy_class, chunk, risk_params, date_range, keep_results):
+                        store(i, result)
+                    logger.info(f"Completed chunk {done+1}/{len(chunks)}")
+                return results
+
+            shared = SharedPreparedData(prepared, context=context) if use_processes else None
+            if use_processes:
+                task = _evaluate_chunk_in_worker
+                initializer = _init_worker
+                initargs = (str(shared.path), self.backtest_manager.initial_capital, strategy_class, risk_params, date_range,
+                            self.cancel_token)
+            else:
+                task = lambda chunk: self._evaluate_chunk(prepared, context, strategy_class, chunk, risk_params, date_range, keep_results)
+                initializer, initargs = None, ()
+
+            for done, (chunk, chunk_results, error) in enumerate(iter_chunk_results(
+                    task, chunks, n_workers, use_processes=use_processes, initializer=initializer, initargs=initargs,
+                    cancel_token=self.cancel_token)):
+                if error is not None:
+                    chunk_results = [(i, {"success": False, "params": params, "error": str(error)}) for i, params in chunk]
+                for i, result in chunk_results:
+                    store(i, result)
+                logger.info(f"Completed chunk {done+1}/{len(chunks)}")
+        finally:
+            if shared is not None:
+                shared.close()
+            self.cancel_token.release()  # Znacznik anulowania nie jest już potrzebny
+
+        return results
+
+    def _evaluate_chunk(self,
+                        prepared: PreparedData,
+                        context: SimulationContext,
+                        strategy_class: Type[BaseStrategy],
+                        chunk: List[Tuple[int, Dict[str, Any]]],
+                        risk_params: Optional[Dict[str, Any]],
+                        date_range: str,
+                        keep_results: bool = False) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        Liczy sygnały i symuluje jedną paczkę kombinacji parametrów.
+
+        Args:
+            prepared: Dane przygotowane przez BacktestManager.prepare_data
+            context: Filtr rynku i benchmark (BacktestManager.build_simulation_context)
+            strategy_class: Klasa strategii
+            chunk: Lista par (pozycja w siatce, parametry)
+            risk_params: Parametry zarządzania ryzykiem
+            date_range: Opis zakresu dat (do raportu)
+            keep_results: Czy dołączać wyniki symulacji (klucz "results")
+
+        Returns:
+            Lista par (pozycja w siatce, wynik)
+        """
+        grid = [params for _, params in chunk]
+        try:
+            signal_tensor = strategy_class.generate_signals_batch(
+                {ticker: prepared.ticker_data[ticker] for ticker in prepared.tickers},
+                grid,
+                prepared.dates
+            )
+            batch = self.backtest_manager.simulate_signals_batch(prepared, signal_tensor, risk_params, context=context,
+                                                                 cancel_token=self.cancel_token)
+        except BacktestCancelled:
+            raise
+        except Exception as e:
+            logger.error(f"Error in batched simulation: {e}", exc_info=True)
+            return [(i, {"success": False, "params": params, "error": str(e)}) for i, params in chunk]
+
+        outputs = []
+        for (i, params), (combined_results, stats) in zip(chunk, batch):
+            result = self._result_from_stats(params, combined_results, stats, date_range)
+            if keep_results and result["success"]:
+                result["results"] = combined_results
+            outputs.append((i, result))
+        return outputs
+
+    @staticmethod
+    def _signal_shape(prepared: PreparedData) -> Tuple[int, int]:
+        """Kształt macierzy sygnałów jednej kombinacji (daty x tickery); ogranicza rozmiar paczki."""
+        return len(prepared.dates), len(prepared.tickers)
+
+    def _result_from_stats(self,
+                           strategy_params: Dict[str, Any],
+                           results: Optional[Dict[str, Any]],
+                           stats: Optional[Dict[str, Any]],
+                           date_range: str) -> Dict[str, Any]:
+        """
+        Buduje wpis wyniku optymalizacji z wyników symulacji.
+
+        Args:
+            strategy_params: Parametry strategii
+            results: Wyniki symulacji (combined_results)
+            stats: Statystyki portfela
+            date_range: Opis zakresu dat (do raportu)
+
+        Returns:
+            Wyniki backtestu i użyte parametry
+        """
+        if not stats or "error" in stats:
+            logger.warning(f"No stats returned for parameters: {strategy_params}")
+            return {
+                "success": False,
+                "params": strategy_params,
+                "error": (stats or {}).get("error", "No statistics returned from backtest")
+            }
+
+        # Zwracanie wyników wraz z parametrami
+        return {
+            "success": True,
+            "params": strategy_params,
+            "stats": stats,
+            "n_trades": len((results or {}).get("trades", [])),
+            "date_range": date_range
+        }
+
     def _run_backtest_with_params(self, 
                                  strategy_class: Type[BaseStrategy], 
                                  tickers: List[str],
@@ -70,6 +315,9 @@ class StrategyOptimizer:
                                  risk_params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Uruchamia pojedynczy backtest z określonymi parametrami.
+
+        Wynik jest najpierw szukany w trwałym cache wyników (klucz to pełny
+        odcisk konfiguracji i wersji danych); nowe wyniki są w nim zapisywane.
         
         Args:
             strategy_class: Klasa strategii
@@ -82,41 +330,23 @@ class StrategyOptimizer:
         Returns:
             Wyniki backtestu i użyte parametry
         """
-        try:
-            # Uruchomienie backtestu
-            signals, results, stats = self.backtest_manager.run_backtest(
-                strategy_type=strategy_class.__name__.replace("Strategy", ""),
-                tickers=tickers,
-                strategy_params=strategy_params,
-                risk_params=risk_params,
-                start_date=start_date,
-                end_date=end_date
-            )
-            
-            if not stats:
-                logger.warning(f"No stats returned for parameters: {strategy_params}")
-                return {
-                    "success": False,
-                    "params": strategy_params,
-                    "error": "No statistics returned from backtest"
-                }
-            
-            # Zwracanie wyników wraz z parametrami
-            return {
-                "success": True,
-                "params": strategy_params,
-                "stats": stats,
-                "n_trades": len(results.get("trades", [])),
-                "date_range": f"{start_date} to {end_date}"
-            }
-            
-        except Exception as e:
-            logger.error(f"Error running backtest with params {strategy_params}: {e}", exc_info=True)
-            return {
-                "success": False,
-                "params": strategy_params,
-                "error": str(e)
-            }
+        manager = self.backtest_manager
+        date_range = f"{start_date} to {end_date}"
+        cache_key = manager.run_fingerprint(
+            self._strategy_key(strategy_class), tickers, strategy_params, risk_params,
+            start_date=start_date, end_date=end_date
+        )
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Result cache hit for parameters: {strategy_params}")
+            return self._result_from_stats(strategy_params, cached["results"], cached["stats"], date_range)
+
+        result = self._evaluate_param_grid(
+            strategy_class, tickers, start_date, end_date, [strategy_params], risk_params, keep_results=True
+        )[0]
+        if result["success"]:
+            self.result_cache.put(cache_key, result.pop("results"), result["stats"])
+        return result
     
     def grid_search(self, 
                    strategy_class: Type[BaseStrategy],
@@ -127,7 +357,9 @@ class StrategyOptimizer:
                    risk_params: Optional[Dict[str, Any]] = None,
                    metric: str = "Sharpe Ratio",
                    n_jobs: int = 1,
-                   use_processes: bool = False) -> List[Dict[str, Any]]:
+                   use_processes: bool = False,
+                   chunk_size: Optional[int] = None,
+                   result_callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
         """
         Przeprowadza grid search dla parametrów strategii.
         
@@ -139,8 +371,10 @@ class StrategyOptimizer:
             end_date: Data końcowa
             risk_params: Parametry zarządzania ryzykiem
             metric: Metryka do optymalizacji (np. "Sharpe Ratio", "Total Return", "Max Drawdown")
-            n_jobs: Liczba równoległych zadań (1 = sekwencyjnie)
+            n_jobs: Liczba równoległych zadań (1 = sekwencyjnie, <= 0 = liczba rdzeni)
             use_processes: Czy używać procesów zamiast wątków (True = procesy)
+            chunk_size: Liczba kombinacji w jednym zadaniu (None = dobierana automatycznie)
+            result_callback: Wywoływana dla każdego wyniku zaraz po jego obliczeniu
             
         Returns:
             Lista wyników dla wszystkich kombinacji parametrów, posortowana wg metryki
@@ -153,75 +387,56 @@ class StrategyOptimizer:
         logger.info(f"Optimizing for metric: {metric}")
         
         start_time = time.time()
-        results = []
         
-        # Uruchamianie backtestów sekwencyjnie lub równolegle
-        if n_jobs == 1:
-            # Sekwencyjne uruchamianie
-            for i, params in enumerate(param_grid):
-                logger.info(f"Running backtest {i+1}/{total_combinations} with params: {params}")
-                result = self._run_backtest_with_params(
-                    strategy_class, tickers, start_date, end_date, params, risk_params
-                )
-                results.append(result)
-                
-        else:
-            # Równoległe uruchamianie
-            executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
-            
-            with executor_class(max_workers=n_jobs) as executor:
-                futures = []
-                
-                for params in param_grid:
-                    future = executor.submit(
-                        self._run_backtest_with_params,
-                        strategy_class, tickers, start_date, end_date, params, risk_params
-                    )
-                    futures.append(future)
-                
-                # Zbieranie wyników w miarę ich ukończenia
-                for i, future in enumerate(as_completed(futures)):
-                    try:
-                        result = future.result()
-                        results.append(result)
-                        logger.info(f"Completed backtest {i+1}/{total_combinations} with params: {result['params']}")
-                    except Exception as e:
-                        logger.error(f"Error in backtest future {i+1}: {e}", exc_info=True)
-                        results.append({
-                            "success": False,
-                            "params": "Unknown params",
-                            "error": str(e)
-                        })
+        # Sygnały dla całej siatki liczone są naraz, symulacje sekwencyjnie lub równolegle
+        results = self._evaluate_param_grid(
+            strategy_class, tickers, start_date, end_date, param_grid, risk_params,
+            n_jobs=n_jobs, use_processes=use_processes,
+            chunk_size=chunk_size, result_callback=result_callback
+        )
         
         # Obliczenie czasu wykonania
         elapsed_time = time.time() - start_time
         logger.info(f"Grid search completed in {elapsed_time:.2f} seconds")
         
         # Sortowanie wyników według metryki (jeśli istnieje)
-        successful_results = [r for r in results if r["success"]]
+        sorted_results = self._rank_results(results, metric)
         
-        # Metryki, które są "im mniejsze, tym lepsze" (np. drawdown)
+        logger.info(f"Grid search sorted {len(sorted_results)} successful results by {metric}")
+        
+        if sorted_results:
+            logger.info(f"Best params: {sorted_results[0]['params']} with {metric}: {self._extract_metric(sorted_results[0], metric)}")
+        
+        return sorted_results
+
+    @staticmethod
+    def _is_reverse_metric(metric: str) -> bool:
+        """Czy metryka jest "im mniejsza, tym lepsza" (np. drawdown)."""
         reverse_metrics = ["Max Drawdown", "Maximum Drawdown", "Volatility"]
-        is_reverse = any(m.lower() in metric.lower() for m in reverse_metrics)
+        return any(m.lower() in metric.lower() for m in reverse_metrics)
+
+    def _rank_results(self, results: List[Dict[str, Any]], metric: str) -> List[Dict[str, Any]]:
+        """
+        Sortuje udane wyniki według metryki i nadaje im ranking.
+
+        Args:
+            results: Lista wyników backtestów
+            metric: Metryka do optymalizacji
+
+        Returns:
+            Udane wyniki, najlepszy pierwszy (z kluczem "rank")
+        """
+        successful_results = [r for r in results if r.get("success", False)]
         
         sorted_results = sorted(
             successful_results, 
             key=lambda x: self._extract_metric(x, metric),
-            reverse=not is_reverse  # Jeśli metryka jest z reverse_metrics, sortuj rosnąco
+            reverse=not self._is_reverse_metric(metric)  # Metryki "im mniejsze, tym lepsze" sortowane rosnąco
         )
         
         # Dodawanie rankingu do wyników
         for i, result in enumerate(sorted_results):
             result["rank"] = i + 1
-        
-        logger.info(f"Grid search sorted {len(sorted_results)} successful results by {metric}")
-        
-        # Dla metryk, gdzie mniejsza wartość jest lepsza, najpierw jest najlepsza
-        if sorted_results and is_reverse:
-            logger.info(f"Best params: {sorted_results[0]['params']} with {metric}: {self._extract_metric(sorted_results[0], metric)}")
-        elif sorted_results:
-            logger.info(f"Best params: {sorted_results[0]['params']} with {metric}: {self._extract_metric(sorted_results[0], metric)}")
-        
         return sorted_results
     
     def _extract_metric(self, result: Dict[str, Any], metric: str) -> float:
@@ -402,10 +617,21 @@ class StrategyOptimizer:
                              step_size: int = 126,
                              metric: str = "Sharpe Ratio",
                              risk_params: Optional[Dict[str, Any]] = None,
-                             n_jobs: int = 1) -> Dict[str, Any]:
+                             n_jobs: int = 1,
+                             use_processes: bool = False,
+                             incremental: bool = True) -> Dict[str, Any]:
         """
         Przeprowadza optymalizację walk-forward, optymalizując parametry na oknie 
         i testując na okresie poza oknem.
+
+        W trybie przyrostowym (``incremental=True``) sygnały i portfele całej
+        siatki liczone są raz dla pełnego zakresu dat, a każde okno in-sample
+        oceniane jest na wycinku krzywych kapitału. Okna out-of-sample to
+        osobne portfele startujące z kapitałem początkowym (jak pojedynczy
+        backtest okna) i liczone są równolegle. Okna in-sample oceniane są
+        natomiast na portfelu, który niesie pozycje otwarte przed początkiem
+        okna, więc wybrane parametry mogą się czasem różnić od trybu
+        ``incremental=False`` (osobny grid search dla każdego okna).
         
         Args:
             strategy_class: Klasa strategii
@@ -418,15 +644,24 @@ class StrategyOptimizer:
             metric: Metryka do optymalizacji
             risk_params: Parametry zarządzania ryzykiem
             n_jobs: Liczba równoległych zadań
+            use_processes: Czy używać procesów zamiast wątków (True = procesy)
+            incremental: Czy liczyć okna przyrostowo (False = osobny grid search dla każdego okna)
             
         Returns:
             Wyniki optymalizacji walk-forward
         """
-        # Konwersja dat do obiektów datetime
-        from datetime import datetime, timedelta
-        start = datetime.strptime(start_date, "%Y-%m-%d")
-        end = datetime.strptime(end_date, "%Y-%m-%d")
-        
+        windows = self._walk_forward_windows(start_date, end_date, window_size, step_size)
+
+        if incremental:
+            try:
+                wf_results = self._walk_forward_incremental(
+                    strategy_class, param_ranges, tickers, start_date, end_date, windows,
+                    metric, risk_params, n_jobs, use_processes
+                )
+            finally:
+                self.cancel_token.release()  # Znacznik anulowania nie jest już potrzebny
+            return self._summarize_walk_forward(wf_results, metric)
+
         # Inicjalizacja wyników
         wf_results = {
             "windows": [],
@@ -436,39 +671,27 @@ class StrategyOptimizer:
             "robustness_ratio": []  # Stosunek wyników out-of-sample do in-sample
         }
         
-        current_start = start
-        window_id = 1
-        
-        while current_start + timedelta(days=window_size) < end:
-            # Definicja okna in-sample i out-of-sample
-            in_sample_end = current_start + timedelta(days=window_size)
-            out_sample_end = min(in_sample_end + timedelta(days=step_size), end)
-            
-            in_sample_start_str = current_start.strftime("%Y-%m-%d")
-            in_sample_end_str = in_sample_end.strftime("%Y-%m-%d")
-            out_sample_start_str = in_sample_end.strftime("%Y-%m-%d")
-            out_sample_end_str = out_sample_end.strftime("%Y-%m-%d")
-            
+        for window in windows:
+            window_id = window["id"]
             logger.info(f"Walk-forward window {window_id}:")
-            logger.info(f"  In-sample:  {in_sample_start_str} to {in_sample_end_str}")
-            logger.info(f"  Out-sample: {out_sample_start_str} to {out_sample_end_str}")
+            logger.info(f"  In-sample:  {window['in_sample_start']} to {window['in_sample_end']}")
+            logger.info(f"  Out-sample: {window['out_sample_start']} to {window['out_sample_end']}")
             
             # Optymalizacja parametrów na oknie in-sample
             in_sample_results = self.grid_search(
                 strategy_class=strategy_class,
                 param_ranges=param_ranges,
                 tickers=tickers,
-                start_date=in_sample_start_str,
-                end_date=in_sample_end_str,
+                start_date=window["in_sample_start"],
+                end_date=window["in_sample_end"],
                 risk_params=risk_params,
                 metric=metric,
-                n_jobs=n_jobs
+                n_jobs=n_jobs,
+                use_processes=use_processes
             )
             
             if not in_sample_results:
                 logger.warning(f"No valid results for in-sample window {window_id}")
-                current_start = current_start + timedelta(days=step_size)
-                window_id += 1
                 continue
             
             # Najlepsze parametry z in-sample
@@ -479,43 +702,84 @@ class StrategyOptimizer:
             out_sample_result = self._run_backtest_with_params(
                 strategy_class=strategy_class,
                 tickers=tickers,
-                start_date=out_sample_start_str,
-                end_date=out_sample_end_str,
+                start_date=window["out_sample_start"],
+                end_date=window["out_sample_end"],
                 strategy_params=best_params,
                 risk_params=risk_params
             )
             
-            # Zapisywanie wyników
-            out_sample_metric = self._extract_metric(out_sample_result, metric)
-            
-            # Obliczanie współczynnika odporności (stosunek out-of-sample do in-sample)
-            # Jeśli in-sample jest 0 lub blisko 0, ustawiamy na NaN
-            if abs(in_sample_metric) < 0.00001:
-                robustness = float('nan')
-            else:
-                robustness = out_sample_metric / in_sample_metric
-            
-            wf_results["windows"].append({
+            self._append_walk_forward_window(
+                wf_results, window, best_params, in_sample_metric,
+                self._extract_metric(out_sample_result, metric), metric
+            )
+        
+        return self._summarize_walk_forward(wf_results, metric)
+
+    def _walk_forward_windows(self, start_date: str, end_date: str, window_size: int, step_size: int) -> List[Dict[str, Any]]:
+        """
+        Wyznacza okna walk-forward (w dniach kalendarzowych).
+
+        Args:
+            start_date: Data początkowa
+            end_date: Data końcowa
+            window_size: Rozmiar okna optymalizacyjnego (w dniach)
+            step_size: Rozmiar kroku przesuwania okna (w dniach)
+
+        Returns:
+            Lista okien z datami in-sample i out-of-sample
+        """
+        # Konwersja dat do obiektów datetime
+        from datetime import datetime, timedelta
+        start = datetime.strptime(start_date, "%Y-%m-%d")
+        end = datetime.strptime(end_date, "%Y-%m-%d")
+
+        windows = []
+        current_start = start
+        window_id = 1
+        while current_start + timedelta(days=window_size) < end:
+            # Definicja okna in-sample i out-of-sample
+            in_sample_end = current_start + timedelta(days=window_size)
+            out_sample_end = min(in_sample_end + timedelta(days=step_size), end)
+            windows.append({
                 "id": window_id,
-                "in_sample_start": in_sample_start_str,
-                "in_sample_end": in_sample_end_str,
-                "out_sample_start": out_sample_start_str,
-                "out_sample_end": out_sample_end_str
+                "in_sample_start": current_start.strftime("%Y-%m-%d"),
+                "in_sample_end": in_sample_end.strftime("%Y-%m-%d"),
+                "out_sample_start": in_sample_end.strftime("%Y-%m-%d"),
+                "out_sample_end": out_sample_end.strftime("%Y-%m-%d")
             })
-            wf_results["best_params"].append(best_params)
-            wf_results["in_sample_metrics"].append(in_sample_metric)
-            wf_results["out_of_sample_metrics"].append(out_sample_metric)
-            wf_results["robustness_ratio"].append(robustness)
-            
-            logger.info(f"  Best params: {best_params}")
-            logger.info(f"  In-sample {metric}: {in_sample_metric}")
-            logger.info(f"  Out-sample {metric}: {out_sample_metric}")
-            logger.info(f"  Robustness ratio: {robustness}")
-            
             # Przesunięcie okna
             current_start = current_start + timedelta(days=step_size)
             window_id += 1
-        
+        return windows
+
+    def _append_walk_forward_window(self,
+                                    wf_results: Dict[str, Any],
+                                    window: Dict[str, Any],
+                                    best_params: Dict[str, Any],
+                                    in_sample_metric: float,
+                                    out_sample_metric: float,
+                                    metric: str) -> None:
+        """Zapisuje wyniki jednego okna walk-forward."""
+        # Obliczanie współczynnika odporności (stosunek out-of-sample do in-sample)
+        # Jeśli in-sample jest 0 lub blisko 0, ustawiamy na NaN
+        if abs(in_sample_metric) < 0.00001:
+            robustness = float('nan')
+        else:
+            robustness = out_sample_metric / in_sample_metric
+
+        wf_results["windows"].append(dict(window))
+        wf_results["best_params"].append(best_params)
+        wf_results["in_sample_metrics"].append(in_sample_metric)
+        wf_results["out_of_sample_metrics"].append(out_sample_metric)
+        wf_results["robustness_ratio"].append(robustness)
+
+        logger.info(f"  Best params: {best_params}")
+        logger.info(f"  In-sample {metric}: {in_sample_metric}")
+        logger.info(f"  Out-sample {metric}: {out_sample_metric}")
+        logger.info(f"  Robustness ratio: {robustness}")
+
+    def _summarize_walk_forward(self, wf_results: Dict[str, Any], metric: str) -> Dict[str, Any]:
+        """Dodaje podsumowanie do wyników walk-forward."""
         # Łączenie wyników
         wf_results["summary"] = {
             "avg_in_sample_metric": np.mean(wf_results["in_sample_metrics"]),
@@ -531,7 +795,290 @@ class StrategyOptimizer:
         logger.info(f"Most common parameter set: {wf_results['summary']['most_common_params']}")
         
         return wf_results
-    
+
+    def _walk_forward_incremental(self,
+                                  strategy_class: Type[BaseStrategy],
+                                  param_ranges: Dict[str, Union[List, np.ndarray, range]],
+                                  tickers: List[str],
+                                  start_date: str,
+                                  end_date: str,
+                                  windows: List[Dict[str, Any]],
+                                  metric: str,
+                                  risk_params: Optional[Dict[str, Any]],
+                                  n_jobs: int,
+                                  use_processes: bool) -> Dict[str, Any]:
+        """
+        Walk-forward liczony przyrostowo na danych przygotowanych raz dla pełnego zakresu.
+
+        Każda kombinacja siatki symulowana jest raz (paczkami, jak w grid search);
+        okno in-sample oceniane jest na wycinku jej krzywej kapitału i transakcjach
+        zamkniętych w oknie. Okna out-of-sample symulowane są od nowa dla najlepszych
+        parametrów na wycinku danych, więc wynik odpowiada osobnemu backtestowi okna.
+        Okna in-sample oceniane są na portfelu, który niesie pozycje otwarte przed
+        początkiem okna (stąd możliwe różnice wyboru parametrów względem grid searchu okna).
+
+        Args:
+            strategy_class: Klasa strategii
+            param_ranges: Zakresy parametrów do przeszukania
+            tickers: Lista tickerów
+            start_date: Data początkowa
+            end_date: Data końcowa
+            windows: Okna z _walk_forward_windows
+            metric: Metryka do optymalizacji
+            risk_params: Parametry zarządzania ryzykiem
+            n_jobs: Liczba równoległych zadań (1 = sekwencyjnie, <= 0 = liczba rdzeni)
+            use_processes: Czy używać procesów zamiast wątków (True = procesy)
+
+        Returns:
+            Wyniki walk-forward (bez podsumowania)
+        """
+        wf_results = {
+            "windows": [],
+            "best_params": [],
+            "in_sample_metrics": [],
+            "out_of_sample_metrics": [],
+            "robustness_ratio": []
+        }
+        if not windows:
+            return wf_results
+
+        # Walidacja parametrów przez konstruktor strategii
+        param_grid = []
+        for params in self.generate_parameter_grid(param_ranges):
+            try:
+                strategy_class(tickers=tickers, **params)
+                param_grid.append(params)
+            except Exception as e:
+                logger.warning(f"Skipping invalid parameters {params}: {e}")
+        if not param_grid:
+            logger.warning("No valid parameter combinations for walk-forward optimization")
+            return wf_results
+
+        manager = self.backtest_manager
+        try:
+            prepared = manager.prepare_data(
+                tickers, start_date, end_date, warmup_bars=strategy_class.grid_warmup_bars(param_grid)
+            )
+            context = manager.build_simulation_context(prepared, risk_params)
+        except Exception as e:
+            logger.error(f"Error preparing data for walk-forward optimization: {e}", exc_info=True)
+            return wf_results
+
+        # Pozycje okien w prepared.dates: [początek, koniec)
+        dates = prepared.dates
+        def positions(first: str, last: str) -> Tuple[int, int]:
+            return (int(dates.searchsorted(pd.Timestamp(first), side='left')),
+                    int(dates.searchsorted(pd.Timestamp(last), side='right')))
+        in_sample = [positions(w["in_sample_start"], w["in_sample_end"]) for w in windows]
+        out_sample = [positions(w["out_sample_start"], w["out_sample_end"]) for w in windows]
+
+        # In-sample: jedna symulacja pełnego zakresu na kombinację, okna to wycinki
+        start_time = time.time()
+        scores = np.full((len(windows), len(param_grid)), np.nan)
+        ticker_data = {ticker: prepared.ticker_data[ticker] for ticker in prepared.tickers}
+        for chunk in make_chunks(list(enumerate(param_grid)), chunk_size_for(
+                len(param_grid), 1, item_shape=self._signal_shape(prepared), itemsize=np.dtype(SIGNAL_DTYPE).itemsize)):
+            self.cancel_token.raise_if_cancelled()
+            try:
+                signal_tensor = strategy_class.generate_signals_batch(ticker_data, [p for _, p in chunk], dates)
+                scenarios = manager.simulate_scenarios(prepared, signal_tensor, risk_params, context=context,
+                                                       cancel_token=self.cancel_token)
+            except BacktestCancelled:
+                raise
+            except Exception as e:
+                logger.error(f"Error in walk-forward simulation: {e}", exc_info=True)
+                continue
+            positions_in_grid = [i for i, _ in chunk]
+            trades = [scenarios.trades_for(k) if self._is_trade_metric(metric) else TradeLedger() for k in range(len(chunk))]
+            for w, (first, stop) in enumerate(in_sample):
+                if stop - first < 2:
+                    continue
+                window_index = pd.DatetimeIndex(dates[first:stop], name='date')
+                # Metryki krzywej kapitału liczone wsadowo dla całej paczki
+                window_scores = self._window_scores(scenarios.equity[:, first:stop], window_index, metric)
+                if window_scores is not None:
+                    scores[w, positions_in_grid] = window_scores
+                    continue
+                for k, i in enumerate(positions_in_grid):
+                    portfolio = pd.Series(scenarios.equity[k, first:stop], index=window_index, name="Portfolio")
+                    exits = trades[k].column('exit_date')
+                    window_trades = trades[k].select((exits >= window_index[0].to_datetime64()) & (exits <= window_index[-1].to_datetime64()))
+                    stats = self._window_stats(portfolio, window_trades, metric)
+                    scores[w, i] = self._extract_metric({"success": True, "stats": stats}, metric)
+        logger.info(f"Scored {len(param_grid)} parameter sets on {len(windows)} in-sample windows "
+                    f"in {time.time() - start_time:.2f} seconds")
+
+        # Wybór najlepszych parametrów dla każdego okna
+        is_reverse = self._is_reverse_metric(metric)
+        selected = []
+        for w, window in enumerate(windows):
+            valid = np.flatnonzero(~np.isnan(scores[w]))
+            first, stop = out_sample[w]
+            if valid.size == 0 or stop - first < 2:
+                logger.warning(f"No valid results for walk-forward window {window['id']}")
+                continue
+            # Stabilny wybór: przy remisie wygrywa wcześniejsza kombinacja (jak sortowanie w grid_search)
+            order = valid[np.argsort(scores[w, valid] if is_reverse else -scores[w, valid], kind='stable')]
+            selected.append((w, int(order[0])))
+
+        # Out-of-sample: osobne portfele dla najlepszych parametrów, okna liczone równolegle
+        tasks = []
+        for w, i in selected:
+            first, stop = out_sample[w]
+            window = windows[w]
+            tasks.append((w, param_grid[i], first, stop, f"{window['out_sample_start']} to {window['out_sample_end']}"))
+
+        out_results: Dict[int, Dict[str, Any]] = {}
+        n_workers = min(resolve_worker_count(n_jobs), max(1, len(tasks)))
+        chunks = make_chunks(tasks, max(1, -(-len(tasks) // n_workers)))
+        if n_workers == 1:
+            for chunk in chunks:
+                self.cancel_token.raise_if_cancelled()
+                out_results.update(self._evaluate_window_chunk(prepared, context, strategy_class, chunk, risk_params))
+        else:
+            shared = SharedPreparedData(prepared, context=context) if use_processes else None
+            try:
+                if use_processes:
+                    task = _evaluate_window_chunk_in_worker
+                    initializer = _init_worker
+                    initargs = (str(shared.path), manager.initial_capital, strategy_class, risk_params, "",
+                                self.cancel_token)
+                else:
+                    task = lambda chunk: self._evaluate_window_chunk(prepared, context, strategy_class, chunk, risk_params)
+                    initializer, initargs = None, ()
+                for chunk, chunk_results, error in iter_chunk_results(
+                        task, chunks, n_workers, use_processes=use_processes, initializer=initializer, initargs=initargs,
+                        cancel_token=self.cancel_token):
+                    if error is not None:
+                        chunk_results = [(w, {"success": False, "params": params, "error": str(error)})
+                                         for w, params, _, _, _ in chunk]
+                    out_results.update(chunk_results)
+            finally:
+                if shared is not None:
+                    shared.close()
+
+        for w, i in selected:
+            window = windows[w]
+            logger.info(f"Walk-forward window {window['id']}:")
+            logger.info(f"  In-sample:  {window['in_sample_start']} to {window['in_sample_end']}")
+            logger.info(f"  Out-sample: {window['out_sample_start']} to {window['out_sample_end']}")
+            self._append_walk_forward_window(
+                wf_results, window, param_grid[i], float(scores[w, i]),
+                self._extract_metric(out_results[w], metric), metric
+            )
+        return wf_results
+
+    def _evaluate_window_chunk(self,
+                               prepared: PreparedData,
+                               context: SimulationContext,
+                               strategy_class: Type[BaseStrategy],
+                               chunk: List[Tuple[int, Dict[str, Any], int, int, str]],
+                               risk_params: Optional[Dict[str, Any]]) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        Symuluje okna out-of-sample jako osobne portfele na wycinkach danych.
+
+        Sygnały liczone są na pełnym zakresie dat (z rozgrzewką), więc wycinek
+        daje te same sygnały co osobny backtest okna.
+
+        Args:
+            prepared: Dane pełnego zakresu (BacktestManager.prepare_data)
+            context: Filtr rynku i benchmark pełnego zakresu
+            strategy_class: Klasa strategii
+            chunk: Lista krotek (okno, parametry, pierwsza pozycja, pozycja za końcem, opis zakresu dat)
+            risk_params: Parametry zarządzania ryzykiem
+
+        Returns:
+            Lista par (okno, wynik)
+        """
+        manager = self.backtest_manager
+        ticker_data = {ticker: prepared.ticker_data[ticker] for ticker in prepared.tickers}
+        results = []
+        for w, params, first, stop, date_range in chunk:
+            try:
+                signals = strategy_class.generate_signals_batch(ticker_data, [params], prepared.dates)
+                window_prepared, window_context = manager.slice_prepared(prepared, context, first, stop)
+                (combined_results, stats), = manager.simulate_signals_batch(
+                    window_prepared, signals[:, first:stop], risk_params, context=window_context,
+                    cancel_token=self.cancel_token
+                )
+                results.append((w, self._result_from_stats(params, combined_results, stats, date_range)))
+            except BacktestCancelled:
+                raise
+            except Exception as e:
+                logger.error(f"Error in out-of-sample simulation: {e}", exc_info=True)
+                results.append((w, {"success": False, "params": params, "error": str(e)}))
+        return results
+
+    @staticmethod
+    def _is_trade_metric(metric: str) -> bool:
+        """Czy metryka liczona jest z listy transakcji."""
+        return metric.lower() in ("win rate", "win_rate", "profit factor", "profit_factor")
+
+    # Metryki oceniane wsadowo: nazwa -> (kolumna compute_performance_stats_batch, mnożnik)
+    _BATCH_WINDOW_METRICS = {
+        **dict.fromkeys(("sharpe ratio", "sharpe", "sharpe_ratio"), ("sharpe_ratio", 1.0)),
+        **dict.fromkeys(("sortino ratio", "sortino", "sortino_ratio"), ("sortino_ratio", 1.0)),
+        **dict.fromkeys(("calmar ratio", "calmar", "calmar_ratio"), ("calmar_ratio", 1.0)),
+        **dict.fromkeys(("total return", "return", "total_return"), ("total_return", 100.0)),
+        **dict.fromkeys(("max drawdown", "maximum drawdown", "drawdown", "max_drawdown"), ("max_drawdown", 100.0)),
+    }
+
+    def _window_scores(self, equity: np.ndarray, window_index: pd.DatetimeIndex, metric: str) -> Optional[np.ndarray]:
+        """
+        Ocenia metrykę na wycinku krzywych kapitału wielu kombinacji naraz.
+
+        Odpowiada _window_stats + _extract_metric dla każdego wiersza, ale bez
+        pętli po kombinacjach (compute_performance_stats_batch).
+
+        Args:
+            equity: Wartość portfeli w oknie, kształt (liczba kombinacji, liczba dni)
+            window_index: Daty okna
+            metric: Metryka do optymalizacji
+
+        Returns:
+            Wartości metryki per wiersz (NaN, gdy nieokreślona) albo None, gdy metryki nie liczy się wsadowo
+        """
+        column = self._BATCH_WINDOW_METRICS.get(metric.lower())
+        if column is None:
+            return None
+        key, scale = column
+        table = compute_performance_stats_batch(equity, window_index, risk_free_rate=config.RISK_FREE_RATE)
+        return table[key].to_numpy() * scale
+
+    def _window_stats(self, portfolio: pd.Series, trades: TradeLedger, metric: str) -> Dict[str, Any]:
+        """
+        Liczy statystyki wycinka krzywej kapitału potrzebne do oceny metryki.
+
+        Zwrot liczony jest względem wartości portfela na początku okna.
+        Dla metryk spoza listy liczone są pełne statystyki portfela.
+
+        Args:
+            portfolio: Wartość portfela w oknie
+            trades: Transakcje zamknięte w oknie
+            metric: Metryka do optymalizacji
+
+        Returns:
+            Słownik statystyk zawierający metrykę
+        """
+        name = metric.lower()
+        rf = config.RISK_FREE_RATE
+        if name in ("sharpe ratio", "sharpe", "sharpe_ratio"):
+            return {"Sharpe Ratio": calculate_sharpe_ratio(portfolio, risk_free_rate=rf)}
+        if name in ("sortino ratio", "sortino", "sortino_ratio"):
+            return {"Sortino Ratio": calculate_sortino_ratio(portfolio, risk_free_rate=rf)}
+        if name in ("calmar ratio", "calmar", "calmar_ratio"):
+            return {"Calmar Ratio": calculate_calmar_ratio(portfolio)}
+        if name in ("total return", "return", "total_return"):
+            return {"Total Return": (portfolio.iloc[-1] / portfolio.iloc[0] - 1) * 100}
+        if name in ("max drawdown", "maximum drawdown", "drawdown", "max_drawdown"):
+            drawdown = calculate_max_drawdown(portfolio)
+            return {"Max Drawdown": drawdown * 100 if drawdown is not None else None}
+        if self._is_trade_metric(metric):
+            return calculate_trade_statistics(trades)
+        return self.backtest_manager._calculate_portfolio_stats(
+            {"Portfolio_Value": portfolio, "Benchmark": None, "trades": trades}, {}, 0
+        )
+
     def _get_most_common_params(self, param_list: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Znajduje najczęściej występujące parametry w liście parametrów.
@@ -713,56 +1260,253 @@ class StrategyOptimizer:
             
             random_params_list.append(params)
         
-        # Uruchamianie backtestów z losowymi parametrami
-        results = []
-        
-        # Jeśli n_jobs > 1, użyj równoległości
-        if n_jobs > 1:
-            with ThreadPoolExecutor(max_workers=n_jobs) as executor:
-                futures = []
-                
-                for params in random_params_list:
-                    future = executor.submit(
-                        self._run_backtest_with_params,
-                        strategy_class, tickers, start_date, end_date, params, risk_params
-                    )
-                    futures.append(future)
-                
-                for i, future in enumerate(as_completed(futures)):
-                    try:
-                        result = future.result()
-                        results.append(result)
-                        logger.info(f"Completed Monte Carlo trial {i+1}/{n_trials}")
-                    except Exception as e:
-                        logger.error(f"Error in Monte Carlo trial {i+1}: {e}")
-        else:
-            # Sekwencyjne wykonanie
-            for i, params in enumerate(random_params_list):
-                logger.info(f"Running Monte Carlo trial {i+1}/{n_trials} with params: {params}")
-                result = self._run_backtest_with_params(
-                    strategy_class, tickers, start_date, end_date, params, risk_params
-                )
-                results.append(result)
-        
-        # Sortowanie wyników według metryki optymalizacji
-        successful_results = [r for r in results if r.get("success", False)]
-        
-        # Metryki, które są "im mniejsze, tym lepsze" (np. drawdown)
-        reverse_metrics = ["Max Drawdown", "Maximum Drawdown", "Volatility"]
-        is_reverse = any(m.lower() in metric.lower() for m in reverse_metrics)
-        
-        sorted_results = sorted(
-            successful_results, 
-            key=lambda x: self._extract_metric(x, metric),
-            reverse=not is_reverse
+        # Uruchamianie backtestów z losowymi parametrami (sygnały liczone naraz dla wszystkich prób)
+        results = self._evaluate_param_grid(
+            strategy_class, tickers, start_date, end_date, random_params_list, risk_params, n_jobs=n_jobs
         )
         
-        # Dodawanie rankingu do wyników
-        for i, result in enumerate(sorted_results):
-            result["rank"] = i + 1
+        # Sortowanie wyników według metryki optymalizacji
+        sorted_results = self._rank_results(results, metric)
         
         logger.info(f"Monte Carlo optimization completed with {len(sorted_results)} successful trials")
         if sorted_results:
             logger.info(f"Best params: {sorted_results[0]['params']} with {metric}: {self._extract_metric(sorted_results[0], metric)}")
         
-        return sorted_results
\ No newline at end of file
+        return sorted_results
+
+
+    def adaptive_search(self,
+                        strategy_class: Type[BaseStrategy],
+                        param_ranges: Dict[str, Union[List, np.ndarray, range]],
+                        tickers: List[str],
+                        start_date: Optional[str] = None,
+                        end_date: Optional[str] = None,
+                        risk_params: Optional[Dict[str, Any]] = None,
+                        metric: str = "Sharpe Ratio",
+                        n_candidates: Optional[int] = None,
+                        n_rungs: int = 3,
+                        eta: int = 3,
+                        n_jobs: int = 1,
+                        use_processes: bool = False,
+                        random_state: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Adaptacyjne przeszukiwanie siatki: model zastępczy + successive halving.
+
+        Kandydaci wybierani są z siatki ``param_ranges``: najpierw losowo, potem
+        według oczekiwanej poprawy (expected improvement) modelu zastępczego
+        (proces gaussowski ze scikit-learn, bez niego losowo), dopasowanego do
+        wyników na najtańszym szczeblu. Szczebel ``r`` to ostatnie ``eta**-(n_rungs-1-r)``
+        zakresu dat i tyle samo tickerów; na kolejny szczebel przechodzi najlepsze
+        ``1/eta`` kandydatów, a ostatni szczebel to pełny backtest.
+
+        Args:
+            strategy_class: Klasa strategii
+            param_ranges: Zakresy parametrów (jak w grid_search)
+            tickers: Lista tickerów (kolejność decyduje o podzbiorach na niższych szczeblach)
+            start_date: Data początkowa
+            end_date: Data końcowa
+            risk_params: Parametry zarządzania ryzykiem
+            metric: Metryka do optymalizacji
+            n_candidates: Liczba kandydatów na pierwszym szczeblu (None = ok. 1/eta siatki)
+            n_rungs: Liczba szczebli (1 = pełne backtesty wszystkich kandydatów)
+            eta: Współczynnik redukcji między szczeblami
+            n_jobs: Liczba równoległych zadań (1 = sekwencyjnie, <= 0 = liczba rdzeni)
+            use_processes: Czy używać procesów zamiast wątków (True = procesy)
+            random_state: Ziarno losowania kandydatów
+
+        Returns:
+            Wyniki pełnych backtestów ostatniego szczebla, posortowane jak w grid_search
+        """
+        # Walidacja parametrów przez konstruktor strategii (niepoprawne kombinacje nie zużywają budżetu)
+        param_grid = []
+        for params in self.generate_parameter_grid(param_ranges):
+            try:
+                strategy_class(tickers=tickers, **params)
+                param_grid.append(params)
+            except Exception as e:
+                logger.debug(f"Skipping invalid parameters {params}: {e}")
+        if not param_grid:
+            logger.warning("No valid parameter combinations for adaptive search")
+            return []
+        rng = np.random.default_rng(random_state)
+        n_rungs = max(1, n_rungs)
+        if n_candidates is None:
+            n_candidates = max(eta ** (n_rungs - 1), -(-len(param_grid) // eta))
+        n_candidates = min(n_candidates, len(param_grid))
+
+        # Faktyczne dni handlowe zakresu (do wyznaczenia wycinków szczebli)
+        dates = self.backtest_manager.prepare_data(tickers, start_date, end_date).dates
+        rungs = []
+        for r in range(n_rungs):
+            fraction = float(eta) ** -(n_rungs - 1 - r)
+            n_days = max(min(len(dates), MIN_RUNG_DAYS), int(np.ceil(fraction * len(dates))))
+            n_tickers = max(1, int(np.ceil(fraction * len(tickers))))
+            rungs.append((dates[-n_days].strftime("%Y-%m-%d"), dates[-1].strftime("%Y-%m-%d"), tickers[:n_tickers]))
+
+        sign = -1.0 if self._is_reverse_metric(metric) else 1.0
+        backtests = 0
+
+        def evaluate(rung: int, positions: List[int]) -> Dict[int, Dict[str, Any]]:
+            nonlocal backtests
+            rung_start, rung_end, rung_tickers = rungs[rung]
+            results = self._evaluate_param_grid(
+                strategy_class, rung_tickers, rung_start, rung_end, [param_grid[i] for i in positions], risk_params,
+                n_jobs=n_jobs, use_processes=use_processes
+            )
+            backtests += len(positions)
+            return dict(zip(positions, results))
+
+        def objective(result: Dict[str, Any]) -> float:
+            # Im większa, tym lepsza; nieudane lub nieskończone wyniki są najgorsze
+            value = sign * self._extract_metric(result, metric) if result.get("success") else np.nan
+            return value if np.isfinite(value) else -np.inf
+
+        # Szczebel 0: kandydaci proponowani partiami przez model zastępczy
+        features = self._encode_param_grid(param_grid, param_ranges)
+        n_initial = min(n_candidates, max(2 * features.shape[1] + 1, n_candidates // 3))
+        batch_size = max(1, n_candidates // 6)
+        remaining = list(rng.permutation(len(param_grid)))
+        scores: Dict[int, float] = {}
+        final_results: Dict[int, Dict[str, Any]] = {}
+        proposal = remaining[:n_initial]
+        while proposal:
+            remaining = [i for i in remaining if i not in set(proposal)]
+            for i, result in evaluate(0, proposal).items():
+                scores[i] = objective(result)
+                final_results[i] = result
+            budget = min(batch_size, n_candidates - len(scores), len(remaining))
+            proposal = self._propose_candidates(features, scores, remaining, budget, rng) if budget > 0 else []
+        logger.info(f"Adaptive search scored {len(scores)} of {len(param_grid)} candidates on rung 1/{n_rungs}")
+
+        # Kolejne szczeble: awans najlepszych 1/eta kandydatów
+        survivors = sorted(scores, key=lambda i: scores[i], reverse=True)
+        for rung in range(1, n_rungs):
+            survivors = survivors[:max(1, -(-len(survivors) // eta))]
+            results = evaluate(rung, survivors)
+            survivors = sorted(survivors, key=lambda i: objective(results[i]), reverse=True)
+            final_results = results
+            logger.info(f"Adaptive search promoted {len(survivors)} candidates to rung {rung+1}/{n_rungs}")
+
+        sorted_results = self._rank_results(list(final_results.values()), metric)
+        logger.info(f"Adaptive search ran {backtests} backtests ({len(final_results)} full-length) "
+                    f"instead of {len(param_grid)} full-length backtests")
+        if sorted_results:
+            logger.info(f"Best params: {sorted_results[0]['params']} with {metric}: {self._extract_metric(sorted_results[0], metric)}")
+        return sorted_results
+
+    @staticmethod
+    def _encode_param_grid(param_grid: List[Dict[str, Any]],
+                           param_ranges: Dict[str, Union[List, np.ndarray, range]]) -> np.ndarray:
+        """
+        Koduje kombinacje parametrów jako punkty w [0, 1]^d dla modelu zastępczego.
+
+        Parametry liczbowe skalowane są liniowo między min i max, pozostałe
+        (np. bool, tekst) według pozycji na liście wartości.
+        """
+        columns = []
+        for name, values in param_ranges.items():
+            values = list(values)
+            if all(isinstance(v, (int, float, np.integer, np.floating)) and not isinstance(v, bool) for v in values):
+                column = np.array([float(params[name]) for params in param_grid])
+                low, high = min(values), max(values)
+            else:
+                column = np.array([float(values.index(params[name])) for params in param_grid])
+                low, high = 0.0, float(len(values) - 1)
+            columns.append((column - low) / (high - low) if high > low else np.zeros(len(param_grid)))
+        return np.column_stack(columns) if columns else np.zeros((len(param_grid), 1))
+
+    @staticmethod
+    def _propose_candidates(features: np.ndarray,
+                            scores: Dict[int, float],
+                            remaining: List[int],
+                            n_proposals: int,
+                            rng: np.random.Generator) -> List[int]:
+        """
+        Wybiera kolejnych kandydatów według expected improvement procesu gaussowskiego.
+
+        Bez scikit-learn lub przy zbyt małej liczbie skończonych wyników
+        kandydaci losowani są z pozostałych.
+
+        Args:
+            features: Zakodowana siatka (_encode_param_grid)
+            scores: Wyniki ocenionych kandydatów (pozycja w siatce -> wartość, większa lepsza, -inf = nieudany)
+            remaining: Pozycje jeszcze nieocenione
+            n_proposals: Liczba kandydatów do wybrania
+            rng: Generator liczb losowych
+
+        Returns:
+            Lista pozycji w siatce
+        """
+        # Nieudane wyniki nie wchodzą do modelu (nie są też ponownie proponowane)
+        observed = [i for i, score in scores.items() if np.isfinite(score)]
+        if not SKLEARN_AVAILABLE or len(observed) < 3:
+            return [int(i) for i in rng.permutation(remaining)[:n_proposals]]
+
+        y = np.array([scores[i] for i in observed])
+        model = GaussianProcessRegressor(
+            kernel=ConstantKernel() * Matern(length_scale=0.3, nu=2.5) + WhiteKernel(),
+            normalize_y=True, random_state=int(rng.integers(2 ** 31))
+        )
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            model.fit(features[observed], y)
+            mean, std = model.predict(features[remaining], return_std=True)
+        std = np.maximum(std, 1e-12)
+        z = (mean - y.max()) / std
+        expected_improvement = (mean - y.max()) * norm.cdf(z) + std * norm.pdf(z)
+        best = np.argsort(-expected_improvement, kind='stable')[:n_proposals]
+        return [int(remaining[j]) for j in best]
+
+
+# --- Procesy robocze puli (stan ustawiany raz na proces) ---
+
+_worker_state: Dict[str, Any] = {}
+
+
+def _init_worker(shared_path: str,
+                 initial_capital: float,
+                 strategy_class: Type[BaseStrategy],
+                 risk_params: Optional[Dict[str, Any]],
+                 date_range: str,
+                 cancel_token: Optional[CancellationToken] = None) -> None:
+    """
+    Inicjalizuje proces roboczy: mapuje współdzielone dane i buduje panel raz.
+
+    Args:
+        shared_path: Katalog SharedPreparedData (dane, filtr rynku i benchmark)
+        initial_capital: Kapitał początkowy
+        strategy_class: Klasa strategii
+        risk_params: Parametry zarządzania ryzykiem
+        date_range: Opis zakresu dat (do raportu)
+        cancel_token: Token anulowania procesu nadrzędnego (obserwowany przez plik-znacznik)
+    """
+    # Dane, filtr rynku i benchmark pochodzą z SharedPreparedData (okna walk-forward tylko
+    # wycinają i przeskalowują benchmark), więc przypięty pusty DataLoader nigdy nie wczytuje
+    # pliku danych, a menedżer nie sięga do rejestru współdzielonych loaderów
+    prepared = SharedPreparedData.load(shared_path)
+    manager = BacktestManager(initial_capital, data_loader=DataLoader())
+    optimizer = StrategyOptimizer(manager, cancel_token=cancel_token)
+    _worker_state.update(
+        optimizer=optimizer,
+        prepared=prepared,
+        context=SharedPreparedData.load_context(shared_path, prepared.dates),
+        strategy_class=strategy_class,
+        risk_params=risk_params,
+        date_range=date_range,
+    )
+
+
+def _evaluate_chunk_in_worker(chunk: List[Tuple[int, Dict[str, Any]]]) -> List[Tuple[int, Dict[str, Any]]]:
+    """Ocenia paczkę kombinacji w procesie roboczym (patrz StrategyOptimizer._evaluate_chunk)."""
+    state = _worker_state
+    return state['optimizer']._evaluate_chunk(
+        state['prepared'], state['context'], state['strategy_class'], chunk, state['risk_params'], state['date_range']
+    )
+
+
+def _evaluate_window_chunk_in_worker(chunk: List[Tuple[int, Dict[str, Any], int, int, str]]) -> List[Tuple[int, Dict[str, Any]]]:
+    """Symuluje okna out-of-sample w procesie roboczym (patrz StrategyOptimizer._evaluate_window_chunk)."""
+    state = _worker_state
+    return state['optimizer']._evaluate_window_chunk(
+        state['prepared'], state['context'], state['strategy_class'], chunk, state['risk_params']
+    )
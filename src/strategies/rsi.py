@@ -1,13 +1,18 @@
 import pandas as pd
+import numpy as np
 import pandas_ta as ta  # type: ignore
 import logging
-from typing import List
+from typing import Any, Dict, List, Optional
 # --- MODIFIED: Use absolute import ---
-from src.strategies.base import BaseStrategy
+from src.strategies.base import SIGNAL_DTYPE, BaseStrategy
+from src.core.indicator_cache import indicator_cache, data_fingerprint
 # --- END MODIFIED ---
 
 logger = logging.getLogger(__name__)
 
+# Warm-up history kept before a backtest window, in RSI periods
+RSI_WARMUP_PERIODS = 10
+
 class RSIStrategy(BaseStrategy):
     """
     Implements a trading strategy based on the Relative Strength Index (RSI) indicator.
@@ -42,6 +47,59 @@ class RSIStrategy(BaseStrategy):
         """Returns a dictionary with the current strategy parameters."""
         return self.parameters
 
+    @classmethod
+    def warmup_bars(cls, params: Dict[str, Any]) -> Optional[int]:
+        """
+        RSI uses Wilder smoothing (an EMA), which never fully forgets old prices.
+
+        Keeping ``RSI_WARMUP_PERIODS`` periods leaves the dropped history a weight of
+        (1 - 1/n)^(k*n) < e^-k, far below the precision of the thresholds.
+        """
+        return RSI_WARMUP_PERIODS * int(cls._param_value(params, 'rsi_period')) + 1
+
+    @classmethod
+    def generate_signals_batch(cls,
+                               data: Dict[str, pd.DataFrame],
+                               param_grid: List[Dict[str, Any]],
+                               index: pd.DatetimeIndex) -> np.ndarray:
+        """
+        Vectorized ``generate_signals`` over a (rsi_period x lower_bound x upper_bound) grid.
+
+        Each distinct RSI period is computed once per ticker (through the indicator cache)
+        and the threshold crossings are evaluated for all parameter sets at once.
+        See ``BaseStrategy.generate_signals_batch``.
+        """
+        tickers = list(data)
+        periods = cls._grid_values(param_grid, 'rsi_period').astype(int)
+        lower = cls._grid_values(param_grid, 'lower_bound').astype(np.float64)[:, None]
+        upper = cls._grid_values(param_grid, 'upper_bound').astype(np.float64)[:, None]
+        unique_periods, period_rows = np.unique(periods, return_inverse=True)
+
+        out = np.zeros((len(param_grid), len(index), len(tickers)), dtype=SIGNAL_DTYPE)
+        for j, ticker in enumerate(tickers):
+            df = data[ticker]
+            if df is None or 'Close' not in df.columns:
+                continue
+            close = df['Close']
+            close_fingerprint = data_fingerprint(close)
+            rsi = np.vstack([
+                indicator_cache.get_or_compute(
+                    ticker, 'ta.rsi', {'length': int(period)}, close,
+                    lambda period=period: df.ta.rsi(length=int(period)),
+                    fingerprint=close_fingerprint
+                ).to_numpy(dtype=np.float64)
+                for period in unique_periods
+            ])
+            for chunk in cls._param_chunks(len(param_grid), len(df)):
+                rsi_values = rsi[period_rows[chunk]]
+                rsi_prev = cls._shift_rows(rsi_values)
+                buy = (rsi_values > lower[chunk]) & (rsi_prev <= lower[chunk])
+                sell = (rsi_values < upper[chunk]) & (rsi_prev >= upper[chunk])
+                signals = np.where(sell, -1, np.where(buy, 1, 0)).astype(SIGNAL_DTYPE)
+                signals[len(df) < periods[chunk]] = 0 # Not enough history for the RSI period
+                out[chunk, :, j] = cls._align_signal_rows(signals, df.index, index)
+        return out
+
     def generate_signals(self, ticker: str, data: pd.DataFrame) -> pd.DataFrame: # Added 'ticker' argument
         """
         Generates trading signals based on the RSI indicator.
@@ -75,8 +133,11 @@ class RSIStrategy(BaseStrategy):
         rsi_col = f'RSI_{self.rsi_period}'
 
         try:
-            # Calculate RSI using pandas_ta
-            df.ta.rsi(length=self.rsi_period, append=True, col_names=(rsi_col,))
+            # Calculate RSI using pandas_ta (shared through the indicator cache)
+            df[rsi_col] = indicator_cache.get_or_compute(
+                ticker, 'ta.rsi', {'length': self.rsi_period}, df['Close'],
+                lambda: df.ta.rsi(length=self.rsi_period)
+            )
 
             if rsi_col not in df.columns:
                 logger.error(f"RSI column '{rsi_col}' not found after pandas_ta calculation for {ticker}.") # Added ticker
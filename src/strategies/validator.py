@@ -1,5 +1,4 @@
 import pandas as pd
-import numpy as np
 import logging
 import inspect
 from typing import Dict, List, Any, Optional, Union, Type, Tuple
@@ -7,6 +6,7 @@ from datetime import datetime, timedelta
 
 from src.strategies.base import BaseStrategy
 from src.core.exceptions import StrategyValidationError
+from src.core.synthetic_data import SyntheticMarketConfig, generate_synthetic_market
 
 logger = logging.getLogger(__name__)
 
@@ -29,52 +29,25 @@ class StrategyValidator:
         
         Args:
             days: Number of historical data days
-            volatility: Daily price volatility
+            volatility: Daily volatility of the returns (market, factor and ticker-specific parts together)
             
         Returns:
             DataFrame with synthetic OHLCV data
         """
-        # Generate start date (one year back)
+        # Weekdays over the requested calendar span (one year back by default)
         end_date = datetime.now().date()
         start_date = end_date - timedelta(days=days)
-        
-        # Generate list of trading days (only weekdays)
-        dates = []
-        curr_date = start_date
-        while curr_date <= end_date:
-            # Only days from Monday (0) to Friday (4)
-            if curr_date.weekday() < 5:
-                dates.append(curr_date)
-            curr_date += timedelta(days=1)
-        
-        # Generate random price changes as Brownian motion
-        np.random.seed(42)  # For test repeatability
-        returns = np.random.normal(0, volatility, len(dates))
-        
-        # Start with price 100 and generate remaining prices
-        close_prices = 100 * np.cumprod(1 + returns)
-        
-        # Generate other OHLCV columns
-        high_prices = close_prices * np.exp(np.random.normal(0, volatility/2, len(dates)))
-        low_prices = close_prices * np.exp(np.random.normal(0, -volatility/2, len(dates)))
-        # Ensure high >= close >= low
-        high_prices = np.maximum(high_prices, close_prices)
-        low_prices = np.minimum(low_prices, close_prices)
-        
-        # Open between low and high
-        open_prices = low_prices + (high_prices - low_prices) * np.random.random(len(dates))
-        
-        # Random volumes - random variable from log-normal distribution
-        volumes = np.exp(np.random.normal(10, 1, len(dates)))
-        
-        # Create DataFrame
-        df = pd.DataFrame({
-            'Open': open_prices,
-            'High': high_prices,
-            'Low': low_prices,
-            'Close': close_prices,
-            'Volume': volumes
-        }, index=dates)
+        dates = pd.bdate_range(start=start_date, end=end_date)
+
+        # Single clean history from the batched generator (fixed seed for test repeatability)
+        market = generate_synthetic_market(
+            SyntheticMarketConfig(tickers=['SAMPLE'], seed=42, stress_vol_multiplier=1.0,
+                                  start_price_range=(100.0, 100.0), jump_probability=0.0,
+                                  missing_day_probability=0.0, late_listing_fraction=0.0,
+                                  splits_per_year=0.0).with_daily_volatility(volatility),
+            dates=dates
+        )
+        df = market.ticker_frames()['SAMPLE'].rename_axis(None)
         
         # Save generated data
         self.sample_data = df
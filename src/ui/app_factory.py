@@ -10,10 +10,7 @@ import traceback
 import pandas as pd
 import time # Add time import for versioning
 
-# --- CORRECTED: Import DiskcacheManager from background_callback ---
-import diskcache
-from dash.background_callback import DiskcacheManager
-# --- END CORRECTED --- 
+from flask import jsonify
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -29,7 +26,7 @@ class DeprecationFilter(logging.Filter):
 
 # Import local modules
 from src.core.constants import AVAILABLE_STRATEGIES
-from src.core.data import DataLoader
+from src.core.data import get_shared_data_loader
 from src.ui.callbacks.strategy_callbacks import register_strategy_callbacks
 from src.ui.callbacks.backtest_callbacks import register_backtest_callbacks
 from src.ui.callbacks.risk_management_callbacks import register_risk_management_callbacks
@@ -42,6 +39,7 @@ from src.ui.layouts.strategy_config import create_strategy_config_section
 from src.ui.layouts.results_display import create_center_panel_layout, create_right_panel_layout
 from src.ui.components.loading_overlay import create_loading_overlay  # Import the loading overlay component
 # --- END Import ---
+from src.ui.job_queue import create_background_callback_manager
 from src.ui.ids.ids import ResultsIDs, StrategyConfigIDs, AppStructureIDs, SharedComponentIDs # MODIFIED IMPORT
 from src.version import get_version, get_version_info, RELEASE_DATE, get_changelog  # Import version info
 
@@ -58,10 +56,8 @@ def create_app(debug: bool = False, suppress_callback_exceptions: bool = True, a
     Returns:
         dash.Dash: Configured Dash application instance
     """
-    # --- ADDED: Initialize DiskcacheManager ---
-    cache = diskcache.Cache("./cache") # Creates a cache directory
-    background_callback_manager = DiskcacheManager(cache)
-    # --- END ADDED ---
+    # Background callbacks run through the configured job queue (see src/ui/job_queue.py)
+    background_callback_manager = create_background_callback_manager("./cache")
 
     # Initialize the Dash app with Bootstrap components
     # --- Add version query string to custom CSS --- 
@@ -307,6 +303,12 @@ def create_app(debug: bool = False, suppress_callback_exceptions: bool = True, a
     # Register all application callbacks
     register_callbacks(app)
 
+    # Queue depth metrics of the background job queue
+    if hasattr(background_callback_manager, 'stats'):
+        @app.server.route("/jobs/metrics")
+        def job_queue_metrics():
+            return jsonify(background_callback_manager.stats())
+
     return app
 
 def create_version_display():
@@ -347,6 +349,7 @@ def create_app_layout() -> html.Div:
             # Store for app state
             dcc.Store(id=AppStructureIDs.APP_STATE_STORE, data={}), # CHANGED
             dcc.Store(id=ResultsIDs.BACKTEST_RESULTS_STORE), # Use ResultsID
+            dcc.Store(id=ResultsIDs.CHART_WIDTH_STORE), # Filled client-side with the window width
             dcc.Store(id=StrategyConfigIDs.STRATEGY_CONFIG_STORE_MAIN), # Add main config store
             dcc.Store(id=SharedComponentIDs.RUN_BACKTEST_TRIGGER_STORE), # CHANGED
 
@@ -570,7 +573,7 @@ def get_available_tickers() -> List[Dict[str, str]]:
         List[Dict[str, str]]: List of dictionaries for dropdown options.
     """
     try:
-        data_loader = DataLoader()
+        data_loader = get_shared_data_loader()
         tickers = data_loader.get_available_tickers()
         # Format for dbc.Select or dcc.Checklist options
         return [{'label': ticker, 'value': ticker} for ticker in tickers]
@@ -21,7 +21,6 @@ from dash import (
     ALL,
 )
 import plotly.graph_objects as go
-import plotly.io as pio
 import dash_bootstrap_components as dbc  # Import dbc
 from dash import dash_table
 from dash.dash_table.Format import Format, Scheme, Group
@@ -40,6 +39,7 @@ from src.core.constants import CHART_THEME
 
 # Import centralized IDs
 from src.ui.ids.ids import (
+    AppStructureIDs,
     ResultsIDs,
     WizardIDs,
     StrategyConfigIDs,
@@ -53,12 +53,40 @@ logger = logging.getLogger(__name__)
 # In a real Dash app, this might be handled differently (e.g., global variable, app context)
 backtest_service = BacktestService()
 
+LIVE_EQUITY_MAX_POINTS = 400  # The live chart is small; keeps each progress payload light
+
+
+def _x_range_from_relayout(relayout_data):
+    """
+    Reads the zoomed x range from a Plotly ``relayoutData`` event.
+
+    Returns:
+        Tuple of (x_range, is_x_event): x_range is None when the x axis is reset
+        to autorange; is_x_event is False for events that do not touch the x axis.
+    """
+    if not relayout_data:
+        return None, False
+    if "xaxis.range[0]" in relayout_data and "xaxis.range[1]" in relayout_data:
+        return (relayout_data["xaxis.range[0]"], relayout_data["xaxis.range[1]"]), True
+    if isinstance(relayout_data.get("xaxis.range"), list) and len(relayout_data["xaxis.range"]) == 2:
+        return tuple(relayout_data["xaxis.range"]), True
+    if relayout_data.get("xaxis.autorange"):
+        return None, True
+    return None, False
+
 
 def register_backtest_callbacks(app: Dash):
     """Register callbacks related to running backtests and displaying results."""
 
     logger.info("Registering backtest callbacks...")
 
+    # Charts are downsampled server-side to what the browser window can show
+    app.clientside_callback(
+        "function(_) { return window.innerWidth; }",
+        Output(ResultsIDs.CHART_WIDTH_STORE, "data"),
+        Input(AppStructureIDs.APP_STATE_STORE, "data"),
+    )
+
     # --- Run Backtest Callback ---
     # This callback now outputs to the store instead of directly to result components
     @app.callback(
@@ -140,17 +168,33 @@ def register_backtest_callbacks(app: Dash):
         progress=[
             Output(ResultsIDs.BACKTEST_PROGRESS_BAR, "value"),
             Output(ResultsIDs.BACKTEST_PROGRESS_LABEL_TEXT, "children"),
+            Output(ResultsIDs.BACKTEST_LIVE_EQUITY_CHART, "figure"),
         ],
+        # Dash terminates the job process on Cancel, so the worker is free at once
+        cancel=[Input(ResultsIDs.BACKTEST_CANCEL_BUTTON, "n_clicks")],
         prevent_initial_call=True,
     )
     def run_backtest(set_progress, trigger_data, config_data):
+        # Every progress update carries the bar state and the latest live equity figure
+        live_visualizer = BacktestVisualizer()
+        live = {
+            "value": 0,
+            "message": "",
+            "figure": live_visualizer.create_live_equity_figure(None),
+            "dates": [],
+            "values": [],
+            "trades": 0,
+            "net_pnl": 0.0,
+        }
+
         def wrapped_set_progress(
             progress_tuple,
         ):  # progress_tuple is (value, detail_message)
             value, detail_message = progress_tuple
+            live["value"], live["message"] = value, detail_message
             set_progress(
-                (value, detail_message)
-            )  # Update bar value and inner detail message
+                (value, detail_message, live["figure"])
+            )  # Update bar value, inner detail message and live chart
 
             # Standard delays, adjust if necessary
             if value <= 4:
@@ -160,6 +204,18 @@ def register_backtest_callbacks(app: Dash):
             else:
                 time.sleep(0.05)
 
+        def publish_partial_results(batch):
+            """Appends a batch of equity points and closed trades and redraws the live chart."""
+            live["dates"].extend(batch.get("dates", []))
+            live["values"].extend(batch.get("values", []))
+            live["trades"] += len(batch.get("trades", []))
+            live["net_pnl"] += sum(t.get("net_pnl") or 0.0 for t in batch.get("trades", []))
+            equity = pd.Series(live["values"], index=pd.DatetimeIndex(live["dates"]))
+            live["figure"] = live_visualizer.create_live_equity_figure(
+                equity, live["trades"], live["net_pnl"], max_points=LIVE_EQUITY_MAX_POINTS
+            )
+            set_progress((live["value"], live["message"], live["figure"]))
+
         logger.info("--- run_backtest callback: Entered.")
         if not trigger_data:
             logger.warning("run_backtest triggered without trigger_data.")
@@ -296,6 +352,7 @@ def register_backtest_callbacks(app: Dash):
                 cost_params=cost_params_dict,
                 rebalancing_params=rebalancing_params_dict,
                 progress_callback=wrapped_set_progress,
+                partial_callback=publish_partial_results,
             )
             end_time = time.time()
             logger.info(
@@ -425,9 +482,10 @@ def register_backtest_callbacks(app: Dash):
         Output(ResultsIDs.PERFORMANCE_OVERVIEW_CARD, "style"),
         Output(ResultsIDs.TRADE_STATISTICS_CARD, "style"),
         Input(ResultsIDs.BACKTEST_RESULTS_STORE, "data"),
+        State(ResultsIDs.CHART_WIDTH_STORE, "data"),
         prevent_initial_call=True,
     )
-    def update_results_display(results_data):
+    def update_results_display(results_data, chart_width):
         logger.info("--- update_results_display callback triggered ---")
 
         if not results_data or not results_data.get("success"):
@@ -452,8 +510,10 @@ def register_backtest_callbacks(app: Dash):
                 {"display": "none"},
             )
 
+        run_id = results_data.get("run_id")
         metrics = results_data.get("metrics", {})
-        trades_list = results_data.get("trades_data", [])
+        # Trades and charts are read from the server-side run store, not from the browser store
+        trades_list = backtest_service.get_trades_table_data(run_id) if run_id else []
 
         # Make sure metrics is a dictionary, not None or empty list
         if not metrics or not isinstance(metrics, dict):
@@ -617,42 +677,18 @@ def register_backtest_callbacks(app: Dash):
         else:
             trades_table_component = html.Div("No trades executed during the backtest.")
 
-        # Process chart figures if available, otherwise create empty placeholders
-        portfolio_chart_fig = None
-        try:
-            portfolio_chart_fig = (
-                pio.from_json(results_data.get("portfolio_value_chart_json"))
-                if results_data.get("portfolio_value_chart_json")
-                else None
-            )
-        except Exception as e:
-            logger.error(f"Error parsing portfolio chart: {e}")
+        # Render chart figures from the stored run, otherwise create empty placeholders
+        portfolio_chart_fig = backtest_service.get_equity_chart(run_id, "value", width=chart_width)
         if not portfolio_chart_fig:
             portfolio_chart_fig = create_empty_chart(
                 "Portfolio Value data not available"
             )
 
-        drawdown_chart_fig = None
-        try:
-            drawdown_chart_fig = (
-                pio.from_json(results_data.get("drawdown_chart_json"))
-                if results_data.get("drawdown_chart_json")
-                else None
-            )
-        except Exception as e:
-            logger.error(f"Error parsing drawdown chart: {e}")
+        drawdown_chart_fig = backtest_service.get_equity_chart(run_id, "drawdown", width=chart_width)
         if not drawdown_chart_fig:
             drawdown_chart_fig = create_empty_chart("Drawdown data not available")
 
-        monthly_returns_heatmap_fig = None
-        try:
-            monthly_returns_heatmap_fig = (
-                pio.from_json(results_data.get("monthly_returns_heatmap_json"))
-                if results_data.get("monthly_returns_heatmap_json")
-                else None
-            )
-        except Exception as e:
-            logger.error(f"Error parsing monthly returns heatmap: {e}")
+        monthly_returns_heatmap_fig = backtest_service.get_monthly_returns_chart(run_id)
         if not monthly_returns_heatmap_fig:
             monthly_returns_heatmap_fig = create_empty_chart(
                 "Monthly Returns data not available"
@@ -746,17 +782,23 @@ def register_backtest_callbacks(app: Dash):
         Input(ResultsIDs.PORTFOLIO_VALUE_CURRENCY_PERCENT, "n_clicks"),
         Input(ResultsIDs.PORTFOLIO_SCALE_LINEAR_BTN, "n_clicks"),
         Input(ResultsIDs.PORTFOLIO_SCALE_LOG_BTN, "n_clicks"),
+        Input(ResultsIDs.PORTFOLIO_CHART, "relayoutData"),
         State(ResultsIDs.PORTFOLIO_SETTINGS_STORE, "data"),
         State(ResultsIDs.BACKTEST_RESULTS_STORE, "data"),
+        State(ResultsIDs.CHART_WIDTH_STORE, "data"),
         prevent_initial_call=True,
     )
     def update_portfolio_chart(
-        usd_click, pct_click, lin_click, log_click, settings, results_data
+        usd_click, pct_click, lin_click, log_click, relayout_data, settings, results_data, chart_width
     ):
         if not results_data:
             raise PreventUpdate
         settings = settings or {"y_axis": "usd", "scale": "linear"}
         triggered = ctx.triggered_id
+        # Zooming re-fetches the visible range at full resolution
+        x_range, is_x_event = _x_range_from_relayout(relayout_data)
+        if triggered == ResultsIDs.PORTFOLIO_CHART and not is_x_event:
+            raise PreventUpdate
         if triggered == ResultsIDs.PORTFOLIO_VALUE_CURRENCY_USD:
             settings["y_axis"] = "usd"
         elif triggered == ResultsIDs.PORTFOLIO_VALUE_CURRENCY_PERCENT:
@@ -766,20 +808,15 @@ def register_backtest_callbacks(app: Dash):
         elif triggered == ResultsIDs.PORTFOLIO_SCALE_LOG_BTN:
             settings["scale"] = "log"
 
-        fig_json = (
-            results_data.get("portfolio_value_chart_json")
-            if settings["y_axis"] == "usd"
-            else results_data.get("portfolio_returns_chart_json")
+        fig = backtest_service.get_equity_chart(
+            results_data.get("run_id"),
+            "value" if settings["y_axis"] == "usd" else "returns",
+            width=chart_width,
+            x_range=x_range,
         )
-        if not fig_json:
+        if not fig:
             return dash.no_update, settings, False, True, False, True
 
-        try:
-            fig = pio.from_json(fig_json)
-        except Exception as e:
-            logger.error(f"Error decoding portfolio chart json: {e}")
-            raise PreventUpdate
-
         fig.update_yaxes(type="log" if settings["scale"] == "log" else "linear")
         if settings["y_axis"] == "percent":
             fig.update_yaxes(ticksuffix="%", tickprefix=None)
@@ -806,17 +843,22 @@ def register_backtest_callbacks(app: Dash):
         Input(ResultsIDs.DRAWDOWN_YAXIS_PERCENT_BTN, "n_clicks"),
         Input(ResultsIDs.DRAWDOWN_SCALE_LINEAR_BTN, "n_clicks"),
         Input(ResultsIDs.DRAWDOWN_SCALE_LOG_BTN, "n_clicks"),
+        Input(ResultsIDs.DRAWDOWN_CHART, "relayoutData"),
         State(ResultsIDs.DRAWDOWN_SETTINGS_STORE, "data"),
         State(ResultsIDs.BACKTEST_RESULTS_STORE, "data"),
+        State(ResultsIDs.CHART_WIDTH_STORE, "data"),
         prevent_initial_call=True,
     )
     def update_drawdown_chart(
-        usd_click, pct_click, lin_click, log_click, settings, results_data
+        usd_click, pct_click, lin_click, log_click, relayout_data, settings, results_data, chart_width
     ):
         if not results_data:
             raise PreventUpdate
         settings = settings or {"y_axis": "percent", "scale": "linear"}
         triggered = ctx.triggered_id
+        x_range, is_x_event = _x_range_from_relayout(relayout_data)
+        if triggered == ResultsIDs.DRAWDOWN_CHART and not is_x_event:
+            raise PreventUpdate
         if triggered == ResultsIDs.DRAWDOWN_YAXIS_USD_BTN:
             settings["y_axis"] = "usd"
         elif triggered == ResultsIDs.DRAWDOWN_YAXIS_PERCENT_BTN:
@@ -826,30 +868,13 @@ def register_backtest_callbacks(app: Dash):
         elif triggered == ResultsIDs.DRAWDOWN_SCALE_LOG_BTN:
             settings["scale"] = "log"
 
-        fig_json = results_data.get("drawdown_chart_json")
-        if not fig_json:
+        run_id = results_data.get("run_id")
+        fig = backtest_service.get_equity_chart(
+            run_id, "drawdown", width=chart_width, x_range=x_range, drawdown_unit=settings["y_axis"]
+        )
+        if not fig:
             return dash.no_update, settings, False, True, False, True
 
-        try:
-            fig = pio.from_json(fig_json)
-        except Exception as e:
-            logger.error(f"Error decoding drawdown chart json: {e}")
-            raise PreventUpdate
-
-        if settings["y_axis"] == "usd" and results_data.get(
-            "portfolio_value_chart_json"
-        ):
-            pv_fig = pio.from_json(results_data["portfolio_value_chart_json"])
-            for i, trace in enumerate(fig.data):
-                if i < len(pv_fig.data):
-                    pv = pd.Series(pv_fig.data[i].y)
-                    rolling_max = pv.cummax()
-                    dd = pv - rolling_max
-                    trace.y = dd
-            fig.update_yaxes(tickprefix="$", tickformat=",.0f")
-        else:
-            fig.update_yaxes(ticksuffix="%")
-
         fig.update_yaxes(type="log" if settings["scale"] == "log" else "linear")
 
         return (
@@ -864,13 +889,20 @@ def register_backtest_callbacks(app: Dash):
     @app.callback(
         Output(ResultsIDs.SIGNALS_CHART, "figure"),
         Input(ResultsIDs.SIGNALS_TICKER_SELECTOR, "value"),
+        Input(ResultsIDs.SIGNALS_CHART, "relayoutData"),
         State(ResultsIDs.BACKTEST_RESULTS_STORE, "data"),
+        State(ResultsIDs.CHART_WIDTH_STORE, "data"),
         prevent_initial_call=True,
     )
-    def update_signals_chart(ticker, results_data):
+    def update_signals_chart(ticker, relayout_data, results_data, chart_width):
         """Update signals chart for selected ticker using strategy defaults."""
         if not ticker or not results_data:
             raise PreventUpdate
+        x_range = None
+        if ctx.triggered_id == ResultsIDs.SIGNALS_CHART:
+            x_range, is_x_event = _x_range_from_relayout(relayout_data)
+            if not is_x_event:
+                raise PreventUpdate
 
         strategy = (results_data.get("strategy_type") or "").upper()
         indicators = []
@@ -881,18 +913,10 @@ def register_backtest_callbacks(app: Dash):
         elif strategy == "RSI":
             indicators = ["rsi"]
 
-        signals_df = None
-        signals_dict = results_data.get("signals", {})
-        if isinstance(signals_dict, dict) and ticker in signals_dict:
-            try:
-                signals_df = pd.read_json(signals_dict[ticker], orient="split")
-            except ValueError:
-                try:
-                    signals_df = pd.read_json(signals_dict[ticker])
-                except Exception:
-                    signals_df = None
-
-        fig = backtest_service.get_signals_chart(ticker, indicators, signals_df)
+        fig = backtest_service.get_signals_chart(
+            ticker, indicators, run_id=results_data.get("run_id"),
+            width=chart_width, x_range=x_range
+        )
         if fig is None:
             return create_empty_chart("No signal data")
         return fig
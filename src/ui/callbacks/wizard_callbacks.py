@@ -19,7 +19,7 @@ from src.core.constants import (
 )
 from src.ui.ids import WizardIDs, StrategyConfigIDs # Removed PageIDs and GeneralIDs
 from src.ui.components.stepper import create_wizard_stepper  # Import for updating the stepper
-from src.core.data import DataLoader  # Import for ticker data
+from src.core.data import get_shared_data_loader  # Import for ticker data
 from dash.exceptions import PreventUpdate # Added PreventUpdate
 import dash_bootstrap_components as dbc # Added dbc
 from typing import List, Tuple, Dict # Added Dict
@@ -640,7 +640,7 @@ def register_wizard_callbacks(app: Dash): # Make sure Dash is imported if not al
         if style is None or style.get("display") == "none":
             raise PreventUpdate
         try:
-            data_loader = DataLoader()
+            data_loader = get_shared_data_loader()
             available_tickers = data_loader.get_available_tickers()
             return [{"label": ticker, "value": ticker} for ticker in available_tickers]
         except Exception as e:
@@ -79,6 +79,23 @@ def create_loading_overlay():
                         )
                     ]
                 ),
+                # Equity curve of the running simulation, fed by the progress updates
+                dcc.Graph(
+                    id=ResultsIDs.BACKTEST_LIVE_EQUITY_CHART,
+                    config={"displayModeBar": False},
+                    style={"height": "260px"}
+                ),
+                # Stops the background job (Dash `cancel=`), freeing its worker
+                html.Div(
+                    dbc.Button(
+                        "Cancel",
+                        id=ResultsIDs.BACKTEST_CANCEL_BUTTON,
+                        color="secondary",
+                        outline=True,
+                        size="sm"
+                    ),
+                    className="text-center mt-2"
+                ),
                 dcc.Interval(
                     id=ResultsIDs.BACKTEST_ANIMATION_INTERVAL,
                     interval=300,  # Milliseconds
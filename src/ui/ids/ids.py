@@ -152,6 +152,7 @@ class ResultsIDs:
 
     # Store
     BACKTEST_RESULTS_STORE = "backtest-results-store"
+    CHART_WIDTH_STORE = "chart-width-store"  # Browser width used to downsample chart data
 
     # Buttons
     PORTFOLIO_VALUE_BUTTON = "btn-chart-value"
@@ -209,6 +210,8 @@ class ResultsIDs:
     BACKTEST_ANIMATED_TEXT = "backtest-animated-text"
     BACKTEST_PROGRESS_DETAIL_TEXT = "backtest-progress-detail-text"
     BACKTEST_ANIMATION_INTERVAL = "backtest-animation-interval"
+    BACKTEST_LIVE_EQUITY_CHART = "backtest-live-equity-chart"  # Equity curve streamed while running
+    BACKTEST_CANCEL_BUTTON = "backtest-cancel-button"
 
     # Layout Wrappers / Areas
     RESULTS_AREA_WRAPPER = "actual-results-area"  # UNCOMMENTED
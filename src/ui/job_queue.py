@@ -0,0 +1,300 @@
+"""
+Background job execution for Dash background callbacks.
+
+Dash's ``DiskcacheManager`` starts one process per job as soon as the job is
+submitted, so a handful of users each starting a long optimization can
+oversubscribe the machine. ``PooledJobManager`` keeps the diskcache result
+backend but puts submissions into per-user queues and runs at most
+``max_workers`` job processes at a time. Free slots are handed out round-robin
+over the users that have queued jobs, so one user submitting many jobs does not
+starve the others. The cache entries of a finished job (result, progress,
+side updates) get an expiry of ``result_ttl`` seconds when the job is reaped,
+which also removes the results of jobs whose browser tab was closed; results
+memoized with ``cache_by`` keep the ``expire`` given to the manager. Jobs run
+Dash's own job function; the manager only overrides the public manager hooks.
+
+The queue lives in the server process. With several server processes (e.g.
+gunicorn workers) every process has its own queue and limit.
+
+Example:
+    manager = create_background_callback_manager()
+    app = dash.Dash(__name__, background_callback_manager=manager)
+    manager.stats()  # {'running': 2, 'queued': 5, ...}
+"""
+
+import logging
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Optional
+
+import diskcache
+from dash.background_callback import DiskcacheManager
+
+from src.core.config import config
+from src.core.parallel import resolve_worker_count
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_POLL_SECONDS = 0.1   # How often finished job processes are reaped
+WAIT_TIME_SAMPLES = 200        # Number of recent queue wait times kept for stats()
+ANONYMOUS_USER = "anonymous"
+
+
+@dataclass
+class _Job:
+    """A submitted background callback, queued or running."""
+    job_id: str
+    user: str
+    key: str
+    job_fn: Callable
+    args: Any
+    context: Any
+    submitted_at: float
+    started_at: Optional[float] = None
+    process: Any = None
+
+
+class PooledJobManager(DiskcacheManager):
+    """Diskcache-backed background callback manager with a bounded, fair job queue."""
+
+    def __init__(self,
+                 cache: Optional[diskcache.Cache] = None,
+                 max_workers: Optional[int] = None,
+                 result_ttl: Optional[float] = None,
+                 user_header: str = "",
+                 cache_by=None,
+                 expire=None):
+        """
+        Args:
+            cache (Optional[diskcache.Cache]): Result backend. Defaults to a new temporary diskcache.
+            max_workers (Optional[int]): Maximum number of jobs running at once; None or <= 0 means
+                                         one per CPU core.
+            result_ttl (Optional[float]): Seconds after which unread results and progress entries are
+                                          removed. None or <= 0 keeps them until read.
+            user_header (str): Request header identifying the user. Set it only when a trusted proxy
+                               (e.g. an authenticating one) adds the header, since clients can send
+                               any value. Empty (the default) groups jobs by client address.
+            cache_by: See ``DiskcacheManager``.
+            expire: See ``DiskcacheManager``.
+        """
+        self.result_ttl = result_ttl if result_ttl and result_ttl > 0 else None
+        self.max_workers = resolve_worker_count(max_workers)
+        self.user_header = user_header.lower()
+        super().__init__(cache, cache_by=cache_by, expire=expire)
+
+        self._cond = threading.Condition()
+        self._queues: "OrderedDict[str, Deque[_Job]]" = OrderedDict()  # Round-robin order of users
+        self._jobs: Dict[str, _Job] = {}      # Queued and running jobs by id
+        self._running: Dict[str, _Job] = {}
+        self._completed = 0
+        self._wait_times: Deque[float] = deque(maxlen=WAIT_TIME_SAMPLES)
+        self._scheduler: Optional[threading.Thread] = None
+
+    # --- Queue ---
+
+    def user_of(self, context: Any) -> str:
+        """Returns the user a job is accounted to: the configured header, else the client address."""
+        headers = (context or {}).get("headers") or {}
+        if self.user_header:
+            for name, value in headers.items():
+                if name.lower() == self.user_header and value:
+                    return str(value)
+        return (context or {}).get("remote") or ANONYMOUS_USER
+
+    def call_job_fn(self, key, job_fn, args, context):
+        """Queues a job and returns its id (used by Dash as the job handle)."""
+        job = _Job(job_id=uuid.uuid4().hex, user=self.user_of(context), key=key, job_fn=job_fn,
+                   args=args, context=context, submitted_at=time.monotonic())
+        with self._cond:
+            self._jobs[job.job_id] = job
+            self._queues.setdefault(job.user, deque()).append(job)
+            self._ensure_scheduler()
+            self._cond.notify()
+        logger.debug(f"Queued background job {job.job_id} for user {job.user}.")
+        return job.job_id
+
+    def _ensure_scheduler(self) -> None:
+        if self._scheduler is None or not self._scheduler.is_alive():
+            self._scheduler = threading.Thread(target=self._schedule_loop, name="background-job-scheduler",
+                                               daemon=True)
+            self._scheduler.start()
+
+    def _schedule_loop(self) -> None:
+        while True:
+            with self._cond:
+                self._reap_finished()
+                while self._queues and len(self._running) < self.max_workers:
+                    self._start(self._next_job())
+                self._cond.wait(SCHEDULER_POLL_SECONDS)
+
+    def _next_job(self) -> _Job:
+        """Takes the oldest job of the next user in round-robin order (caller holds the lock)."""
+        user, queue = next(iter(self._queues.items()))
+        job = queue.popleft()
+        if queue:
+            self._queues.move_to_end(user)
+        else:
+            del self._queues[user]
+        return job
+
+    def _start(self, job: _Job) -> None:
+        # pylint: disable-next=import-outside-toplevel
+        from multiprocess import Process
+
+        job.process = Process(target=job.job_fn,
+                              args=(job.key, self._make_progress_key(job.key), job.args, job.context))
+        try:
+            job.process.start()
+        except Exception as e:
+            logger.error(f"Could not start background job {job.job_id}: {e}")
+            self._jobs.pop(job.job_id, None)
+            self._completed += 1
+            # Same error entry Dash's job function writes, so the polling client gets a result
+            self.handle.set(job.key, {"background_callback_error": {
+                "msg": f"Could not start background job: {e}",
+                "tb": traceback.format_exc(),
+            }})
+            self._expire_entries(job)
+            return
+        job.started_at = time.monotonic()
+        self._wait_times.append(job.started_at - job.submitted_at)
+        self._running[job.job_id] = job
+
+    def _reap_finished(self) -> None:
+        for job_id, job in list(self._running.items()):
+            if not job.process.is_alive():
+                job.process.join(0)
+                del self._running[job_id]
+                self._jobs.pop(job_id, None)
+                self._completed += 1
+                self._expire_entries(job)
+
+    def _expire_entries(self, job: _Job) -> None:
+        """
+        Lets the cache entries a finished job wrote expire after ``result_ttl`` (unread ones included).
+
+        Results memoized with ``cache_by`` keep the manager's own ``expire`` (or no expiry), as
+        with ``DiskcacheManager``; only their progress and set_props entries get ``result_ttl``.
+        """
+        expiries = {}
+        if self.result_ttl is not None:
+            # Progress and set_props keys as written by Dash's job function
+            expiries[self._make_progress_key(job.key)] = self.result_ttl
+            expiries[self._make_set_props_key(job.key)] = self.result_ttl
+            if self.cache_by is None:
+                expiries[job.key] = self.result_ttl
+        if self.cache_by is not None and self.expire:
+            expiries[job.key] = self.expire
+        for key, expire in expiries.items():
+            try:
+                self.handle.touch(key, expire=expire)
+            except Exception as e:
+                logger.debug(f"Could not set expiry of cache entry {key}: {e}")
+
+    def _remove_queued(self, job: _Job) -> None:
+        queue = self._queues.get(job.user)
+        if queue is None:
+            return
+        try:
+            queue.remove(job)
+        except ValueError:
+            return
+        if not queue:
+            del self._queues[job.user]
+
+    # --- DiskcacheManager interface ---
+
+    def job_running(self, job):
+        """Queued jobs count as running, so the client keeps polling until they finish."""
+        with self._cond:
+            entry = self._jobs.get(str(job))
+            if entry is None:
+                return False
+            return entry.process is None or entry.process.is_alive()
+
+    def terminate_job(self, job):
+        """Drops a queued job or kills a running one (and its child processes)."""
+        if job is None:
+            return
+        with self._cond:
+            entry = self._jobs.pop(str(job), None)
+            if entry is None:
+                return
+            if entry.process is None:
+                self._remove_queued(entry)
+                logger.debug(f"Removed queued background job {entry.job_id}.")
+                return
+            self._running.pop(entry.job_id, None)
+            self._completed += 1
+            self._cond.notify()
+        if entry.process.pid is not None:
+            super().terminate_job(entry.process.pid)
+        entry.process.join(1)
+        self._expire_entries(entry)
+
+    def terminate_unhealthy_job(self, job):
+        with self._cond:
+            entry = self._jobs.get(str(job))
+        if entry is None or entry.process is None or entry.process.is_alive():
+            return False
+        self.terminate_job(job)
+        return True
+
+    # --- Metrics ---
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns queue depth metrics.
+
+        Returns:
+            Dict[str, Any]: 'backend', 'max_workers', 'running', 'queued', 'queued_by_user',
+                            'running_by_user', 'completed' and 'mean_wait_seconds' (over recent jobs).
+        """
+        with self._cond:
+            running_by_user: Dict[str, int] = {}
+            for job in self._running.values():
+                running_by_user[job.user] = running_by_user.get(job.user, 0) + 1
+            waits = list(self._wait_times)
+            return {
+                'backend': 'pool',
+                'max_workers': self.max_workers,
+                'running': len(self._running),
+                'queued': sum(len(q) for q in self._queues.values()),
+                'queued_by_user': {user: len(q) for user, q in self._queues.items()},
+                'running_by_user': running_by_user,
+                'completed': self._completed,
+                'mean_wait_seconds': sum(waits) / len(waits) if waits else 0.0,
+            }
+
+
+def create_background_callback_manager(cache_dir: str = "./cache", backend: Optional[str] = None):
+    """
+    Creates the background callback manager selected by the configuration.
+
+    Args:
+        cache_dir (str): Directory of the diskcache result backend.
+        backend (Optional[str]): 'pool' (queued worker pool) or 'diskcache' (Dash's
+                                 process-per-job manager). Defaults to ``config.JOB_QUEUE_BACKEND``.
+
+    Returns:
+        DiskcacheManager: The manager (``PooledJobManager`` for 'pool').
+    """
+    backend = (backend or getattr(config, 'JOB_QUEUE_BACKEND', 'pool')).lower()
+    cache = diskcache.Cache(cache_dir)
+    if backend == 'diskcache':
+        logger.info("Background callbacks: diskcache manager (one process per job).")
+        return DiskcacheManager(cache)
+    if backend != 'pool':
+        logger.warning(f"Unknown job queue backend '{backend}', using 'pool'.")
+
+    manager = PooledJobManager(cache,
+                               max_workers=getattr(config, 'JOB_WORKERS', 0),
+                               result_ttl=getattr(config, 'JOB_RESULT_TTL_SECONDS', 3600),
+                               user_header=getattr(config, 'JOB_USER_HEADER', ''))
+    logger.info(f"Background callbacks: job queue with {manager.max_workers} worker(s), "
+                f"result TTL {manager.result_ttl}s.")
+    return manager
@@ -0,0 +1,192 @@
+"""
+Downsampling of time series before they are turned into Plotly traces.
+
+A chart a thousand pixels wide cannot show more than a couple of points per
+pixel, so long daily or intraday histories are reduced with
+Largest-Triangle-Three-Buckets (LTTB) before figure construction. LTTB keeps
+the visual shape (spikes and turning points) of the line. Points that must be
+exact on the chart (trade dates, signals, drawdown troughs) are passed as
+``keep`` positions and are always part of the result.
+
+Example:
+    positions = select_positions(series.index, series.to_numpy(), max_points_for_width(1200),
+                                 keep=drawdown_trough_positions(series))
+    series = series.iloc[positions]
+"""
+
+import logging
+from typing import Any, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+POINTS_PER_PIXEL = 2          # LTTB output stays visually lossless at ~2 points per pixel
+DEFAULT_CHART_WIDTH_PX = 1200  # Used when the client did not report its width
+MIN_POINTS = 100
+
+
+def max_points_for_width(width_px: Optional[float]) -> int:
+    """Returns the number of points worth sending for a chart ``width_px`` pixels wide."""
+    try:
+        width = float(width_px) if width_px else DEFAULT_CHART_WIDTH_PX
+    except (TypeError, ValueError):
+        width = DEFAULT_CHART_WIDTH_PX
+    return max(MIN_POINTS, int(width * POINTS_PER_PIXEL))
+
+
+def lttb_positions(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Selects ``n_out`` points of a line with Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept. The points in between are split
+    into ``n_out - 2`` buckets and from each bucket the point forming the largest
+    triangle with the previously selected point and the average of the next
+    bucket is taken. NaN values are treated as gaps: they are never selected
+    unless the whole bucket is NaN.
+
+    Args:
+        x (np.ndarray): Monotonic x coordinates (e.g. ``DatetimeIndex.asi8``).
+        y (np.ndarray): Values.
+        n_out (int): Number of points to keep.
+
+    Returns:
+        np.ndarray: Sorted integer positions of the selected points.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    finite = np.isfinite(y)
+    y_filled = np.where(finite, y, 0.0)
+
+    # Bucket boundaries over the interior points 1 .. n-2
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    prev = 0
+    for b in range(n_out - 2):
+        start, stop = edges[b], max(edges[b + 1], edges[b] + 1)
+        next_start, next_stop = stop, (edges[b + 2] if b + 2 < len(edges) else n)
+        next_stop = max(next_stop, next_start + 1)
+        next_mask = finite[next_start:next_stop]
+        if next_mask.any():
+            avg_x = x[next_start:next_stop][next_mask].mean()
+            avg_y = y_filled[next_start:next_stop][next_mask].mean()
+        else:
+            avg_x, avg_y = x[min(next_start, n - 1)], y_filled[prev]
+
+        # Twice the triangle area (prev, candidate, next-bucket average)
+        area = np.abs((x[prev] - avg_x) * (y_filled[start:stop] - y_filled[prev])
+                      - (x[prev] - x[start:stop]) * (avg_y - y_filled[prev]))
+        area = np.where(finite[start:stop], area, -1.0)
+        prev = start + int(np.argmax(area))
+        selected[b + 1] = prev
+    return np.unique(selected)
+
+
+def select_positions(index: pd.Index,
+                     values: np.ndarray,
+                     max_points: Optional[int],
+                     keep: Optional[Sequence[int]] = None) -> np.ndarray:
+    """
+    Picks the positions of a series to plot: LTTB points plus the exact ``keep`` points.
+
+    Args:
+        index (pd.Index): Series index (datetime or numeric).
+        values (np.ndarray): Series values.
+        max_points (Optional[int]): Target number of points; None or a value
+                                    >= len(values) keeps every point.
+        keep (Optional[Sequence[int]]): Positions that must be kept.
+
+    Returns:
+        np.ndarray: Sorted unique integer positions.
+    """
+    n = len(values)
+    if not max_points or n <= max_points:
+        return np.arange(n)
+    keep = np.asarray(keep if keep is not None else [], dtype=np.int64)
+    keep = keep[(keep >= 0) & (keep < n)]
+    budget = max(3, int(max_points) - len(keep))
+    x = index.asi8 if isinstance(index, pd.DatetimeIndex) else np.arange(n)
+    return np.union1d(lttb_positions(x, np.asarray(values, dtype=np.float64), budget), keep)
+
+
+def downsample(series: pd.Series, max_points: Optional[int], keep: Optional[Sequence[int]] = None) -> pd.Series:
+    """Returns ``series`` reduced to about ``max_points`` points (see ``select_positions``)."""
+    if series is None or series.empty:
+        return series
+    return series.iloc[select_positions(series.index, series.to_numpy(dtype=np.float64, na_value=np.nan),
+                                        max_points, keep)]
+
+
+def drawdown_trough_positions(values: pd.Series, limit: Optional[int] = None) -> np.ndarray:
+    """
+    Returns the position of the deepest point of every drawdown episode.
+
+    An episode starts when the series falls below its running maximum and ends
+    at the next new high.
+
+    Args:
+        values (pd.Series): Portfolio (or benchmark) values.
+        limit (Optional[int]): Keep only the ``limit`` deepest troughs.
+
+    Returns:
+        np.ndarray: Sorted positions of the troughs.
+    """
+    if values is None or len(values) == 0:
+        return np.empty(0, dtype=np.int64)
+    v = values.to_numpy(dtype=np.float64, na_value=np.nan)
+    running_max = np.fmax.accumulate(v)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        drawdown = np.where(running_max > 0, v / running_max - 1.0, 0.0)
+    drawdown = np.nan_to_num(drawdown, nan=0.0)
+    episode = np.cumsum(drawdown >= 0)
+    underwater = drawdown < 0
+    if not underwater.any():
+        return np.empty(0, dtype=np.int64)
+    positions = np.flatnonzero(underwater)
+    frame = pd.DataFrame({'episode': episode[positions], 'drawdown': drawdown[positions], 'pos': positions})
+    troughs = frame.loc[frame.groupby('episode')['drawdown'].idxmin()]
+    if limit is not None and len(troughs) > limit:
+        troughs = troughs.nsmallest(limit, 'drawdown')
+    return np.sort(troughs['pos'].to_numpy(dtype=np.int64))
+
+
+def positions_of_dates(index: pd.Index, dates: Sequence[Any]) -> np.ndarray:
+    """Returns the positions of ``dates`` that are present in a DatetimeIndex."""
+    if len(dates) == 0 or not isinstance(index, pd.DatetimeIndex):
+        return np.empty(0, dtype=np.int64)
+    dates = pd.DatetimeIndex(pd.to_datetime(list(dates), errors='coerce')).dropna()
+    if index.tz is not None and dates.tz is None:
+        dates = dates.tz_localize(index.tz)
+    elif index.tz is None and dates.tz is not None:
+        dates = dates.tz_localize(None)
+    positions = index.get_indexer(dates)
+    return np.unique(positions[positions >= 0])
+
+
+def clip_to_range(obj, x_range: Optional[Tuple[Any, Any]]):
+    """
+    Slices a Series/DataFrame with a DatetimeIndex to a visible x range.
+
+    One point on each side of the range is kept, so lines run to the plot edges.
+    """
+    if obj is None or x_range is None or len(obj) == 0 or not isinstance(obj.index, pd.DatetimeIndex):
+        return obj
+    try:
+        lo, hi = pd.Timestamp(x_range[0]), pd.Timestamp(x_range[1])
+    except (TypeError, ValueError):
+        logger.warning(f"Ignoring invalid x range {x_range!r}.")
+        return obj
+    if obj.index.tz is not None:
+        lo = lo.tz_localize(obj.index.tz) if lo.tz is None else lo
+        hi = hi.tz_localize(obj.index.tz) if hi.tz is None else hi
+    first = max(0, obj.index.searchsorted(lo) - 1)
+    last = min(len(obj), obj.index.searchsorted(hi, side='right') + 1)
+    return obj.iloc[first:last]
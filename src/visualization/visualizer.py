@@ -28,6 +28,8 @@ except ImportError as e:
     def create_allocation_chart(*args, **kwargs): return html.Div("Chart Utils Error")
     def _create_base_layout(*args, **kwargs): return {}
 
+from .downsampling import clip_to_range, downsample, drawdown_trough_positions, positions_of_dates, select_positions
+
 
 class BacktestVisualizer:
     """
@@ -156,11 +158,30 @@ class BacktestVisualizer:
              return create_empty_chart("Error Generating Allocation Chart", height=height)
 
 
+    def _trough_dates(self, values: Optional[pd.Series], max_points: Optional[int]) -> pd.Index:
+        """Dates of the drawdown troughs that must stay exact after downsampling."""
+        if not max_points or values is None or len(values) <= max_points:
+            return pd.Index([])
+        return values.index[drawdown_trough_positions(values, limit=max(1, max_points // 4))]
+
+    def _reduce_series(self, series: Optional[pd.Series], max_points: Optional[int],
+                       x_range: Optional[Tuple[Any, Any]], keep_dates=()) -> Optional[pd.Series]:
+        """Clips a series to the visible range and downsamples it, keeping ``keep_dates`` exact."""
+        if series is None:
+            return None
+        series = clip_to_range(series, x_range)
+        if not max_points or len(series) <= max_points:
+            return series
+        return downsample(series, max_points, keep=positions_of_dates(series.index, keep_dates))
+
     def create_equity_curve_figure(self, 
                                   portfolio_values: pd.Series, 
                                   benchmark_values: Optional[pd.Series] = None,
                                   chart_type: str = "value",
-                                  initial_capital: float = 100000) -> go.Figure:
+                                  initial_capital: float = 100000,
+                                  max_points: Optional[int] = None,
+                                  x_range: Optional[Tuple[Any, Any]] = None,
+                                  drawdown_unit: str = "percent") -> go.Figure:
         """
         Create a portfolio performance chart figure.
         
@@ -169,6 +190,9 @@ class BacktestVisualizer:
             benchmark_values: Optional benchmark series
             chart_type: Type of chart to create ('value', 'returns', or 'drawdown')
             initial_capital: Initial portfolio capital
+            max_points: Downsample each line to about this many points (None keeps all)
+            x_range: Visible (start, end) dates; data outside is not sent
+            drawdown_unit: 'percent' (below the running peak, in %) or 'usd' (below the running peak, in $)
             
         Returns:
             go.Figure: Plotly figure object
@@ -190,12 +214,17 @@ class BacktestVisualizer:
             )
             return fig
 
+        # Drawdown troughs are located on the full history and kept exact in every chart type
+        portfolio_troughs = self._trough_dates(portfolio_values, max_points)
+        benchmark_troughs = self._trough_dates(benchmark_values, max_points)
+
         if chart_type == "value":
             # --- CORRECTED: Create Value chart figure directly --- 
+            plot_values = self._reduce_series(portfolio_values, max_points, x_range, portfolio_troughs)
             fig = go.Figure()
             fig.add_trace(go.Scatter(
-                x=portfolio_values.index, 
-                y=portfolio_values.values,
+                x=plot_values.index, 
+                y=plot_values.values,
                 mode='lines',
                 name='Portfolio',
                 line=dict(color=self.viz_cfg["colors"]["portfolio"], width=2)
@@ -203,9 +232,10 @@ class BacktestVisualizer:
             
             benchmark_name = f"Benchmark ({config.BENCHMARK_TICKER})" if config.BENCHMARK_TICKER else "Benchmark"
             if benchmark_values is not None and not benchmark_values.empty:
+                plot_benchmark = self._reduce_series(benchmark_values, max_points, x_range, benchmark_troughs)
                 fig.add_trace(go.Scatter(
-                    x=benchmark_values.index, 
-                    y=benchmark_values.values,
+                    x=plot_benchmark.index, 
+                    y=plot_benchmark.values,
                     mode='lines',
                     name=benchmark_name,
                     line=dict(color=self.viz_cfg["colors"]["benchmark"], width=2)
@@ -223,6 +253,7 @@ class BacktestVisualizer:
                 )
             )
             fig.update_layout(layout)
+            self._apply_x_range(fig, x_range)
             return fig
             
         elif chart_type == "returns":
@@ -234,6 +265,8 @@ class BacktestVisualizer:
             if benchmark_values is not None and not benchmark_values.empty:
                 bench_returns = benchmark_values.pct_change().fillna(0) * 100
                 benchmark_cum_returns = (1 + bench_returns / 100).cumprod() * 100 - 100
+            cumulative_returns = self._reduce_series(cumulative_returns, max_points, x_range, portfolio_troughs)
+            benchmark_cum_returns = self._reduce_series(benchmark_cum_returns, max_points, x_range, benchmark_troughs)
             
             # Create figure
             fig = go.Figure()
@@ -266,17 +299,22 @@ class BacktestVisualizer:
                 )
             )
             fig.update_layout(layout)
+            self._apply_x_range(fig, x_range)
             return fig
             
         elif chart_type == "drawdown":
-            # Calculate drawdowns
-            rolling_max = portfolio_values.cummax()
-            drawdowns = -((portfolio_values - rolling_max) / rolling_max) * 100
+            # Calculate drawdowns on the full history, before the lines are cut to x_range and downsampled
+            usd = drawdown_unit == "usd"
+            def _drawdown(values: pd.Series) -> pd.Series:
+                rolling_max = values.cummax()
+                return values - rolling_max if usd else -((values - rolling_max) / rolling_max) * 100
 
+            drawdowns = _drawdown(portfolio_values)
             benchmark_drawdowns = None
             if benchmark_values is not None and not benchmark_values.empty:
-                bench_rolling_max = benchmark_values.cummax()
-                benchmark_drawdowns = -((benchmark_values - bench_rolling_max) / bench_rolling_max) * 100
+                benchmark_drawdowns = _drawdown(benchmark_values)
+            drawdowns = self._reduce_series(drawdowns, max_points, x_range, portfolio_troughs)
+            benchmark_drawdowns = self._reduce_series(benchmark_drawdowns, max_points, x_range, benchmark_troughs)
 
             # Create figure
             fig = go.Figure()
@@ -315,19 +353,70 @@ class BacktestVisualizer:
                 height=300, # Keep drawdown height slightly smaller as per previous change
                 xaxis_title="Date",
                 yaxis=dict(
+                    title="Drawdown ($)",
+                    tickprefix="$",
+                    tickformat=",.0f"  # USD drawdowns are negative, so they already point down
+                ) if usd else dict(
                     title="Drawdown (%)",
                     ticksuffix="%",
                     autorange="reversed"  # Invert y-axis for better visualization
                 )
             )
             fig.update_layout(layout)
+            self._apply_x_range(fig, x_range)
             return fig
             
         else:
             # Default to value chart
             logger.warning(f"Unknown chart type: {chart_type}. Using value chart.")
             # Pass benchmark_values correctly to the recursive call
-            return self.create_equity_curve_figure(portfolio_values, benchmark_values, chart_type="value")
+            return self.create_equity_curve_figure(portfolio_values, benchmark_values, chart_type="value",
+                                                   max_points=max_points, x_range=x_range)
+
+    def create_live_equity_figure(self,
+                                  portfolio_values: Optional[pd.Series],
+                                  closed_trades: int = 0,
+                                  net_pnl: float = 0.0,
+                                  max_points: Optional[int] = None) -> go.Figure:
+        """
+        Create the compact equity chart shown while a backtest is still running.
+
+        Args:
+            portfolio_values: Equity points received so far
+            closed_trades: Number of trades closed so far
+            net_pnl: Net P&L of the closed trades
+            max_points: Downsample the line to about this many points
+
+        Returns:
+            go.Figure: Plotly figure object
+        """
+        if portfolio_values is None or portfolio_values.empty:
+            return create_empty_chart("Waiting for first results...", height=260)
+
+        values = downsample(portfolio_values, max_points,
+                            keep=drawdown_trough_positions(portfolio_values, limit=max_points // 4 if max_points else None))
+        fig = go.Figure(go.Scatter(
+            x=values.index,
+            y=values.values,
+            mode='lines',
+            name='Portfolio',
+            line=dict(color=self.viz_cfg["colors"]["portfolio"], width=2)
+        ))
+        layout = _create_base_layout(
+            title=f"Live equity: ${portfolio_values.iloc[-1]:,.0f} | {closed_trades} closed trades, net P&L ${net_pnl:,.0f}",
+            height=260,
+            margin=dict(t=40, l=60, r=20, b=30),
+            yaxis=dict(tickprefix="$", tickformat=",.0f")
+        )
+        fig.update_layout(layout)
+        fig.update_layout(showlegend=False)
+        return fig
+
+    @staticmethod
+    def _apply_x_range(fig: go.Figure, x_range: Optional[Tuple[Any, Any]]) -> None:
+        """Keeps a zoomed chart at its zoom after the figure is rebuilt for that range."""
+        if x_range is not None:
+            fig.update_xaxes(range=list(x_range), autorange=False)
 
     
     def create_monthly_returns_heatmap(self, portfolio_values: pd.Series) -> go.Figure:
@@ -466,7 +555,8 @@ class BacktestVisualizer:
             )
             return fig
     
-    def create_signals_chart(self, ticker: str, signals_df: pd.DataFrame, trades: List[Dict], indicators: Optional[Dict[str, pd.Series]] = None) -> go.Figure:
+    def create_signals_chart(self, ticker: str, signals_df: pd.DataFrame, trades: List[Dict], indicators: Optional[Dict[str, pd.Series]] = None,
+                             max_points: Optional[int] = None, x_range: Optional[Tuple[Any, Any]] = None) -> go.Figure:
         """
         Create a chart showing price data with signals and trades for a specific ticker.
         
@@ -474,6 +564,10 @@ class BacktestVisualizer:
             ticker: Ticker symbol
             signals_df: DataFrame with OHLCV data and signals
             trades: List of trades for this ticker
+            indicators: Optional indicator lines aligned with signals_df
+            max_points: Downsample the price and indicator lines to about this many points.
+                        Signal and trade dates are always kept.
+            x_range: Visible (start, end) dates; data outside is not sent
             
         Returns:
             go.Figure: Plotly figure object
@@ -499,6 +593,19 @@ class BacktestVisualizer:
             signals_df = signals_df.copy()
             signals_df.columns = [c.lower() for c in signals_df.columns]
 
+            # Markers are drawn from the full data; only the lines are thinned
+            signals_df = clip_to_range(signals_df, x_range)
+            line_df = signals_df
+            if max_points and len(signals_df) > max_points and 'close' in signals_df.columns:
+                keep_dates = []
+                if 'signal' in signals_df.columns:
+                    keep_dates.extend(signals_df.index[signals_df['signal'].fillna(0) != 0])
+                for trade in trades or []:
+                    keep_dates.extend(d for d in (trade.get('entry_date'), trade.get('exit_date')) if d is not None)
+                positions = select_positions(signals_df.index, signals_df['close'].to_numpy(dtype=np.float64, na_value=np.nan),
+                                             max_points, keep=positions_of_dates(signals_df.index, keep_dates))
+                line_df = signals_df.iloc[positions]
+
             # Create figure
             fig = go.Figure()
 
@@ -506,8 +613,8 @@ class BacktestVisualizer:
             if 'close' in signals_df.columns:
                 # Używamy małych liter dla nazw kolumn
                 fig.add_trace(go.Scatter(
-                    x=signals_df.index,
-                    y=signals_df['close'],
+                    x=line_df.index,
+                    y=line_df['close'],
                     mode='lines',
                     name='Price',
                     line=dict(color='#888888', width=1.5),
@@ -617,6 +724,10 @@ class BacktestVisualizer:
             if indicators:
                 for name, series in indicators.items():
                     if series is not None and not series.empty:
+                        # Indicator lines share the price line's points so they stay aligned
+                        if max_points or x_range is not None:
+                            series = series.reindex(line_df.index)
+
                         fig.add_trace(
                             go.Scatter(
                                 x=series.index,
@@ -645,6 +756,7 @@ class BacktestVisualizer:
                 xanchor="right",
                 x=1
             ))
+            self._apply_x_range(fig, x_range)
             return fig
 
         except Exception as e:
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("pandas_ta")
+pytest.importorskip("sklearn")
+
+from src.strategies.optimizer import StrategyOptimizer
+
+
+def test_surrogate_proposals_move_towards_optimum():
+    param_ranges = {'short_window': list(range(2, 42, 2)), 'long_window': list(range(50, 250, 10))}
+    grid = [{'short_window': s, 'long_window': l} for s in param_ranges['short_window'] for l in param_ranges['long_window']]
+    features = StrategyOptimizer._encode_param_grid(grid, param_ranges)
+    assert features.shape == (len(grid), 2) and features.min() == 0.0 and features.max() == 1.0
+
+    def objective(i):
+        return -np.sum((features[i] - np.array([0.7, 0.3])) ** 2)
+
+    rng = np.random.default_rng(0)
+    remaining = list(rng.permutation(len(grid)))
+    scores = {int(i): objective(i) for i in remaining[:8]}
+    scores[int(remaining[8])] = -np.inf  # failed backtest
+    remaining = remaining[9:]
+    for _ in range(4):
+        proposal = StrategyOptimizer._propose_candidates(features, scores, remaining, 4, rng)
+        assert len(set(proposal)) == 4 and set(proposal) <= set(remaining)
+        remaining = [i for i in remaining if i not in proposal]
+        scores.update({i: objective(i) for i in proposal})
+
+    best = max(scores, key=scores.get)
+    assert objective(best) > -0.01
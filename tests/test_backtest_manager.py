@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.backtest_manager import BacktestManager
+from src.core.data import DataLoader
+
+
+def test_prepare_data_keeps_only_warmup_and_window(tmp_path):
+    dates = pd.bdate_range('2021-01-04', periods=100)
+    rows = [(date, ticker, 1.0, 1.0, 1.0, 10.0 + i, 100) for ticker in ('AAA', 'BBB') for i, date in enumerate(dates)]
+    path = tmp_path / 'prices.csv'
+    pd.DataFrame(rows, columns=['Date', 'Ticker', 'Open', 'High', 'Low', 'Close', 'Volume']).to_csv(path, index=False)
+    manager = BacktestManager(initial_capital=100000, data_loader=DataLoader(path, use_price_store=False))
+
+    prepared = manager.prepare_data(['AAA', 'BBB'], str(dates[50].date()), str(dates[69].date()), warmup_bars=10)
+
+    pd.testing.assert_index_equal(prepared.dates, dates[50:70].as_unit('ns'), check_names=False) # Loaders normalize to ns
+    assert prepared.ticker_data['AAA'].index[0] == dates[40]
+    assert prepared.ticker_data['AAA'].index[-1] == dates[69]
+    np.testing.assert_array_equal(prepared.simulation_panel.close[:, 0], 10.0 + np.arange(50, 70))
+
+    full = manager.prepare_data(['AAA', 'BBB'], str(dates[50].date()), str(dates[69].date()))
+    assert len(full.ticker_data['AAA']) == len(dates)
+
+
+def test_sliced_window_simulation_matches_fresh_window(tmp_path):
+    rng = np.random.default_rng(5)
+    dates = pd.bdate_range('2021-01-04', periods=120)
+    rows = []
+    for ticker in ('AAA', 'BBB', 'SPY'):
+        close = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates))))
+        rows += [(date, ticker, c, c, c, c, 100) for date, c in zip(dates, close)]
+    path = tmp_path / 'prices.csv'
+    pd.DataFrame(rows, columns=['Date', 'Ticker', 'Open', 'High', 'Low', 'Close', 'Volume']).to_csv(path, index=False)
+    manager = BacktestManager(initial_capital=100000, data_loader=DataLoader(path, use_price_store=False))
+    risk = {'use_stop_loss': True, 'stop_loss_pct': 0.03, 'max_open_positions': 1}
+
+    full = manager.prepare_data(['AAA', 'BBB'])
+    signals = rng.choice([-1.0, 0.0, 0.0, 1.0], size=(2, len(full.dates), 2))
+    full_context = manager.build_simulation_context(full, risk)
+    load_benchmark = manager.data_loader.load_benchmark_data_df
+    manager.data_loader.load_benchmark_data_df = lambda: pytest.fail("slice_prepared must not load price data")
+    window, context = manager.slice_prepared(full, full_context, 30, 90)
+    manager.data_loader.load_benchmark_data_df = load_benchmark
+    sliced = manager.simulate_signals_batch(window, signals[:, 30:90], risk, context=context)
+
+    fresh = manager.prepare_data(['AAA', 'BBB'], str(dates[30].date()), str(dates[89].date()))
+    expected = manager.simulate_signals_batch(fresh, signals[:, 30:90], risk)
+
+    for (results, stats), (expected_results, expected_stats) in zip(sliced, expected):
+        pd.testing.assert_series_equal(results['Portfolio_Value'], expected_results['Portfolio_Value'])
+        pd.testing.assert_series_equal(results['Benchmark'], expected_results['Benchmark'])
+        assert results['trades'] == expected_results['trades']
+        assert stats['total_trades'] == expected_stats['total_trades'] > 0
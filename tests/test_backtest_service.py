@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pandas_ta")
+
+from src.core.config import config
+from src.core.result_cache import ResultCache
+from src.portfolio.trade_ledger import TradeLedger
+from src.services.backtest_service import BacktestService
+
+
+@pytest.fixture
+def price_data(tmp_path, monkeypatch):
+    """Random-walk prices for two tickers and the benchmark, set as the configured data file."""
+    rng = np.random.default_rng(11)
+    dates = pd.bdate_range('2021-01-04', periods=250)
+    rows = []
+    for ticker in ('AAA', 'BBB', 'SPY'):
+        close = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates))))
+        rows += [(date, ticker, c, c, c, c, 1000) for date, c in zip(dates, close)]
+    path = tmp_path / 'prices.csv'
+    pd.DataFrame(rows, columns=['Date', 'Ticker', 'Open', 'High', 'Low', 'Close', 'Volume']).to_csv(path, index=False)
+    monkeypatch.setattr(config, 'DATA_PATH', str(path))
+    monkeypatch.setattr(config, 'PROFILE_TRACE_PATH', None)
+    return dates
+
+
+def _service(root, max_bytes=64 * 1024 * 1024):
+    service = BacktestService()
+    service.run_store = ResultCache(root, max_bytes=max_bytes)
+    return service
+
+
+def _run(service, dates, window):
+    package = service.run_backtest('BB', ['AAA', 'BBB'], str(dates[30].date()), str(dates[-1].date()),
+                                   strategy_params={'window': window, 'num_std': 1.0})
+    assert package['success'], package.get('error')
+    return package
+
+
+def test_runs_are_stored_and_served_by_run_id(price_data, tmp_path):
+    root = tmp_path / 'runs'
+    service = _service(root)
+    package = _run(service, price_data, 20)
+    assert 'charts' not in package and package['trades_count'] > 0
+
+    run = service.get_run(package['run_id'])
+    ledger = run['results']['trades']
+    assert isinstance(ledger, TradeLedger) and len(ledger) == package['trades_count']
+    assert set(run['signals']) == {'AAA', 'BBB'}
+
+    # Column-wise ledger rows match the rows of the equivalent list of trade dicts
+    rows = service.get_trades_table_data(package['run_id'])
+    service.current_results = {'trades': ledger.to_records()}
+    assert rows == service.get_trades_table_data()
+    assert rows[0]['entry_date'] == pd.Timestamp(ledger.column('entry_date')[0]).strftime('%Y-%m-%d')
+
+    # Unknown IDs
+    assert service.get_run(None) is None
+    assert service.get_run('0' * 64) is None
+    assert service.get_trades_table_data('0' * 64) == []
+
+    # A second run that overflows the store budget evicts the older one for other processes
+    viewer = _service(root, max_bytes=int(1.5 * sum(p.stat().st_size for p in root.glob('*.npz'))))
+    service.run_store = viewer.run_store
+    newer = _run(service, price_data, 10)
+    assert viewer.get_run(package['run_id']) is None
+    assert viewer.get_trades_table_data(package['run_id']) == []
+    assert viewer.get_run(newer['run_id']) is not None
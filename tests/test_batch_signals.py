@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pandas_ta")
+
+from src.strategies.base import BaseStrategy
+from src.strategies.moving_average import MovingAverageStrategy
+from src.strategies.rsi import RSIStrategy
+from src.strategies.bollinger import BollingerBandsStrategy
+
+
+@pytest.fixture
+def ticker_data():
+    """Two tickers with different histories, aligned on a shared business-day index."""
+    rng = np.random.default_rng(3)
+    dates = pd.bdate_range('2021-01-04', periods=300)
+    data = {}
+    for ticker, start in (('AAA', 0), ('BBB', 40)):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates) - start)))
+        data[ticker] = pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': 1000},
+                                    index=pd.DatetimeIndex(dates[start:], name='Date'))
+    return data, dates
+
+
+@pytest.mark.parametrize('strategy_class, param_grid', [
+    (MovingAverageStrategy, [{'short_window': s, 'long_window': l} for s in (5, 10, 20) for l in (30, 50)]),
+    (RSIStrategy, [{'rsi_period': p, 'lower_bound': lo, 'upper_bound': 70} for p in (7, 14) for lo in (25, 30)]),
+    (BollingerBandsStrategy, [{'window': w, 'num_std': k} for w in (10, 20) for k in (1.0, 2.0)]),
+])
+def test_batch_matches_per_parameter_signals(ticker_data, strategy_class, param_grid):
+    data, dates = ticker_data
+    batched = strategy_class.generate_signals_batch(data, param_grid, dates)
+    looped = BaseStrategy.generate_signals_batch.__func__(strategy_class, data, param_grid, dates)
+
+    assert batched.shape == (len(param_grid), len(dates), len(data))
+    np.testing.assert_array_equal(batched, looped)
+    assert np.abs(batched).sum() > 0
+
+
+@pytest.mark.parametrize('strategy_class, param_grid', [
+    (MovingAverageStrategy, [{'short_window': 5, 'long_window': 30}, {'short_window': 10, 'long_window': 50}]),
+    (RSIStrategy, [{'rsi_period': 7}, {'rsi_period': 14, 'lower_bound': 25}]),
+    (BollingerBandsStrategy, [{'window': 10, 'num_std': 1.0}, {'window': 20}]),
+])
+def test_warmup_history_reproduces_full_history_signals(ticker_data, strategy_class, param_grid):
+    data, dates = ticker_data
+    window = dates[200:260]
+    warmup = strategy_class.grid_warmup_bars(param_grid)
+    sliced = {}
+    for ticker, df in data.items():
+        first = max(0, df.index.searchsorted(window[0]) - warmup)
+        sliced[ticker] = df.iloc[first:df.index.searchsorted(window[-1], side='right')]
+
+    full = strategy_class.generate_signals_batch(data, param_grid, window)
+    short = strategy_class.generate_signals_batch(sliced, param_grid, window)
+    np.testing.assert_array_equal(short, full)
@@ -0,0 +1,17 @@
+from benchmarks.compare import compare_results, format_comparison
+
+
+def _doc(**medians):
+    return {'results': {name: {'median': seconds, 'min': seconds} for name, seconds in medians.items()}}
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    baseline = _doc(a=1.0, b=1.0, c=1.0, tiny=0.0001, gone=0.5)
+    current = _doc(a=1.1, b=1.3, c=0.5, tiny=0.0009, new=0.2)
+
+    status = {row.name: row.status for row in compare_results(baseline, current, threshold=0.15)}
+
+    assert status == {'a': 'ok', 'b': 'regression', 'c': 'improvement', 'tiny': 'ok',
+                      'gone': 'missing', 'new': 'new'}
+    table = format_comparison(compare_results(baseline, current)).splitlines()
+    assert table[1].startswith('b ') and table[1].endswith('regression')
@@ -0,0 +1,79 @@
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.cancellation import CancellationToken
+from src.core.exceptions import BacktestCancelled
+from src.core.parallel import iter_chunk_results, make_chunks
+from src.core.simulation import build_simulation_panel, run_multi_scenario_simulation
+from src.portfolio.risk_manager import RiskManager
+
+
+def _slow_chunk(args):
+    token, chunk = args
+    for _ in range(100):
+        token.raise_if_cancelled()
+        time.sleep(0.01)
+    return chunk
+
+
+def test_pickled_token_sees_cancellation_through_marker(tmp_path):
+    token = CancellationToken(tmp_path / 'cancel')
+    copy = pickle.loads(pickle.dumps(token))
+    assert not copy.cancelled
+
+    token.cancel()
+    time.sleep(0.15)
+    with pytest.raises(BacktestCancelled):
+        copy.raise_if_cancelled()
+
+    token.reset()
+    assert not CancellationToken(tmp_path / 'cancel').cancelled
+
+
+@pytest.mark.parametrize('use_processes', [False, True])
+def test_dispatch_stops_within_a_second(tmp_path, use_processes):
+    token = CancellationToken(tmp_path / 'cancel')
+    chunks = [(token, chunk) for chunk in make_chunks(list(range(40)), 1)]
+    finished = []
+    start = time.monotonic()
+
+    with pytest.raises(BacktestCancelled):
+        for chunk, result, error in iter_chunk_results(_slow_chunk, chunks, n_workers=2, use_processes=use_processes,
+                                                       cancel_token=token):
+            finished.append(result)
+            token.cancel()
+
+    assert len(finished) < len(chunks)
+    # The first chunks take 1 s; the running ones stop at their next check
+    assert time.monotonic() - start < 2.0
+
+
+def test_simulation_loop_checks_token():
+    dates = pd.bdate_range('2022-01-03', periods=50)
+    panel = pd.DataFrame({('AAA', 'Close'): np.linspace(100, 120, len(dates))}, index=dates)
+    panel.columns = pd.MultiIndex.from_tuples(panel.columns)
+    sim_panel = build_simulation_panel(panel, {}, ['AAA'])
+    token = CancellationToken()
+    token.cancel()
+
+    with pytest.raises(BacktestCancelled):
+        run_multi_scenario_simulation(sim_panel, np.zeros((2, len(dates), 1)), RiskManager({}), {}, 100000,
+                                      cancel_token=token)
+    token.reset()
+
+
+def test_marker_is_removed_when_the_job_ends(tmp_path):
+    from src.services.backtest_service import BacktestService
+
+    token = CancellationToken(tmp_path / 'cancel')
+    token.cancel()
+    assert token.marker_path.exists()
+
+    result = BacktestService().run_backtest('MAC', [], '2020-01-01', '2020-12-31', cancel_token=token)
+    assert result['success'] is False
+    assert not token.marker_path.exists()
+    assert token.cancelled        # Still cancelled in this process until reset()
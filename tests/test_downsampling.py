@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+from src.visualization.downsampling import (
+    clip_to_range,
+    downsample,
+    drawdown_trough_positions,
+    lttb_positions,
+    positions_of_dates,
+)
+
+
+def _equity(n=20000, seed=5):
+    rng = np.random.default_rng(seed)
+    values = 100000 * np.exp(np.cumsum(rng.normal(0.0002, 0.01, n)))
+    return pd.Series(values, index=pd.date_range('1990-01-01', periods=n, freq='D'))
+
+
+def test_lttb_keeps_endpoints_and_extremes():
+    y = np.sin(np.linspace(0, 20, 5000))
+    y[1234] = 5.0
+    positions = lttb_positions(np.arange(len(y)), y, 200)
+
+    assert len(positions) == 200
+    assert positions[0] == 0 and positions[-1] == len(y) - 1
+    assert 1234 in positions
+    assert np.all(np.diff(positions) > 0)
+
+
+def test_downsample_keeps_requested_points_and_drawdown_troughs():
+    equity = _equity()
+    troughs = drawdown_trough_positions(equity, limit=100)
+    trade_dates = equity.index[[17, 4321, 15000]]
+    keep = np.union1d(troughs, positions_of_dates(equity.index, trade_dates))
+
+    reduced = downsample(equity, 2000, keep=keep)
+
+    assert len(reduced) <= 2000 + 1
+    assert reduced.index.isin(trade_dates).sum() == 3
+    deepest = (equity / equity.cummax() - 1).idxmin()
+    assert deepest in reduced.index
+    # Kept points carry their exact values
+    pd.testing.assert_series_equal(reduced, equity.loc[reduced.index])
+
+
+def test_short_series_and_zoom_range_are_not_thinned():
+    equity = _equity(n=500)
+    assert downsample(equity, 2000).equals(equity)
+
+    window = clip_to_range(equity, ('1990-03-01', '1990-04-01'))
+    assert window.index[0] < pd.Timestamp('1990-03-01') and window.index[-1] > pd.Timestamp('1990-04-01')
+    assert len(window) == 34
+
+
+def test_usd_drawdown_uses_running_peak_of_full_history():
+    from src.visualization.visualizer import BacktestVisualizer
+
+    equity = _equity()
+    x_range = ('2000-01-01', '2001-01-01')
+    fig = BacktestVisualizer().create_equity_curve_figure(equity, chart_type='drawdown', max_points=500,
+                                                          x_range=x_range, drawdown_unit='usd')
+
+    trace = fig.data[0]
+    expected = (equity - equity.cummax()).loc[pd.DatetimeIndex(trace.x)]
+    np.testing.assert_allclose(trace.y, expected.to_numpy())
+    assert pd.Timestamp(trace.x[0]) <= pd.Timestamp(x_range[0]) and pd.Timestamp(trace.x[-1]) >= pd.Timestamp(x_range[1])
+    assert len(trace.x) < len(equity) / 10
+    assert fig.layout.yaxis.tickprefix == '$'
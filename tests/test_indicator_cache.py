@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from src.core.indicator_cache import IndicatorCache
+
+
+def _close(seed=0, n=100):
+    rng = np.random.default_rng(seed)
+    return pd.Series(100 + rng.normal(0, 1, n).cumsum(), index=pd.bdate_range('2022-01-03', periods=n), name='Close')
+
+
+def test_each_distinct_indicator_is_computed_once():
+    cache = IndicatorCache(max_bytes=10 * 1024 * 1024)
+    close = _close()
+    calls = []
+
+    def sma(length):
+        calls.append(length)
+        return close.rolling(length).mean()
+
+    for short in range(2, 8):
+        for long in range(short + 1, 12):
+            cache.get_or_compute('AAPL', 'rolling_mean', {'window': short}, close, lambda: sma(short))
+            cache.get_or_compute('AAPL', 'rolling_mean', {'window': long}, close, lambda: sma(long))
+
+    assert sorted(calls) == list(range(2, 12))
+    stats = cache.stats()
+    assert stats['misses'] == 10
+    assert stats['hit_rate'] > 0.8
+
+    # Different data under the same ticker is a different entry
+    cache.get_or_compute('AAPL', 'rolling_mean', {'window': 2}, _close(seed=1), lambda: sma(2))
+    assert calls.count(2) == 2
+
+
+def test_lru_eviction_respects_memory_budget():
+    close = _close(n=100)
+    entry_bytes = close.memory_usage(index=False)
+    cache = IndicatorCache(max_bytes=2 * entry_bytes)
+
+    for window in (2, 3, 2, 4):  # 2 is touched again, so 3 is the least recently used
+        cache.get_or_compute('AAPL', 'rolling_mean', {'window': window}, close, lambda: close.rolling(window).mean())
+
+    keys = {key[2] for key in cache._entries}
+    assert keys == {(('window', 2),), (('window', 4),)}
+    assert cache.stats()['evictions'] == 1
+    assert cache.current_bytes <= cache.max_bytes
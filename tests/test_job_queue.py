@@ -0,0 +1,99 @@
+import time
+
+import diskcache
+
+from src.ui.job_queue import PooledJobManager
+
+
+def _sleep_job(seconds):
+    def job_fn(result_key, progress_key, args, context):
+        time.sleep(seconds)
+    return job_fn
+
+
+def test_queue_is_bounded_and_round_robin_across_users(tmp_path):
+    manager = PooledJobManager(diskcache.Cache(str(tmp_path)), max_workers=1, result_ttl=60,
+                               user_header="X-Forwarded-User")
+    job_fn = _sleep_job(0.3)
+    alice = [manager.call_job_fn(f"a{i}", job_fn, (), {"remote": "alice"}) for i in range(3)]
+    bob = manager.call_job_fn("b0", job_fn, (), {"headers": {"X-Forwarded-User": "bob"}, "remote": "proxy"})
+
+    time.sleep(0.15)
+    stats = manager.stats()
+    assert stats['running'] == 1 and stats['queued'] == 3
+    assert all(manager.job_running(job) for job in alice + [bob])
+
+    # Bob's single job runs before Alice's remaining ones
+    manager.terminate_job(alice[0])
+    time.sleep(0.2)
+    assert manager.stats()['running_by_user'] == {'bob': 1}
+
+    # Queued jobs can be dropped without ever starting
+    manager.terminate_job(alice[2])
+    assert not manager.job_running(alice[2])
+    deadline = time.monotonic() + 5
+    while manager.stats()['running'] or manager.stats()['queued']:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    assert manager.stats()['completed'] == 3
+
+
+def _result_job(result_key, progress_key, args, context):
+    import diskcache
+    diskcache.Cache(args).set(result_key, "done")
+
+
+def test_finished_job_entries_expire(tmp_path):
+    cache = diskcache.Cache(str(tmp_path))
+    manager = PooledJobManager(cache, max_workers=1, result_ttl=60)
+    manager.call_job_fn("r0", _result_job, str(tmp_path), {})
+
+    deadline = time.monotonic() + 5
+    while manager.stats()['completed'] < 1:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    value, expire_time = cache.get("r0", expire_time=True)
+    assert value == "done" and 0 < expire_time - time.time() <= 60
+
+
+def test_memoized_results_keep_their_own_expiry(tmp_path):
+    cache = diskcache.Cache(str(tmp_path))
+    manager = PooledJobManager(cache, max_workers=1, result_ttl=60, cache_by=[lambda: "v1"], expire=3600)
+    manager.call_job_fn("m0", _result_job, str(tmp_path), {})
+
+    deadline = time.monotonic() + 5
+    while manager.stats()['completed'] < 1:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    value, expire_time = cache.get("m0", expire_time=True)
+    assert value == "done" and 60 < expire_time - time.time() <= 3600
+
+
+def test_job_that_cannot_start_gets_an_error_result(tmp_path, monkeypatch):
+    import multiprocess
+
+    def fail_start(self):
+        raise OSError("no more processes")
+
+    monkeypatch.setattr(multiprocess.Process, 'start', fail_start)
+    manager = PooledJobManager(diskcache.Cache(str(tmp_path)), max_workers=1, result_ttl=60)
+    job = manager.call_job_fn("e0", _result_job, str(tmp_path), {})
+
+    deadline = time.monotonic() + 5
+    while manager.job_running(job):
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    assert manager.result_ready("e0")
+    assert "no more processes" in manager.get_result("e0", job)["background_callback_error"]["msg"]
+    assert manager.stats()['running'] == 0 and manager.stats()['queued'] == 0
+
+
+def test_user_header_is_ignored_unless_configured(tmp_path):
+    manager = PooledJobManager(diskcache.Cache(str(tmp_path)), max_workers=1)
+    spoofed = {"headers": {"X-Forwarded-User": "someone-else"}, "remote": "10.0.0.7"}
+    assert manager.user_of(spoofed) == "10.0.0.7"
+    assert manager.user_of({}) == "anonymous"
+
+    proxied = PooledJobManager(diskcache.Cache(str(tmp_path / "proxied")), max_workers=1,
+                               user_header="X-Forwarded-User")
+    assert proxied.user_of(spoofed) == "someone-else"
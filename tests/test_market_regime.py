@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.market_regime import (AllRegimes, DrawdownRegime, MovingAverageTrend, VolatilityRegime,
+                                    evaluate_regime, regime_filter_from_params)
+from src.portfolio.risk_manager import RiskManager
+
+
+@pytest.fixture
+def benchmark():
+    rng = np.random.default_rng(3)
+    dates = pd.bdate_range('2020-01-01', periods=300)
+    close = pd.Series(100 * np.cumprod(1 + rng.normal(0, 0.015, len(dates))), index=dates)
+    close.iloc[[50, 120]] = np.nan
+    return close
+
+
+def test_ma_trend_matches_close_vs_moving_average(benchmark):
+    dates = benchmark.index[100:]        # The lookback reaches back before the backtest window
+    favorable = evaluate_regime(MovingAverageTrend(lookback=20), benchmark, dates)
+
+    moving_average = benchmark.rolling(20).mean().ffill()
+    close, ma = benchmark[dates], moving_average[dates]
+    expected = close.isna() | ma.isna() | (close >= ma)
+    assert favorable.dtype == bool and len(favorable) == len(dates)
+    np.testing.assert_array_equal(favorable, expected.to_numpy())
+    assert favorable[dates.get_loc(benchmark.index[120])]   # Missing benchmark price: favorable
+
+
+def test_volatility_and_drawdown_regimes(benchmark):
+    dates = benchmark.index
+    returns = benchmark.ffill().pct_change()
+    volatility = returns.rolling(10).std() * np.sqrt(252)
+    calm = evaluate_regime(VolatilityRegime(lookback=10, max_volatility=0.22), benchmark, dates)
+    assert 0 < (~calm).sum() < len(dates)
+    np.testing.assert_array_equal(calm[volatility.notna() & benchmark.notna()],
+                                  (volatility <= 0.22)[volatility.notna() & benchmark.notna()])
+
+    drawdown = benchmark.ffill() / benchmark.ffill().cummax() - 1
+    shallow = evaluate_regime(DrawdownRegime(max_drawdown=0.05), benchmark, dates)
+    np.testing.assert_array_equal(shallow[benchmark.notna()], (drawdown >= -0.05)[benchmark.notna()])
+
+    both = evaluate_regime(AllRegimes([VolatilityRegime(10, 0.22), DrawdownRegime(0.05)]), benchmark, dates)
+    np.testing.assert_array_equal(both, calm & shallow)
+
+
+def test_regime_selection_from_risk_params():
+    risk_manager = RiskManager({'market_trend_lookback': 50})
+    assert regime_filter_from_params({}, risk_manager) == MovingAverageTrend(lookback=50)
+    combined = regime_filter_from_params({'market_filter_type': ['volatility', 'drawdown'], 'market_max_drawdown': 0.2})
+    assert combined == AllRegimes([VolatilityRegime(), DrawdownRegime(max_drawdown=0.2)])
+    with pytest.raises(ValueError):
+        regime_filter_from_params({'market_filter_type': 'moon_phase'})
@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analysis import metrics
+from src.analysis.metrics import PERFORMANCE_STAT_KEYS, EquityCurve, compute_performance_stats
+
+
+def _curves(seed=0, n=300):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range('2020-01-01', periods=n)
+    equity = pd.Series(100000 * np.cumprod(1 + rng.normal(0.0005, 0.01, n)), index=index)
+    benchmark = pd.Series(400 * np.cumprod(1 + rng.normal(0.0003, 0.01, n)), index=index)
+    return equity, benchmark
+
+
+def test_bundle_matches_per_metric_wrappers():
+    equity, benchmark = _curves()
+    stats = compute_performance_stats(equity, benchmark, risk_free_rate=0.02)
+
+    assert set(stats) == set(PERFORMANCE_STAT_KEYS)
+    assert stats['total_return'] == pytest.approx(metrics.calculate_total_return(equity))
+    assert stats['cagr'] == pytest.approx(metrics.calculate_cagr(equity))
+    assert stats['max_drawdown'] == pytest.approx(metrics.calculate_max_drawdown(equity))
+    assert stats['calmar_ratio'] == pytest.approx(metrics.calculate_calmar_ratio(equity))
+    assert stats['sharpe_ratio'] == pytest.approx(metrics.calculate_sharpe_ratio(equity, 0.02))
+    assert stats['sortino_ratio'] == pytest.approx(metrics.calculate_sortino_ratio(equity, 0.02))
+    assert stats['beta'] == pytest.approx(metrics.calculate_beta(equity, benchmark))
+    assert stats['alpha'] == pytest.approx(metrics.calculate_alpha(equity, benchmark, 0.02))
+    assert stats['information_ratio'] == pytest.approx(metrics.calculate_information_ratio(equity, benchmark))
+    returns = metrics.calculate_return_series(equity)
+    assert stats['annualized_volatility'] == pytest.approx(metrics.calculate_annualized_volatility(returns))
+    assert stats['annualized_volatility'] == pytest.approx(metrics.calculate_annualized_volatility(returns.dropna()))
+
+
+def test_bundle_values_against_reference_formulas():
+    equity, benchmark = _curves(seed=3)
+    stats = compute_performance_stats(equity, benchmark, risk_free_rate=0.0)
+
+    returns = equity.pct_change().dropna()
+    bench_returns = benchmark.pct_change().dropna()
+    years = (equity.index[-1] - equity.index[0]).days / 365.25
+    cagr = (equity.iloc[-1] / equity.iloc[0]) ** (1 / years) - 1
+    vol = returns.std() * np.sqrt(252)
+    drawdown = (equity / equity.cummax() - 1).min()
+
+    assert stats['cagr'] == pytest.approx(cagr)
+    assert stats['annualized_volatility'] == pytest.approx(vol)
+    assert stats['sharpe_ratio'] == pytest.approx(cagr / vol)
+    assert stats['max_drawdown'] == pytest.approx(drawdown)
+    assert stats['beta'] == pytest.approx(np.cov(returns, bench_returns)[0, 1] / bench_returns.var())
+    assert stats['max_drawdown_abs'] == pytest.approx((equity.cummax() - equity).max())
+    assert stats['recovery_factor'] == pytest.approx(abs(equity.iloc[-1] - equity.iloc[0]) / stats['max_drawdown_abs'])
+
+
+def test_volatility_wrapper_skips_leading_pct_change_nan():
+    equity, _ = _curves(seed=5, n=1006)
+    returns = equity.pct_change()
+
+    reference = returns.dropna().std() * np.sqrt(252)
+    assert metrics.calculate_annualized_volatility(returns) == pytest.approx(reference, rel=1e-12)
+    # Not the former result, which back-filled the NaN into a duplicate first return
+    backfilled = returns.bfill().std() * np.sqrt(252)
+    assert metrics.calculate_annualized_volatility(returns) != pytest.approx(backfilled, rel=1e-9)
+
+
+def test_cleaning_fills_gaps_like_pandas():
+    equity, _ = _curves(n=20)
+    equity.iloc[[0, 1, 7, 8, 19]] = np.nan
+    curve = EquityCurve.from_series(equity)
+    np.testing.assert_allclose(curve.values, equity.ffill().bfill().to_numpy())
+
+    assert EquityCurve.from_series(pd.Series([np.nan, np.nan])) is None
+    assert EquityCurve.from_series(pd.Series([1.0])) is None
+    assert EquityCurve.from_series(pd.Series(['1', 'x', '3'])).values.tolist() == [1.0, 1.0, 3.0]
+
+
+def test_benchmark_aligned_on_common_dates():
+    equity, benchmark = _curves(seed=5)
+    shifted = benchmark.iloc[40:]
+    stats = compute_performance_stats(equity, shifted)
+    common = equity.index.intersection(shifted.index)
+    assert stats['beta'] == pytest.approx(metrics.calculate_beta(equity[common], shifted[common]))
+    assert stats['alpha'] == pytest.approx(metrics.calculate_alpha(equity[common], shifted[common]))
+
+    flat = pd.Series(100.0, index=equity.index)
+    stats = compute_performance_stats(flat, equity)
+    assert stats['max_drawdown'] == 0 and stats['calmar_ratio'] == 0.0 and stats['sharpe_ratio'] == 0.0
+    assert stats['recovery_factor'] == 0.0 and stats['beta'] == pytest.approx(0.0)
+
+
+def test_invalid_equity_returns_empty_bundle():
+    stats = compute_performance_stats(pd.Series(dtype=float))
+    assert stats == dict.fromkeys(PERFORMANCE_STAT_KEYS)
+
+
+def test_batch_rows_match_single_curve_kernel():
+    rng = np.random.default_rng(7)
+    index = pd.bdate_range('2021-01-01', periods=120)
+    equity = 1000 * np.cumprod(1 + rng.normal(0.0004, 0.01, (6, len(index))), axis=1)
+    equity[1] = 1000.0                     # Flat curve: zero volatility and drawdown
+    equity[2, [0, 5, 6]] = np.nan          # Gaps are filled like the single-curve kernel
+    equity[3] = np.nan                     # Unusable curve
+    _, benchmark = _curves(seed=8, n=len(index) + 10)
+    benchmark.index = pd.bdate_range('2020-12-18', periods=len(benchmark))
+
+    table = metrics.compute_performance_stats_batch(equity, index, benchmark, risk_free_rate=0.02, initial_value=1000.0)
+
+    assert list(table.columns) == list(PERFORMANCE_STAT_KEYS) and len(table) == 6
+    assert table.loc[3].isna().all()
+    for k in (0, 1, 2, 4, 5):
+        expected = compute_performance_stats(pd.Series(equity[k], index=index), benchmark, 0.02, 1000.0)
+        for key, value in expected.items():
+            if value is None:
+                assert np.isnan(table.loc[k, key]), (k, key)
+            else:
+                assert table.loc[k, key] == pytest.approx(value), (k, key)
+
+
+def test_batch_rejects_mismatched_index():
+    with pytest.raises(ValueError):
+        metrics.compute_performance_stats_batch(np.ones((2, 5)), pd.bdate_range('2021-01-01', periods=4))
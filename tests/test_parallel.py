@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.backtest_manager import BacktestManager, SimulationContext
+from src.core.data import DataLoader
+from src.core.parallel import SharedPreparedData, chunk_size_for, iter_chunk_results, make_chunks
+
+
+def _square_chunk(chunk):
+    if 13 in chunk:
+        raise ValueError("bad chunk")
+    return [x * x for x in chunk]
+
+
+@pytest.mark.parametrize('use_processes', [False, True])
+def test_chunk_results_cover_every_item_once(use_processes):
+    chunks = make_chunks(list(range(40)), chunk_size_for(40, n_workers=2))
+    assert [x for chunk in chunks for x in chunk] == list(range(40))
+
+    squares, failed = {}, []
+    for chunk, result, error in iter_chunk_results(_square_chunk, chunks, n_workers=2,
+                                                   use_processes=use_processes, max_in_flight=3):
+        if error is not None:
+            failed.extend(chunk)
+            continue
+        squares.update(zip(chunk, result))
+
+    assert 13 in failed
+    assert sorted(list(squares) + failed) == list(range(40))
+    assert all(squares[x] == x * x for x in squares)
+
+
+def _is_mapped(values):
+    while values is not None and not isinstance(values, np.memmap):
+        values = values.base
+    return values is not None
+
+
+def test_shared_prepared_data_round_trip(tmp_path):
+    dates = pd.bdate_range('2021-01-04', periods=60)
+    ticker_data = {}
+    for k, ticker in enumerate(['AAA', 'BBB']):
+        close = np.linspace(10, 20, len(dates) - 5 * k)
+        ticker_data[ticker] = pd.DataFrame(
+            {'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close, 'Volume': np.arange(len(close))},
+            index=pd.DatetimeIndex(dates[5 * k:], name='Date'))
+    manager = BacktestManager(initial_capital=100000, data_loader=DataLoader(tmp_path / 'unused.csv'))
+    prepared = manager.prepare_ticker_data(ticker_data, dates[10], dates[50])
+
+    benchmark = pd.Series(np.linspace(1e5, 1.1e5, len(prepared.dates)), index=prepared.dates.rename('date'), name='Benchmark')
+    context = SimulationContext(market_favorable=np.arange(len(prepared.dates)) % 3 > 0, benchmark=benchmark)
+
+    with SharedPreparedData(prepared, context=context) as shared:
+        loaded = SharedPreparedData.load(shared.path)
+        loaded_context = SharedPreparedData.load_context(shared.path, loaded.dates)
+
+        assert loaded.tickers == prepared.tickers
+        pd.testing.assert_index_equal(loaded.dates, prepared.dates)
+        pd.testing.assert_index_equal(loaded.combined_index, prepared.combined_index)
+        pd.testing.assert_frame_equal(loaded.panel, prepared.panel, check_freq=False)
+        np.testing.assert_array_equal(loaded.simulation_panel.close, prepared.simulation_panel.close)
+        for ticker in prepared.tickers:
+            pd.testing.assert_frame_equal(loaded.ticker_data[ticker], prepared.ticker_data[ticker], check_freq=False)
+
+        pd.testing.assert_series_equal(loaded_context.benchmark, context.benchmark, check_freq=False)
+        np.testing.assert_array_equal(loaded_context.market_favorable, context.market_favorable)
+
+        # Frames and arrays are views of the memory-mapped files, not per-process copies
+        assert _is_mapped(loaded.simulation_panel.close)
+        assert _is_mapped(loaded.panel[('AAA', 'Close')].to_numpy())
+        assert _is_mapped(loaded.ticker_data['BBB']['Close'].to_numpy())
+    assert not shared.path.exists()
+
+
+def test_chunk_size_respects_memory_budget():
+    # 2520 days x 500 tickers of int8 signals is ~1.26 MB per parameter set
+    assert chunk_size_for(1000, n_workers=1) == 256
+    assert chunk_size_for(1000, n_workers=1, item_shape=(2520, 500), memory_budget=64 * 2520 * 500) == 64
+    assert chunk_size_for(1000, n_workers=8, item_shape=(2520, 500), memory_budget=10 * 2520 * 500) == 10
+    assert chunk_size_for(1000, n_workers=1, item_shape=(2520, 500), itemsize=8, memory_budget=1000) == 1
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.portfolio.portfolio_manager import PortfolioManager, Position
+from src.portfolio.position_book import PositionBook
+from src.portfolio.risk_manager import RiskManager
+
+RISK_CONFIG = {
+    'use_stop_loss': True, 'stop_loss_pct': 0.04,
+    'use_take_profit': True, 'profit_target_ratio': 2.0,
+    'use_trailing_stop': True,
+}
+
+
+def _position(ticker, price, direction=1, shares=10):
+    stop = price * (1 - 0.04 * direction)
+    take = price * (1 + 0.08 * direction)
+    return Position(ticker=ticker, entry_date=pd.Timestamp('2022-01-03'), entry_price=price, shares=shares,
+                    direction=direction, stop_loss_price=stop, take_profit_price=take, initial_stop_price=stop,
+                    use_trailing=True)
+
+
+def test_book_behaves_like_an_ordered_dict():
+    book = PositionBook(capacity=1)
+    for ticker, price in (('AAA', 10.0), ('BBB', 20.0), ('CCC', 30.0)):
+        book[ticker] = _position(ticker, price)
+    del book['AAA']
+    book['AAA'] = _position('AAA', 11.0)
+    book['BBB'] = _position('BBB', 21.0)       # Replacing keeps the place in the order
+
+    assert list(book) == ['BBB', 'CCC', 'AAA'] and len(book) == 3
+    assert 'AAA' in book and 'ZZZ' not in book
+    assert book['BBB'].entry_price == 21.0 and isinstance(book['BBB'].shares, int)
+    view = book['CCC']
+    view.stop_loss_price = 25.0
+    view.update_peak_prices(35.0)
+    assert book['CCC'].stop_loss_price == 25.0 and book['CCC'].highest_price_since_entry == 35.0
+    with pytest.raises(KeyError):
+        del book['ZZZ']
+    assert book.market_value(book.price_array({'BBB': 22.0})) == 10 * 22.0 + 10 * 30.0 + 10 * 11.0
+
+
+def _reference_update(positions, prices, risk_manager):
+    """The former per-position loop of update_positions_and_stops."""
+    exits = []
+    for ticker, position in positions.items():
+        price = prices[ticker]
+        position.update_peak_prices(price)
+        long = position.direction > 0
+        if (price <= position.stop_loss_price) if long else (price >= position.stop_loss_price):
+            exits.append((ticker, position.stop_loss_price, 'stop_loss'))
+        elif (price >= position.take_profit_price) if long else (price <= position.take_profit_price):
+            exits.append((ticker, position.take_profit_price, 'take_profit'))
+        else:
+            position.stop_loss_price = risk_manager.update_trailing_stop(
+                position.entry_price, position.highest_price_since_entry, position.lowest_price_since_entry,
+                position.stop_loss_price, position.direction)
+    for ticker, _, _ in exits:
+        del positions[ticker]
+    return exits
+
+
+def test_vectorized_stops_match_per_position_loop():
+    rng = np.random.default_rng(5)
+    tickers = [f"T{i}" for i in range(12)]
+    risk_manager = RiskManager(RISK_CONFIG)
+    pm = PortfolioManager(10**7, risk_manager)
+    reference = {}
+    for i, ticker in enumerate(tickers):
+        direction = 1 if i % 3 else -1
+        pm.positions[ticker] = _position(ticker, 100.0, direction)
+        reference[ticker] = _position(ticker, 100.0, direction)
+
+    prices = {ticker: 100.0 for ticker in tickers}
+    for day in pd.bdate_range('2022-01-04', periods=40):
+        prices = {ticker: price * (1 + rng.normal(0, 0.015)) for ticker, price in prices.items()}
+        expected = _reference_update(reference, prices, risk_manager)
+        before = len(pm.closed_trades)
+        pm.update_positions_and_stops(prices, day)
+
+        closed = pm.closed_trades[before:]
+        assert [(t['ticker'], t['exit_reason']) for t in closed] == [(t, r) for t, _, r in expected]
+        assert [t['exit_price'] for t in closed] == [level for _, level, _ in expected]  # No slippage
+        assert list(pm.positions) == list(reference)
+        for ticker, position in reference.items():
+            assert pm.positions[ticker].stop_loss_price == position.stop_loss_price
+            assert pm.positions[ticker].lowest_price_since_entry == position.lowest_price_since_entry
+    assert len(pm.closed_trades) > 0
@@ -0,0 +1,126 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.data import DataLoader, DataRegistry
+from src.core.price_store import PriceStore
+
+
+@pytest.fixture
+def price_csv(tmp_path):
+    """Small long-format price CSV with unsorted rows and mixed-case tickers."""
+    dates = pd.bdate_range('2021-01-04', periods=30)
+    rows = []
+    for k, ticker in enumerate(['MSFT', 'aapl', 'SPY']):
+        for i, date in enumerate(dates):
+            price = 100.0 + 10 * k + i
+            rows.append((date, ticker, price, price + 1, price - 1, price + 0.5, 1000 * (i + 1)))
+    df = pd.DataFrame(rows, columns=['Date', 'Ticker', 'Open', 'High', 'Low', 'Close', 'Volume'])
+    path = tmp_path / 'prices.csv'
+    df.sample(frac=1.0, random_state=0).to_csv(path, index=False)
+    return path
+
+
+def test_store_matches_csv_loader(price_csv):
+    csv_loader = DataLoader(price_csv, use_price_store=False)
+    store_loader = DataLoader(price_csv, use_price_store=True)
+
+    assert store_loader.get_available_tickers() == csv_loader.get_available_tickers() == ['AAPL', 'MSFT']
+    assert store_loader.get_date_range() == csv_loader.get_date_range()
+    for ticker in ['AAPL', 'MSFT', 'SPY']:
+        pd.testing.assert_frame_equal(store_loader.get_ticker_data(ticker), csv_loader.get_ticker_data(ticker))
+    assert store_loader.get_ticker_data('XYZ') is None
+
+
+@pytest.mark.parametrize('use_price_store', [False, True])
+def test_load_tickers_prepares_only_requested(price_csv, use_price_store):
+    loader = DataLoader(price_csv, use_price_store=use_price_store)
+    loaded = loader.load_tickers(['aapl', 'SPY', 'XYZ'])
+
+    assert list(loaded) == ['aapl', 'SPY']
+    assert sorted(loader._data_cache) == ['AAPL', 'SPY']
+    assert loaded['aapl'].index.is_monotonic_increasing
+    assert list(loaded['aapl'].columns) == ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def test_store_is_rebuilt_when_csv_changes(price_csv):
+    first = PriceStore.open_or_build(price_csv)
+    assert PriceStore.open_or_build(price_csv).path == first.path
+
+    df = pd.read_csv(price_csv)
+    df.loc[df['Ticker'] == 'MSFT', 'Close'] = 1.0
+    df.to_csv(price_csv, index=False)
+
+    second = PriceStore.open_or_build(price_csv)
+    assert second.path != first.path
+    assert not first.path.exists()
+    assert np.all(second.ticker_frame('MSFT')['Close'] == 1.0)
+
+
+def test_write_keeps_an_existing_store(price_csv, tmp_path):
+    frame = pd.read_csv(price_csv, parse_dates=['Date'])
+    path = tmp_path / 'store'
+    PriceStore.write(frame, path)
+    reader = PriceStore.open(path)
+    meta_inode = (path / 'meta.json').stat().st_ino
+
+    PriceStore.write(frame, path)                 # Concurrent build of the same contents
+    assert (path / 'meta.json').stat().st_ino == meta_inode
+    assert [p.name for p in tmp_path.iterdir() if '.tmp' in p.name] == []
+    pd.testing.assert_frame_equal(reader.ticker_frame('MSFT'), PriceStore.open(path).ticker_frame('MSFT'))
+
+    leftover = tmp_path / 'partial'
+    leftover.mkdir()
+    (leftover / 'Close.npy').write_bytes(b'')     # Interrupted build without meta.json
+    PriceStore.write(frame, leftover)
+    assert PriceStore.open(leftover).tickers == reader.tickers
+
+
+def test_shared_loader_reused_until_file_changes(price_csv):
+    registry = DataRegistry()
+    first = registry.get_loader(price_csv)
+    assert registry.get_loader(price_csv) is first
+    assert registry.stats() == {'hits': 1, 'misses': 1, 'reloads': 0, 'loaders': 1}
+
+    df = pd.read_csv(price_csv)
+    df.loc[df['Ticker'] == 'MSFT', 'Close'] = 1.0
+    df.to_csv(price_csv, index=False)
+
+    second = registry.get_loader(price_csv)
+    assert second is not first
+    assert registry.stats()['reloads'] == 1
+    assert np.all(second.get_ticker_data('MSFT')['Close'] == 1.0)
+    assert not np.all(first.get_ticker_data('MSFT')['Close'] == 1.0)
+
+
+def test_readers_served_during_slow_reload(price_csv, monkeypatch):
+    registry = DataRegistry()
+    first = registry.get_loader(price_csv)
+    pd.read_csv(price_csv).assign(Close=1.0).to_csv(price_csv, index=False)
+
+    started, release = threading.Event(), threading.Event()
+    prime = DataLoader._load_and_cache_full_data
+
+    def slow_prime(loader):
+        started.set()
+        assert release.wait(10)
+        return prime(loader)
+
+    monkeypatch.setattr(DataLoader, '_load_and_cache_full_data', slow_prime)
+    results = {}
+    reloader = threading.Thread(target=lambda: results.update(reloader=registry.get_loader(price_csv)))
+    reloader.start()
+    assert started.wait(10)
+
+    reader = threading.Thread(target=lambda: results.update(reader=registry.get_loader(price_csv)))
+    reader.start()
+    reader.join(5)
+    assert not reader.is_alive() and results['reader'] is first   # Stale snapshot, no waiting
+
+    release.set()
+    reloader.join(10)
+    assert results['reloader'] is not first
+    assert registry.get_loader(price_csv) is results['reloader']
+    assert registry.stats()['reloads'] == 1
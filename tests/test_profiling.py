@@ -0,0 +1,54 @@
+import json
+import time
+
+from src.core.profiling import NULL_PROFILER, RunProfiler
+
+
+def test_nested_phases_counters_and_trace_file(tmp_path):
+    trace = tmp_path / "trace.jsonl"
+    profiler = RunProfiler(label="run", trace_path=trace)
+    with profiler.phase("backtest"):
+        for _ in range(2):
+            with profiler.phase("signals"):
+                time.sleep(0.01)
+        profiler.count("orders", 3)
+        profiler.count("orders")
+    profiler.snapshot("done")
+
+    report = profiler.finish()
+    phases = {p['path']: p for p in report['phases']}
+    assert list(phases) == ["backtest", "backtest/signals"]
+    assert phases["backtest/signals"]['calls'] == 2
+    assert phases["backtest"]['seconds'] >= phases["backtest/signals"]['seconds'] >= 0.02
+    assert report['counters'] == {"orders": 4}
+    assert report['snapshots'][0]['label'] == "done"
+
+    lines = trace.read_text().splitlines()
+    assert len(lines) == 1 and json.loads(lines[0])['label'] == "run"
+    assert profiler.finish() is report  # Finishing twice does not write again
+    assert len(trace.read_text().splitlines()) == 1
+
+
+def test_allocation_tracking_and_null_profiler():
+    profiler = RunProfiler(track_allocations=True)
+    with profiler.phase("alloc"):
+        block = bytearray(4 * 2**20)
+    report = profiler.finish()
+    assert report['phases'][0]['peak_bytes'] >= 4 * 2**20
+    del block
+
+    with NULL_PROFILER.phase("anything"):
+        NULL_PROFILER.count("x")
+
+
+def test_service_stops_allocation_tracking_on_early_return(monkeypatch):
+    import tracemalloc
+
+    from src.core.config import config
+    from src.services.backtest_service import BacktestService
+
+    monkeypatch.setattr(config, 'PROFILE_ALLOCATIONS', True)
+    monkeypatch.setattr(config, 'PROFILE_TRACE_PATH', None)
+    result = BacktestService().run_backtest('MAC', [], '2020-01-01', '2020-12-31')
+    assert result['success'] is False
+    assert not tracemalloc.is_tracing()
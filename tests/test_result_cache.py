@@ -0,0 +1,67 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.core.result_cache import ResultCache, run_fingerprint
+
+
+def _run(seed=0, n=50):
+    rng = np.random.default_rng(seed)
+    index = pd.DatetimeIndex(pd.bdate_range('2022-01-03', periods=n), name='date')
+    results = {
+        'Portfolio_Value': pd.Series(100000 + rng.normal(0, 100, n).cumsum(), index=index, name='Portfolio'),
+        'Benchmark': pd.Series(100000 + rng.normal(0, 100, n).cumsum(), index=index, name='Benchmark'),
+        'trades': [
+            {'ticker': 'AAPL', 'entry_date': index[3], 'exit_date': index[9], 'entry_price': 10.5, 'shares': 12,
+             'net_pnl': -4.25, 'exit_reason': 'stop_loss', 'final_stop_price': None},
+            {'ticker': 'MSFT', 'entry_date': index[5], 'exit_date': index[20], 'entry_price': 20.0, 'shares': 3,
+             'net_pnl': 7.5, 'exit_reason': 'signal', 'final_stop_price': 19.0},
+        ],
+    }
+    signals = {'AAPL': pd.DataFrame({'Close': rng.random(n), 'Signal': rng.integers(-1, 2, n)}, index=index)}
+    stats = {'Total Return': 1.5, 'Sharpe Ratio': float('nan'), 'Recovery Factor': float('inf'), 'Alpha': None}
+    return results, stats, signals
+
+
+def test_round_trip_preserves_results(tmp_path):
+    cache = ResultCache(tmp_path, max_bytes=10 * 1024 * 1024)
+    results, stats, signals = _run()
+    key = run_fingerprint(strategy='MAC', params={'a': 1})
+
+    assert cache.get(key) is None
+    assert cache.put(key, results, stats)
+    assert cache.get(key, require_signals=True) is None
+    cache.put(key, results, stats, signals)
+
+    entry = cache.get(key, require_signals=True)
+    pd.testing.assert_series_equal(entry['results']['Portfolio_Value'], results['Portfolio_Value'], check_freq=False)
+    pd.testing.assert_series_equal(entry['results']['Benchmark'], results['Benchmark'], check_freq=False)
+    assert entry['results']['trades'] == results['trades']
+    pd.testing.assert_frame_equal(entry['signals']['AAPL'], signals['AAPL'], check_freq=False)
+    assert entry['stats']['Total Return'] == 1.5 and np.isnan(entry['stats']['Sharpe Ratio'])
+    assert entry['stats']['Recovery Factor'] == float('inf') and entry['stats']['Alpha'] is None
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 2
+
+
+def test_fingerprint_is_canonical():
+    assert run_fingerprint(a={'x': 1, 'y': 2}, b=[1]) == run_fingerprint(b=[1], a={'y': 2, 'x': 1})
+    assert run_fingerprint(a={'x': 1}) != run_fingerprint(a={'x': 2})
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    results, stats, _ = _run()
+    probe = ResultCache(tmp_path / 'probe', max_bytes=1 << 30)
+    probe.put('probe', results, stats)
+    entry_size = (tmp_path / 'probe' / 'probe.npz').stat().st_size
+
+    cache = ResultCache(tmp_path / 'cache', max_bytes=int(2.5 * entry_size))
+    cache.put('a', results, stats)
+    cache.put('b', results, stats)
+    for name, mtime in (('a', 1_000_000), ('b', 2_000_000)):
+        os.utime(tmp_path / 'cache' / f'{name}.npz', (mtime, mtime))
+    assert cache.get('a') is not None  # refreshes 'a', so 'b' is the oldest
+    cache.put('c', results, stats)
+
+    assert sorted(p.stem for p in (tmp_path / 'cache').glob('*.npz')) == ['a', 'c']
+    assert cache.stats()['evictions'] == 1
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.backtest_manager import BacktestManager
+from src.core.market_regime import MovingAverageTrend, evaluate_regime
+from src.core.simulation import build_simulation_panel, run_array_simulation, run_multi_scenario_simulation
+from src.portfolio.portfolio_manager import PortfolioManager
+from src.portfolio.risk_manager import RiskManager
+
+
+TICKERS = ['AAA', 'BBB', 'CCC', 'DDD']
+RISK_CONFIG = {
+    'use_stop_loss': True, 'stop_loss_pct': 0.05,
+    'use_take_profit': True, 'profit_target_ratio': 2.0,
+    'use_trailing_stop': True, 'max_open_positions': 2,
+}
+COSTS = {'commission_pct': 0.001, 'slippage_pct': 0.0005}
+
+
+def _new_rejection_counts():
+    return {key: 0 for key in ('insufficient_cash', 'risk_rejected_size', 'max_positions_reached',
+                               'position_exists', 'invalid_price', 'missing_data', 'market_filter', 'other')}
+
+
+@pytest.fixture
+def market():
+    """Synthetic (date x (ticker, field)) panel, per-ticker signals and a market filter series."""
+    rng = np.random.default_rng(7)
+    dates = pd.bdate_range('2022-01-03', periods=120)
+    columns = {}
+    all_signals = {}
+    for ticker in TICKERS:
+        close = pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates)))), index=dates)
+        close.iloc[rng.integers(0, len(dates), 3)] = np.nan  # gaps in the data
+        columns[(ticker, 'Close')] = close
+        all_signals[ticker] = pd.DataFrame({'Signal': rng.choice([-1.0, 0.0, 0.0, 1.0], len(dates))}, index=dates)
+    panel = pd.DataFrame(columns)
+    panel.columns = pd.MultiIndex.from_tuples(panel.columns)
+    spy_close = pd.Series(np.linspace(100, 110, len(dates)) + rng.normal(0, 2, len(dates)), index=dates)
+    spy_ma = spy_close.rolling(10).mean()
+    return panel, all_signals, spy_close, spy_ma
+
+
+@pytest.mark.parametrize('use_market_filter', [False, True])
+def test_array_simulation_matches_legacy_loop(market, use_market_filter):
+    panel, all_signals, spy_close, spy_ma = market
+    manager = BacktestManager(initial_capital=100000)
+    sim_panel = build_simulation_panel(panel, all_signals, TICKERS)
+    market_favorable = evaluate_regime(MovingAverageTrend(lookback=10), spy_close, sim_panel.dates) if use_market_filter else None
+
+    legacy_pm = PortfolioManager(100000, RiskManager(RISK_CONFIG), COSTS)
+    legacy_counts = _new_rejection_counts()
+    legacy_total = manager._run_legacy_loop(
+        panel.index, panel, TICKERS, all_signals, legacy_pm, legacy_counts,
+        market_favorable, None, 0, 0
+    )
+
+    array_pm = PortfolioManager(100000, RiskManager(RISK_CONFIG), COSTS)
+    array_counts = _new_rejection_counts()
+    array_total = run_array_simulation(sim_panel, array_pm, array_counts, market_favorable=market_favorable)
+
+    assert array_total == legacy_total
+    assert array_counts == legacy_counts
+    assert array_pm.closed_trades == legacy_pm.closed_trades
+    assert array_pm.portfolio_value_history == legacy_pm.portfolio_value_history
+    assert len(legacy_pm.closed_trades) > 0
+
+
+@pytest.mark.parametrize('risk_config', [RISK_CONFIG, {'max_position_size': 0.5}])
+def test_multi_scenario_simulation_matches_single_portfolios(market, risk_config):
+    panel, _, _, _ = market
+    sim_panel = build_simulation_panel(panel, {}, TICKERS)
+    rng = np.random.default_rng(11)
+    signal_tensor = rng.choice([-1.0, 0.0, 0.0, 0.0, 1.0], size=(6, sim_panel.n_days, len(TICKERS)))
+
+    scenarios = run_multi_scenario_simulation(sim_panel, signal_tensor, RiskManager(risk_config), COSTS, 100000)
+
+    for k in range(len(signal_tensor)):
+        pm = PortfolioManager(100000, RiskManager(risk_config), COSTS)
+        counts = _new_rejection_counts()
+        total = run_array_simulation(sim_panel.with_signals(signal_tensor[k]), pm, counts)
+        final_prices = {ticker: (panel[(ticker, 'Close')].iloc[-1] if pd.notna(panel[(ticker, 'Close')].iloc[-1])
+                                 else position.entry_price) for ticker, position in pm.positions.items()}
+        pm.close_all_positions(final_prices, sim_panel.dates[-1], reason="end_of_backtest")
+
+        assert scenarios.total_signals[k] == total
+        assert scenarios.rejected_counts_for(k) == counts
+        assert scenarios.trades_for(k) == pm.closed_trades
+        np.testing.assert_array_equal(scenarios.equity[k], [value for _, value in pm.portfolio_value_history])
+        assert scenarios.cash[k] == pm.cash
+
+
+def test_partial_results_batches_add_up_to_final_history(market):
+    panel, all_signals, _, _ = market
+    sim_panel = build_simulation_panel(panel, all_signals, TICKERS)
+    pm = PortfolioManager(100000, RiskManager(RISK_CONFIG), COSTS)
+    batches = []
+
+    run_array_simulation(sim_panel, pm, _new_rejection_counts(), partial_callback=batches.append)
+
+    assert len(batches) > 1
+    dates = [date for batch in batches for date in batch['dates']]
+    values = [value for batch in batches for value in batch['values']]
+    trades = [trade for batch in batches for trade in batch['trades']]
+    assert dates == [date.isoformat() for date, _ in pm.portfolio_value_history]
+    assert values == [value for _, value in pm.portfolio_value_history]
+    assert [(t['ticker'], t['net_pnl']) for t in trades] == [(t['ticker'], t['net_pnl']) for t in pm.closed_trades]
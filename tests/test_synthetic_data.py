@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+from src.core.data import DataLoader
+from src.core.synthetic_data import SyntheticMarketConfig, generate_synthetic_market, write_price_data
+
+
+def test_panel_is_valid_correlated_and_reproducible():
+    cfg = SyntheticMarketConfig(n_tickers=300, years=4, splits_per_year=0.5, late_listing_fraction=0.3)
+    market = generate_synthetic_market(cfg)
+    prices = market.prices
+
+    assert list(prices.columns) == ['Date', 'Ticker', 'Open', 'High', 'Low', 'Close', 'Volume']
+    assert prices[['Date', 'Ticker']].astype({'Ticker': str}).equals(
+        prices[['Date', 'Ticker']].astype({'Ticker': str}).sort_values(['Date', 'Ticker'], ignore_index=True))
+    assert (prices['High'] >= prices[['Open', 'Close']].max(axis=1)).all()
+    assert (prices['Low'] <= prices[['Open', 'Close']].min(axis=1)).all()
+    assert (prices['Low'] > 0).all()
+
+    # Ragged histories: late listings and missing days
+    rows_per_ticker = prices.groupby('Ticker', observed=True).size()
+    assert (rows_per_ticker < len(market.regimes)).mean() > 0.5
+    assert (rows_per_ticker < 0.9 * len(market.regimes)).sum() > 30
+
+    # Unadjusted splits: the close drops by about the split ratio on the split date
+    closes = prices.pivot(index='Date', columns='Ticker', values='Close')
+    split = market.splits.iloc[0]
+    series = closes[split['Ticker']].dropna()
+    position = series.index.get_indexer([split['Date']])[0]
+    if position > 0:
+        assert 0.5 * split['Ratio'] < series.iloc[position - 1] / series.iloc[position] < 2 * split['Ratio']
+
+    # The market factor correlates tickers (split days excluded)
+    returns = np.log(closes).diff()
+    returns = returns.where(returns.abs() < 0.3)
+    assert returns.corr().to_numpy()[np.triu_indices(300, 1)].mean() > 0.2
+    assert set(market.regimes.unique()) == {'calm', 'stress'}
+
+    again = generate_synthetic_market(cfg)
+    pd.testing.assert_frame_equal(again.prices, prices)
+
+
+def test_written_file_loads_identically_from_csv_and_store(tmp_path):
+    market = generate_synthetic_market(SyntheticMarketConfig(tickers=['SPY', 'AAA', 'BBB'], years=1))
+    csv_path = write_price_data(market.prices, tmp_path / "historical_prices.csv")
+    assert any((tmp_path / ".price_store").glob("historical_prices-*/meta.json"))
+
+    from_store = DataLoader(csv_path, use_price_store=True).load_tickers(['AAA', 'SPY'])
+    from_csv = DataLoader(csv_path, use_price_store=False).load_tickers(['AAA', 'SPY'])
+    for ticker in ('AAA', 'SPY'):
+        pd.testing.assert_frame_equal(from_store[ticker][['Open', 'Close', 'Volume']],
+                                      from_csv[ticker][['Open', 'Close', 'Volume']], check_dtype=False)
+
+
+def test_daily_volatility_sets_total_return_volatility():
+    cfg = SyntheticMarketConfig(n_tickers=400, years=4, stress_vol_multiplier=1.0, jump_probability=0.0,
+                                missing_day_probability=0.0, late_listing_fraction=0.0, splits_per_year=0.0)
+    market = generate_synthetic_market(cfg.with_daily_volatility(0.01))
+    closes = market.prices.pivot(index='Date', columns='Ticker', values='Close')
+    realized = np.log(closes).diff().std()
+    assert abs(np.sqrt((realized ** 2).mean()) - 0.01) < 0.0005
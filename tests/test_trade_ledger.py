@@ -0,0 +1,79 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analysis.metrics import calculate_trade_statistics
+from src.portfolio.trade_ledger import TRADE_SCHEMA, TradeLedger
+
+
+def _trade_dicts(n=50, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2021-01-01', periods=n + 10)
+    trades = []
+    for i in range(n):
+        entry, exit = dates[i], dates[i + int(rng.integers(1, 10))]
+        pnl = float(rng.normal(0, 100))
+        trades.append({
+            'ticker': f"T{i % 4}", 'entry_date': entry, 'exit_date': exit,
+            'entry_price': 10.0 + i, 'exit_price': 11.0 + i, 'shares': int(rng.integers(1, 100)), 'direction': 1,
+            'gross_pnl': pnl + 1.0, 'net_pnl': pnl, 'commission': 1.0, 'pnl_pct': pnl / 10,
+            'exit_reason': ('signal', 'stop_loss')[i % 2], 'holding_period_days': (exit - entry).days,
+            'initial_stop_price': 9.0, 'final_stop_price': 9.5 if i % 3 else None,
+        })
+    return trades
+
+
+def test_rows_round_trip_through_growing_buffers():
+    trades = _trade_dicts()
+    trades[3]['holding_period_days'] = None
+    ledger = TradeLedger(capacity=4)
+    for trade in trades:
+        ledger.record(**trade)
+
+    assert len(ledger) == len(trades) and ledger.capacity >= len(trades)
+    assert ledger == trades
+    assert ledger[3]['holding_period_days'] is None and ledger[-1] == trades[-1]
+    assert ledger[10:12] == trades[10:12]
+    assert list(ledger[0]) == list(TRADE_SCHEMA)
+    assert pickle.loads(pickle.dumps(ledger)) == ledger
+
+
+def test_bulk_append_and_select_match_row_appends():
+    trades = _trade_dicts(seed=1)
+    ledger = TradeLedger.from_records(trades)
+    frame = pd.DataFrame(trades)
+    bulk = TradeLedger()
+    bulk.append_columns(**{name: frame[name].to_numpy() for name in TRADE_SCHEMA})
+    assert bulk == ledger
+
+    picked = ledger.select(ledger.mask_for('ticker', 'T2'))
+    assert picked == [t for t in trades if t['ticker'] == 'T2']
+    assert len(ledger.select(ledger.mask_for('ticker', 'missing'))) == 0
+
+
+def test_frame_view_shares_buffers():
+    ledger = TradeLedger.from_records(_trade_dicts(seed=2))
+    frame = ledger.to_frame()
+
+    assert list(frame.columns) == list(TRADE_SCHEMA)
+    assert np.shares_memory(frame['net_pnl'].to_numpy(), ledger.column('net_pnl'))
+    assert isinstance(frame['ticker'].dtype, pd.CategoricalDtype)
+    assert frame['exit_date'].dtype == 'datetime64[ns]'
+    assert TradeLedger.from_frame(frame) == ledger
+
+
+def test_vectorized_statistics_match_dict_path():
+    trades = _trade_dicts(n=200, seed=3)
+    ledger = TradeLedger.from_records(trades)
+    from_ledger = calculate_trade_statistics(ledger)
+    from_dicts = calculate_trade_statistics(trades)
+
+    assert from_ledger.keys() == from_dicts.keys()
+    for key, value in from_dicts.items():
+        assert from_ledger[key] == pytest.approx(value), key
+    pnls = [t['net_pnl'] for t in trades]
+    assert from_ledger['total_pnl'] == pytest.approx(sum(pnls))
+    assert from_ledger['winning_trades'] == sum(p > 0 for p in pnls)
+    assert calculate_trade_statistics(TradeLedger())['total_trades'] == 0
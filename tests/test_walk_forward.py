@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pandas_ta")
+
+from src.core.backtest_manager import BacktestManager
+from src.core.data import DataLoader
+from src.core.result_cache import ResultCache
+from src.strategies.bollinger import BollingerBandsStrategy
+from src.strategies.optimizer import StrategyOptimizer
+
+PARAM_RANGES = {'window': [10, 20, 30], 'num_std': [1.0, 2.0]}
+RISK = {'use_stop_loss': True, 'stop_loss_pct': 0.05, 'max_open_positions': 2}
+
+
+@pytest.fixture
+def optimizer(tmp_path):
+    """Optimizer over a small random-walk market (two tickers plus the benchmark), without result caching."""
+    rng = np.random.default_rng(21)
+    dates = pd.bdate_range('2019-01-01', periods=800)
+    rows = []
+    for ticker in ('AAA', 'BBB', 'SPY'):
+        close = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates))))
+        rows += [(date, ticker, c, c, c, c, 1000) for date, c in zip(dates, close)]
+    path = tmp_path / 'prices.csv'
+    pd.DataFrame(rows, columns=['Date', 'Ticker', 'Open', 'High', 'Low', 'Close', 'Volume']).to_csv(path, index=False)
+    manager = BacktestManager(initial_capital=100000, data_loader=DataLoader(path, use_price_store=False))
+    return StrategyOptimizer(manager, result_cache=ResultCache(tmp_path / 'cache', max_bytes=0))
+
+
+def _walk_forward(optimizer, **kwargs):
+    return optimizer.optimize_walk_forward(BollingerBandsStrategy, PARAM_RANGES, ['AAA', 'BBB'], '2019-01-01', '2022-01-28',
+                                           window_size=252, step_size=126, risk_params=RISK, **kwargs)
+
+
+def test_incremental_out_of_sample_matches_standalone_backtests(optimizer):
+    incremental = _walk_forward(optimizer)
+    full = _walk_forward(optimizer, incremental=False)
+    assert incremental['summary']['windows_count'] == full['summary']['windows_count'] >= 4
+    assert [w['id'] for w in incremental['windows']] == [w['id'] for w in full['windows']]
+
+    # In-sample scores differ (slices of one continuous run), but out-of-sample windows are fresh
+    # portfolios: equal for the same chosen parameters, in both modes and in a standalone backtest
+    same_choice = 0
+    for k, window in enumerate(incremental['windows']):
+        params = incremental['best_params'][k]
+        standalone = optimizer._run_backtest_with_params(BollingerBandsStrategy, ['AAA', 'BBB'], window['out_sample_start'],
+                                                         window['out_sample_end'], params, RISK)
+        expected = optimizer._extract_metric(standalone, "Sharpe Ratio")
+        assert incremental['out_of_sample_metrics'][k] == pytest.approx(expected, rel=1e-9, abs=1e-12)
+        if full['best_params'][k] == params:
+            same_choice += 1
+            assert full['out_of_sample_metrics'][k] == pytest.approx(expected, rel=1e-9, abs=1e-12)
+    assert same_choice > 0
+
+
+def test_incremental_trade_metric_in_parallel(optimizer):
+    sequential = _walk_forward(optimizer, metric="Win Rate")
+    parallel = _walk_forward(optimizer, metric="Win Rate", n_jobs=2)
+
+    assert sequential['summary']['windows_count'] >= 4
+    assert parallel['best_params'] == sequential['best_params']
+    assert parallel['in_sample_metrics'] == pytest.approx(sequential['in_sample_metrics'])
+    assert parallel['out_of_sample_metrics'] == pytest.approx(sequential['out_of_sample_metrics'])
+    assert all(0 <= value <= 100 for value in sequential['in_sample_metrics'])